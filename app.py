@@ -1,26 +1,21 @@
 # app.py (Final Corrected Version)
-
-from tools.run_cpr_filter import run_cpr_filter
-from tools.run_cpr_filter_wide_band import run_cpr_filter_wide_band
-from run_analytics import run_analysis
-from tools.clean_data_dir import clean_generated_files
-from strategies import (
-    generate_continuation_strategies,
-    generate_reversal_strategies,
-    generate_reversal_strategies_v2
-)
-from option_strategies import (
-    generate_continuation_strategies_options,
-    generate_reversal_strategies_options,
-    generate_reversal_strategies_v2_options
-)
-from option_tools import execute_option_trades, execute_index_trades, run_option_analysis, run_option_backtest, run_combined_option_backtest
-from run_process_data import run_process_data
+# Step modules are imported inside the step functions when a step runs, so importing
+# app and single-step runs only pay for what they use (see tools/startup_budget.py).
+#
+# Command line (all options optional; without them the run_step_N flags below apply):
+#   python app.py --steps 10-11 --dates 0707-1107 --strategies rev_v1 --workers 4
+#   python app.py --steps 1,3,5-11 --dates '*07' --output reports/july
+#   python app.py --dry-run      print the planned per-date tasks and exit
+#   python app.py --profile profile --profile-hook cprofile   timing profile (tools/profiler.py)
+
+import argparse
+import contextlib
+import fnmatch
+import io
 import yaml
-import pandas as pd
 import os
+import shutil
 import traceback
-from tabulate import tabulate
 
 # --- Step Controllers ---
 # Control which steps of the backtesting pipeline to execute
@@ -37,6 +32,52 @@ run_step_9 = True          # Step 9: Process put option data (now combined with
 run_step_10 = True          # Step 10: Execute option trades (call & put) for Option
 run_step_11 = True  # Step 11: Generate comprehensive analytics reports
 
+STRATEGIES = ('cont', 'rev_v1', 'rev_v2')
+
+STEP_TITLES = {
+    0: 'Cleanup',
+    1: 'Process Raw Data',
+    2: 'Generate Index Continuation Signals',
+    3: 'Generate Index Reversal v1 Signals',
+    4: 'Generate Index Reversal v2 Signals',
+    5: 'Run CPR Filter',
+    6: 'Execute Trades',
+    7: 'Execute CPR-Filtered Trades',
+    8: 'Option Signals & Call Backtest',
+    9: 'Put Backtest',
+    10: 'Execute Trades for Call/Put Data',
+    11: 'Final Analytics Report',
+}
+
+# Index signal steps and the strategy each one generates
+INDEX_SIGNAL_STEPS = {2: 'cont', 3: 'rev_v1', 4: 'rev_v2'}
+
+# Index trades: (strategy, signal file, signal column, option side, output file), in execution order
+INDEX_TRADE_RUNS = [
+    ('rev_v1', 'tradeview_rev_output.csv', 'Call', 'Call', 'rev_v1_trades.csv'),
+    ('rev_v1', 'tradeview_rev_output.csv', 'Put', 'Put', 'rev_v1_trades.csv'),
+    ('rev_v2', 'tradeview_rev_output.csv', 'Call_v2', 'Call', 'rev_v2_trades.csv'),
+    ('rev_v2', 'tradeview_rev_output.csv', 'Put_v2', 'Put', 'rev_v2_trades.csv'),
+    ('cont', 'tradeview_cont_output.csv', 'Call', 'Call', 'cont_trades.csv'),
+    ('cont', 'tradeview_cont_output.csv', 'Put', 'Put', 'cont_trades.csv'),
+]
+
+# Option books: strategy -> (signal file key, backtest label, column suffix)
+OPTION_BOOKS = {
+    'cont': ('cont', 'Continuation Strategy', ''),
+    'rev_v1': ('rev', 'Reversal Strategy', ''),
+    'rev_v2': ('rev', 'Reversal Strategy v2', '_v2'),
+}
+BACKTEST_FILES = {'cont': 'backtest_results_cont.csv', 'rev_v1': 'backtest_results_rev.csv', 'rev_v2': 'backtest_results_rev_v2.csv'}
+
+# Trade files each trade step writes: (ledger book, folder under the date, file pattern)
+TRADE_OUTPUTS = {
+    6: [('index', 'trades', '{strategy}_trades.csv')],
+    7: [('index_crp', 'trades_crp', '{strategy}_trades.csv')],
+    10: [('call', os.path.join('call', 'trades'), 'call_{strategy}_trades.csv'),
+         ('put', os.path.join('put', 'trades'), 'put_{strategy}_trades.csv')],
+}
+
 def load_config():
     """Load configuration from config.yaml"""
     try:
@@ -46,24 +87,387 @@ def load_config():
         print(f"Error loading config.yaml: {e}")
         return None
 
-def main():
+# --- Command line and run plan ---
+
+def default_steps():
+    """Steps enabled by the run_step_N flags"""
+    flags = [run_cleanup, run_step_1, run_step_2, run_step_3, run_step_4, run_step_5,
+             run_step_6, run_step_7, run_step_8, run_step_9, run_step_10, run_step_11]
+    return [step for step, enabled in enumerate(flags) if enabled]
+
+def parse_steps(spec):
+    """'0-11', '6,7' or '1,3,5-11' -> sorted step numbers"""
+    steps = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            start, end = int(start or 0), int(end or max(STEP_TITLES))
+            if start > end:
+                raise ValueError(f"Step range '{part}' is reversed")
+            steps.update(range(start, end + 1))
+        else:
+            steps.add(int(part))
+    unknown = sorted(steps - set(STEP_TITLES))
+    if unknown:
+        raise ValueError(f"Unknown steps {unknown}; valid steps are 0-{max(STEP_TITLES)}")
+    return sorted(steps)
+
+def _date_key(date):
+    """DDMM -> (month, day) so ranges follow the calendar"""
+    return (int(date[2:4]), int(date[0:2])) if len(date) == 4 and date.isdigit() else (99, 99)
+
+def select_dates(dates, spec):
+    """
+    Filters DDMM folder names.
+
+    spec is a comma-separated list of dates ('0707'), inclusive calendar
+    ranges ('2406-0307') and globs ('*07' = every date in July). The input
+    order of dates is kept.
+    """
+    if not spec:
+        return list(dates)
+    selected = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if any(ch in part for ch in '*?['):
+            matches = fnmatch.filter(dates, part)
+        elif '-' in part:
+            start, end = (_date_key(d.strip()) for d in part.split('-', 1))
+            matches = [d for d in dates if start <= _date_key(d) <= end]
+        else:
+            matches = [part] if part in dates else []
+        if not matches:
+            print(f"⚠️ Date filter '{part}' matches no folder under the data directory")
+        selected.update(matches)
+    return [d for d in dates if d in selected]
+
+def parse_strategies(spec):
+    """'rev_v1,cont' -> strategies in pipeline order"""
+    if not spec:
+        return list(STRATEGIES)
+    requested = {s.strip() for s in spec.split(',') if s.strip()}
+    unknown = sorted(requested - set(STRATEGIES))
+    if unknown:
+        raise ValueError(f"Unknown strategies {unknown}; valid strategies are {', '.join(STRATEGIES)}")
+    return [s for s in STRATEGIES if s in requested]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Options scalping backtest pipeline")
+    parser.add_argument('--steps', default=None,
+                        help="Steps to run, e.g. '0-11', '6,7' or '1,3,5-11' (default: the run_step_N flags in app.py)")
+    parser.add_argument('--dates', default=None,
+                        help="DDMM dates, ranges and globs, e.g. '0707', '0707-1107', '*07' (default: every date folder)")
+    parser.add_argument('--strategies', default=None,
+                        help="Comma-separated subset of cont,rev_v1,rev_v2 (default: all)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Worker processes for the per-date tasks of each step (1 = run inline, 0 = one per CPU)")
+    parser.add_argument('--data-root', default='./data', help="Folder with the DDMM date folders")
+    parser.add_argument('--output', default='.', help="Folder for the final analytics report files")
+    parser.add_argument('--dry-run', action='store_true', help="Print the planned tasks and exit")
+    parser.add_argument('--profile', default=None, metavar='DIR',
+                        help="Record wall/CPU time, rows and peak memory per step, date and function to DIR/profile.json and profile_spans.csv")
+    parser.add_argument('--profile-hook', choices=['cprofile', 'sample'], default=None,
+                        help="With --profile: also run each task under cProfile (.prof) or the sampling profiler (.folded)")
+    return parser.parse_args(argv)
+
+def plan_run(steps, dates, strategies):
+    """
+    Per-step task list for this run.
+
+    Returns:
+        list: (step, dates) in execution order. Steps 0 and 11 run once in the
+        main process (dates lists the cleaned dates / is empty); every other
+        step runs one task per date.
+    """
+    plan = []
+    for step in steps:
+        if step in INDEX_SIGNAL_STEPS and INDEX_SIGNAL_STEPS[step] not in strategies:
+            continue
+        if step == 11:
+            plan.append((step, []))
+        else:
+            plan.append((step, list(dates)))
+    return plan
+
+def merge_index_signal_steps(plan):
+    """Steps 2-4 share one pass over each day's indicator file: fold them into one task per date"""
+    merged, index_strategies = [], [INDEX_SIGNAL_STEPS[step] for step, _ in plan if step in INDEX_SIGNAL_STEPS]
+    for step, dates in plan:
+        if step not in INDEX_SIGNAL_STEPS:
+            merged.append((step, dates, None))
+        elif not any(s in INDEX_SIGNAL_STEPS for s, _, _ in merged):
+            merged.append((step, dates, index_strategies))
+    return merged
+
+def invalidate_trade_outputs(step, dates, strategies, data_root, ledger_path):
+    """
+    Removes the trade files and ledger rows a trade step is about to rewrite.
+
+    Trade files and the ledger are append-only, so without this a partial
+    re-run (no cleanup step) would add its trades next to the old ones.
+    """
+    from tools.trade_sink import remove_ledger_rows
+
+    removed_files = 0
+    books = []
+    for book, folder, pattern in TRADE_OUTPUTS.get(step, []):
+        books.append(book)
+        for date in dates:
+            for strategy in strategies:
+                path = os.path.join(data_root, date, folder, pattern.format(strategy=strategy))
+                if os.path.exists(path):
+                    os.remove(path)
+                    removed_files += 1
+    removed_rows = remove_ledger_rows(ledger_path, dates, books, strategies) if books else 0
+    if removed_files or removed_rows:
+        print(f"  ♻️ Replacing previous results: {removed_files} trade files, {removed_rows} ledger rows")
+
+# --- Per-date step tasks ---
+
+def _read_csv(path, parse_datetime=False):
+    import pandas as pd
+    from tools.profiler import profile_span
+
+    with profile_span('read_csv', function='app._read_csv') as span:
+        df = pd.read_csv(path, encoding='utf-8-sig')
+        if parse_datetime:
+            df['datetime'] = pd.to_datetime(df['datetime'])
+        if span is not None:
+            span['rows'] = len(df)
+    return df
+
+def process_raw_data_for_date(date, ctx, sink):
+    from run_process_data import run_process_data
+    run_process_data(dates=[date], base_data_dir=ctx['data_root'])
+
+def generate_index_signals_for_date(date, ctx, sink):
+    from strategies.signal_engine import process_index_day
+    process_index_day(os.path.join(ctx['data_root'], date), ctx['index_strategies'])
+
+def apply_cpr_filter_for_date(date, ctx, sink):
+    from tools.run_cpr_filter import run_cpr_filter
+    from tools.run_cpr_filter_wide_band import run_cpr_filter_wide_band
+    import pandas as pd
+
+    print(f"\n--- Processing Date: {date} ---")
+    date_dir = os.path.join(ctx['data_root'], date)
+    price_data_file = os.path.join(date_dir, 'tradeview_utc.csv')
+    if not os.path.exists(price_data_file):
+        print(f"  - Skipping {date}, missing price data file.")
+        return
+
+    price_df = _read_csv(price_data_file)
+    daily_tc = price_df['Daily TC'].iloc[0]
+    daily_bc = price_df['Daily BC'].iloc[0]
+    cpr_width = daily_tc - daily_bc if pd.notna(daily_tc) and pd.notna(daily_bc) else 0
+    filter_func = run_cpr_filter_wide_band if cpr_width > 50 else run_cpr_filter
+    print(f"  Using {'wide' if cpr_width > 50 else 'standard'} band CPR filter (CPR width: {cpr_width:.2f})")
+
+    signal_files = []
+    if 'rev_v1' in ctx['strategies'] or 'rev_v2' in ctx['strategies']:
+        signal_files.append(('reversal', 'tradeview_rev_output.csv', ['Call', 'Put', 'Call_v2', 'Put_v2']))
+    if 'cont' in ctx['strategies']:
+        signal_files.append(('continuation', 'tradeview_cont_output.csv', ['Call', 'Put']))
+
+    for label, filename, columns in signal_files:
+        signals_file = os.path.join(date_dir, filename)
+        if not os.path.exists(signals_file):
+            print(f"  - Skipping {label} signals, file not found.")
+            continue
+        signals_df = _read_csv(signals_file)
+        # Dynamically create the trade type map based on existing columns
+        trade_type_map = {col: col.split('_')[0] for col in columns if col in signals_df.columns}
+        if not trade_type_map:
+            print(f"  - No {label} signal columns found to filter.")
+            continue
+        print(f"  - Applying CPR filter to {label} signals: {list(trade_type_map.keys())}")
+        filter_func(price_df.copy(), signals_df, trade_type_map).to_csv(signals_file, index=False)
+
+def _execute_index_trades(date, ctx, sink, column_suffix, trades_folder):
+    from option_tools import execute_index_trades
+
+    date_dir = os.path.join(ctx['data_root'], date)
+    calls_file = os.path.join(date_dir, 'call', 'call_out.csv')
+    puts_file = os.path.join(date_dir, 'put', 'put_out.csv')
+    if not all(os.path.exists(f) for f in [calls_file, puts_file]):
+        print(f"  - Skipping {date}, missing call/put data files.")
+        return
+
+    prices = {'Call': _read_csv(calls_file), 'Put': _read_csv(puts_file)}
+    signals = {}
+    trades_dir = os.path.join(date_dir, trades_folder)
+    for strategy, signals_filename, signal_col, trade_type, output_filename in INDEX_TRADE_RUNS:
+        if strategy not in ctx['strategies'] or (column_suffix and strategy == 'rev_v2'):
+            continue
+        signals_file = os.path.join(date_dir, signals_filename)
+        if signals_filename not in signals:
+            signals[signals_filename] = _read_csv(signals_file) if os.path.exists(signals_file) else None
+        signals_df = signals[signals_filename]
+        column = signal_col + column_suffix
+        if signals_df is not None and column in signals_df.columns:
+            execute_index_trades(signals_df.copy(), prices[trade_type].copy(), column, trade_type, ctx['config'],
+                                 trades_dir, output_filename, sink=sink)
+
+def execute_index_trades_for_date(date, ctx, sink):
+    _execute_index_trades(date, ctx, sink, '', 'trades')
+
+def execute_cpr_index_trades_for_date(date, ctx, sink):
+    # No v2 for CPR filtered for now
+    _execute_index_trades(date, ctx, sink, '_crp', 'trades_crp')
+
+def _option_files(date, ctx, option_type):
+    """Paths of the option price file and the signal files the selected books need"""
+    from strategies.signal_engine import OPTION_SIGNAL_FILES
+
+    date_dir = os.path.join(ctx['data_root'], date)
+    files = {
+        'calls': os.path.join(date_dir, 'call', 'call_out.csv'),
+        'puts': os.path.join(date_dir, 'put', 'put_out.csv'),
+    }
+    for strategy in ctx['strategies']:
+        key = OPTION_BOOKS[strategy][0]
+        files[key] = os.path.join(date_dir, OPTION_SIGNAL_FILES[option_type][key])
+    return files
+
+def _backtest_options(date, ctx, option_type):
+    from option_tools import run_option_backtests
+
+    files = _option_files(date, ctx, option_type)
+    if not all(os.path.exists(f) for f in files.values()):
+        print(f"  - Skipping {date}, missing one or more required files.")
+        return
+
+    print(f"\n--- Backtesting {option_type} Data for Date: {date} ---")
+    option_df = _read_csv(files['calls' if option_type == 'Call' else 'puts'], parse_datetime=True)
+    signals = {key: _read_csv(files[key], parse_datetime=True) for key in ('cont', 'rev') if key in files}
+    runs = [(signals[OPTION_BOOKS[s][0]], OPTION_BOOKS[s][1], option_type + OPTION_BOOKS[s][2]) for s in ctx['strategies']]
+    results = run_option_backtests(option_df, date, ctx['config'], option_type, runs)
+
+    backtest_dir = os.path.join(ctx['data_root'], date, option_type.lower(), 'backtest')
+    os.makedirs(backtest_dir, exist_ok=True)
+    import pandas as pd
+    for strategy, trades in zip(ctx['strategies'], results):
+        if trades:
+            pd.DataFrame(trades).to_csv(os.path.join(backtest_dir, BACKTEST_FILES[strategy]), index=False)
+
+def backtest_calls_for_date(date, ctx, sink):
+    from strategies.signal_engine import process_option_day, OPTION_SIGNAL_FILES
+
+    # Continuation, reversal v1 and v2 signals for call/put option files in one pass per file
+    date_dir = os.path.join(ctx['data_root'], date)
+    for option_type, option_files in OPTION_SIGNAL_FILES.items():
+        process_option_day(date_dir, option_type, ctx['strategies'], option_files)
+    _backtest_options(date, ctx, 'Call')
+
+def backtest_puts_for_date(date, ctx, sink):
+    _backtest_options(date, ctx, 'Put')
+
+def execute_option_trades_for_date(date, ctx, sink):
+    from option_tools import execute_option_trades
+
+    for option_type in ('Call', 'Put'):
+        files = _option_files(date, ctx, option_type)
+        if not all(os.path.exists(f) for f in files.values()):
+            print(f"  - Skipping {option_type} trades for {date}, missing files.")
+            continue
+        side = option_type.lower()
+        prices_df = _read_csv(files['calls' if option_type == 'Call' else 'puts'])
+        signals = {key: _read_csv(files[key]) for key in ('cont', 'rev') if key in files}
+        trades_dir = os.path.join(ctx['data_root'], date, side, 'trades')
+        # One trade file per strategy: {side}_cont / {side}_rev_v1 / {side}_rev_v2
+        for strategy in ctx['strategies']:
+            key, _, suffix = OPTION_BOOKS[strategy]
+            execute_option_trades(signals[key].copy(), prices_df.copy(), option_type + suffix, option_type, ctx['config'],
+                                  trades_dir, f"{side}_{strategy}_trades.csv", sink=sink)
+
+DATE_STEPS = {
+    1: process_raw_data_for_date,
+    2: generate_index_signals_for_date,
+    3: generate_index_signals_for_date,
+    4: generate_index_signals_for_date,
+    5: apply_cpr_filter_for_date,
+    6: execute_index_trades_for_date,
+    7: execute_cpr_index_trades_for_date,
+    8: backtest_calls_for_date,
+    9: backtest_puts_for_date,
+    10: execute_option_trades_for_date,
+}
+
+def run_date_task(task):
+    """
+    Runs one step for one date (in a worker process or inline).
+
+    Trade files are written by the task's own sink; ledger rows (and profile
+    spans from a worker) are returned so the main process records them in date order.
+
+    Returns:
+        tuple: (date, captured output or None, list of ledger DataFrames, list of profile spans)
+    """
+    step, date, ctx, capture = task
+    from tools.trade_sink import TradeSink
+    from tools.profiler import profile_task, profile_span, profile_hook
+
+    output = io.StringIO() if capture else None
+    hook_base = os.path.join(ctx['profile_dir'], 'hooks', f"step{step}_{date}") if ctx['profile_hook'] else None
+    with contextlib.redirect_stdout(output) if capture else contextlib.nullcontext(), \
+            profile_task(ctx['profile_dir'] is not None, step=step, date=date) as spans:
+        with profile_span('date_task', function=DATE_STEPS[step].__name__), profile_hook(ctx['profile_hook'], hook_base):
+            sink = TradeSink(collect_ledger=True)
+            try:
+                DATE_STEPS[step](date, ctx, sink)
+            except Exception as e:
+                print(f"  ✗ ERROR processing {date} in Step {step}: {str(e)}")
+                traceback.print_exc(file=output)
+            sink.close()
+    return date, output.getvalue() if capture else None, sink.ledger_rows, spans
+
+def run_step_tasks(step, dates, ctx, ledger_path, pool):
+    """Runs a step's per-date tasks and appends their ledger rows in date order"""
+    from tools.trade_sink import append_trades
+    from tools.profiler import active_profiler
+
+    tasks = [(step, date, ctx, pool is not None) for date in dates]
+    results = pool.map(run_date_task, tasks) if pool is not None else map(run_date_task, tasks)
+    for date, output, ledger_rows, spans in results:
+        if output:
+            print(output, end='')
+        for ledger_df in ledger_rows:
+            append_trades(ledger_path, ledger_df)
+        if spans and active_profiler() is not None:
+            active_profiler().spans.extend(spans)
+
+def main(argv=None):
     """
     Main function to run the complete backtesting pipeline.
     """
+    args = parse_args(argv)
+    try:
+        steps = parse_steps(args.steps) if args.steps else default_steps()
+        strategies = parse_strategies(args.strategies)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+
     config = load_config()
     if not config:
         print("Error: Could not load configuration. Exiting.")
         return
 
-    data_root = './data'
+    data_root = args.data_root
     if not os.path.exists(data_root):
         print(f"Error: Data directory '{data_root}' not found.")
         return
 
-    dates = sorted([d for d in os.listdir(data_root) if os.path.isdir(os.path.join(data_root, d))])
+    all_dates = sorted([d for d in os.listdir(data_root) if os.path.isdir(os.path.join(data_root, d))])
+    dates = select_dates(all_dates, args.dates)
 
     if not dates:
-        print("No date directories (DDMM) found in ./data folder.")
+        print(f"No date directories (DDMM) found in {data_root} folder.")
         return
 
     print(f"Found data for dates: {dates}")
@@ -71,326 +475,90 @@ def main():
     print(f"Last entry time: {config['LAST_ENTRY_TIME']}")
     print("Trade execution parameters loaded from option_tools/trade_config.yaml")
 
-    if run_cleanup:
-        print("\n--- Running Step 0: Cleanup ---")
-        clean_generated_files()
-        print("Cleanup finished.\n")
-
-    if run_step_1:
-        print("\n--- Running Step 1: Process Raw Data ---")
-        run_process_data()
-        print("Step 1 finished.\n")
-
-    if run_step_2:
-        print("\n--- Running Step 2: Generate Continuation Signals ---")
-        generate_continuation_strategies()
-        print("Step 2 finished.\n")
-
-    if run_step_3:
-        print("\n--- Running Step 3: Generate First Reversal Signals ---")
-        generate_reversal_strategies()
-        print("Step 3 finished.\n")
-
-    if run_step_4:
-        print("\n--- Running Step 4: Generate Second Reversal Signals ---")
-        generate_reversal_strategies_v2()
-        print("Step 4 finished.\n")
-
+    plan = merge_index_signal_steps(plan_run(steps, dates, strategies))
+    print(f"Planned steps: {', '.join(str(step) for step, _, _ in plan) or 'none'} | strategies: {', '.join(strategies)}")
+    if args.dry_run:
+        for step, step_dates, index_strategies in plan:
+            scope = 'once' if step == 11 else f"{len(step_dates)} date tasks"
+            detail = f" ({', '.join(index_strategies)})" if index_strategies else ''
+            print(f"  Step {step}: {STEP_TITLES[step]}{detail} - {scope}")
+        return
 
-    if run_step_5:
-        print("\n--- Running Step 5: Run CPR Filter ---")
-        for date in dates:
-            print(f"\n--- Processing Date: {date} ---")
-            try:
-                price_data_file = f"./data/{date}/tradeview_utc.csv"
-                if not os.path.exists(price_data_file):
-                    print(f"  - Skipping {date}, missing price data file.")
-                    continue
-
-                price_df = pd.read_csv(price_data_file, encoding='utf-8-sig')
-                daily_tc = price_df['Daily TC'].iloc[0]
-                daily_bc = price_df['Daily BC'].iloc[0]
-                cpr_width = daily_tc - daily_bc if pd.notna(daily_tc) and pd.notna(daily_bc) else 0
-                filter_func = run_cpr_filter_wide_band if cpr_width > 50 else run_cpr_filter
-                print(f"  Using {'wide' if cpr_width > 50 else 'standard'} band CPR filter (CPR width: {cpr_width:.2f})")
-
-                # --- Process Reversal Signals ---
-                rev_signals_file = f"./data/{date}/tradeview_rev_output.csv"
-                if os.path.exists(rev_signals_file):
-                    rev_signals_df = pd.read_csv(rev_signals_file, encoding='utf-8-sig')
-                    
-                    # Dynamically create the trade type map based on existing columns
-                    trade_type_map_rev = {}
-                    if 'Call' in rev_signals_df.columns: trade_type_map_rev['Call'] = 'Call'
-                    if 'Put' in rev_signals_df.columns: trade_type_map_rev['Put'] = 'Put'
-                    if 'Call_v2' in rev_signals_df.columns: trade_type_map_rev['Call_v2'] = 'Call'
-                    if 'Put_v2' in rev_signals_df.columns: trade_type_map_rev['Put_v2'] = 'Put'
-
-                    if trade_type_map_rev:
-                        print(f"  - Applying CPR filter to reversal signals: {list(trade_type_map_rev.keys())}")
-                        rev_signals_df_filtered = filter_func(price_df.copy(), rev_signals_df, trade_type_map_rev)
-                        rev_signals_df_filtered.to_csv(rev_signals_file, index=False)
-                    else:
-                        print("  - No reversal signal columns found to filter.")
+    from tools.trade_sink import LEDGER_FILENAME
+    # Executors queue their results in a per-task trade sink; the main process
+    # appends the returned ledger rows in date order (same ledger for any worker count).
+    ledger_path = os.path.join(data_root, LEDGER_FILENAME)
+    ctx = {
+        'config': config, 'data_root': data_root, 'strategies': strategies, 'index_strategies': [],
+        'profile_dir': args.profile, 'profile_hook': args.profile_hook if args.profile else None,
+    }
+    date_filtered = args.dates is not None
+    workers = args.workers if args.workers != 0 else os.cpu_count()
+
+    from tools.profiler import enable_profiling, disable_profiling, active_profiler, profile_span, profile_hook, worker_cpu_s
+    if args.profile:
+        enable_profiling()
+        if ctx['profile_hook']:
+            # Hook files of earlier runs would otherwise be merged into this run's profile
+            shutil.rmtree(os.path.join(args.profile, 'hooks'), ignore_errors=True)
+
+    pool = None
+    if workers and workers > 1 and len(dates) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        for step, step_dates, index_strategies in plan:
+            title = "Steps 2-4" if index_strategies else f"Step {step}"
+            with profile_span('step', function='Generate Index Signals' if index_strategies else STEP_TITLES[step], step=step) as step_span:
+                if step == 0:
+                    print("\n--- Running Step 0: Cleanup ---")
+                    from tools.clean_data_dir import clean_generated_files
+                    clean_generated_files(dates=step_dates if date_filtered else None, base_data_dir=data_root)
+                    print("Cleanup finished.\n")
+                elif step == 11:
+                    print("\n--- Running Step 11: Final Analytics Report ---")
+                    from run_analytics import run_analysis
+                    hook_base = os.path.join(args.profile, 'hooks', 'step11') if ctx['profile_hook'] else None
+                    with profile_hook(ctx['profile_hook'], hook_base):
+                        run_analysis(data_root, output_dir=args.output)
+                    print("Step 11 finished.\n")
                 else:
-                    print(f"  - Skipping reversal signals, file not found.")
-
-                # --- Process Continuation Signals ---
-                cont_signals_file = f"./data/{date}/tradeview_cont_output.csv"
-                if os.path.exists(cont_signals_file):
-                    cont_signals_df = pd.read_csv(cont_signals_file, encoding='utf-8-sig')
-                    
-                    # Dynamically create the trade type map
-                    trade_type_map_cont = {}
-                    if 'Call' in cont_signals_df.columns: trade_type_map_cont['Call'] = 'Call'
-                    if 'Put' in cont_signals_df.columns: trade_type_map_cont['Put'] = 'Put'
-
-                    if trade_type_map_cont:
-                        print(f"  - Applying CPR filter to continuation signals: {list(trade_type_map_cont.keys())}")
-                        cont_signals_df_filtered = filter_func(price_df.copy(), cont_signals_df, trade_type_map_cont)
-                        cont_signals_df_filtered.to_csv(cont_signals_file, index=False)
+                    if index_strategies:
+                        print(f"\n--- Running Steps 2-4: Generate Index Signals ({', '.join(index_strategies)}) ---")
+                        ctx = dict(ctx, index_strategies=index_strategies)
                     else:
-                        print("  - No continuation signal columns found to filter.")
-                else:
-                    print(f"  - Skipping continuation signals, file not found.")
-
-            except Exception as e:
-                print(f"  ✗ ERROR processing {date} in Step 5: {str(e)}")
-                traceback.print_exc()
-        print("\nStep 5 finished.\n")
-
-    if run_step_6:
-        print("\n--- Running Step 6: Execute Trades ---")
-        for date in dates:
-            trades_dir = f"./data/{date}/trades"
-            try:
-                calls_file = f"./data/{date}/call/call_out.csv"
-                puts_file = f"./data/{date}/put/put_out.csv"
-
-                if not all(os.path.exists(f) for f in [calls_file, puts_file]):
-                    print(f"  - Skipping {date}, missing call/put data files.")
-                    continue
-                
-                calls_df = pd.read_csv(calls_file, encoding='utf-8-sig')
-                puts_df = pd.read_csv(puts_file, encoding='utf-8-sig')
-
-                # --- Execute Reversal Trades ---
-                rev_signals_file = f"./data/{date}/tradeview_rev_output.csv"
-                if os.path.exists(rev_signals_file):
-                    rev_signals_df = pd.read_csv(rev_signals_file, encoding='utf-8-sig')
-                    if 'Call' in rev_signals_df.columns:
-                        execute_index_trades(rev_signals_df.copy(), calls_df.copy(), 'Call', 'Call', config, trades_dir, 'rev_v1_trades.csv')
-                    if 'Put' in rev_signals_df.columns:
-                        execute_index_trades(rev_signals_df.copy(), puts_df.copy(), 'Put', 'Put', config, trades_dir, 'rev_v1_trades.csv')
-                    if 'Call_v2' in rev_signals_df.columns:
-                        execute_index_trades(rev_signals_df.copy(), calls_df.copy(), 'Call_v2', 'Call', config, trades_dir, 'rev_v2_trades.csv')
-                    if 'Put_v2' in rev_signals_df.columns:
-                        execute_index_trades(rev_signals_df.copy(), puts_df.copy(), 'Put_v2', 'Put', config, trades_dir, 'rev_v2_trades.csv')
-
-                # --- Execute Continuation Trades ---
-                cont_signals_file = f"./data/{date}/tradeview_cont_output.csv"
-                if os.path.exists(cont_signals_file):
-                    cont_signals_df = pd.read_csv(cont_signals_file, encoding='utf-8-sig')
-                    if 'Call' in cont_signals_df.columns:
-                        execute_index_trades(cont_signals_df.copy(), calls_df.copy(), 'Call', 'Call', config, trades_dir, 'cont_trades.csv')
-                    if 'Put' in cont_signals_df.columns:
-                        execute_index_trades(cont_signals_df.copy(), puts_df.copy(), 'Put', 'Put', config, trades_dir, 'cont_trades.csv')
-
-            except Exception as e:
-                print(f"  ✗ ERROR processing {date} in Step 6: {str(e)}")
-                traceback.print_exc()
-        print("\nStep 6 finished.\n")
-
-    if run_step_7:
-        print("\n--- Running Step 7: Execute CPR-Filtered Trades ---")
-        for date in dates:
-            trades_dir_cpr = f"./data/{date}/trades_crp"
-            try:
-                calls_file = f"./data/{date}/call/call_out.csv"
-                puts_file = f"./data/{date}/put/put_out.csv"
-
-                if not all(os.path.exists(f) for f in [calls_file, puts_file]):
-                    print(f"  - Skipping {date}, missing call/put data files.")
-                    continue
-
-                calls_df = pd.read_csv(calls_file, encoding='utf-8-sig')
-                puts_df = pd.read_csv(puts_file, encoding='utf-8-sig')
-
-                # --- Execute Reversal CPR Trades ---
-                rev_signals_file = f"./data/{date}/tradeview_rev_output.csv"
-                if os.path.exists(rev_signals_file):
-                    rev_signals_df = pd.read_csv(rev_signals_file, encoding='utf-8-sig')
-                    if 'Call_crp' in rev_signals_df.columns:
-                        execute_index_trades(rev_signals_df.copy(), calls_df.copy(), 'Call_crp', 'Call', config, trades_dir_cpr, 'rev_v1_trades.csv')
-                    if 'Put_crp' in rev_signals_df.columns:
-                        execute_index_trades(rev_signals_df.copy(), puts_df.copy(), 'Put_crp', 'Put', config, trades_dir_cpr, 'rev_v1_trades.csv')
-                    # No v2 for CPR filtered for now
-                
-                # --- Execute Continuation CPR Trades ---
-                cont_signals_file = f"./data/{date}/tradeview_cont_output.csv"
-                if os.path.exists(cont_signals_file):
-                    cont_signals_df = pd.read_csv(cont_signals_file, encoding='utf-8-sig')
-                    if 'Call_crp' in cont_signals_df.columns:
-                        execute_index_trades(cont_signals_df.copy(), calls_df.copy(), 'Call_crp', 'Call', config, trades_dir_cpr, 'cont_trades.csv')
-                    if 'Put_crp' in cont_signals_df.columns:
-                        execute_index_trades(cont_signals_df.copy(), puts_df.copy(), 'Put_crp', 'Put', config, trades_dir_cpr, 'cont_trades.csv')
-
-            except Exception as e:
-                print(f"  ✗ ERROR processing {date} in Step 7: {str(e)}")
-                traceback.print_exc()
-        print("\nStep 7 finished.\n")
-
-    if run_step_8:
-        print("\n--- Running Step 8: Process Call Data (Signal Generation & Backtest) ---")
-        generate_continuation_strategies_options(call_input_filename='call/call_out.csv', call_output_filename='call/call_cont_out.csv', put_input_filename='put/put_out.csv', put_output_filename='put/put_cont_out.csv')
-        generate_reversal_strategies_options(call_input_filename='call/call_out.csv', call_output_filename='call/call_rev_out.csv', put_input_filename='put/put_out.csv', put_output_filename='put/put_rev_out.csv')
-        generate_reversal_strategies_v2_options(call_input_filename='call/call_out.csv', call_output_filename='call/call_rev_out.csv', put_input_filename='put/put_out.csv', put_output_filename='put/put_rev_out.csv')
-        
-        for date in dates:
-            try:
-                cont_signals_file = f"./data/{date}/call/call_cont_out.csv"
-                rev_signals_file = f"./data/{date}/call/call_rev_out.csv"
-                calls_file = f"./data/{date}/call/call_out.csv"
-                puts_file = f"./data/{date}/put/put_out.csv"
-                
-                required_files = [calls_file, puts_file, cont_signals_file, rev_signals_file]
-                if not all(os.path.exists(f) for f in required_files):
-                    print(f"  - Skipping {date} in Step 9, missing one or more required files.")
-                    continue
-
-                print(f"\n--- Backtesting Call Data for Date: {date} ---")
-                calls_df = pd.read_csv(calls_file, encoding='utf-8-sig')
-                calls_df['datetime'] = pd.to_datetime(calls_df['datetime'])
-                puts_df = pd.read_csv(puts_file, encoding='utf-8-sig')
-                puts_df['datetime'] = pd.to_datetime(puts_df['datetime'])
-                cont_signals_df = pd.read_csv(cont_signals_file, encoding='utf-8-sig')
-                cont_signals_df['datetime'] = pd.to_datetime(cont_signals_df['datetime'])
-                rev_signals_df = pd.read_csv(rev_signals_file, encoding='utf-8-sig')
-                rev_signals_df['datetime'] = pd.to_datetime(rev_signals_df['datetime'])
-
-                # Use option-specific backtesting for call options
-                trades_cont = run_option_backtest(cont_signals_df.copy(), calls_df.copy(), date, config, 'Continuation Strategy', 'Call', 'Call')
-                trades_rev = run_option_backtest(rev_signals_df.copy(), calls_df.copy(), date, config, 'Reversal Strategy', 'Call', 'Call')
-                trades_rev_v2 = run_option_backtest(rev_signals_df.copy(), calls_df.copy(), date, config, 'Reversal Strategy v2', 'Call', 'Call_v2')
-                
-                backtest_dir = f"./data/{date}/call/backtest"
-                os.makedirs(backtest_dir, exist_ok=True)
-
-                if trades_cont: pd.DataFrame(trades_cont).to_csv(f"{backtest_dir}/backtest_results_cont.csv", index=False)
-                if trades_rev: pd.DataFrame(trades_rev).to_csv(f"{backtest_dir}/backtest_results_rev.csv", index=False)
-                if trades_rev_v2: pd.DataFrame(trades_rev_v2).to_csv(f"{backtest_dir}/backtest_results_rev_v2.csv", index=False)
-
-            except Exception as e:
-                print(f"  ✗ ERROR processing {date} in Step 9: {str(e)}")
-                traceback.print_exc()
-        print("Step 8 finished.\n")
-
-    if run_step_9:
-        print("\n--- Running Step 9: Process Put Data (Signal Generation & Backtest) ---")
-        # Note: Put data processing is now handled together with call data in step 9
-        # using the option_strategies which process both call and put files appropriately
-        print("   Put data processing is handled together with call data in step 9 using option strategies")
-        
-        for date in dates:
-            try:
-                cont_signals_file = f"./data/{date}/put/put_cont_out.csv"
-                rev_signals_file = f"./data/{date}/put/put_rev_out.csv"
-                calls_file = f"./data/{date}/call/call_out.csv"
-                puts_file = f"./data/{date}/put/put_out.csv"
-                
-                required_files = [calls_file, puts_file, cont_signals_file, rev_signals_file]
-                if not all(os.path.exists(f) for f in required_files):
-                    print(f"  - Skipping {date} in Step 10, missing one or more required files.")
-                    continue
-
-                print(f"\n--- Backtesting Put Data for Date: {date} ---")
-                calls_df = pd.read_csv(calls_file, encoding='utf-8-sig')
-                calls_df['datetime'] = pd.to_datetime(calls_df['datetime'])
-                puts_df = pd.read_csv(puts_file, encoding='utf-8-sig')
-                puts_df['datetime'] = pd.to_datetime(puts_df['datetime'])
-                cont_signals_df = pd.read_csv(cont_signals_file, encoding='utf-8-sig')
-                cont_signals_df['datetime'] = pd.to_datetime(cont_signals_df['datetime'])
-                rev_signals_df = pd.read_csv(rev_signals_file, encoding='utf-8-sig')
-                rev_signals_df['datetime'] = pd.to_datetime(rev_signals_df['datetime'])
-
-                # Use option-specific backtesting for put options
-                trades_cont = run_option_backtest(cont_signals_df.copy(), puts_df.copy(), date, config, 'Continuation Strategy', 'Put', 'Put')
-                trades_rev = run_option_backtest(rev_signals_df.copy(), puts_df.copy(), date, config, 'Reversal Strategy', 'Put', 'Put')
-                trades_rev_v2 = run_option_backtest(rev_signals_df.copy(), puts_df.copy(), date, config, 'Reversal Strategy v2', 'Put', 'Put_v2')
-                
-                backtest_dir = f"./data/{date}/put/backtest"
-                os.makedirs(backtest_dir, exist_ok=True)
-
-                if trades_cont: pd.DataFrame(trades_cont).to_csv(f"{backtest_dir}/backtest_results_cont.csv", index=False)
-                if trades_rev: pd.DataFrame(trades_rev).to_csv(f"{backtest_dir}/backtest_results_rev.csv", index=False)
-                if trades_rev_v2: pd.DataFrame(trades_rev_v2).to_csv(f"{backtest_dir}/backtest_results_rev_v2.csv", index=False)
-
-            except Exception as e:
-                print(f"  ✗ ERROR processing {date} in Step 10: {str(e)}")
-                traceback.print_exc()
-        print("Step 9 finished.\n")
-
-    if run_step_10:
-        print("\n--- Running Step 10: Execute Trades for Call/Put Data ---")
-        for date in dates:
-            # Execute for Call data - Create 3 separate files
-            call_trades_dir = f"./data/{date}/call/trades"
-            try:
-                cont_signals_file = f"./data/{date}/call/call_cont_out.csv"
-                rev_signals_file = f"./data/{date}/call/call_rev_out.csv"
-                calls_file = f"./data/{date}/call/call_out.csv"
-                puts_file = f"./data/{date}/put/put_out.csv"
-
-                required_files = [calls_file, puts_file, cont_signals_file, rev_signals_file]
-                if not all(os.path.exists(f) for f in required_files):
-                    print(f"  - Skipping Call trades for {date}, missing files.")
-                else:
-                    calls_df = pd.read_csv(calls_file, encoding='utf-8-sig')
-                    puts_df = pd.read_csv(puts_file, encoding='utf-8-sig')
-                    cont_signals_df = pd.read_csv(cont_signals_file, encoding='utf-8-sig')
-                    rev_signals_df = pd.read_csv(rev_signals_file, encoding='utf-8-sig')
-                    
-                    # Create 3 separate call trade files
-                    execute_option_trades(cont_signals_df.copy(), calls_df.copy(), 'Call', 'Call', config, call_trades_dir, 'call_cont_trades.csv')
-                    execute_option_trades(rev_signals_df.copy(), calls_df.copy(), 'Call', 'Call', config, call_trades_dir, 'call_rev_v1_trades.csv')
-                    execute_option_trades(rev_signals_df.copy(), calls_df.copy(), 'Call_v2', 'Call', config, call_trades_dir, 'call_rev_v2_trades.csv')
-            except Exception as e:
-                print(f"  ✗ ERROR processing Call trades for {date} in Step 11: {str(e)}")
-                traceback.print_exc()
-
-            # Execute for Put data - Create 3 separate files
-            put_trades_dir = f"./data/{date}/put/trades"
-            try:
-                cont_signals_file = f"./data/{date}/put/put_cont_out.csv"
-                rev_signals_file = f"./data/{date}/put/put_rev_out.csv"
-                calls_file = f"./data/{date}/call/call_out.csv"
-                puts_file = f"./data/{date}/put/put_out.csv"
-
-                required_files = [calls_file, puts_file, cont_signals_file, rev_signals_file]
-                if not all(os.path.exists(f) for f in required_files):
-                    print(f"  - Skipping Put trades for {date}, missing files.")
-                else:
-                    calls_df = pd.read_csv(calls_file, encoding='utf-8-sig')
-                    puts_df = pd.read_csv(puts_file, encoding='utf-8-sig')
-                    cont_signals_df = pd.read_csv(cont_signals_file, encoding='utf-8-sig')
-                    rev_signals_df = pd.read_csv(rev_signals_file, encoding='utf-8-sig')
-
-                    # Create 3 separate put trade files
-                    execute_option_trades(cont_signals_df.copy(), puts_df.copy(), 'Put', 'Put', config, put_trades_dir, 'put_cont_trades.csv')
-                    execute_option_trades(rev_signals_df.copy(), puts_df.copy(), 'Put', 'Put', config, put_trades_dir, 'put_rev_v1_trades.csv')
-                    execute_option_trades(rev_signals_df.copy(), puts_df.copy(), 'Put_v2', 'Put', config, put_trades_dir, 'put_rev_v2_trades.csv')
-            except Exception as e:
-                print(f"  ✗ ERROR processing Put trades for {date} in Step 11: {str(e)}")
-                traceback.print_exc()
-        print("\nStep 10 finished.\n")
-
-
-    if run_step_11:
-        print("\n--- Running Step 11: Final Analytics Report ---")
-        run_analysis()
-        print("Step 11 finished.\n")
+                        print(f"\n--- Running Step {step}: {STEP_TITLES[step]} ---")
+                    if step in TRADE_OUTPUTS:
+                        invalidate_trade_outputs(step, step_dates, strategies, data_root, ledger_path)
+                    run_step_tasks(step, step_dates, ctx, ledger_path, pool)
+                    print(f"\n{title} finished.\n")
+            if step_span is not None and pool is not None:
+                step_span['cpu_s'] = round(step_span['cpu_s'] + worker_cpu_s(active_profiler().spans, step), 6)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    if args.profile:
+        write_run_profile(disable_profiling(), args, steps, dates, strategies, workers)
 
     print("All selected steps completed successfully!")
 
+def write_run_profile(profiler, args, steps, dates, strategies, workers):
+    """Saves the run's spans (and merged cProfile stats) under --profile and prints the summary"""
+    import glob
+    from tools.profiler import write_profile, format_profile_summary, merge_cprofile_stats
+
+    meta = {'steps': steps, 'dates': dates, 'strategies': strategies, 'workers': workers, 'profile_hook': args.profile_hook}
+    json_path = write_profile(profiler.spans, args.profile, meta)
+    print("\n".join(format_profile_summary(profiler.spans)))
+    print(f"💾 Profile saved to: {json_path} (spans also in profile_spans.csv)")
+    if args.profile_hook == 'cprofile':
+        merged = merge_cprofile_stats(sorted(glob.glob(os.path.join(args.profile, 'hooks', '*.prof'))),
+                                      os.path.join(args.profile, 'run.prof'))
+        if merged:
+            print(f"💾 Merged cProfile stats saved to: {merged}")
+    elif args.profile_hook == 'sample':
+        print(f"💾 Sampled stacks (folded format) saved to: {os.path.join(args.profile, 'hooks')}")
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+# Offline benchmark suite: synthetic sessions (benchmarks.synthetic) and timed hot paths (benchmarks.run_benchmarks).
@@ -0,0 +1,415 @@
+# benchmarks/run_benchmarks.py
+# Times the pipeline hot paths on synthetic sessions and compares them with stored baselines.
+#
+# Usage (from the repository root, no network or Kite access needed):
+#   python -m benchmarks.run_benchmarks                       # compare with benchmarks/baselines.json
+#   python -m benchmarks.run_benchmarks --update-baseline     # record new baselines
+#   python -m benchmarks.run_benchmarks --cases 'executor.*' --days 10 --strikes 5
+
+import io
+import os
+import sys
+import copy
+import json
+import time
+import fnmatch
+import argparse
+import platform
+import statistics
+import tempfile
+import contextlib
+
+import pandas as pd
+import yaml
+
+from .synthetic import DEFAULT_SPEC, OPTION_COLUMNS, generate_sessions, write_data_root
+
+DEFAULT_SETTINGS = {
+    'REPEAT': 5,
+    'WARMUP': 1,
+    'TOLERANCE': 0.25,      # Slower than baseline by more than this fraction -> regression
+    'MIN_DELTA_S': 0.005,   # ... and by at least this many seconds (ignores timer noise on tiny cases)
+    'BASELINE_FILE': os.path.join('benchmarks', 'baselines.json'),
+    'SESSION': {},          # DEFAULT_SPEC overrides (DAYS, STRIKES, VOLATILITY, SEED, ...)
+}
+
+def load_benchmark_config(path=None):
+    """Load benchmark settings from benchmarks/benchmarks.yaml"""
+    path = path or os.path.join(os.path.dirname(__file__), 'benchmarks.yaml')
+    try:
+        with open(path, 'r') as file:
+            settings = yaml.safe_load(file) or {}
+    except Exception as e:
+        print(f"Warning: Could not load {path}: {e}")
+        settings = {}
+    merged = copy.deepcopy(DEFAULT_SETTINGS)
+    merged.update(settings)
+    return merged
+
+def load_main_config(path='config.yaml'):
+    with open(path, 'r') as file:
+        return yaml.safe_load(file)
+
+# --- Benchmark cases ---
+# Each case gets the shared context and returns the callable that is timed, so
+# setup (synthetic data, signal frames, configs) stays outside the measurement.
+
+BENCHMARKS = {}
+
+def benchmark(name):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+def _quiet_calculator():
+    from tools.indicators import TechnicalIndicatorsCalculator
+    with contextlib.redirect_stdout(io.StringIO()):
+        calculator = TechnicalIndicatorsCalculator(os.path.join('tools', 'indicators_config.ini'))
+    calculator.config['DEFAULT']['show_detailed_output'] = 'false'
+    calculator.config['DEFAULT']['show_comparison'] = 'false'
+    return calculator
+
+def _index_prices(ctx):
+    """All sessions as one OHLC frame indexed by datetime (the layout tools/indicators.py reads)"""
+    frame = pd.concat([s['index'][['datetime', 'open', 'high', 'low', 'close']] for s in ctx['sessions']], ignore_index=True)
+    return frame.set_index('datetime')
+
+@benchmark('indicators.supertrend')
+def bench_supertrend(ctx):
+    calculator, df = _quiet_calculator(), _index_prices(ctx)
+    return lambda: calculator.calculate_supertrend(df, 10, 3.0)
+
+@benchmark('indicators.williams_r')
+def bench_williams_r(ctx):
+    calculator, df = _quiet_calculator(), _index_prices(ctx)
+    return lambda: (calculator.calculate_williams_r(df, 9), calculator.calculate_williams_r(df, 28))
+
+@benchmark('indicators.stochastic_rsi')
+def bench_stochastic_rsi(ctx):
+    calculator, df = _quiet_calculator(), _index_prices(ctx)
+    return lambda: calculator.calculate_stochastic_rsi(df, 3, 3, 14, 14)
+
+@benchmark('indicators.cpr')
+def bench_cpr(ctx):
+    calculator, df = _quiet_calculator(), _index_prices(ctx)
+    return lambda: calculator.calculate_and_append_cpr(df.copy())
+
+@benchmark('indicators.all')
+def bench_all_indicators(ctx):
+    calculator, df = _quiet_calculator(), _index_prices(ctx)
+    return lambda: calculator.calculate_and_append_indicators(df.copy())
+
+def _index_frames(ctx):
+    """(renamed indicator frame, supertrend direction) per session"""
+    from strategies.signal_engine import COLUMN_RENAMES, index_direction
+    frames = [session['index'].rename(columns=COLUMN_RENAMES) for session in ctx['sessions']]
+    return [(df, index_direction(df)) for df in frames]
+
+def _option_frames(ctx):
+    """(option type, renamed indicator frame, candle direction) per session, side and strike"""
+    from strategies.signal_engine import COLUMN_RENAMES, option_direction
+    frames = []
+    for session in ctx['sessions']:
+        for option_type, key in (('Call', 'calls'), ('Put', 'puts')):
+            for option_df in session[key].values():
+                df = option_df.rename(columns=COLUMN_RENAMES)
+                frames.append((option_type, df, option_direction(df)))
+    return frames
+
+# Rule contexts cache evaluated nodes, so every timed run builds fresh ones
+def _index_signal_case(strategy):
+    def setup(ctx):
+        from strategies.signal_engine import build_rule_context, evaluate_strategies
+        frames = _index_frames(ctx)
+        return lambda: [evaluate_strategies(build_rule_context(df, direction), [strategy]) for df, direction in frames]
+    return setup
+
+def _option_signal_case(strategy):
+    def setup(ctx):
+        from strategies.signal_engine import build_rule_context, option_signals
+        frames = _option_frames(ctx)
+        return lambda: [option_signals(build_rule_context(df, direction), option_type, [strategy]) for option_type, df, direction in frames]
+    return setup
+
+for _strategy in ('cont', 'rev_v1', 'rev_v2'):
+    benchmark(f'signals.index.{_strategy}')(_index_signal_case(_strategy))
+    benchmark(f'signals.option.{_strategy}')(_option_signal_case(_strategy))
+
+@benchmark('signals.index_day_files')
+def bench_index_day_files(ctx):
+    from strategies.signal_engine import process_index_day
+    date_dirs = [os.path.join(ctx['data_root'], date) for date in ctx['dates']]
+    return lambda: [process_index_day(date_dir) for date_dir in date_dirs]
+
+def index_signal_frames(ctx):
+    """Per-session reversal signal frames (Call/Put/Call_v2/Put_v2), cached on the context"""
+    if 'index_signals' not in ctx:
+        from strategies.signal_engine import build_rule_context, evaluate_strategies
+        frames = []
+        for session, (renamed, direction) in zip(ctx['sessions'], _index_frames(ctx)):
+            signals = evaluate_strategies(build_rule_context(renamed, direction), ['rev_v1', 'rev_v2'])
+            df = session['index'].drop(columns=['time']).copy()
+            df['Call'], df['Put'] = signals['rev_v1']['call'].astype(int), signals['rev_v1']['put'].astype(int)
+            df['Call_v2'], df['Put_v2'] = signals['rev_v2']['call'].astype(int), signals['rev_v2']['put'].astype(int)
+            frames.append(df)
+        ctx['index_signals'] = frames
+    return ctx['index_signals']
+
+def option_signal_frames(ctx):
+    """(session, option_type, strike, signals frame) for the rev_v1 entries of every strike"""
+    if 'option_signals' not in ctx:
+        from strategies.signal_engine import COLUMN_RENAMES, build_rule_context, option_direction, option_signals
+        frames = []
+        for session in ctx['sessions']:
+            for option_type, key in (('Call', 'calls'), ('Put', 'puts')):
+                for strike, option_df in session[key].items():
+                    df = option_df.rename(columns=COLUMN_RENAMES)
+                    entries = option_signals(build_rule_context(df, option_direction(df)), option_type, ['rev_v1'])['rev_v1']
+                    frames.append((session, option_type, strike, pd.DataFrame({'datetime': option_df['datetime'], option_type: entries.astype(int)})))
+        ctx['option_signals'] = frames
+    return ctx['option_signals']
+
+def _cpr_filter_case(module_name, function_name):
+    def setup(ctx):
+        import importlib
+        filter_func = getattr(importlib.import_module(module_name), function_name)
+        pairs = [(s['index'].drop(columns=['time']), signals) for s, signals in zip(ctx['sessions'], index_signal_frames(ctx))]
+        trade_type_map = {'Call': 'Call', 'Put': 'Put', 'Call_v2': 'Call', 'Put_v2': 'Put'}
+        return lambda: [filter_func(price_df.copy(), signals_df.copy(), trade_type_map) for price_df, signals_df in pairs]
+    return setup
+
+benchmark('cpr_filter.standard')(_cpr_filter_case('tools.run_cpr_filter', 'run_cpr_filter'))
+benchmark('cpr_filter.wide_band')(_cpr_filter_case('tools.run_cpr_filter_wide_band', 'run_cpr_filter_wide_band'))
+
+def _option_executor_case(executor):
+    def setup(ctx):
+        from option_tools.walk_forward import get_executor_module
+        module, trade_config = get_executor_module(executor)
+        frames = option_signal_frames(ctx)
+        # Processed-file columns: the COMPLEX exits read K, D, %R and %R.1 as well as OHLC
+        prices = {(id(s), option_type, strike): s['calls' if option_type == 'Call' else 'puts'][strike][OPTION_COLUMNS]
+                  for s, option_type, strike, _ in frames}
+
+        def run():
+            for session, option_type, strike, signals_df in frames:
+                prices_df = module.prepare_option_prices(prices[(id(session), option_type, strike)].copy(), trade_config)
+                module.simulate_option_trades(signals_df.copy(), prices_df, option_type, option_type, ctx['config'], trade_config)
+        return run
+    return setup
+
+def _index_executor_case(function_name):
+    def setup(ctx):
+        from option_tools import index_trade_executor
+        from tools.trade_sink import TradeSink
+        execute = getattr(index_trade_executor, function_name)
+        runs = []
+        for session, signals_df in zip(ctx['sessions'], index_signal_frames(ctx)):
+            for option_type, key in (('Call', 'calls'), ('Put', 'puts')):
+                prices_df = session[key][session[f'{option_type.lower()}_strike']]
+                runs.append((signals_df, prices_df, option_type))
+
+        def run():
+            # Trades are buffered in a sink that is never flushed, so nothing is written
+            sink = TradeSink()
+            for signals_df, prices_df, option_type in runs:
+                execute(signals_df.copy(), prices_df.copy(), option_type, option_type, ctx['config'], ctx['work_dir'], 'bench_trades.csv', sink=sink)
+        return run
+    return setup
+
+benchmark('executor.option.simple')(_option_executor_case('SIMPLE'))
+benchmark('executor.option.complex')(_option_executor_case('COMPLEX'))
+benchmark('executor.index.simple')(_index_executor_case('execute_index_trades_simple'))
+benchmark('executor.index.complex')(_index_executor_case('execute_index_trades_complex'))
+
+@benchmark('backtest.option')
+def bench_option_backtest(ctx):
+    from option_tools.option_run_backtesting import run_option_backtests
+    runs = [(session, option_type, strike, [(signals_df, 'Reversal', option_type)])
+            for session, option_type, strike, signals_df in option_signal_frames(ctx)]
+
+    def run():
+        for session, option_type, strike, signal_runs in runs:
+            option_df = session['calls' if option_type == 'Call' else 'puts'][strike]
+            run_option_backtests(option_df, session['date'], ctx['config'], option_type, signal_runs)
+    return run
+
+@benchmark('analytics.run_analysis')
+def bench_run_analysis(ctx):
+    import app
+    from run_analytics import run_analysis
+    # Steps 2-10 on the synthetic root produce the trade ledger the report reads
+    app.main(['--steps', '2-10', '--data-root', ctx['data_root'], '--workers', '1'])
+    output_dir = os.path.join(ctx['work_dir'], 'report')
+    return lambda: run_analysis(ctx['data_root'], output_dir=output_dir)
+
+# --- Timing and baselines ---
+
+def time_case(fn, repeat, warmup):
+    """Wall time of fn() over `repeat` runs after `warmup` untimed runs (console output suppressed)"""
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(warmup):
+            fn()
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+    return {'min_s': round(min(timings), 6), 'median_s': round(statistics.median(timings), 6), 'repeat': repeat}
+
+def select_cases(patterns=None):
+    """Case names matching any of the glob patterns (all cases when none are given)"""
+    if not patterns:
+        return list(BENCHMARKS)
+    return [name for name in BENCHMARKS if any(fnmatch.fnmatch(name, pattern) for pattern in patterns)]
+
+def run_benchmarks(cases, spec, repeat, warmup, config_path='config.yaml'):
+    """
+    Generates the synthetic sessions once and times every selected case.
+
+    Returns:
+        dict: case -> {'min_s', 'median_s', 'repeat'} (or {'error': ...} when setup/run failed)
+    """
+    print(f"--- Generating synthetic sessions: {spec['DAYS']} days, {spec['STRIKES']} strikes, volatility {spec['VOLATILITY']} ---")
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='bench_') as work_dir:
+        ctx = {
+            'sessions': generate_sessions(spec),
+            'config': load_main_config(config_path),
+            'work_dir': work_dir,
+            'data_root': os.path.join(work_dir, 'data'),
+        }
+        ctx['dates'] = write_data_root(ctx['sessions'], ctx['data_root'])
+
+        for name in cases:
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    fn = BENCHMARKS[name](ctx)
+                results[name] = time_case(fn, repeat, warmup)
+                print(f"⏱️ {name:<28} min {results[name]['min_s'] * 1000:9.1f} ms   median {results[name]['median_s'] * 1000:9.1f} ms")
+            except Exception as e:
+                results[name] = {'error': f"{type(e).__name__}: {e}"}
+                print(f"❌ {name:<28} failed: {results[name]['error']}")
+    return results
+
+def machine_info():
+    return {'machine': platform.node(), 'platform': platform.platform(), 'python': sys.version.split()[0], 'pandas': pd.__version__}
+
+def load_baselines(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as file:
+        return json.load(file)
+
+def save_baselines(path, results, spec, previous=None):
+    """Writes results as the new baselines (cases not run this time keep their old baseline)"""
+    cases = dict((previous or {}).get('cases', {}))
+    cases.update({name: result for name, result in results.items() if 'error' not in result})
+    baselines = {
+        'meta': {**machine_info(), 'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'session': spec},
+        'cases': cases,
+    }
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as file:
+        json.dump(baselines, file, indent=2)
+    return path
+
+def compare_with_baselines(results, baselines, tolerance, min_delta_s):
+    """
+    Flags cases whose fastest run got slower than baseline by more than the tolerance.
+
+    Returns:
+        list: (case, baseline min_s, current min_s, change ratio, status) rows;
+              status is 'regression', 'faster', 'ok', 'new' or 'error'
+    """
+    rows = []
+    for name, result in results.items():
+        baseline = baselines.get('cases', {}).get(name)
+        if 'error' in result:
+            rows.append((name, baseline and baseline['min_s'], None, None, 'error'))
+            continue
+        if baseline is None:
+            rows.append((name, None, result['min_s'], None, 'new'))
+            continue
+        base, current = baseline['min_s'], result['min_s']
+        ratio = current / base if base > 0 else float('inf')
+        if ratio > 1 + tolerance and current - base >= min_delta_s:
+            status = 'regression'
+        elif ratio < 1 - tolerance and base - current >= min_delta_s:
+            status = 'faster'
+        else:
+            status = 'ok'
+        rows.append((name, base, current, ratio, status))
+    return rows
+
+STATUS_ICONS = {'regression': '❌', 'faster': '🎉', 'ok': '✓', 'new': 'ℹ️', 'error': '❌'}
+
+def print_comparison(rows):
+    print(f"\n{'Case':<28} {'Baseline':>12} {'Current':>12} {'Change':>9}")
+    for name, base, current, ratio, status in rows:
+        base_ms = f"{base * 1000:.1f} ms" if base is not None else '-'
+        current_ms = f"{current * 1000:.1f} ms" if current is not None else '-'
+        change = f"{(ratio - 1) * 100:+.1f}%" if ratio is not None else '-'
+        print(f"{STATUS_ICONS[status]} {name:<26} {base_ms:>12} {current_ms:>12} {change:>9}  {status}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline hot paths on synthetic sessions")
+    parser.add_argument('--cases', nargs='*', help="Glob patterns of cases to run (e.g. 'signals.*'); default all")
+    parser.add_argument('--list', action='store_true', help="List the benchmark cases and exit")
+    parser.add_argument('--repeat', type=int, help="Timed runs per case")
+    parser.add_argument('--days', type=int, help="Synthetic sessions")
+    parser.add_argument('--strikes', type=int, help="Option strikes per side")
+    parser.add_argument('--volatility', type=float, help="Annualised index volatility")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--baseline', help="Baseline file (default from benchmarks.yaml)")
+    parser.add_argument('--tolerance', type=float, help="Allowed slowdown as a fraction (0.25 = 25%%)")
+    parser.add_argument('--update-baseline', action='store_true', help="Store this run as the new baseline")
+    parser.add_argument('--settings', help="Path to benchmarks.yaml")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return 0
+
+    settings = load_benchmark_config(args.settings)
+    spec = {**DEFAULT_SPEC, **settings.get('SESSION', {})}
+    for key, value in (('DAYS', args.days), ('STRIKES', args.strikes), ('VOLATILITY', args.volatility), ('SEED', args.seed)):
+        if value is not None:
+            spec[key] = value
+
+    cases = select_cases(args.cases)
+    if not cases:
+        print(f"❌ No benchmark cases match {args.cases} (see --list)")
+        return 1
+
+    results = run_benchmarks(cases, spec, args.repeat or settings['REPEAT'], settings['WARMUP'])
+    baseline_path = args.baseline or settings['BASELINE_FILE']
+    baselines = load_baselines(baseline_path)
+
+    if args.update_baseline:
+        save_baselines(baseline_path, results, spec, baselines)
+        print(f"💾 Baselines saved to {baseline_path}")
+        return 0
+
+    if baselines is None:
+        print(f"ℹ️ No baselines at {baseline_path}; run with --update-baseline to record them.")
+        return 0
+    if baselines.get('meta', {}).get('session') != spec:
+        print(f"⚠️ Baselines were recorded with different session settings ({baselines['meta'].get('session')}); timings are not comparable.")
+        return 0
+    if baselines['meta'].get('machine') != platform.node():
+        print(f"⚠️ Baselines were recorded on '{baselines['meta'].get('machine')}'; differences may be hardware, not code.")
+
+    tolerance = args.tolerance if args.tolerance is not None else settings['TOLERANCE']
+    rows = compare_with_baselines(results, baselines, tolerance, settings['MIN_DELTA_S'])
+    print_comparison(rows)
+
+    failed = [name for name, _, _, _, status in rows if status in ('regression', 'error')]
+    if failed:
+        print(f"\n❌ {len(failed)} benchmark(s) regressed or failed (tolerance {tolerance:.0%}): {', '.join(failed)}")
+        return 1
+    print(f"\n✅ No regressions (tolerance {tolerance:.0%})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
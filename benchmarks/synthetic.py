@@ -0,0 +1,209 @@
+# benchmarks/synthetic.py
+# Synthetic 1-minute NIFTY sessions (index + option strikes) with the indicator
+# columns the pipeline reads, so hot paths can be timed offline without Kite data.
+
+import io
+import os
+import math
+import contextlib
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from tools.indicators import TechnicalIndicatorsCalculator
+
+BARS_PER_SESSION = 375  # 09:15 .. 15:29
+SESSION_OPEN = (9, 15)
+
+DEFAULT_SPEC = {
+    'DAYS': 5,
+    'STRIKES': 3,              # Strikes per side, centred on the opening ATM strike
+    'STRIKE_STEP': 50,
+    'START_DATE': '2025-07-01',
+    'START_PRICE': 25500.0,
+    'VOLATILITY': 0.15,        # Annualised index volatility
+    'OPTION_IV': 0.12,         # Implied volatility used to price the option premiums
+    'EXPIRY_WEEKDAY': 3,       # Weekly expiry (Thursday)
+    'SEED': 7,
+}
+
+# Same settings as tools/indicators_config.ini and the TradingView export
+INDICATOR_SETTINGS = {
+    'SUPERTREND': (10, 3.0),
+    'WILLIAMS_R': (9, 28),
+    'STOCHASTIC_RSI': (3, 3, 14, 14),
+    'EMA': 9,
+}
+
+INDEX_COLUMNS = [
+    'time', 'open', 'high', 'low', 'close', 'Daily Pivot', 'Daily BC', 'Daily TC',
+    'Daily R1', 'Daily R2', 'Daily R3', 'Daily R4', 'Daily S1', 'Daily S2',
+    'Daily S3', 'Daily S4', 'Prev Day High', 'Prev Day Low', 'EMA',
+    'Up Trend', 'Down Trend', 'K', 'D', '%R', '%R.1', 'datetime'
+]
+OPTION_COLUMNS = ['datetime', 'open', 'high', 'low', 'close', 'K', 'D', '%R', '%R.1']
+
+def session_dates(start_date, days):
+    """The first `days` weekdays from start_date (YYYY-MM-DD)"""
+    current = datetime.strptime(start_date, '%Y-%m-%d')
+    dates = []
+    while len(dates) < days:
+        if current.weekday() < 5:
+            dates.append(current)
+        current += timedelta(days=1)
+    return dates
+
+def _indicator_calculator():
+    """TechnicalIndicatorsCalculator without its console output"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return TechnicalIndicatorsCalculator(os.path.join(os.path.dirname(__file__), os.pardir, 'tools', 'indicators_config.ini'))
+
+def generate_index_session(day, open_price, volatility, rng):
+    """
+    One session of 1-minute index bars from a random walk.
+
+    Each day gets its own drift so sessions alternate between trends and
+    ranges, which is what the reversal / continuation rules react to.
+    """
+    sigma = volatility / math.sqrt(252 * BARS_PER_SESSION)
+    drift = rng.normal(0.0, 3 * sigma / math.sqrt(BARS_PER_SESSION))
+    returns = rng.normal(drift, sigma, BARS_PER_SESSION)
+    close = open_price * np.exp(np.cumsum(returns))
+    opens = np.concatenate([[open_price], close[:-1]])
+    wick = np.abs(rng.normal(0.0, sigma * 0.6, (2, BARS_PER_SESSION))) * close
+    start = day.replace(hour=SESSION_OPEN[0], minute=SESSION_OPEN[1])
+    return pd.DataFrame({
+        'datetime': pd.date_range(start, periods=BARS_PER_SESSION, freq='min'),
+        'open': opens.round(2),
+        'high': (np.maximum(opens, close) + wick[0]).round(2),
+        'low': (np.minimum(opens, close) - wick[1]).round(2),
+        'close': close.round(2),
+    })
+
+def cpr_levels(prev_high, prev_low, prev_close):
+    """Daily CPR / floor pivot levels from the previous session (TradingView formulas)"""
+    pivot = (prev_high + prev_low + prev_close) / 3
+    bc = (prev_high + prev_low) / 2
+    day_range = prev_high - prev_low
+    r1, s1 = 2 * pivot - prev_low, 2 * pivot - prev_high
+    r2, s2 = pivot + day_range, pivot - day_range
+    r3, s3 = prev_high + 2 * (pivot - prev_low), prev_low - 2 * (prev_high - pivot)
+    return {
+        'Daily Pivot': pivot, 'Daily BC': bc, 'Daily TC': 2 * pivot - bc,
+        'Daily R1': r1, 'Daily R2': r2, 'Daily R3': r3, 'Daily R4': r3 + (r2 - r1),
+        'Daily S1': s1, 'Daily S2': s2, 'Daily S3': s3, 'Daily S4': s3 - (s1 - s2),
+        'Prev Day High': prev_high, 'Prev Day Low': prev_low,
+    }
+
+def add_oscillators(df, calculator):
+    """Stochastic RSI (K, D) and Williams %R (%R, %R.1) columns, as in the processed files"""
+    k_period, d_period, rsi_period, stoch_period = INDICATOR_SETTINGS['STOCHASTIC_RSI']
+    fast, slow = INDICATOR_SETTINGS['WILLIAMS_R']
+    df['K'], df['D'] = calculator.calculate_stochastic_rsi(df, k_period, d_period, rsi_period, stoch_period)
+    df['%R'] = calculator.calculate_williams_r(df, fast)
+    df['%R.1'] = calculator.calculate_williams_r(df, slow)
+    return df
+
+def option_premium(spot, strike, option_type, days_to_expiry, iv):
+    """Normal-model premium (floored at one tick) of a call/put; spot and days_to_expiry may be arrays"""
+    sigma = np.maximum(spot * iv * np.sqrt(np.maximum(days_to_expiry, 0.02) / 365), 1e-9)
+    moneyness = (spot - strike) if option_type == 'Call' else (strike - spot)
+    d = moneyness / sigma
+    cdf = 0.5 * (1 + np.vectorize(math.erf)(d / math.sqrt(2)))
+    pdf = np.exp(-0.5 * d * d) / math.sqrt(2 * math.pi)
+    return np.maximum(moneyness * cdf + sigma * pdf, 0.05)
+
+def generate_option_session(index_df, strike, option_type, days_to_expiry, iv):
+    """
+    1-minute option bars priced off the index bars.
+
+    The premium high comes from the index high for calls and the index low
+    for puts (and vice versa), and time value decays through the session.
+    """
+    decay = days_to_expiry - np.arange(len(index_df)) / (BARS_PER_SESSION * 1.0)
+    favourable, adverse = ('high', 'low') if option_type == 'Call' else ('low', 'high')
+    price = {}
+    for column, source in (('open', 'open'), ('high', favourable), ('low', adverse), ('close', 'close')):
+        price[column] = option_premium(index_df[source].to_numpy(), strike, option_type, decay, iv)
+    df = pd.DataFrame({'datetime': index_df['datetime'], **{k: (v / 0.05).round() * 0.05 for k, v in price.items()}})
+    df['high'] = df[['open', 'high', 'close']].max(axis=1)
+    df['low'] = df[['open', 'low', 'close']].min(axis=1)
+    df[['open', 'high', 'low', 'close']] = df[['open', 'high', 'low', 'close']].round(2)
+    return df
+
+def generate_sessions(spec=None):
+    """
+    Synthetic sessions for benchmarking.
+
+    Args:
+        spec (dict): DEFAULT_SPEC overrides (days, strikes, volatility, seed, ...)
+
+    Returns:
+        list: One dict per session with 'date' (DDMM), 'index' (indicator frame in
+              tradeview_utc.csv layout) and 'calls' / 'puts' ({strike: option frame});
+              'call_strike' / 'put_strike' name the ATM strike written as call_out/put_out.
+    """
+    spec = {**DEFAULT_SPEC, **(spec or {})}
+    rng = np.random.default_rng(spec['SEED'])
+    calculator = _indicator_calculator()
+    step = spec['STRIKE_STEP']
+
+    sessions = []
+    price = spec['START_PRICE']
+    prev = (price * 1.004, price * 0.996, price)
+    for day in session_dates(spec['START_DATE'], spec['DAYS']):
+        open_price = price * math.exp(rng.normal(0.0, 0.003))
+        index_df = generate_index_session(day, open_price, spec['VOLATILITY'], rng)
+        for column, value in cpr_levels(*prev).items():
+            index_df[column] = value
+
+        up_trend, down_trend = calculator.calculate_supertrend(index_df, *INDICATOR_SETTINGS['SUPERTREND'])
+        index_df['EMA'] = calculator.calculate_ema(index_df, INDICATOR_SETTINGS['EMA'])
+        index_df['Up Trend'], index_df['Down Trend'] = up_trend, down_trend
+        add_oscillators(index_df, calculator)
+        index_df['time'] = pd.DatetimeIndex(index_df['datetime']).as_unit('ns').asi8 // 10**9
+
+        days_to_expiry = (spec['EXPIRY_WEEKDAY'] - day.weekday()) % 7 + 1
+        atm = int(round(open_price / step) * step)
+        offsets = range(-(spec['STRIKES'] // 2), spec['STRIKES'] - spec['STRIKES'] // 2)
+        options = {}
+        for option_type in ('Call', 'Put'):
+            options[option_type] = {
+                atm + offset * step: add_oscillators(
+                    generate_option_session(index_df, atm + offset * step, option_type, days_to_expiry, spec['OPTION_IV']),
+                    calculator)
+                for offset in offsets
+            }
+
+        sessions.append({
+            'date': day.strftime('%d%m'),
+            'index': index_df[INDEX_COLUMNS],
+            'calls': options['Call'],
+            'puts': options['Put'],
+            'call_strike': atm,
+            'put_strike': atm,
+        })
+        price = index_df['close'].iloc[-1]
+        prev = (index_df['high'].max(), index_df['low'].min(), price)
+    return sessions
+
+def write_data_root(sessions, data_root):
+    """
+    Writes sessions as processed date folders (what step 1 leaves behind):
+    DDMM/tradeview_utc.csv, DDMM/call/call_out.csv and DDMM/put/put_out.csv.
+
+    Returns:
+        list: The DDMM folders written
+    """
+    for session in sessions:
+        date_dir = os.path.join(data_root, session['date'])
+        for side in ('call', 'put'):
+            os.makedirs(os.path.join(date_dir, side), exist_ok=True)
+        index_df = session['index'].copy()
+        index_df['datetime'] = index_df['datetime'].dt.strftime('%Y-%m-%d %H:%M:%S')
+        index_df.to_csv(os.path.join(date_dir, 'tradeview_utc.csv'), index=False)
+        for side, strike in (('call', session['call_strike']), ('put', session['put_strike'])):
+            option_df = session[f'{side}s'][strike][OPTION_COLUMNS]
+            option_df.to_csv(os.path.join(date_dir, side, f'{side}_out.csv'), index=False)
+    return [session['date'] for session in sessions]
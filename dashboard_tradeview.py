@@ -1,267 +1,650 @@
+# dashboard_tradeview.py
+# Dash chart of a processed session: candles with Supertrend and CPR levels, Stochastic RSI and Williams %R.
+#
+#   python dashboard_tradeview.py                                  # static chart of ./tradeview_utc.csv
+#   python dashboard_tradeview.py --data-root data                 # date/instrument selector over the day store
+#   python dashboard_tradeview.py --data-root data --stream replay --bars-per-tick 5
+#   python dashboard_tradeview.py --data-root data --stream live --table index=NIFTY_50 --table call=NIFTY25JUL25000CE
+#   python dashboard_tradeview.py --data-root data --long-range --dates 0107-3107
+#
+# Streaming modes only send new bars to the browser (Graph.extendData); the figure is
+# built once per selected day. Long-range mode re-decimates the visible bars on every zoom.
+
+import os
+import argparse
+import sqlite3
+
+import numpy as np
+import pandas as pd
 import dash
-from dash import dcc, html
+from dash import dcc, html, Input, Output, State
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import pandas as pd
-import pytz
-
-app = dash.Dash(__name__)
-
-try:
-    df = pd.read_csv('tradeview_utc.csv')
-    df = df[df['datetime'] != 'datetime']
-    df['datetime'] = pd.to_datetime(df['datetime'], errors='coerce')
-    df = df.dropna(subset=['datetime'])
-    df['time'] = pd.to_datetime(df['time'], unit='s', utc=True)
-    ist = pytz.timezone('Asia/Kolkata')
-    df['time_ist'] = df['time'].dt.tz_convert(ist)
-    df = df[
-        (df['time_ist'].dt.time >= pd.to_datetime('09:15').time()) &
-        (df['time_ist'].dt.time <= pd.to_datetime('15:30').time())
-    ]
-    df = df.sort_values('time_ist')
-
-    df['Up Trend'] = pd.to_numeric(df['Up Trend'], errors='coerce')
-    df['Down Trend'] = pd.to_numeric(df['Down Trend'], errors='coerce')
-
-    # Create supertrend series: Up Trend where available, else Down Trend
-    supertrend = df['Up Trend'].combine_first(df['Down Trend'])
-
-    # Determine color segments for supertrend line
-    colors = ['green' if not pd.isna(u) else 'red' for u in df['Up Trend']]
-    segments = []
-    start_idx = 0
-    current_color = colors[0]
-
-    for i in range(1, len(colors)):
-        if colors[i] != current_color:
-            segments.append((start_idx, i - 1, current_color))
-            start_idx = i
-            current_color = colors[i]
-    segments.append((start_idx, len(colors) - 1, current_color))
-
-    # Create subplots with 4 rows
+
+IST = 'Asia/Kolkata'
+SESSION_START, SESSION_END = '09:15', '15:30'
+
+# Price pane overlays: (columns, colour)
+CPR_LINES = [
+    (['Daily Pivot', 'Daily BC', 'Daily TC'], 'blue'),
+    (['Daily S1', 'Daily S2', 'Daily S3', 'Daily S4'], 'red'),
+    (['Daily R1', 'Daily R2', 'Daily R3', 'Daily R4'], 'purple'),
+    (['Prev Day High', 'Prev Day Low'], 'black'),
+]
+
+# Indicator panes: row -> [(column, trace name, colour)]
+INDICATOR_TRACES = {
+    2: [('K', 'Stoch RSI %K', '#2E86AB'), ('D', 'Stoch RSI %D', '#F24236')],
+    3: [('%R', 'Williams %R(9)', 'blue')],
+    4: [('%R.1', 'Williams %R(28)', 'orange')],
+}
+INDICATOR_BANDS = {2: (80, 50, 20), 3: (-20, -50, -80), 4: (-20, -50, -80)}
+
+DEFAULT_CACHE_DIR = 'day_cache'
+INSTRUMENTS = ['index', 'call', 'put']
+
+# --- Data ---
+
+def prepare_frame(df):
+    """Session bars with an IST 'time_ist' column, sorted, numeric Supertrend columns"""
+    df = df[df['datetime'] != 'datetime'] if df['datetime'].dtype == object else df
+    df = df.assign(datetime=pd.to_datetime(df['datetime'], errors='coerce')).dropna(subset=['datetime'])
+    df['time_ist'] = df['datetime'].dt.tz_localize(IST)
+    clock = df['time_ist'].dt.strftime('%H:%M')
+    df = df[(clock >= SESSION_START) & (clock <= SESSION_END)].sort_values('time_ist')
+    for column in ('Up Trend', 'Down Trend'):
+        df[column] = pd.to_numeric(df[column], errors='coerce') if column in df.columns else np.nan
+    return df.reset_index(drop=True)
+
+def load_csv_frame(path):
+    return prepare_frame(pd.read_csv(path))
+
+def list_store_dates(data_root):
+    """DDMM folders under data_root, in calendar order"""
+    if not os.path.isdir(data_root):
+        return []
+    dates = [d for d in os.listdir(data_root) if os.path.isdir(os.path.join(data_root, d)) and d.isdigit()]
+    return sorted(dates, key=lambda d: (d[2:4], d[0:2]))
+
+def load_store_frame(data_root, date, instrument, cache_dir=DEFAULT_CACHE_DIR):
+    """One day/instrument from the columnar day store (tools/day_cache), or None"""
+    from tools.day_cache import load_day
+
+    day = load_day(data_root, date, instrument, cache_dir)
+    return prepare_frame(day.to_frame()) if day is not None else None
+
+def load_live_history(data_root, dates, today, instrument, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Bars shown before today's live candles: today's stored bars when the day is
+    already processed, else the last stored session before today (indicator
+    warm-up only, so its CPR levels are dropped), else an empty frame.
+    """
+    if today in dates:
+        df = load_store_frame(data_root, today, instrument, cache_dir)
+        if df is not None:
+            return df
+    earlier = [d for d in dates if (d[2:4], d[0:2]) < (today[2:4], today[0:2])]
+    for date in sorted(earlier, key=lambda d: (d[2:4], d[0:2]), reverse=True):
+        df = load_store_frame(data_root, date, instrument, cache_dir)
+        if df is not None:
+            return df.drop(columns=[column for columns, _ in CPR_LINES for column in columns], errors='ignore')
+    return prepare_frame(pd.DataFrame(columns=['datetime', 'open', 'high', 'low', 'close']))
+
+# --- Figure ---
+
+def build_figure(df, title=None):
+    """
+    Four-pane figure of a prepared frame.
+
+    Returns:
+        tuple: (figure, line_columns) where line_columns lists the frame column
+        behind each Scatter trace, in trace order (trace 0 is the candlestick).
+        Streaming updates use it to extend every trace with the new bars.
+    """
     fig = make_subplots(
         rows=4, cols=1,
         shared_xaxes=True,
         vertical_spacing=0.04,
         row_heights=[0.5, 0.15, 0.15, 0.15],
-        subplot_titles=(
-            'OHLC with Supertrend & CPR Levels',
-            'Stochastic RSI',
-            'Williams %R(9)',
-            'Williams %R(28)'
-        )
+        subplot_titles=('OHLC with Supertrend & CPR Levels', 'Stochastic RSI', 'Williams %R(9)', 'Williams %R(28)'),
     )
+    x = df['time_ist']
+    fig.add_trace(go.Candlestick(x=x, open=df['open'], high=df['high'], low=df['low'], close=df['close'], name='OHLC'), row=1, col=1)
 
-    # Candlestick
-    fig.add_trace(
-        go.Candlestick(
-            x=df['time_ist'],
-            open=df['open'],
-            high=df['high'],
-            low=df['low'],
-            close=df['close'],
-            name='OHLC'
-        ),
-        row=1, col=1
-    )
+    line_columns = []
 
-    # Plot supertrend segments
-    for start, end, color in segments:
-        fig.add_trace(
-            go.Scatter(
-                x=df['time_ist'].iloc[start:end+1],
-                y=supertrend.iloc[start:end+1],
-                mode='lines',
-                line=dict(color=color, width=3),
-                name='Supertrend',
-                showlegend=False
-            ),
-            row=1, col=1
-        )
-
-    # CPR lines
-    cpr_columns = ['Daily Pivot', 'Daily BC', 'Daily TC']
-    support_columns = ['Daily S1', 'Daily S2', 'Daily S3', 'Daily S4']
-    resistance_columns = ['Daily R1', 'Daily R2', 'Daily R3', 'Daily R4']
-    prev_day_columns = ['Prev Day High', 'Prev Day Low']
-
-    for col in cpr_columns:
-        if col in df.columns:
-            fig.add_trace(
-                go.Scatter(
-                    x=df['time_ist'],
-                    y=df[col],
-                    mode='lines',
-                    name=col,
-                    line=dict(color='blue', width=2, dash='dot'),
-                    connectgaps=False,
-                    showlegend=True
-                ),
-                row=1, col=1
-            )
-    for col in support_columns:
-        if col in df.columns:
-            fig.add_trace(
-                go.Scatter(
-                    x=df['time_ist'],
-                    y=df[col],
-                    mode='lines',
-                    name=col,
-                    line=dict(color='red', width=2, dash='dot'),
-                    connectgaps=False,
-                    showlegend=True
-                ),
-                row=1, col=1
-            )
-    for col in resistance_columns:
-        if col in df.columns:
-            fig.add_trace(
-                go.Scatter(
-                    x=df['time_ist'],
-                    y=df[col],
-                    mode='lines',
-                    name=col,
-                    line=dict(color='purple', width=2, dash='dot'),
-                    connectgaps=False,
-                    showlegend=True
-                ),
-                row=1, col=1
-            )
-    for col in prev_day_columns:
-        if col in df.columns:
-            fig.add_trace(
-                go.Scatter(
-                    x=df['time_ist'],
-                    y=df[col],
-                    mode='lines',
-                    name=col,
-                    line=dict(color='black', width=2, dash='dot'),
-                    connectgaps=False,
-                    showlegend=True
-                ),
-                row=1, col=1
-            )
-
-    # Stochastic RSI
-    if 'K' in df.columns:
-        fig.add_trace(
-            go.Scatter(
-                x=df['time_ist'],
-                y=df['K'],
-                mode='lines',
-                name='Stoch RSI %K',
-                line=dict(color='#2E86AB', width=2),
-                yaxis='y2'
-            ),
-            row=2, col=1
-        )
-    if 'D' in df.columns:
-        fig.add_trace(
-            go.Scatter(
-                x=df['time_ist'],
-                y=df['D'],
-                mode='lines',
-                name='Stoch RSI %D',
-                line=dict(color='#F24236', width=2),
-                yaxis='y2'
-            ),
-            row=2, col=1
-        )
-
-    # Horizontal reference lines for Stochastic RSI
-    fig.add_hline(y=80, line_dash="dash", line_color="rgba(255,0,0,0.5)", row=2, col=1, annotation_text="80")
-    fig.add_hline(y=50, line_dash="dot", line_color="rgba(128,128,128,0.5)", row=2, col=1, annotation_text="50")
-    fig.add_hline(y=20, line_dash="dash", line_color="rgba(0,128,0,0.5)", row=2, col=1, annotation_text="20")
-
-    # Williams %R(9)
-    if '%R' in df.columns:
-        fig.add_trace(
-            go.Scatter(
-                x=df['time_ist'],
-                y=df['%R'],
-                mode='lines',
-                name='Williams %R(9)',
-                line=dict(color='blue', width=2)
-            ),
-            row=3, col=1
-        )
-        fig.add_hline(y=-20, line_dash="dash", line_color="rgba(255,0,0,0.5)", row=3, col=1, annotation_text="-20")
-        fig.add_hline(y=-50, line_dash="dot", line_color="rgba(128,128,128,0.5)", row=3, col=1, annotation_text="-50")
-        fig.add_hline(y=-80, line_dash="dash", line_color="rgba(0,128,0,0.5)", row=3, col=1, annotation_text="-80")
-        fig.update_yaxes(title_text="Williams %R(9)", range=[-100, 0], row=3, col=1, showgrid=True, gridcolor='rgba(128,128,128,0.2)')
-
-    # Williams %R(28)
-    if '%R.1' in df.columns:
-        fig.add_trace(
-            go.Scatter(
-                x=df['time_ist'],
-                y=df['%R.1'],
-                mode='lines',
-                name='Williams %R(28)',
-                line=dict(color='orange', width=2)
-            ),
-            row=4, col=1
-        )
-        fig.add_hline(y=-20, line_dash="dash", line_color="rgba(255,0,0,0.5)", row=4, col=1, annotation_text="-20")
-        fig.add_hline(y=-50, line_dash="dot", line_color="rgba(128,128,128,0.5)", row=4, col=1, annotation_text="-50")
-        fig.add_hline(y=-80, line_dash="dash", line_color="rgba(0,128,0,0.5)", row=4, col=1, annotation_text="-80")
-        fig.update_yaxes(title_text="Williams %R(28)", range=[-100, 0], row=4, col=1, showgrid=True, gridcolor='rgba(128,128,128,0.2)')
-
-    # Rangebreaks for weekends and non-trading hours
-    rangebreaks = [dict(bounds=[6, 1], pattern="day of week")]
-    unique_dates = sorted(df['time_ist'].dt.date.unique())
-    for i in range(len(unique_dates) - 1):
-        current_date = unique_dates[i]
-        next_date = unique_dates[i + 1]
-        break_start = f"{current_date} 15:30:00+05:30"
-        break_end = f"{next_date} 09:15:00+05:30"
-        rangebreaks.append(dict(bounds=[break_start, break_end]))
+    def add_line(column, row, **kwargs):
+        fig.add_trace(go.Scatter(x=x, y=df[column], mode='lines', connectgaps=False, **kwargs), row=row, col=1)
+        line_columns.append(column)
+
+    # Supertrend: one trace per direction; the gaps of each split it into its segments
+    add_line('Up Trend', 1, name='Supertrend', line=dict(color='green', width=3), showlegend=False)
+    add_line('Down Trend', 1, name='Supertrend', line=dict(color='red', width=3), showlegend=False)
+    for columns, color in CPR_LINES:
+        for column in columns:
+            if column in df.columns:
+                add_line(column, 1, name=column, line=dict(color=color, width=2, dash='dot'))
 
-    date_range_str = f"{unique_dates[0]} to {unique_dates[-1]}" if len(unique_dates) > 1 else str(unique_dates[0])
+    for row, traces in INDICATOR_TRACES.items():
+        for column, name, color in traces:
+            if column in df.columns:
+                add_line(column, row, name=name, line=dict(color=color, width=2))
+        upper, middle, lower = INDICATOR_BANDS[row]
+        fig.add_hline(y=upper, line_dash="dash", line_color="rgba(255,0,0,0.5)", row=row, col=1, annotation_text=str(upper))
+        fig.add_hline(y=middle, line_dash="dot", line_color="rgba(128,128,128,0.5)", row=row, col=1, annotation_text=str(middle))
+        fig.add_hline(y=lower, line_dash="dash", line_color="rgba(0,128,0,0.5)", row=row, col=1, annotation_text=str(lower))
 
+    rangebreaks = session_rangebreaks(df)
     fig.update_layout(
-        title=f'Supertrend with CPR Levels Visualization ({date_range_str})',
+        title=title or f'Supertrend with CPR Levels Visualization ({date_range_label(df)})',
         height=1200,
         template='plotly_white',
         showlegend=True,
         xaxis_rangeslider_visible=False,
-        xaxis=dict(rangebreaks=rangebreaks)
     )
-
     fig.update_yaxes(title_text="Price", row=1, col=1)
     fig.update_yaxes(title_text="Stoch RSI", range=[0, 100], row=2, col=1, showgrid=True, gridcolor='rgba(128,128,128,0.2)')
-    fig.update_xaxes(title_text="Time (IST)", row=2, col=1)
-    fig.update_xaxes(title_text="Time (IST)", row=3, col=1)
-    fig.update_xaxes(title_text="Time (IST)", row=4, col=1)
+    fig.update_yaxes(title_text="Williams %R(9)", range=[-100, 0], row=3, col=1, showgrid=True, gridcolor='rgba(128,128,128,0.2)')
+    fig.update_yaxes(title_text="Williams %R(28)", range=[-100, 0], row=4, col=1, showgrid=True, gridcolor='rgba(128,128,128,0.2)')
+    for row in (2, 3, 4):
+        fig.update_xaxes(title_text="Time (IST)", row=row, col=1)
     fig.update_xaxes(rangebreaks=rangebreaks)
+    return fig, line_columns
+
+def session_rangebreaks(df):
+    """Weekend and overnight gaps between the sessions in df"""
+    rangebreaks = [dict(bounds=[6, 1], pattern="day of week")]
+    days = sorted(df['time_ist'].dt.date.unique()) if len(df) else []
+    for current_date, next_date in zip(days[:-1], days[1:]):
+        rangebreaks.append(dict(bounds=[f"{current_date} {SESSION_END}:00+05:30", f"{next_date} {SESSION_START}:00+05:30"]))
+    return rangebreaks
+
+def date_range_label(df):
+    days = sorted(df['time_ist'].dt.date.unique()) if len(df) else []
+    if not days:
+        return 'no data'
+    return f"{days[0]} to {days[-1]}" if len(days) > 1 else str(days[0])
+
+def _column_values(df, column):
+    values = df[column].to_numpy(dtype=float) if column in df.columns else np.full(len(df), np.nan)
+    return [None if np.isnan(v) else float(v) for v in values]
+
+def extend_updates(new_bars, line_columns, max_points=None):
+    """
+    Graph.extendData values appending new_bars to a build_figure figure.
+
+    Candles and lines take different keys, so they are two updates:
+    ([ohlc update, [0]], [x/y update, line trace indices]), each followed by
+    max_points when traces should be trimmed to a rolling window.
+    """
+    # IST wall-clock strings, matching how the figure serialises its tz-aware x values
+    x = new_bars['time_ist'].dt.strftime('%Y-%m-%d %H:%M:%S').tolist()
+    candles = {'x': [x], **{key: [_column_values(new_bars, key)] for key in ('open', 'high', 'low', 'close')}}
+    lines = {'x': [x] * len(line_columns), 'y': [_column_values(new_bars, column) for column in line_columns]}
+    indices = list(range(1, len(line_columns) + 1))
+    trim = [max_points] if max_points else []
+    return [candles, [0]] + trim, [lines, indices] + trim
+
+# --- Streaming sources ---
+
+class ReplaySource:
+    """Reveals a stored day a few bars per tick, as if the bars were arriving live"""
+
+    def __init__(self, frame, bars_per_tick=1, start_bars=60):
+        self.frame = frame
+        self.bars_per_tick = bars_per_tick
+        self.start_bars = start_bars
+        self._times_ns = pd.DatetimeIndex(frame['time_ist']).asi8
+
+    def initial(self):
+        return self.frame.iloc[:self.start_bars]
+
+    def bars_after(self, cursor):
+        start = int(np.searchsorted(self._times_ns, pd.Timestamp(cursor).value, side='right')) if cursor else 0
+        return self.frame.iloc[start:start + self.bars_per_tick]
+
+class LiveCandleSource:
+    """
+    Completed 1-minute candles built from the tick store written by
+    kiteconnect_app/live_stream_resample.py (kiteconnect_app/tick_store.py
+    layout), with indicators recomputed over a trailing window. CPR levels are
+    carried from the stored session.
+    """
+
+    INDICATOR_WINDOW = 300
+    PRICE_SCALE = 100   # tick_store.PRICE_SCALE
+
+    def __init__(self, tick_dir, symbol, history):
+        from tools.indicators import TechnicalIndicatorsCalculator
+
+        self.tick_dir = tick_dir
+        self.symbol = symbol
+        self.history = history
+        self.calculator = TechnicalIndicatorsCalculator(os.path.join('tools', 'indicators_config.ini'))
+
+    def initial(self):
+        return self.history
+
+    def start_cursor(self):
+        """Last history bar when it is from today; None (stream from today's first tick) otherwise"""
+        today = pd.Timestamp.now(tz=IST).normalize()
+        if len(self.history) and self.history['time_ist'].iloc[-1] >= today:
+            return self.history['time_ist'].iloc[-1].isoformat()
+        return None
+
+    def read_candles(self, since):
+        """1-minute OHLC of the symbol's ticks at or after `since` (IST), forming minute excluded"""
+        since = since.tz_convert(IST).tz_localize(None)
+        path = os.path.join(self.tick_dir, f"ticks_{since.strftime('%Y%m%d')}.db")
+        empty = pd.DataFrame(columns=['datetime', 'open', 'high', 'low', 'close'])
+        if not os.path.exists(path):
+            return empty
+        # ts is IST wall-clock milliseconds, price is scaled to an integer
+        with sqlite3.connect(path) as conn:
+            ticks = pd.read_sql_query(
+                "SELECT ts, price FROM ticks WHERE instrument_token = "
+                "(SELECT instrument_token FROM instruments WHERE symbol = ?) AND ts >= ?",
+                conn, params=(self.symbol, int(since.value // 1_000_000)))
+        if ticks.empty:
+            return empty
+        prices = pd.Series(ticks['price'].to_numpy() / self.PRICE_SCALE, index=pd.to_datetime(ticks['ts'], unit='ms'))
+        candles = prices.resample('1min').ohlc().dropna()
+        current_minute = pd.Timestamp.now(tz=IST).tz_localize(None).floor('1min')
+        candles = candles[candles.index < current_minute]
+        return candles.rename_axis('datetime').reset_index()
+
+    def bars_after(self, cursor):
+        since = pd.Timestamp(cursor) + pd.Timedelta(minutes=1) if cursor else pd.Timestamp.now(tz=IST).normalize()
+        candles = self.read_candles(since)
+        if candles.empty:
+            return candles
+        candles['time_ist'] = candles['datetime'].dt.tz_localize(IST)
+        self.history = pd.concat([self.history, self.add_indicators(candles)], ignore_index=True)
+        return self.history.iloc[-len(candles):]
+
+    def add_indicators(self, candles):
+        """Indicator columns for the new candles, computed over the trailing window"""
+        window = pd.concat([self.history.tail(self.INDICATOR_WINDOW), candles], ignore_index=True)
+        config = self.calculator.config
+        window['Up Trend'], window['Down Trend'] = self.calculator.calculate_supertrend(
+            window, config.getint('SUPERTREND', 'period', fallback=10), config.getfloat('SUPERTREND', 'multiplier', fallback=3.0))
+        window['K'], window['D'] = self.calculator.calculate_stochastic_rsi(
+            window, config.getint('STOCHASTIC_RSI', 'k_period', fallback=3), config.getint('STOCHASTIC_RSI', 'd_period', fallback=3),
+            config.getint('STOCHASTIC_RSI', 'rsi_period', fallback=14), config.getint('STOCHASTIC_RSI', 'stoch_period', fallback=14))
+        window['%R'] = self.calculator.calculate_williams_r(window, config.getint('WILLIAMS_R', 'period_1', fallback=9))
+        window['%R.1'] = self.calculator.calculate_williams_r(window, config.getint('WILLIAMS_R', 'period_2', fallback=28))
+        new = window.iloc[-len(candles):].copy()
+        for columns, _ in CPR_LINES:
+            for column in columns:
+                if column in self.history.columns and len(self.history):
+                    new[column] = self.history[column].iloc[-1]
+        return new
+
+# --- Long-range mode ---
+
+class LongRangeSeries:
+    """
+    Many sessions of one instrument as plain arrays, plotted against bar number.
+
+    Bar numbers (not timestamps) make overnight and weekend gaps disappear
+    without rangebreaks, which WebGL traces do not support.
+    """
+
+    def __init__(self, times_ns, columns):
+        self.times_ns = times_ns
+        self.columns = columns
+
+    @property
+    def n_bars(self):
+        return len(self.times_ns)
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+def load_store_range(data_root, dates, instrument, cache_dir=DEFAULT_CACHE_DIR):
+    """Concatenates the day store arrays of `dates` (session bars only) into a LongRangeSeries"""
+    from tools.day_cache import load_day
+
+    times, parts = [], []
+    for date in dates:
+        day = load_day(data_root, date, instrument, cache_dir)
+        if day is None:
+            continue
+        times_ns = np.asarray(day['datetime'])
+        minute_of_day = (times_ns // 60_000_000_000) % 1440
+        in_session = (minute_of_day >= 9 * 60 + 15) & (minute_of_day <= 15 * 60 + 30)
+        times.append(times_ns[in_session])
+        parts.append({column: np.asarray(day[column])[in_session] for column in day.columns})
+    if not times:
+        return None
+    columns = {}
+    for column in set().union(*parts):
+        columns[column] = np.concatenate([part.get(column, np.full(len(t), np.nan)) for part, t in zip(parts, times)])
+    return LongRangeSeries(np.concatenate(times), columns)
+
+def bucket_bounds(start, stop, max_buckets):
+    """Bucket start positions covering bars [start, stop) with at most max_buckets equal-size buckets"""
+    size = max(1, -(-(stop - start) // max_buckets))
+    return np.arange(start, stop, size), size
+
+def decimate_ohlc(series, start, stop, max_buckets):
+    """Bucketed candles (first open, max high, min low, last close) positioned at each bucket's first bar"""
+    starts, size = bucket_bounds(start, stop, max_buckets)
+    if size == 1:
+        window = slice(start, stop)
+        return starts, series['open'][window], series['high'][window], series['low'][window], series['close'][window]
+    ends = np.minimum(starts + size, stop) - 1
+    return (starts, series['open'][starts], np.maximum.reduceat(series['high'][start:stop], starts - start),
+            np.minimum.reduceat(series['low'][start:stop], starts - start), series['close'][ends])
+
+def decimate_minmax(values, start, stop, max_buckets):
+    """
+    Min/max decimation: each bucket keeps its lowest and highest point, in time
+    order, so spikes survive at any zoom level. NaN gaps stay gaps.
+
+    Returns:
+        tuple: (bar positions, values)
+    """
+    starts, size = bucket_bounds(start, stop, max_buckets)
+    window = np.asarray(values[start:stop], dtype=float)
+    if size <= 2:
+        return np.arange(start, stop), window
+    padded = np.full(len(starts) * size, np.nan)
+    padded[:len(window)] = window
+    rows = padded.reshape(len(starts), size)
+    missing = np.isnan(rows)
+    low = np.argmin(np.where(missing, np.inf, rows), axis=1)
+    high = np.argmax(np.where(missing, -np.inf, rows), axis=1)
+    picks = np.sort(np.stack([low, high], axis=1), axis=1)
+    positions = (starts[:, None] + picks).ravel()
+    y = rows[np.arange(len(starts))[:, None], picks].ravel()
+    y[missing.all(axis=1).repeat(2)] = np.nan
+    return positions, y
+
+def bar_ticks(series, start, stop, count=8):
+    """Tick positions and IST labels for the visible bars (dates when the range spans days)"""
+    positions = np.unique(np.linspace(start, max(start, stop - 1), count).astype(int))
+    stamps = pd.to_datetime(series.times_ns[positions])
+    span_days = (series.times_ns[stop - 1] - series.times_ns[start]) / 86_400e9 if stop > start else 0
+    fmt = '%d %b %Y' if span_days > 30 else '%d %b %H:%M' if span_days >= 1 else '%H:%M'
+    return positions.tolist(), stamps.strftime(fmt).tolist()
+
+def build_long_range_figure(series, x_range=None, indicators=False, max_points=2000, title=''):
+    """
+    Decimated figure of the bars in x_range (bar positions; None = everything).
+
+    Candles are bucketed to at most max_points; the Supertrend, CPR and
+    indicator lines use Scattergl with min/max decimation. Indicator panes are
+    only built (and decimated) when `indicators` is set.
+    """
+    n = series.n_bars
+    start, stop = (0, n) if x_range is None else (max(0, int(np.floor(x_range[0]))), min(n, int(np.ceil(x_range[1])) + 1))
+    stop = max(stop, start + 1)
+
+    rows = 4 if indicators else 1
+    fig = make_subplots(
+        rows=rows, cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.04,
+        row_heights=[0.5, 0.15, 0.15, 0.15] if indicators else [1.0],
+        subplot_titles=('OHLC with Supertrend & CPR Levels', 'Stochastic RSI', 'Williams %R(9)', 'Williams %R(28)')[:rows],
+    )
+    positions, open_, high, low, close = decimate_ohlc(series, start, stop, max_points)
+    fig.add_trace(go.Candlestick(x=positions, open=open_, high=high, low=low, close=close, name='OHLC'), row=1, col=1)
+
+    def add_line(column, row, **kwargs):
+        if column in series.columns:
+            x, y = decimate_minmax(series[column], start, stop, max_points)
+            fig.add_trace(go.Scattergl(x=x, y=y, mode='lines', connectgaps=False, **kwargs), row=row, col=1)
+
+    add_line('Up Trend', 1, name='Supertrend', line=dict(color='green', width=3), showlegend=False)
+    add_line('Down Trend', 1, name='Supertrend', line=dict(color='red', width=3), showlegend=False)
+    for columns, color in CPR_LINES:
+        for column in columns:
+            add_line(column, 1, name=column, line=dict(color=color, width=2, dash='dot'))
+    if indicators:
+        for row, traces in INDICATOR_TRACES.items():
+            for column, name, color in traces:
+                add_line(column, row, name=name, line=dict(color=color, width=2))
+            for level in INDICATOR_BANDS[row]:
+                fig.add_hline(y=level, line_dash="dot", line_color="rgba(128,128,128,0.5)", row=row, col=1)
+        fig.update_yaxes(range=[0, 100], row=2, col=1)
+        fig.update_yaxes(range=[-100, 0], row=3, col=1)
+        fig.update_yaxes(range=[-100, 0], row=4, col=1)
+
+    tickvals, ticktext = bar_ticks(series, start, stop)
+    fig.update_xaxes(tickvals=tickvals, ticktext=ticktext, range=[start - 0.5, stop - 0.5])
+    fig.update_layout(
+        title=title,
+        height=1200 if indicators else 700,
+        template='plotly_white',
+        showlegend=True,
+        xaxis_rangeslider_visible=False,
+        uirevision=title,
+    )
+    return fig
+
+def relayout_x_range(relayout, n_bars):
+    """Visible bar range from a Graph.relayoutData event; None for autorange, 'keep' when x did not change"""
+    if not relayout:
+        return 'keep'
+    for key, value in relayout.items():
+        if key.startswith('xaxis') and key.endswith('.autorange'):
+            return None
+    lows = [v for k, v in relayout.items() if k.startswith('xaxis') and k.endswith('.range[0]')]
+    highs = [v for k, v in relayout.items() if k.startswith('xaxis') and k.endswith('.range[1]')]
+    ranges = [v for k, v in relayout.items() if k.startswith('xaxis') and k.endswith('.range')]
+    if lows and highs:
+        return [float(lows[0]), float(highs[0])]
+    if ranges:
+        return [float(ranges[0][0]), float(ranges[0][1])]
+    return 'keep'
+
+# --- App ---
+
+def create_app(csv_path=None, data_root=None, cache_dir=DEFAULT_CACHE_DIR, stream='off', interval_ms=1000,
+               bars_per_tick=1, start_bars=60, live_tables=None, tick_dir=None, max_points=None):
+    """
+    Builds the Dash app.
+
+    With csv_path the chart is a static figure of that file (the original
+    dashboard). With data_root a date/instrument selector loads days from the
+    day store, and stream='replay'|'live' appends bars on every interval tick.
+    """
+    app = dash.Dash(__name__)
+    header = html.H1("Supertrend with CPR Levels Visualization", style={'textAlign': 'center', 'marginBottom': 30})
+
+    if data_root is None:
+        try:
+            df = load_csv_frame(csv_path)
+            fig, _ = build_figure(df)
+            app.layout = html.Div([
+                header,
+                html.Div([html.H4(f"📊 Loaded {len(df)} data points from {date_range_label(df)}", style={'color': 'green', 'textAlign': 'center'})]),
+                dcc.Graph(id='supertrend-cpr-chart', figure=fig, style={'height': '1200px'}),
+            ])
+        except Exception as e:
+            app.layout = html.Div([header, html.Div([html.H3("Error:", style={'color': 'red'}), html.P(str(e), style={'color': 'red'})])])
+        return app
+
+    dates = list_store_dates(data_root)
+    live_tables = live_tables or {}
+    sources = {}
+    # Live mode streams today's tick file, whether or not today's folder exists yet
+    today = pd.Timestamp.now(tz=IST).strftime('%d%m')
+    if stream == 'live':
+        dates = dates + [today] if today not in dates else dates
+        default_date = today
+    else:
+        default_date = dates[-1] if dates else None
+
+    app.layout = html.Div([
+        header,
+        html.Div([
+            dcc.Dropdown(id='date-select', options=dates, value=default_date, clearable=False, style={'width': '160px'}),
+            dcc.Dropdown(id='instrument-select', options=INSTRUMENTS, value='index', clearable=False, style={'width': '160px'}),
+        ], style={'display': 'flex', 'gap': '12px', 'justifyContent': 'center'}),
+        html.H4(id='data-info', style={'color': 'green', 'textAlign': 'center'}),
+        dcc.Graph(id='supertrend-cpr-chart', style={'height': '1200px'}),
+        dcc.Interval(id='stream-interval', interval=interval_ms, disabled=stream == 'off'),
+        dcc.Store(id='stream-cursor'),
+        dcc.Store(id='stream-lines'),
+    ])
+
+    @app.callback(
+        Output('supertrend-cpr-chart', 'figure'),
+        Output('stream-cursor', 'data'),
+        Output('data-info', 'children'),
+        Input('date-select', 'value'),
+        Input('instrument-select', 'value'),
+    )
+    def load_selected_day(date, instrument):
+        live = stream == 'live' and date == today and instrument in live_tables
+        if live:
+            df = load_live_history(data_root, dates, today, instrument, cache_dir)
+        else:
+            df = load_store_frame(data_root, date, instrument, cache_dir) if date else None
+        if df is None:
+            return go.Figure(), None, f"⚠️ No {instrument} data for {date}"
+        if stream == 'replay':
+            sources[(date, instrument)] = source = ReplaySource(df, bars_per_tick, start_bars)
+        elif live:
+            sources[(date, instrument)] = source = LiveCandleSource(tick_dir, live_tables[instrument], df)
+        else:
+            source = None
+        shown = source.initial() if source is not None else df
+        fig, line_columns = build_figure(shown, f"{instrument.upper()} {date}")
+        sources[(date, instrument, 'lines')] = line_columns
+        if live:
+            return fig, source.start_cursor(), f"📡 Streaming today's ticks after {len(df)} history bars ({date_range_label(df)})"
+        cursor = shown['time_ist'].iloc[-1].isoformat() if len(shown) else None
+        return fig, cursor, f"📊 {len(df)} bars from the day store ({date_range_label(df)})"
+
+    @app.callback(
+        Output('supertrend-cpr-chart', 'extendData'),
+        Output('stream-lines', 'data'),
+        Output('stream-cursor', 'data', allow_duplicate=True),
+        Input('stream-interval', 'n_intervals'),
+        State('stream-cursor', 'data'),
+        State('date-select', 'value'),
+        State('instrument-select', 'value'),
+        prevent_initial_call=True,
+    )
+    def stream_new_bars(_, cursor, date, instrument):
+        source = sources.get((date, instrument))
+        if source is None:
+            return dash.no_update, dash.no_update, dash.no_update
+        new_bars = source.bars_after(cursor)
+        if new_bars.empty:
+            return dash.no_update, dash.no_update, dash.no_update
+        candles, lines = extend_updates(new_bars, sources[(date, instrument, 'lines')], max_points)
+        return candles, lines, new_bars['time_ist'].iloc[-1].isoformat()
+
+    @app.callback(
+        Output('supertrend-cpr-chart', 'extendData', allow_duplicate=True),
+        Input('stream-lines', 'data'),
+        prevent_initial_call=True,
+    )
+    def stream_new_lines(lines):
+        # Second extendData push: the line traces take x/y, the candlestick takes OHLC
+        return lines if lines else dash.no_update
+
+    return app
+
+def create_long_range_app(data_root, dates=None, cache_dir=DEFAULT_CACHE_DIR, max_points=2000):
+    """
+    Long-range view over many sessions of the day store.
+
+    Every zoom/pan re-decimates the visible bars on the server, so the browser
+    never holds more than about max_points points per trace. Indicator panes
+    load on demand.
+    """
+    from app import select_dates
+
+    app = dash.Dash(__name__)
+    selected = select_dates(list_store_dates(data_root), dates)
+    series_cache = {}
+
+    def get_series(instrument):
+        if instrument not in series_cache:
+            series_cache[instrument] = load_store_range(data_root, selected, instrument, cache_dir)
+        return series_cache[instrument]
+
+    app.layout = html.Div([
+        html.H1("Supertrend with CPR Levels - Long Range", style={'textAlign': 'center', 'marginBottom': 30}),
+        html.Div([
+            dcc.Dropdown(id='instrument-select', options=INSTRUMENTS, value='index', clearable=False, style={'width': '160px'}),
+            dcc.Checklist(id='indicator-toggle', options=[{'label': ' Indicator panes', 'value': 'on'}], value=[]),
+        ], style={'display': 'flex', 'gap': '12px', 'justifyContent': 'center', 'alignItems': 'center'}),
+        html.H4(id='data-info', style={'color': 'green', 'textAlign': 'center'}),
+        dcc.Graph(id='long-range-chart', config={'scrollZoom': True}),
+    ])
+
+    @app.callback(
+        Output('long-range-chart', 'figure'),
+        Output('data-info', 'children'),
+        Input('instrument-select', 'value'),
+        Input('indicator-toggle', 'value'),
+        Input('long-range-chart', 'relayoutData'),
+        State('long-range-chart', 'figure'),
+    )
+    def render_visible_range(instrument, toggle, relayout, figure):
+        series = get_series(instrument)
+        if series is None:
+            return go.Figure(), f"⚠️ No {instrument} data for {len(selected)} dates"
+        x_range = None
+        if dash.ctx.triggered_id == 'long-range-chart':
+            x_range = relayout_x_range(relayout, series.n_bars)
+            if x_range == 'keep':
+                return dash.no_update, dash.no_update
+        elif figure:
+            # Keep the current zoom when the instrument or the panes change
+            x_range = figure.get('layout', {}).get('xaxis', {}).get('range')
+        fig = build_long_range_figure(series, x_range, 'on' in (toggle or []), max_points, f"{instrument.upper()} ({len(selected)} sessions)")
+        shown = sum(len(trace.x) for trace in fig.data[:1])
+        return fig, f"📊 {series.n_bars} bars, {shown} candles shown"
+
+    return app
+
+def parse_tables(specs):
+    """['index=NIFTY_50', 'call=NIFTY25JUL25000CE'] -> {instrument: tick store symbol}"""
+    tables = {}
+    for spec in specs or []:
+        instrument, _, table = spec.partition('=')
+        if instrument not in INSTRUMENTS or not table:
+            raise ValueError(f"--table expects instrument=SYMBOL with instrument in {INSTRUMENTS}: '{spec}'")
+        tables[instrument] = table
+    return tables
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dash chart of processed sessions, static or streaming")
+    parser.add_argument('--csv', default='tradeview_utc.csv', help="Processed file for the static chart (without --data-root)")
+    parser.add_argument('--data-root', help="Data folder of DDMM sessions; enables the date selector")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--stream', choices=['off', 'replay', 'live'], default='off')
+    parser.add_argument('--interval-ms', type=int, default=1000, help="Streaming refresh interval")
+    parser.add_argument('--bars-per-tick', type=int, default=1, help="Replay: bars revealed per refresh")
+    parser.add_argument('--replay-start', type=int, default=60, help="Replay: bars shown before streaming starts")
+    parser.add_argument('--table', action='append', help="Live: instrument=SYMBOL in the tick store (repeatable)")
+    parser.add_argument('--tick-dir', default=os.path.join('kiteconnect_app', 'db'), help="Live: tick store directory (one file per day)")
+    parser.add_argument('--max-points', type=int, help="Streaming: points kept per trace; long range: points drawn per trace (default 2000)")
+    parser.add_argument('--long-range', action='store_true', help="Decimated WebGL view over many sessions (needs --data-root)")
+    parser.add_argument('--dates', help="Long range: DDMM selection, e.g. 0107-3107 or *07 (default: every date)")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8050)
+    parser.add_argument('--debug', action=argparse.BooleanOptionalAction, default=True)
+    args = parser.parse_args(argv)
+
+    if args.long_range:
+        if not args.data_root:
+            parser.error("--long-range needs --data-root")
+        app = create_long_range_app(args.data_root, args.dates, args.cache_dir, args.max_points or 2000)
+        app.run(debug=args.debug, host=args.host, port=args.port)
+        return
 
-    data_loaded = True
-    error_message = ""
-    data_info = f"Loaded {len(df)} data points from {date_range_str}"
-
-except Exception as e:
-    data_loaded = False
-    error_message = str(e)
-    fig = go.Figure()
-    data_info = "Error loading data"
-
-app.layout = html.Div([
-    html.H1("Supertrend with CPR Levels Visualization", style={'textAlign': 'center', 'marginBottom': 30}),
-    html.Div([
-        html.H4(f"📊 {data_info}", style={'color': 'green', 'textAlign': 'center'})
-    ]) if data_loaded else html.Div(),
-    html.Div([
-        html.H3("Error:", style={'color': 'red'}) if not data_loaded else "",
-        html.P(error_message, style={'color': 'red'}) if not data_loaded else ""
-    ]) if not data_loaded else html.Div(),
-    dcc.Graph(
-        id='supertrend-cpr-chart',
-        figure=fig,
-        style={'height': '1200px'}
-    ) if data_loaded else html.Div(),
-])
+    app = create_app(None if args.data_root else args.csv, args.data_root, args.cache_dir, args.stream, args.interval_ms,
+                     args.bars_per_tick, args.replay_start, parse_tables(args.table), args.tick_dir, args.max_points)
+    app.run(debug=args.debug, host=args.host, port=args.port)
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=8050)
\ No newline at end of file
+    main()
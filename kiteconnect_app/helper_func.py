@@ -1,6 +1,6 @@
 import pandas as pd
 import yaml
-from kiteconnect import KiteConnect
+from kite_client import get_kite_client
 from datetime import datetime, timedelta
 import numpy as np
 from technical_indicators import TechnicalIndicators
@@ -8,26 +8,12 @@ from technical_indicators import TechnicalIndicators
 # Function to initialize Kite Connect API
 def initialize_kiteconnect():
     """
-    Initializes the Kite Connect API using the API key and access token.
+    Returns the shared Kite Connect client (see kite_client.get_kite_client).
 
     Returns:
-        kite (KiteConnect): An instance of the KiteConnect API.
+        kite (KiteConnect): An instance of the KiteConnect API, or None on error.
     """
-    try:
-        # Read access token and API key from files
-        access_token = open("../key_secrets/access_token.txt", 'r').read().strip()
-        key_secret = open("../key_secrets/api_key.txt", 'r').read().split()
-
-        # Initialize Kite Connect
-        kite = KiteConnect(api_key=key_secret[0])
-        kite.set_access_token(access_token)
-        return kite
-    except FileNotFoundError as e:
-        print(f"Error: Missing API key or access token file. {e}")
-        return None
-    except Exception as e:
-        print(f"Error initializing Kite Connect: {e}")
-        return None
+    return get_kite_client()
 
 # Function to fetch instrument_token for a given trading symbol
 def get_instrument_token(kite, trading_symbol, segment="NFO"):
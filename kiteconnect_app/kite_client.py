@@ -0,0 +1,229 @@
+# kiteconnect_app/kite_client.py
+# Shared Kite Connect client: credentials read once, a pooled HTTP session, and an asyncio
+# interface (historical_data, ltp, quote, orders) with batching and per-endpoint rate limits.
+#
+#   from kite_client import get_kite_client, AsyncKiteClient
+#
+#   kite = get_kite_client()                       # blocking KiteConnect (shared instance)
+#
+#   async with AsyncKiteClient() as client:        # or AsyncKiteClient(backend=FakeKiteBackend())
+#       prices = await client.ltp(chain_symbols)   # one request per 1000 instruments
+#       candles = await client.historical_data(token, from_date, to_date, "minute")
+
+import os
+import math
+import time
+import asyncio
+import functools
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+KEY_DIR = os.environ.get("KITE_KEY_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "key_secrets"))
+
+# Kite limits: instruments per quote/ltp call and requests per second per limit group
+# (ltp and quote share the quote limit, order changes share the order placement limit)
+MAX_INSTRUMENTS = {'quote': 500, 'ltp': 1000}
+RATE_LIMITS = {'quote': 1.0, 'historical_data': 3.0, 'place_order': 10.0}
+LIMIT_GROUPS = {'ltp': 'quote', 'modify_order': 'place_order', 'cancel_order': 'place_order'}
+RATE_BURSTS = {'place_order': 10}    # a batch of up to 10 orders goes out at once
+
+# HTTP connection pool of the shared session (requests HTTPAdapter settings)
+POOL = {'pool_connections': 4, 'pool_maxsize': 16, 'max_retries': 0, 'pool_block': False}
+
+@functools.lru_cache(maxsize=None)
+def load_credentials(key_dir=KEY_DIR):
+    """(api_key, api_secret, access_token) from key_secrets/api_key.txt and access_token.txt, read once"""
+    with open(os.path.join(key_dir, "api_key.txt"), 'r') as f:
+        key_secret = f.read().split()
+    with open(os.path.join(key_dir, "access_token.txt"), 'r') as f:
+        access_token = f.read().strip()
+    return key_secret[0], key_secret[1] if len(key_secret) > 1 else None, access_token
+
+@functools.lru_cache(maxsize=None)
+def _shared_client(key_dir):
+    from kiteconnect import KiteConnect
+
+    api_key, _, access_token = load_credentials(key_dir)
+    kite = KiteConnect(api_key=api_key, pool=POOL)
+    kite.set_access_token(access_token)
+    return kite
+
+def get_kite_client(key_dir=KEY_DIR):
+    """
+    Returns the shared, authenticated KiteConnect client (one pooled HTTP session
+    per process), or None when the credentials cannot be read.
+    """
+    try:
+        kite = _shared_client(key_dir)
+        print("Kite client initialized successfully.")
+        return kite
+    except Exception as e:
+        print(f"Error during authentication: {e}")
+        return None
+
+class RateLimiter:
+    """Async token bucket: at most `rate` acquisitions per second (bursts up to `burst`)"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class FakeKiteBackend:
+    """
+    Offline stand-in for KiteConnect (same method names and response shapes).
+
+    Prices follow a deterministic walk per instrument around `prices`
+    (symbol -> base price); every call is recorded in `calls` so tests can
+    assert how many requests were made.
+    """
+
+    def __init__(self, prices=None, default_price=100.0, latency_s=0.0):
+        self.prices = dict(prices or {})
+        self.default_price = default_price
+        self.latency_s = latency_s
+        self.calls = []
+        self._orders = []
+
+    def _price(self, instrument, at=None):
+        base = self.prices.get(instrument, self.default_price)
+        step = int((at or datetime.now()).timestamp()) // 60
+        wobble = math.sin(step * 0.7 + zlib.crc32(str(instrument).encode()) % 97)
+        return round(base * (1 + 0.002 * wobble) * 20) / 20
+
+    def _record(self, method, payload):
+        self.calls.append((method, payload))
+        if self.latency_s:
+            time.sleep(self.latency_s)
+
+    def ltp(self, *instruments):
+        instruments = list(instruments[0]) if len(instruments) == 1 and isinstance(instruments[0], (list, tuple)) else list(instruments)
+        self._record('ltp', instruments)
+        return {i: {'instrument_token': zlib.crc32(i.encode()) % 10**7, 'last_price': self._price(i)} for i in instruments}
+
+    def quote(self, *instruments):
+        instruments = list(instruments[0]) if len(instruments) == 1 and isinstance(instruments[0], (list, tuple)) else list(instruments)
+        self._record('quote', instruments)
+        quotes = {}
+        for i in instruments:
+            price = self._price(i)
+            quotes[i] = {
+                'instrument_token': zlib.crc32(i.encode()) % 10**7, 'last_price': price, 'volume': 0, 'oi': 0,
+                'ohlc': {'open': price, 'high': price, 'low': price, 'close': price},
+                'depth': {'buy': [{'price': price - 0.05, 'quantity': 75, 'orders': 1}],
+                          'sell': [{'price': price + 0.05, 'quantity': 75, 'orders': 1}]},
+            }
+        return quotes
+
+    def historical_data(self, instrument_token, from_date, to_date, interval, continuous=False, oi=False):
+        self._record('historical_data', (instrument_token, from_date, to_date, interval))
+        minutes = {'minute': 1, '3minute': 3, '5minute': 5, '10minute': 10, '15minute': 15,
+                   '30minute': 30, '60minute': 60}.get(interval, 1)
+        start = datetime.fromisoformat(str(from_date)).replace(second=0, microsecond=0)
+        end = datetime.fromisoformat(str(to_date))
+        candles, at = [], start
+        while at < end:
+            price = self._price(instrument_token, at)
+            candles.append({'date': at, 'open': price, 'high': price + 0.5, 'low': price - 0.5, 'close': price, 'volume': 0})
+            at += timedelta(minutes=minutes)
+        return candles
+
+    def place_order(self, variety, exchange, tradingsymbol, transaction_type, quantity, product, order_type,
+                    price=None, tag=None, **params):
+        """Fills market orders at once at the current price; limit orders at their price"""
+        self._record('place_order', (tradingsymbol, transaction_type, quantity, order_type, price))
+        order_id = f"{250000000000000 + len(self._orders)}"
+        fill = price if order_type == 'LIMIT' and price else self._price(f"{exchange}:{tradingsymbol}")
+        now = datetime.now()
+        self._orders.append({
+            'order_id': order_id, 'status': 'COMPLETE', 'exchange': exchange, 'tradingsymbol': tradingsymbol,
+            'transaction_type': transaction_type, 'quantity': quantity, 'filled_quantity': quantity,
+            'order_type': order_type, 'price': price or 0, 'average_price': fill, 'tag': tag,
+            'order_timestamp': now, 'exchange_timestamp': now,
+        })
+        return order_id
+
+    def orders(self):
+        self._record('orders', None)
+        return [dict(order) for order in self._orders]
+
+class AsyncKiteClient:
+    """
+    asyncio interface over a KiteConnect-compatible backend.
+
+    Blocking backend calls run on a small thread pool sharing the backend's
+    pooled HTTP session; each endpoint has its own rate limiter, and ltp/quote
+    split large instrument lists into the fewest requests Kite allows and run
+    them concurrently.
+    """
+
+    def __init__(self, backend=None, key_dir=KEY_DIR, max_workers=4, rate_limits=None):
+        self.backend = backend if backend is not None else _shared_client(key_dir)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kite")
+        limits = dict(RATE_LIMITS, **(rate_limits or {}))
+        self._limiters = {endpoint: RateLimiter(rate, RATE_BURSTS.get(endpoint, 1)) for endpoint, rate in limits.items()}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+    async def _call(self, endpoint, *args, **kwargs):
+        limiter = self._limiters.get(LIMIT_GROUPS.get(endpoint, endpoint))
+        if limiter is not None:
+            await limiter.acquire()
+        method = getattr(self.backend, endpoint)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, functools.partial(method, *args, **kwargs))
+
+    async def _batched(self, endpoint, instruments):
+        instruments = list(dict.fromkeys(instruments))
+        size = MAX_INSTRUMENTS[endpoint]
+        chunks = [instruments[i:i + size] for i in range(0, len(instruments), size)]
+        results = await asyncio.gather(*(self._call(endpoint, chunk) for chunk in chunks))
+        merged = {}
+        for result in results:
+            merged.update(result or {})
+        return merged
+
+    async def ltp(self, instruments):
+        """{'NFO:NIFTY25JUL25000CE': {'instrument_token', 'last_price'}, ...} for any number of instruments"""
+        return await self._batched('ltp', [instruments] if isinstance(instruments, str) else instruments)
+
+    async def quote(self, instruments):
+        """Full quotes (ohlc, depth, oi, ...) for any number of instruments"""
+        return await self._batched('quote', [instruments] if isinstance(instruments, str) else instruments)
+
+    async def historical_data(self, instrument_token, from_date, to_date, interval, continuous=False, oi=False):
+        """Candles as a list of dicts (date, open, high, low, close, volume)"""
+        return await self._call('historical_data', instrument_token, from_date, to_date, interval, continuous, oi)
+
+    async def place_order(self, **params):
+        """Order id of a new order (KiteConnect.place_order keyword arguments)"""
+        return await self._call('place_order', **params)
+
+    async def orders(self):
+        """The day's orders with status, filled_quantity and average_price"""
+        return await self._call('orders')
+
+    async def historical_many(self, instrument_tokens, from_date, to_date, interval):
+        """{token: candles} for several instruments, fetched concurrently within the rate limit"""
+        results = await asyncio.gather(*(self.historical_data(t, from_date, to_date, interval) for t in instrument_tokens))
+        return dict(zip(instrument_tokens, results))
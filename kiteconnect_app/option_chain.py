@@ -0,0 +1,348 @@
+# kiteconnect_app/option_chain.py
+# Live NIFTY option chain: ±N strikes around ATM, re-centred as NIFTY moves, with the last M minutes
+# of every strike's 1-minute candles (and oscillators) in a fixed-size NumPy ring buffer.
+#
+#   python option_chain.py --strikes 10 --minutes 120             # poll Kite LTP once a second
+#   python option_chain.py --fake --seconds 180                    # offline, FakeKiteBackend
+#
+# Signal code reads zero-copy views (chain.view(strike, 'CE') -> dict of arrays, accepted by
+# strategies.signal_engine.build_rule_context) and picks strikes with in-memory lookups.
+
+import time
+import asyncio
+import argparse
+from datetime import datetime, date, timedelta
+
+import numpy as np
+import pandas as pd
+
+SPOT_SYMBOL = "NSE:NIFTY 50"
+STRIKE_STEP = 50
+OPTION_TYPES = ('CE', 'PE')
+FIELDS = ('open', 'high', 'low', 'close', 'K', 'D', '%R', '%R.1')
+
+# Oscillator settings, as in tools/indicators_config.ini
+STOCH_RSI = {'k_period': 3, 'd_period': 3, 'rsi_period': 14, 'stoch_period': 14}
+WILLIAMS_R = (9, 28)
+
+def load_chain_instruments(instruments_csv="nfo_instruments.csv", name="NIFTY", expiry=None):
+    """
+    {(strike, 'CE'|'PE'): (instrument_token, 'NFO:TRADINGSYMBOL')} for one expiry.
+
+    expiry defaults to the nearest expiry on or after today (taken from the
+    instruments file, so holiday-shifted and non-Thursday expiries are handled).
+    """
+    df = pd.read_csv(instruments_csv)
+    df = df[(df['name'] == name) & df['instrument_type'].isin(OPTION_TYPES)].copy()
+    df['expiry'] = pd.to_datetime(df['expiry']).dt.date
+    if expiry is None:
+        upcoming = df.loc[df['expiry'] >= date.today(), 'expiry']
+        if upcoming.empty:
+            expiry = df['expiry'].max()
+            print(f"⚠️  No {name} expiry on or after today in {instruments_csv}; using {expiry} (refresh the file)")
+        else:
+            expiry = upcoming.min()
+    df = df[df['expiry'] == expiry]
+    keys = zip(df['strike'].astype(int), df['instrument_type'])
+    values = zip(df['instrument_token'].astype(int), 'NFO:' + df['tradingsymbol'])
+    return dict(zip(keys, values)), expiry
+
+def chain_oscillators(high, low, close):
+    """
+    Stochastic RSI (K, D) and Williams %R (9, 28) along axis 1 of (series x bars) arrays.
+
+    Same formulas as tools/indicators.py, computed for every strike in one pass.
+    """
+    close_df, high_df, low_df = pd.DataFrame(close.T), pd.DataFrame(high.T), pd.DataFrame(low.T)
+    delta = close_df.diff()
+    alpha = 1.0 / STOCH_RSI['rsi_period']
+    avg_gain = delta.clip(lower=0).ewm(alpha=alpha, adjust=False).mean()
+    avg_loss = (-delta.clip(upper=0)).ewm(alpha=alpha, adjust=False).mean()
+    rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    rsi_min = rsi.rolling(STOCH_RSI['stoch_period']).min()
+    rsi_range = rsi.rolling(STOCH_RSI['stoch_period']).max() - rsi_min
+    stoch = ((rsi - rsi_min) / rsi_range * 100).where(rsi_range != 0, 50).where(rsi.notna() & rsi_min.notna())
+    k = stoch.rolling(STOCH_RSI['k_period']).mean()
+    d = k.rolling(STOCH_RSI['d_period']).mean()
+    result = {'K': k.to_numpy().T, 'D': d.to_numpy().T}
+    for column, period in zip(('%R', '%R.1'), WILLIAMS_R):
+        high_max = high_df.rolling(period).max()
+        low_min = low_df.rolling(period).min()
+        result[column] = (-100 * (high_max - close_df) / (high_max - low_min)).to_numpy().T
+    return result
+
+class CandleRing:
+    """
+    Last `minutes` 1-minute rows of every slot, in a buffer written twice (at i
+    and i + minutes) so the latest window is always one contiguous slice:
+    views never copy, however often the ring wraps.
+    """
+
+    def __init__(self, slots, minutes, fields=FIELDS):
+        self.minutes = minutes
+        self.fields = {name: i for i, name in enumerate(fields)}
+        self.data = np.full((slots, len(fields), 2 * minutes), np.nan)
+        self.times = np.zeros(2 * minutes, dtype='datetime64[m]')
+        self.count = 0
+
+    def append(self, minute, rows):
+        """rows: (slots x fields) values of one minute"""
+        position = self.count % self.minutes
+        for index in (position, position + self.minutes):
+            self.data[:, :, index] = rows
+            self.times[index] = minute
+        self.count += 1
+
+    def window(self):
+        """Slice of the latest min(count, minutes) rows"""
+        length = min(self.count, self.minutes)
+        end = (self.count - 1) % self.minutes + self.minutes + 1 if self.count else 0
+        return slice(end - length, end)
+
+    def field(self, slot, name):
+        """Zero-copy view of one slot's field over the window"""
+        return self.data[slot, self.fields[name], self.window()]
+
+    def write_back(self, start, columns):
+        """Overwrites fields from buffer index `start` on (both copies); columns: field index -> (slots x n) values"""
+        for field, values in columns.items():
+            index = np.arange(start, start + values.shape[1])
+            self.data[:, field, index] = values
+            self.data[:, field, np.where(index >= self.minutes, index - self.minutes, index + self.minutes)] = values
+
+    def clear_slot(self, slot):
+        self.data[slot] = np.nan
+
+class OptionChainSnapshotter:
+    """
+    Tracks the strikes within ±strikes_each_side of ATM for CE and PE.
+
+    Every price update feeds the forming 1-minute candle of each tracked
+    strike; at the minute boundary the candles (and oscillators over the
+    window) go into the ring. When ATM moves, strikes that left the band give
+    their slot to the strikes that entered it (spare slots delay eviction so
+    history survives small moves back and forth).
+    """
+
+    def __init__(self, instruments, strikes_each_side=10, minutes=120, step=STRIKE_STEP, spare_slots=4):
+        self.instruments = instruments
+        self.strikes_each_side = strikes_each_side
+        self.step = step
+        n_slots = (2 * strikes_each_side + 1 + spare_slots) * len(OPTION_TYPES)
+        self.ring = CandleRing(n_slots, minutes)
+        self.slot_of = {}                       # (strike, type) -> slot
+        self.free_slots = list(range(n_slots))[::-1]
+        self.atm = None
+        self.spot = None
+        self.current_minute = None
+        self.forming = np.full((n_slots, 4), np.nan)    # open, high, low, close of the forming minute
+
+    # --- strike band ---
+
+    def band(self, atm=None):
+        atm = self.atm if atm is None else atm
+        offsets = np.arange(-self.strikes_each_side, self.strikes_each_side + 1) * self.step
+        return [(int(atm + offset), option_type) for offset in offsets for option_type in OPTION_TYPES
+                if (int(atm + offset), option_type) in self.instruments]
+
+    def recenter(self, spot):
+        """Moves the tracked band to the ATM strike of `spot`; True when the band changed"""
+        self.spot = spot
+        atm = int(round(spot / self.step) * self.step)
+        if atm == self.atm:
+            return False
+        self.atm = atm
+        wanted = self.band()
+        wanted_set = set(wanted)
+        for key in wanted:
+            if key in self.slot_of:
+                continue
+            if not self.free_slots:
+                # Evict the tracked strike farthest from ATM that is no longer wanted
+                stale = [k for k in self.slot_of if k not in wanted_set]
+                farthest = max(stale, key=lambda k: abs(k[0] - atm))
+                self.free_slots.append(self.slot_of.pop(farthest))
+            slot = self.free_slots.pop()
+            self.ring.clear_slot(slot)
+            self.forming[slot] = np.nan
+            self.slot_of[key] = slot
+        return True
+
+    def tracked_symbols(self):
+        """Kite symbols to poll: spot plus every strike in the current band"""
+        return [SPOT_SYMBOL] + [self.instruments[key][1] for key in self.band()] if self.atm is not None else [SPOT_SYMBOL]
+
+    # --- updates ---
+
+    def update(self, timestamp, prices):
+        """
+        Feeds one snapshot of prices ({kite symbol: last price}, spot included).
+
+        Closes the previous minute first when `timestamp` is in a new minute.
+        """
+        minute = np.datetime64(pd.Timestamp(timestamp).floor('1min').to_datetime64(), 'm')
+        if self.current_minute is not None and minute > self.current_minute:
+            self.close_minute()
+        self.current_minute = minute
+        if SPOT_SYMBOL in prices:
+            self.recenter(prices[SPOT_SYMBOL])
+
+        slots, values = [], []
+        for key, slot in self.slot_of.items():
+            price = prices.get(self.instruments[key][1])
+            if price is not None:
+                slots.append(slot)
+                values.append(price)
+        if not slots:
+            return
+        slots, values = np.array(slots), np.array(values, dtype=float)
+        forming = self.forming[slots]
+        new = np.isnan(forming[:, 0])
+        forming[new, 0] = values[new]
+        forming[:, 1] = np.fmax(forming[:, 1], values)
+        forming[:, 2] = np.fmin(forming[:, 2], values)
+        forming[:, 3] = values
+        self.forming[slots] = forming
+
+    def close_minute(self):
+        """Appends the forming candles (NaN for strikes without prices) and their oscillators to the ring"""
+        rows = np.full((self.forming.shape[0], len(FIELDS)), np.nan)
+        rows[:, :4] = self.forming
+        self.ring.append(self.current_minute, rows)
+        self.forming[:] = np.nan
+        self._refresh_oscillators()
+
+    def _refresh_oscillators(self):
+        fields, window = self.ring.fields, self.ring.window()
+        data = self.ring.data[:, :, window]
+        oscillators = chain_oscillators(data[:, fields['high']], data[:, fields['low']], data[:, fields['close']])
+        self.ring.write_back(window.stop - 1, {fields[name]: values[:, -1:] for name, values in oscillators.items()})
+
+    def load_history(self, candles, until=None):
+        """
+        Seeds the ring from historical minute candles ({(strike, type): [kite candle dicts]}),
+        e.g. AsyncKiteClient.historical_many over the band at startup.
+
+        Candles at or after the minute of `until` (the minute still forming) are
+        dropped: live updates build that minute.
+        """
+        frames = {key: pd.DataFrame(rows).set_index('date') for key, rows in candles.items() if rows and key in self.slot_of}
+        if not frames:
+            return
+        minutes = sorted(set().union(*(frame.index for frame in frames.values())))
+        if until is not None:
+            forming_minute = pd.Timestamp(until).floor('1min').tz_localize(None)
+            minutes = [minute for minute in minutes if pd.Timestamp(minute).tz_localize(None) < forming_minute]
+        minutes = minutes[-self.ring.minutes:]
+        for minute in minutes:
+            rows = np.full((self.forming.shape[0], len(FIELDS)), np.nan)
+            for key, frame in frames.items():
+                if minute in frame.index:
+                    rows[self.slot_of[key], :4] = frame.loc[minute, ['open', 'high', 'low', 'close']].to_numpy(dtype=float)
+            self.ring.append(np.datetime64(pd.Timestamp(minute).tz_localize(None).to_datetime64(), 'm'), rows)
+        self.current_minute = None  # The next update starts the forming minute
+        if minutes:
+            self._refresh_all_oscillators()
+
+    def _refresh_all_oscillators(self):
+        fields, window = self.ring.fields, self.ring.window()
+        data = self.ring.data[:, :, window]
+        oscillators = chain_oscillators(data[:, fields['high']], data[:, fields['low']], data[:, fields['close']])
+        self.ring.write_back(window.start, {fields[name]: values for name, values in oscillators.items()})
+
+    # --- lookups (no API calls) ---
+
+    def strike_at(self, option_type, offset=0):
+        """Strike `offset` steps from ATM (positive = higher strike), if tracked"""
+        strike = self.atm + offset * self.step
+        return strike if (strike, option_type) in self.slot_of else None
+
+    def instrument(self, strike, option_type):
+        """(instrument_token, kite symbol) of a strike"""
+        return self.instruments[(strike, option_type)]
+
+    def view(self, strike, option_type):
+        """Zero-copy {field: array} of the strike's last minutes (oldest first), plus 'datetime'"""
+        slot = self.slot_of[(strike, option_type)]
+        arrays = {name: self.ring.field(slot, name) for name in FIELDS}
+        arrays['datetime'] = self.ring.times[self.ring.window()]
+        return arrays
+
+    def latest(self, strike, option_type):
+        """Forming-minute close if the strike traded this minute, else the last closed candle's close"""
+        slot = self.slot_of[(strike, option_type)]
+        if not np.isnan(self.forming[slot, 3]):
+            return float(self.forming[slot, 3])
+        closes = self.ring.field(slot, 'close')
+        return float(closes[-1]) if len(closes) else float('nan')
+
+    def summary(self):
+        """Current band as a DataFrame: strike, type, symbol, last price, bars held"""
+        rows = []
+        for strike, option_type in self.band():
+            slot = self.slot_of.get((strike, option_type))
+            closes = self.ring.field(slot, 'close')
+            rows.append({'strike': strike, 'type': option_type, 'symbol': self.instruments[(strike, option_type)][1],
+                         'last': self.latest(strike, option_type), 'bars': int(np.count_nonzero(~np.isnan(closes)))})
+        return pd.DataFrame(rows)
+
+async def run_snapshotter(chain, client, seconds=None, interval_s=1.0, backfill=True):
+    """
+    Polls spot and the whole band with one batched LTP call per interval and
+    feeds the chain. Optionally seeds the ring with history first.
+    """
+    quote = await client.ltp([SPOT_SYMBOL])
+    chain.recenter(quote[SPOT_SYMBOL]['last_price'])
+    if backfill:
+        now = datetime.now()
+        tokens = {chain.instruments[key][0]: key for key in chain.band()}
+        history = await client.historical_many(list(tokens), now - timedelta(minutes=chain.ring.minutes), now, "minute")
+        chain.load_history({tokens[token]: candles for token, candles in history.items()}, until=now)
+
+    started = time.monotonic()
+    while seconds is None or time.monotonic() - started < seconds:
+        tick_started = time.monotonic()
+        quotes = await client.ltp(chain.tracked_symbols())
+        chain.update(datetime.now(), {symbol: q['last_price'] for symbol, q in quotes.items()})
+        await asyncio.sleep(max(0.0, interval_s - (time.monotonic() - tick_started)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Track the NIFTY option chain around ATM in memory")
+    parser.add_argument('--strikes', type=int, default=10, help="Strikes each side of ATM")
+    parser.add_argument('--minutes', type=int, default=120, help="Minutes of candles kept per strike")
+    parser.add_argument('--seconds', type=float, default=None, help="Stop after this many seconds")
+    parser.add_argument('--instruments', default="nfo_instruments.csv")
+    parser.add_argument('--fake', action='store_true', help="Use the offline FakeKiteBackend")
+    args = parser.parse_args()
+
+    from kite_client import AsyncKiteClient, FakeKiteBackend
+
+    instruments, expiry = load_chain_instruments(args.instruments, expiry=None)
+    print(f"Chain expiry {expiry}: {len(instruments)} contracts")
+    chain = OptionChainSnapshotter(instruments, args.strikes, args.minutes)
+
+    async def run():
+        backend = None
+        if args.fake:
+            strikes = sorted({strike for strike, _ in instruments})
+            backend = FakeKiteBackend({SPOT_SYMBOL: strikes[len(strikes) // 2]})
+        async with AsyncKiteClient(backend=backend) as client:
+            await run_snapshotter(chain, client, args.seconds)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    print(chain.summary().to_string(index=False))
+
+    # Backfilled and live minutes must not overlap
+    band = chain.band() if chain.atm is not None else []
+    if band:
+        times = chain.view(*band[0])['datetime']
+        if (np.diff(times) > np.timedelta64(0, 'm')).all():
+            print(f"✓ {len(times)} minutes held, timestamps strictly increasing")
+        else:
+            print(f"❌ Repeated or out-of-order minutes in the ring: {times}")
+
+if __name__ == "__main__":
+    main()
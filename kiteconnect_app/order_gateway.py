@@ -0,0 +1,427 @@
+# kiteconnect_app/order_gateway.py
+# Async order gateway: one interface for Kite and for a local mock exchange that fills against
+# ticks replayed from the tick store, with every hop of an order timestamped.
+#
+#   signal -> submit -> sent -> ack -> fill
+#     signal: strategy decided          sent: request handed to the broker/exchange
+#     submit: order given to gateway    ack:  order id received      fill: fill reported
+#
+#   python order_gateway.py mock --date 2025-07-21 --ack-ms 20 --fill-ms 30 --slippage-ticks 1
+#   python order_gateway.py kite --fake --orders 20
+#
+#   async with MockOrderGateway(MockExchange.from_tick_store("db", "2025-07-21")) as gateway:
+#       order = await gateway.submit(Order("NFO:NIFTY25JUL25000CE", "BUY", 75))
+#       await gateway.wait_filled([order])
+#       print(gateway.latency_report())
+
+import time
+import asyncio
+import argparse
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from tick_store import read_ticks
+
+ORDER_HOPS = ('signal', 'submit', 'sent', 'ack', 'fill')
+SIDE_SIGN = {'BUY': 1, 'SELL': -1}
+TICK_SIZE = 0.05
+
+class Order:
+    """
+    One order and its hop timestamps (time.time() seconds in `hops`).
+
+    symbol is 'EXCHANGE:TRADINGSYMBOL'; reference_price is the price the
+    strategy saw at the signal, so fills can be compared with it.
+    """
+    __slots__ = ('symbol', 'side', 'quantity', 'order_type', 'price', 'tag', 'reference_price', 'order_id',
+                 'status', 'fill_price', 'filled_quantity', 'fill_market_time', 'error', 'hops', 'done')
+
+    def __init__(self, symbol, side, quantity, order_type='MARKET', price=None, tag=None, reference_price=None, signal_time=None):
+        self.symbol = symbol
+        self.side = side
+        self.quantity = quantity
+        self.order_type = order_type
+        self.price = price
+        self.tag = tag
+        self.reference_price = reference_price
+        self.order_id = None
+        self.status = 'NEW'
+        self.fill_price = None
+        self.filled_quantity = 0
+        self.fill_market_time = None
+        self.error = None
+        self.hops = {'signal': time.time() if signal_time is None else signal_time}
+        self.done = asyncio.Event()
+
+    def to_dict(self):
+        row = {name: getattr(self, name) for name in self.__slots__ if name not in ('hops', 'done')}
+        row.update({hop: self.hops.get(hop) for hop in ORDER_HOPS})
+        return row
+
+class OrderGateway:
+    """
+    Base gateway: stamps hops, batches orders and tracks fills.
+
+    place_orders sends a list of orders as one batch (split at max_batch).
+    submit sends one order, coalescing it with the other orders submitted
+    within batch_window_s (0 sends immediately). Implementations provide
+    _send(batch) and report results through _ack and _fill.
+    """
+
+    def __init__(self, batch_window_s=0.0, max_batch=20):
+        self.batch_window_s = batch_window_s
+        self.max_batch = max_batch
+        self.orders = []
+        self._pending = []
+        self._flush = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        pass
+
+    async def place_orders(self, orders):
+        """Sends orders (batched) and returns them once acknowledged"""
+        now = time.time()
+        for order in orders:
+            order.hops.setdefault('submit', now)
+            self.orders.append(order)
+        batches = [orders[i:i + self.max_batch] for i in range(0, len(orders), self.max_batch)]
+        await asyncio.gather(*(self._send(batch) for batch in batches))
+        return orders
+
+    async def submit(self, order):
+        """Sends one order with whatever else arrives within batch_window_s; returns once acknowledged"""
+        if self.batch_window_s <= 0:
+            return (await self.place_orders([order]))[0]
+        order.hops.setdefault('submit', time.time())
+        self._pending.append(order)
+        if self._flush is None:
+            self._flush = asyncio.get_running_loop().create_task(self._flush_pending())
+        await asyncio.shield(self._flush)
+        return order
+
+    async def _flush_pending(self):
+        await asyncio.sleep(self.batch_window_s)
+        orders, self._pending, self._flush = self._pending, [], None
+        await self.place_orders(orders)
+
+    async def wait_filled(self, orders, timeout=None):
+        """Waits until every order is filled or finished (rejected/cancelled); False on timeout"""
+        try:
+            await asyncio.wait_for(asyncio.gather(*(order.done.wait() for order in orders)), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _send(self, batch):
+        raise NotImplementedError
+
+    def _ack(self, order, order_id, status='OPEN', error=None):
+        order.hops['ack'] = time.time()
+        order.order_id = order_id
+        order.status = status
+        order.error = error
+        if status in ('REJECTED', 'CANCELLED'):
+            order.done.set()
+
+    def _fill(self, order, price, quantity=None, market_time=None):
+        order.hops['fill'] = time.time()
+        order.fill_price = float(price)
+        order.filled_quantity = order.quantity if quantity is None else quantity
+        order.fill_market_time = market_time
+        order.status = 'COMPLETE'
+        order.done.set()
+
+    def latency_report(self):
+        """
+        Per-hop latency (ms) and slippage of every order as a DataFrame.
+
+        slippage is fill - reference_price in the adverse direction (positive = paid more / sold lower).
+        """
+        df = pd.DataFrame([order.to_dict() for order in self.orders])
+        if df.empty:
+            return df
+        for start, end in zip(ORDER_HOPS[:-1], ORDER_HOPS[1:]):
+            df[f"{start}_to_{end}_ms"] = (df[end] - df[start]) * 1000
+        df['signal_to_fill_ms'] = (df['fill'] - df['signal']) * 1000
+        sign = df['side'].map(SIDE_SIGN)
+        df['slippage'] = (pd.to_numeric(df['fill_price']) - pd.to_numeric(df['reference_price'])) * sign
+        return df
+
+def summarize_latency(report):
+    """Median / p95 / max of each hop and of slippage, one row per measure"""
+    columns = [c for c in report.columns if c.endswith('_ms')] + ['slippage']
+    stats = report[columns].apply(pd.to_numeric, errors='coerce').describe(percentiles=[0.5, 0.95]).T
+    return stats[['count', 'mean', '50%', '95%', 'max']].round(3)
+
+class KiteOrderGateway(OrderGateway):
+    """
+    Orders through an AsyncKiteClient (place_order within Kite's order rate limit).
+
+    Kite has no multi-order endpoint, so a batch is sent as concurrent
+    requests. Fills are picked up from order updates (wire on_order_update to
+    KiteTicker.on_order_update) or, as a fallback, by polling orders().
+    """
+
+    def __init__(self, client, product='MIS', variety='regular', poll_interval_s=0.25, batch_window_s=0.0, max_batch=20):
+        super().__init__(batch_window_s, max_batch)
+        self.client = client
+        self.product = product
+        self.variety = variety
+        self.poll_interval_s = poll_interval_s
+        self._by_id = {}
+        self._poller = None
+        self._loop = None
+
+    def _params(self, order):
+        exchange, tradingsymbol = order.symbol.split(':', 1)
+        params = {'variety': self.variety, 'exchange': exchange, 'tradingsymbol': tradingsymbol,
+                  'transaction_type': order.side, 'quantity': order.quantity, 'product': self.product,
+                  'order_type': order.order_type, 'tag': order.tag}
+        if order.order_type == 'LIMIT':
+            params['price'] = order.price
+        return params
+
+    async def _send(self, batch):
+        self._loop = asyncio.get_running_loop()
+        sent = time.time()
+        for order in batch:
+            order.hops['sent'] = sent
+        results = await asyncio.gather(*(self.client.place_order(**self._params(o)) for o in batch), return_exceptions=True)
+        for order, result in zip(batch, results):
+            if isinstance(result, Exception):
+                self._ack(order, None, 'REJECTED', str(result))
+            else:
+                self._ack(order, str(result))
+                self._by_id[str(result)] = order
+        if self._by_id and self._poller is None and self.poll_interval_s:
+            self._poller = asyncio.get_running_loop().create_task(self._poll())
+
+    def on_order_update(self, ws, data):
+        """KiteTicker.on_order_update handler (runs on the ticker thread)"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._apply_update, data)
+
+    def _apply_update(self, data):
+        order = self._by_id.get(str(data.get('order_id')))
+        if order is None or order.done.is_set():
+            return
+        status = data.get('status')
+        if status == 'COMPLETE':
+            self._fill(order, data.get('average_price'), data.get('filled_quantity'), data.get('exchange_timestamp'))
+            del self._by_id[order.order_id]
+        elif status in ('REJECTED', 'CANCELLED'):
+            order.status, order.error = status, data.get('status_message')
+            order.done.set()
+            del self._by_id[order.order_id]
+
+    async def _poll(self):
+        try:
+            while self._by_id:
+                for data in await self.client.orders():
+                    self._apply_update(data)
+                await asyncio.sleep(self.poll_interval_s)
+        finally:
+            self._poller = None
+
+    async def close(self):
+        if self._poller is not None:
+            self._poller.cancel()
+
+class MockExchange:
+    """
+    Local exchange replaying a day of stored ticks.
+
+    Market time runs from `start` (default: the first tick) at `speed` x wall
+    time once the exchange opens. A market order matches the first tick at or
+    after the moment it is accepted, worse by slippage_ticks; a limit order
+    matches the first tick at or after that moment that trades through its price.
+    """
+
+    def __init__(self, ticks, start=None, speed=1.0, ack_latency_s=0.02, fill_latency_s=0.03,
+                 slippage_ticks=1, tick_size=TICK_SIZE):
+        self.speed = speed
+        self.ack_latency_s = ack_latency_s
+        self.fill_latency_s = fill_latency_s
+        self.slippage_ticks = slippage_ticks
+        self.tick_size = tick_size
+        ticks = ticks.sort_values(['symbol', 'timestamp'], kind='stable')
+        times = ticks['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        prices = ticks['last_price'].to_numpy(dtype=float)
+        symbols = ticks['symbol'].to_numpy()
+        bounds = np.flatnonzero(np.r_[True, symbols[1:] != symbols[:-1], True]) if len(symbols) else np.array([0])
+        self.book = {str(symbols[a]): (times[a:b], prices[a:b]) for a, b in zip(bounds[:-1], bounds[1:])}
+        self.start_ns = int(pd.Timestamp(start).value) if start is not None else int(times.min()) if len(times) else 0
+        self._t0 = None
+        self._ids = itertools.count(1)
+
+    @classmethod
+    def from_tick_store(cls, db_dir, day, symbols=None, start=None, end=None, **params):
+        """Exchange over one tick store day (symbols: tick store names, default all)"""
+        ticks = read_ticks(db_dir, day, start=start, end=end)
+        if symbols:
+            ticks = ticks[ticks['symbol'].isin(symbols)]
+        return cls(ticks, start=start, **params)
+
+    def open(self):
+        if self._t0 is None:
+            self._t0 = time.monotonic()
+
+    def market_now(self):
+        """Current replay time (int64 ns)"""
+        self.open()
+        return self.start_ns + int((time.monotonic() - self._t0) * self.speed * 1e9)
+
+    def _series(self, symbol):
+        return self.book.get(symbol.split(':', 1)[-1].replace(' ', '_'))
+
+    def quote(self, symbol, at=None):
+        """Last traded price at or before `at` (default now), None before the first tick"""
+        series = self._series(symbol)
+        at = self.market_now() if at is None else at
+        if series is None:
+            return None
+        i = np.searchsorted(series[0], at, side='right') - 1
+        return float(series[1][i]) if i >= 0 else None
+
+    def match(self, order, at):
+        """(price, tick time ns) of the order's fill from market time `at` on, or None"""
+        series = self._series(order.symbol)
+        if series is None:
+            return None
+        times, prices = series
+        i = np.searchsorted(times, at, side='left')
+        sign = SIDE_SIGN[order.side]
+        if order.order_type == 'LIMIT':
+            crossing = np.flatnonzero(sign * (prices[i:] - order.price) <= 0)
+            if not len(crossing):
+                return None
+            j = i + crossing[0]
+            return min(prices[j], order.price) if sign > 0 else max(prices[j], order.price), int(times[j])
+        if i >= len(times):
+            return None
+        return round(float(prices[i]) + sign * self.slippage_ticks * self.tick_size, 2), int(times[i])
+
+    def next_order_id(self):
+        return f"MOCK{next(self._ids):08d}"
+
+class MockOrderGateway(OrderGateway):
+    """
+    Gateway to a MockExchange: one simulated round trip (ack_latency_s) per
+    batch, then each fill is reported fill_latency_s after its matching tick
+    is reached in the replay.
+    """
+
+    def __init__(self, exchange, batch_window_s=0.0, max_batch=20):
+        super().__init__(batch_window_s, max_batch)
+        self.exchange = exchange
+        self._fills = set()
+
+    async def _send(self, batch):
+        sent = time.time()
+        for order in batch:
+            order.hops['sent'] = sent
+        await asyncio.sleep(self.exchange.ack_latency_s)
+        accepted_at = self.exchange.market_now()
+        for order in batch:
+            self._ack(order, self.exchange.next_order_id())
+            task = asyncio.get_running_loop().create_task(self._report_fill(order, accepted_at))
+            self._fills.add(task)
+            task.add_done_callback(self._fills.discard)
+
+    async def _report_fill(self, order, accepted_at):
+        matched = self.exchange.match(order, accepted_at)
+        if matched is None:
+            return      # never fills in this replay; stays OPEN
+        price, tick_ns = matched
+        wait_s = max(0.0, (tick_ns - self.exchange.market_now()) / 1e9 / self.exchange.speed)
+        await asyncio.sleep(wait_s + self.exchange.fill_latency_s)
+        self._fill(order, price, market_time=pd.Timestamp(tick_ns))
+
+    async def close(self):
+        for task in list(self._fills):
+            task.cancel()
+
+async def run_order_burst(gateway, symbols, quote, orders=20, per_signal=4, every_s=0.1, quantity=75):
+    """
+    Offline latency drill: every `every_s` a signal submits `per_signal` market
+    orders (alternating BUY/SELL) on random symbols; waits for all fills.
+
+    quote(symbol) -> reference price at the signal.
+    """
+    rng = np.random.default_rng(0)
+    placed, waits = [], []
+    for start in range(0, orders, per_signal):
+        signal_time = time.time()
+        for i in range(start, min(start + per_signal, orders)):
+            symbol = symbols[rng.integers(len(symbols))]
+            order = Order(symbol, 'BUY' if i % 2 == 0 else 'SELL', quantity, reference_price=quote(symbol), signal_time=signal_time)
+            placed.append(order)
+            waits.append(asyncio.get_running_loop().create_task(gateway.submit(order)))
+        await asyncio.sleep(every_s)
+    await asyncio.gather(*waits)
+    filled = await gateway.wait_filled(placed, timeout=30)
+    if not filled:
+        print(f"⚠️  {sum(not o.done.is_set() for o in placed)} of {len(placed)} orders not filled within 30s")
+    return placed
+
+def main():
+    parser = argparse.ArgumentParser(description="Order gateway latency drill (mock exchange or Kite)")
+    sub = parser.add_subparsers(dest='gateway', required=True)
+    mock = sub.add_parser('mock', help="Fill against ticks replayed from the tick store")
+    mock.add_argument('--db-dir', default="db")
+    mock.add_argument('--date', required=True, help="YYYY-MM-DD tick store day")
+    mock.add_argument('--start', default=None, help="Replay start (naive IST datetime, default: first tick)")
+    mock.add_argument('--speed', type=float, default=1.0, help="Market seconds per wall second")
+    mock.add_argument('--ack-ms', type=float, default=20.0)
+    mock.add_argument('--fill-ms', type=float, default=30.0)
+    mock.add_argument('--slippage-ticks', type=float, default=1)
+    kite = sub.add_parser('kite', help="Kite Connect (real orders unless --fake)")
+    kite.add_argument('--fake', action='store_true', help="Use the offline FakeKiteBackend")
+    kite.add_argument('--symbols', nargs='+', default=["NFO:NIFTY25JUL25000CE", "NFO:NIFTY25JUL25100PE"])
+    for p in (mock, kite):
+        p.add_argument('--orders', type=int, default=20)
+        p.add_argument('--per-signal', type=int, default=4, help="Orders per signal")
+        p.add_argument('--every-ms', type=float, default=100.0, help="Time between signals")
+        p.add_argument('--batch-window-ms', type=float, default=2.0, help="Coalesce orders submitted within this window")
+        p.add_argument('--output', default=None, help="Write the per-order latency report to this CSV")
+    args = parser.parse_args()
+
+    async def run():
+        if args.gateway == 'mock':
+            exchange = MockExchange.from_tick_store(
+                args.db_dir, args.date, start=args.start, speed=args.speed, ack_latency_s=args.ack_ms / 1000,
+                fill_latency_s=args.fill_ms / 1000, slippage_ticks=args.slippage_ticks)
+            symbols = sorted(exchange.book)
+            print(f"✓ Mock exchange: {len(symbols)} instruments from {args.db_dir} {args.date}")
+            exchange.open()
+            gateway = MockOrderGateway(exchange, args.batch_window_ms / 1000)
+            quote = exchange.quote
+        else:
+            from kite_client import AsyncKiteClient, FakeKiteBackend
+            client = AsyncKiteClient(backend=FakeKiteBackend() if args.fake else None)
+            gateway = KiteOrderGateway(client, batch_window_s=args.batch_window_ms / 1000)
+            symbols = args.symbols
+            prices = {s: q['last_price'] for s, q in (await client.ltp(symbols)).items()}
+            quote = prices.get
+        async with gateway:
+            await run_order_burst(gateway, symbols, quote, args.orders, args.per_signal, args.every_ms / 1000)
+        if args.gateway == 'kite':
+            client.close()
+        report = gateway.latency_report()
+        print(summarize_latency(report).to_string())
+        if args.output:
+            report.to_csv(args.output, index=False)
+            print(f"💾 Latency report saved to {args.output}")
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    main()
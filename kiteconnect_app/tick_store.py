@@ -0,0 +1,268 @@
+# kiteconnect_app/tick_store.py
+# Tick storage for many instruments: one SQLite file per trading day, one clustered tick table.
+#
+#   CREATE TABLE ticks (
+#       instrument_token INTEGER, ts INTEGER, seq INTEGER, price INTEGER, volume INTEGER,
+#       PRIMARY KEY (instrument_token, ts, seq)
+#   ) WITHOUT ROWID
+#
+# ts is the exchange timestamp as IST wall-clock milliseconds, seq numbers ticks that share a
+# timestamp (so none are overwritten) and price is last_price * PRICE_SCALE. In a WITHOUT ROWID
+# table the primary key is the table itself: rows are stored clustered by instrument and time,
+# so a (token, time range) read is one covering index range scan and each tick costs a
+# single b-tree insert (no rowid table plus separate index).
+#
+#   python tick_store.py export --date 2025-07-21 --cache-dir ../day_cache   # ticks -> 1-minute day store
+
+import os
+import sys
+import sqlite3
+import argparse
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+DB_DIR = "db"
+DB_PREFIX = "ticks_"
+PRICE_SCALE = 100          # paise; NIFTY and option ticks are multiples of 0.05
+MS_PER_DAY = 86_400_000
+
+SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS ticks (
+        instrument_token INTEGER NOT NULL,
+        ts INTEGER NOT NULL,
+        seq INTEGER NOT NULL,
+        price INTEGER NOT NULL,
+        volume INTEGER NOT NULL,
+        PRIMARY KEY (instrument_token, ts, seq)
+    ) WITHOUT ROWID''',
+    '''CREATE TABLE IF NOT EXISTS instruments (
+        instrument_token INTEGER PRIMARY KEY,
+        symbol TEXT NOT NULL
+    )''',
+]
+
+def to_wall_ms(timestamps):
+    """Naive IST datetimes (Kite exchange_timestamp) -> int64 wall-clock milliseconds"""
+    return np.asarray(timestamps, dtype='datetime64[ms]').astype(np.int64)
+
+def day_path(db_dir, day):
+    """Database file of a trading day (date, datetime or 'YYYY-MM-DD')"""
+    return os.path.join(db_dir, f"{DB_PREFIX}{pd.Timestamp(day).strftime('%Y%m%d')}.db")
+
+def connect_day(db_dir, day):
+    """Opens (creating if needed) the tick database of one day"""
+    os.makedirs(db_dir, exist_ok=True)
+    conn = sqlite3.connect(day_path(db_dir, day), check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+    return conn
+
+class TickStore:
+    """
+    Appends ticks to the current day's file and rolls over to a new file at
+    the first tick of the next day.
+
+    Ticks sharing an exchange timestamp get increasing seq numbers instead of
+    replacing each other; after a restart the numbering continues from the file.
+    A late tick (exchange time before the token's last stored tick) takes the
+    next free seq at its own timestamp.
+    """
+
+    def __init__(self, db_dir=DB_DIR, symbols=None):
+        self.db_dir = db_dir
+        self.symbols = dict(symbols or {})
+        self.conn = None
+        self.day = None
+        self._last = {}     # token -> (ts, seq) of the last stored tick
+
+    def _open(self, day):
+        if self.conn is not None:
+            self.conn.close()
+        self.conn = connect_day(self.db_dir, day)
+        self.day = day
+        self._last = {}
+        if self.symbols:
+            self.conn.executemany("INSERT OR REPLACE INTO instruments VALUES (?, ?)", list(self.symbols.items()))
+            self.conn.commit()
+        print(f"💾 Tick store: writing {day_path(self.db_dir, day)}")
+
+    def _last_stored(self, token):
+        if token not in self._last:
+            row = self.conn.execute(
+                "SELECT ts, seq FROM ticks WHERE instrument_token = ? ORDER BY ts DESC, seq DESC LIMIT 1", (token,)).fetchone()
+            self._last[token] = row if row else (None, -1)
+        return self._last[token]
+
+    def _next_seq(self, token, ts):
+        row = self.conn.execute(
+            "SELECT COALESCE(MAX(seq) + 1, 0) FROM ticks WHERE instrument_token = ? AND ts = ?", (token, ts)).fetchone()
+        return row[0]
+
+    def register(self, symbols):
+        """Adds token -> symbol names (stored in every day file)"""
+        self.symbols.update(symbols)
+        if self.conn is not None:
+            self.conn.executemany("INSERT OR REPLACE INTO instruments VALUES (?, ?)", list(symbols.items()))
+            self.conn.commit()
+
+    def write(self, ticks):
+        """
+        Stores a batch of Kite ticks (dicts with instrument_token, exchange_timestamp,
+        last_price and optionally last_quantity) in one transaction.
+
+        Returns:
+            int: Number of ticks stored
+        """
+        ticks = [t for t in ticks if t.get('exchange_timestamp') is not None]
+        if not ticks:
+            return 0
+        ts = to_wall_ms([t['exchange_timestamp'] for t in ticks])
+        prices = np.rint(np.array([t['last_price'] for t in ticks], dtype=float) * PRICE_SCALE).astype(np.int64)
+        days = ts // MS_PER_DAY
+
+        stored = 0
+        for day in np.unique(days):
+            selected = np.flatnonzero(days == day)
+            day_date = pd.Timestamp(int(day) * MS_PER_DAY, unit='ms').date()
+            if self.day != day_date:
+                self._open(day_date)
+            rows = []
+            next_seq = {}   # (token, ts) -> next seq, for timestamps used earlier in this batch
+            for i in selected:
+                token, tick_ts = int(ticks[i]['instrument_token']), int(ts[i])
+                last_ts, last_seq = self._last_stored(token)
+                if last_ts is None or tick_ts > last_ts:
+                    seq = 0
+                elif tick_ts == last_ts:
+                    seq = last_seq + 1
+                else:
+                    seq = next_seq.get((token, tick_ts)) or self._next_seq(token, tick_ts)
+                next_seq[(token, tick_ts)] = seq + 1
+                if last_ts is None or tick_ts >= last_ts:
+                    self._last[token] = (tick_ts, seq)
+                rows.append((token, tick_ts, seq, int(prices[i]), int(ticks[i].get('last_quantity', 0) or 0)))
+            try:
+                self.conn.executemany("INSERT INTO ticks VALUES (?, ?, ?, ?, ?)", rows)
+                self.conn.commit()
+            except sqlite3.Error:
+                # Leave nothing half-written; seq numbers are re-read from the file next time
+                self.conn.rollback()
+                self._last = {}
+                raise
+            stored += len(rows)
+        return stored
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+def instrument_symbols(conn):
+    return dict(conn.execute("SELECT instrument_token, symbol FROM instruments").fetchall())
+
+def read_ticks(db_dir, day, tokens=None, start=None, end=None):
+    """
+    Ticks of one day as a DataFrame (instrument_token, symbol, timestamp, seq, last_price, volume).
+
+    start/end are naive IST datetimes (inclusive/exclusive); tokens limits the instruments.
+    All instruments come from a single query.
+    """
+    path = day_path(db_dir, day)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=['instrument_token', 'symbol', 'timestamp', 'seq', 'last_price', 'volume'])
+    clauses, params = [], []
+    if tokens:
+        clauses.append(f"instrument_token IN ({','.join('?' * len(tokens))})")
+        params.extend(int(t) for t in tokens)
+    if start is not None:
+        clauses.append("ts >= ?")
+        params.append(int(to_wall_ms([start])[0]))
+    if end is not None:
+        clauses.append("ts < ?")
+        params.append(int(to_wall_ms([end])[0]))
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    with sqlite3.connect(path) as conn:
+        rows = conn.execute(f"SELECT instrument_token, ts, seq, price, volume FROM ticks{where}", params).fetchall()
+        symbols = instrument_symbols(conn)
+    data = np.array(rows, dtype=np.int64).reshape(-1, 5)
+    df = pd.DataFrame({
+        'instrument_token': data[:, 0],
+        'timestamp': data[:, 1].astype('datetime64[ms]'),
+        'seq': data[:, 2],
+        'last_price': data[:, 3] / PRICE_SCALE,
+        'volume': data[:, 4],
+    })
+    df.insert(1, 'symbol', df['instrument_token'].map(symbols))
+    return df
+
+def minute_candles(token, ts, price, volume):
+    """
+    1-minute OHLCV of ticks sorted by (token, ts) - the table's storage order.
+
+    Returns:
+        dict: arrays token, minute_ms, open, high, low, close, volume (one row per token-minute)
+    """
+    minute = ts - ts % 60_000
+    if len(ts) == 0:
+        return {key: np.empty(0) for key in ('token', 'minute_ms', 'open', 'high', 'low', 'close', 'volume')}
+    starts = np.flatnonzero(np.r_[True, (token[1:] != token[:-1]) | (minute[1:] != minute[:-1])])
+    ends = np.r_[starts[1:], len(ts)] - 1
+    return {
+        'token': token[starts],
+        'minute_ms': minute[starts],
+        'open': price[starts] / PRICE_SCALE,
+        'high': np.maximum.reduceat(price, starts) / PRICE_SCALE,
+        'low': np.minimum.reduceat(price, starts) / PRICE_SCALE,
+        'close': price[ends] / PRICE_SCALE,
+        'volume': np.add.reduceat(volume, starts),
+    }
+
+def export_day(db_dir, day, cache_dir, symbols=None):
+    """
+    Writes every instrument of a day file to the columnar day store
+    (tools/day_cache layout: DDMM/<symbol>.*) as 1-minute OHLCV bars.
+
+    The whole file is read in one scan in storage order, which is already
+    sorted by instrument and time, so candles need no sort or per-symbol query.
+
+    Returns:
+        list: Symbols written
+    """
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from tools.day_cache import write_day
+
+    path = day_path(db_dir, day)
+    with sqlite3.connect(path) as conn:
+        names = instrument_symbols(conn)
+        data = np.array(conn.execute("SELECT instrument_token, ts, price, volume FROM ticks").fetchall(), dtype=np.int64).reshape(-1, 4)
+    names.update(symbols or {})
+
+    candles = minute_candles(data[:, 0], data[:, 1], data[:, 2], data[:, 3])
+    ddmm = pd.Timestamp(day).strftime('%d%m')
+    bounds = np.flatnonzero(np.r_[True, candles['token'][1:] != candles['token'][:-1], True])
+    written = []
+    for first, last in zip(bounds[:-1], bounds[1:]):
+        token = int(candles['token'][first])
+        symbol = str(names.get(token, token)).replace(' ', '_')
+        columns = {key: candles[key][first:last] for key in ('open', 'high', 'low', 'close', 'volume')}
+        datetime_ns = candles['minute_ms'][first:last] * 1_000_000
+        write_day(cache_dir, ddmm, symbol, columns, datetime_ns, {'source': os.path.abspath(path), 'instrument_token': token})
+        written.append(symbol)
+    print(f"✓ Exported {len(data)} ticks of {len(written)} instruments from {path} to {cache_dir}/{ddmm}")
+    return written
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tick store utilities")
+    sub = parser.add_subparsers(dest='command', required=True)
+    export = sub.add_parser('export', help="Write a day's ticks to the day store as 1-minute bars")
+    export.add_argument('--date', default=datetime.now().strftime('%Y-%m-%d'), help="YYYY-MM-DD (default: today)")
+    export.add_argument('--db-dir', default=DB_DIR)
+    export.add_argument('--cache-dir', default=os.path.join('..', 'day_cache'))
+    args = parser.parse_args()
+    export_day(args.db_dir, args.date, args.cache_dir)
@@ -1,34 +1,31 @@
 # option_tools/__init__.py
-import yaml
+# Public names are imported on first use, so importing the package (or one of its
+# modules in a worker process) reads no config and loads no executor or report stack.
 
-def load_main_config():
-    """Load main configuration from config.yaml"""
-    try:
-        with open('config.yaml', 'r') as file:
-            return yaml.safe_load(file)
-    except Exception as e:
-        print(f"Warning: Could not load config.yaml: {e}")
-        return {'TRADE_STRATEGY': 'COMPLEX'}
+import importlib
 
-config = load_main_config()
-strategy_type = config.get('TRADE_STRATEGY', 'COMPLEX')
+_EXPORTS = {
+    'execute_option_trades': '.trade_executors',
+    'execute_index_trades': '.trade_executors',
+    'run_option_analysis': '.options_run_analytics',
+    'run_option_backtest': '.option_run_backtesting',
+    'run_option_backtests': '.option_run_backtesting',
+    'run_combined_option_backtest': '.option_run_backtesting',
+    'run_walk_forward': '.walk_forward',
+    'run_signal_sweep': '.signal_sweep',
+    'run_paper_day': '.paper_trading',
+    'PositionManager': '.paper_trading',
+    'apply_fill_model': '.fill_model',
+}
 
-if strategy_type == 'SIMPLE':
-    from .simple_trade_executor import execute_option_trades
-    from .index_trade_executor import execute_index_trades_simple as execute_index_trades
-    print("--- Using SIMPLE trading strategy for both options and index trades ---")
-else:
-    from .option_trade_executor import execute_option_trades
-    from .index_trade_executor import execute_index_trades_complex as execute_index_trades
-    print("--- Using COMPLEX trading strategy for both options and index trades ---")
+__all__ = list(_EXPORTS)
 
-from .options_run_analytics import run_option_analysis
-from .option_run_backtesting import run_option_backtest, run_combined_option_backtest
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
 
-__all__ = [
-    'execute_option_trades',
-    'execute_index_trades',
-    'run_option_analysis',
-    'run_option_backtest',
-    'run_combined_option_backtest'
-]
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
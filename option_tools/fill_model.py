@@ -0,0 +1,387 @@
+# option_tools/fill_model.py
+# Execution costs and realistic fills for the option executors and the option backtest.
+#
+# The executors fill at the next bar's open and exit exactly at their stop/target levels.
+# apply_fill_model re-prices finished trades in one vectorised pass: stops that the bar
+# gaps through fill at the open, bars touching both target and stop follow INTRABAR_PATH,
+# exits decided on a close fill at the next open, every fill pays spread + slippage by
+# premium tier, and brokerage/STT/exchange charges come off P/L. Off unless
+# fill_model.yaml sets ENABLED.
+#
+# A gap is an open below the stop in force before the exit bar. The executors hand that
+# stop over (their trailing stops move inside the exit bar); trade files on disk do not
+# record it, so the report only counts gaps through stops that cannot move inside a bar.
+#
+#   python -m option_tools.fill_model                          # backtest-to-live gap of the trade files
+#   python -m option_tools.fill_model --source backtest --intrabar-path STOP_FIRST
+
+import os
+import re
+import copy
+import argparse
+import functools
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from tools.day_cache import DEFAULT_CACHE_DIR, load_day
+
+DEFAULT_SETTINGS = {
+    'ENABLED': False,
+    'QUANTITY': 75,
+    'GAP_THROUGH_STOPS': True,
+    'INTRABAR_PATH': 'TARGET_FIRST',
+    'CLOSE_EXITS_NEXT_OPEN': True,
+    'SPREAD_TIERS': [
+        {'threshold': 50, 'half_spread': 0.05, 'slippage_pct': 0.10},
+        {'threshold': 150, 'half_spread': 0.10, 'slippage_pct': 0.05},
+        {'threshold': float('inf'), 'half_spread': 0.20, 'slippage_pct': 0.05},
+    ],
+    'STOP_SLIPPAGE_TICKS': 1,
+    'TICK_SIZE': 0.05,
+    'COSTS': {
+        'ENABLED': True,
+        'BROKERAGE_PER_ORDER': 20.0,
+        'STT_SELL_PCT': 0.1,
+        'EXCHANGE_TXN_PCT': 0.03503,
+        'SEBI_PER_CRORE': 10.0,
+        'STAMP_BUY_PCT': 0.003,
+        'GST_PCT': 18.0,
+    },
+}
+
+INTRABAR_PATHS = ('TARGET_FIRST', 'STOP_FIRST', 'OPEN_PROXIMITY')
+
+# Trade dict keys of the executors (formatted strings) and of option_run_backtesting (floats)
+EXECUTOR_COLUMNS = {
+    'entry_time': 'Entry Time', 'entry_price': 'Entry Price', 'exit_time': 'Exit Time',
+    'exit_price': 'Exit Price', 'pnl': 'P/L', 'pnl_pct': 'P/L %', 'reason': 'Exit Reason',
+    'stop': 'Final SL', 'gross_pnl': 'Gross P/L', 'costs': 'Costs', 'note': 'Fill Note',
+    'formatted': True, 'fixed_stop': False,
+}
+BACKTEST_COLUMNS = {
+    'entry_time': 'entry_time', 'entry_price': 'entry_price', 'exit_time': 'exit_time',
+    'exit_price': 'exit_price', 'pnl': 'pnl', 'pnl_pct': 'pnl_percent', 'reason': 'exit_reason',
+    'stop': 'stop_loss_price', 'gross_pnl': 'gross_pnl', 'costs': 'costs', 'note': 'fill_note',
+    'formatted': False, 'fixed_stop': True,
+}
+
+# How each exit was priced, read from its exit reason
+STOP, TARGET, CLOSE, END = 0, 1, 2, 3
+_STOP_REASON = re.compile(r'\bSL\b|Stop Loss')
+_TARGET_REASON = re.compile(r'\bTP\b|Target')
+_END_REASON = re.compile(r'^End of')
+# Stops that never move once the trade is open (simple executor phase 1)
+_FIXED_STOP_REASON = re.compile(r'^Fixed SL')
+
+# Components in the order the report applies them
+STAGES = ['gaps', 'intrabar', 'next_open', 'spread', 'costs']
+
+def load_fill_model_config(path=None):
+    """Load fill model settings from option_tools/fill_model.yaml"""
+    path = path or os.path.join(os.path.dirname(__file__), 'fill_model.yaml')
+    try:
+        with open(path, 'r') as file:
+            settings = yaml.safe_load(file) or {}
+    except Exception as e:
+        print(f"Warning: Could not load {path}: {e}")
+        settings = {}
+    merged = copy.deepcopy(DEFAULT_SETTINGS)
+    merged.update(settings)
+    merged['COSTS'] = dict(DEFAULT_SETTINGS['COSTS'], **(settings.get('COSTS') or {}))
+    # Convert 'inf' string to float('inf')
+    for tier in merged['SPREAD_TIERS']:
+        if isinstance(tier['threshold'], str) and tier['threshold'].lower() == 'inf':
+            tier['threshold'] = float('inf')
+    if merged['INTRABAR_PATH'] not in INTRABAR_PATHS:
+        print(f"Warning: Unknown INTRABAR_PATH {merged['INTRABAR_PATH']!r}, using TARGET_FIRST")
+        merged['INTRABAR_PATH'] = 'TARGET_FIRST'
+    return merged
+
+@functools.lru_cache(maxsize=None)
+def _default_settings():
+    # Read once per process: the executors check this on every simulate call
+    return load_fill_model_config()
+
+def price_bars(prices):
+    """
+    Bar times (int64 ns) and open/low arrays from any price source the simulators use:
+    an executor-prepared frame (datetime index or column), option_run_backtesting's
+    bar arrays, or a day_cache DayArrays.
+    """
+    if isinstance(prices, pd.DataFrame):
+        index = prices.index if isinstance(prices.index, pd.DatetimeIndex) else pd.DatetimeIndex(prices['datetime'])
+        datetime_ns = index.as_unit('ns').asi8
+    elif 'index' in prices:
+        datetime_ns = prices['index'].as_unit('ns').asi8
+    else:
+        datetime_ns = np.asarray(prices['datetime'])
+    return {
+        'datetime': datetime_ns,
+        'open': np.asarray(prices['open'], dtype=float),
+        'low': np.asarray(prices['low'], dtype=float),
+    }
+
+def exit_kind(reason):
+    """STOP, TARGET, END (end of day/data) or CLOSE (indicator exit at the bar close)"""
+    reason = str(reason)
+    if _STOP_REASON.search(reason):
+        return STOP
+    if _TARGET_REASON.search(reason):
+        return TARGET
+    if _END_REASON.search(reason):
+        return END
+    return CLOSE
+
+def premium_friction(prices, tiers):
+    """Half spread + slippage in points per unit for each fill price (tier: price < threshold)"""
+    if not tiers:
+        return np.zeros(len(prices))
+    thresholds = np.array([tier['threshold'] for tier in tiers], dtype=float)
+    half_spread = np.array([tier['half_spread'] for tier in tiers], dtype=float)
+    slippage_pct = np.array([tier['slippage_pct'] for tier in tiers], dtype=float)
+    tier = np.minimum(np.searchsorted(thresholds, prices, side='right'), len(tiers) - 1)
+    return half_spread[tier] + prices * slippage_pct[tier] / 100
+
+def transaction_costs(entry_fill, exit_fill, settings):
+    """Round-trip charges per unit (points) for one buy at entry_fill and one sell at exit_fill"""
+    costs = settings['COSTS']
+    if not costs.get('ENABLED', True):
+        return np.zeros(len(entry_fill))
+    quantity = settings['QUANTITY']
+    buy, sell = entry_fill * quantity, exit_fill * quantity
+    brokerage = 2 * costs['BROKERAGE_PER_ORDER']
+    exchange = (buy + sell) * costs['EXCHANGE_TXN_PCT'] / 100
+    sebi = (buy + sell) * costs['SEBI_PER_CRORE'] / 1e7
+    stt = sell * costs['STT_SELL_PCT'] / 100
+    stamp = buy * costs['STAMP_BUY_PCT'] / 100
+    gst = (brokerage + exchange + sebi) * costs['GST_PCT'] / 100
+    return (brokerage + exchange + sebi + stt + stamp + gst) / quantity
+
+def bar_start_stops(trades, exit_price, columns):
+    """
+    Stop in force when each exit bar opened, for trades that do not carry it: the stop
+    column of fixed-stop schemas, the exit price of fixed-stop exits, NaN otherwise.
+    """
+    if columns['fixed_stop']:
+        return _numbers([t.get(columns['stop']) for t in trades])
+    fixed = np.array([bool(_FIXED_STOP_REASON.search(str(t[columns['reason']]))) for t in trades])
+    return np.where(fixed, exit_price, np.nan)
+
+def model_fills(entry_price, exit_price, stop, kinds, exit_pos, bars, settings, bar_stop=None):
+    """
+    Fill prices for a batch of trades.
+
+    Args:
+        entry_price, exit_price: idealised prices from the simulator
+        stop: stop level at exit (NaN when the trade does not record one)
+        kinds: exit_kind of every trade
+        exit_pos: position of each exit bar in bars
+        bars: price_bars output
+        settings: fill model settings
+        bar_stop: stop in force when the exit bar opened (NaN or None: no gap check)
+
+    Returns:
+        tuple: (entry_fill, exit_fill, costs per unit, fill note per trade)
+    """
+    opens, lows = bars['open'], bars['low']
+    bar_open = opens[exit_pos]
+    exit_fill = exit_price.copy()
+    kinds = kinds.copy()
+    notes = np.full(len(entry_price), '', dtype=object)
+
+    # Target and stop inside the same bar: the executors always assume the target came first
+    path = settings['INTRABAR_PATH']
+    if path != 'TARGET_FIRST':
+        stop_first = (kinds == TARGET) & (lows[exit_pos] <= stop)
+        if path == 'OPEN_PROXIMITY':
+            stop_first &= (bar_open - stop) < (exit_price - bar_open)
+        exit_fill[stop_first] = stop[stop_first]
+        kinds[stop_first] = STOP
+        notes[stop_first] = 'stop first'
+
+    # A stop-market order triggered by a gap fills at the open, not at the stop level.
+    # Compared with the stop before the bar: a stop raised inside the bar is not a gap.
+    if settings['GAP_THROUGH_STOPS'] and bar_stop is not None:
+        gapped = (kinds == STOP) & (bar_open < bar_stop)
+        exit_fill[gapped] = bar_open[gapped]
+        notes[gapped] = 'gap'
+
+    if settings['CLOSE_EXITS_NEXT_OPEN']:
+        next_open = (kinds == CLOSE) & (exit_pos + 1 < len(opens))
+        exit_fill[next_open] = opens[exit_pos[next_open] + 1]
+        notes[next_open] = 'next open'
+
+    tick = settings['TICK_SIZE']
+    entry_fill = entry_price + premium_friction(entry_price, settings['SPREAD_TIERS'])
+    exit_fill = exit_fill - premium_friction(exit_fill, settings['SPREAD_TIERS'])
+    exit_fill = exit_fill - (kinds == STOP) * settings['STOP_SLIPPAGE_TICKS'] * tick
+    exit_fill = np.maximum(exit_fill, tick)
+
+    return entry_fill, exit_fill, transaction_costs(entry_fill, exit_fill, settings), notes
+
+def _numbers(values):
+    return np.array([float(str(v).rstrip('%')) if v not in (None, '') else np.nan for v in values], dtype=float)
+
+def apply_fill_model(trades, prices, settings=None, columns=EXECUTOR_COLUMNS, bar_stops=None):
+    """
+    Re-prices simulated trades with the fill model.
+
+    Returns `trades` unchanged when the model is disabled. Otherwise returns new
+    trade dicts with fill prices and net P/L in the usual keys, plus the idealised
+    P/L, the charges per unit and a fill note ('gap', 'stop first', 'next open').
+    Exit times stay on the bar that triggered the exit.
+
+    Args:
+        trades: list of trade dicts (executor or option_run_backtesting keys)
+        prices: bars the trades were simulated on (see price_bars)
+        settings: fill model settings (default: fill_model.yaml, read once)
+        columns: EXECUTOR_COLUMNS or BACKTEST_COLUMNS
+        bar_stops: stop in force when each exit bar opened, from the executor
+            (default: bar_start_stops, which only knows fixed stops)
+    """
+    settings = settings if settings is not None else _default_settings()
+    if not settings['ENABLED'] or not trades:
+        return trades
+
+    c = columns
+    bars = price_bars(prices)
+    exit_ns = pd.DatetimeIndex([t[c['exit_time']] for t in trades]).as_unit('ns').asi8
+    exit_pos = np.minimum(np.searchsorted(bars['datetime'], exit_ns), len(bars['datetime']) - 1)
+    entry_price = _numbers([t[c['entry_price']] for t in trades])
+    exit_price = _numbers([t[c['exit_price']] for t in trades])
+    stop = _numbers([t.get(c['stop']) for t in trades])
+    kinds = np.array([exit_kind(t[c['reason']]) for t in trades])
+    if bar_stops is None:
+        bar_stop = bar_start_stops(trades, exit_price, c)
+    else:
+        bar_stop = np.array(bar_stops, dtype=float)
+
+    entry_fill, exit_fill, costs, notes = model_fills(entry_price, exit_price, stop, kinds, exit_pos, bars, settings, bar_stop)
+    pnl = exit_fill - entry_fill - costs
+    pnl_pct = np.where(entry_fill > 0, pnl / entry_fill * 100, 0.0)
+
+    filled = []
+    for i, trade in enumerate(trades):
+        if c['formatted']:
+            values = (f"{entry_fill[i]:.2f}", f"{exit_fill[i]:.2f}", f"{pnl[i]:.2f}", f"{pnl_pct[i]:.2f}%", f"{costs[i]:.2f}")
+        else:
+            values = (float(entry_fill[i]), float(exit_fill[i]), float(pnl[i]), float(pnl_pct[i]), float(costs[i]))
+        filled.append({
+            **trade,
+            c['entry_price']: values[0],
+            c['exit_price']: values[1],
+            c['pnl']: values[2],
+            c['pnl_pct']: values[3],
+            c['gross_pnl']: trade[c['pnl']],
+            c['costs']: values[4],
+            c['note']: notes[i],
+        })
+    return filled
+
+def stage_settings(settings, upto=None):
+    """Settings with only the STAGES up to `upto` switched on (None: idealised fills)"""
+    on = set(STAGES[:STAGES.index(upto) + 1]) if upto else set()
+    staged = copy.deepcopy(settings)
+    staged['ENABLED'] = True
+    staged['GAP_THROUGH_STOPS'] = settings['GAP_THROUGH_STOPS'] and 'gaps' in on
+    if 'intrabar' not in on:
+        staged['INTRABAR_PATH'] = 'TARGET_FIRST'
+    staged['CLOSE_EXITS_NEXT_OPEN'] = settings['CLOSE_EXITS_NEXT_OPEN'] and 'next_open' in on
+    if 'spread' not in on:
+        staged['SPREAD_TIERS'] = []
+        staged['STOP_SLIPPAGE_TICKS'] = 0
+    staged['COSTS']['ENABLED'] = settings['COSTS'].get('ENABLED', True) and 'costs' in on
+    return staged
+
+def _trade_files(data_root, date, side, source):
+    """(book, path, columns) of every trade or backtest file of one date/side"""
+    folder = os.path.join(data_root, date, side, 'trades' if source == 'trades' else 'backtest')
+    if not os.path.isdir(folder):
+        return []
+    files = sorted(f for f in os.listdir(folder) if f.endswith('.csv'))
+    if source == 'trades':
+        return [(f[:-len('_trades.csv')], os.path.join(folder, f), EXECUTOR_COLUMNS) for f in files]
+    return [(f"{side}_{f[:-4].replace('backtest_results_', '')}", os.path.join(folder, f), BACKTEST_COLUMNS) for f in files]
+
+def fill_model_report(data_root='data', settings=None, source='trades', dates=None, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Backtest-to-live gap of the trade files already written by the pipeline.
+
+    Every trade is re-priced with the fill model one component at a time, so
+    the report shows how much P/L each assumption takes away.
+
+    Returns:
+        DataFrame: one row per book and a TOTAL row with the trade count, idealised
+        and net P/L (points, % summed, rupees) and the P/L points lost to each stage
+    """
+    settings = settings or load_fill_model_config()
+    staged = [stage_settings(settings, stage) for stage in [None] + STAGES]
+    dates = dates or sorted(d for d in os.listdir(data_root) if len(d) == 4 and os.path.isdir(os.path.join(data_root, d)))
+
+    totals = {}
+    for date in dates:
+        for side in ('call', 'put'):
+            files = _trade_files(data_root, date, side, source)
+            bars = load_day(data_root, date, side, cache_dir) if files else None
+            if bars is None:
+                continue
+            for book, path, columns in files:
+                trades = pd.read_csv(path, dtype=str, keep_default_na=False).to_dict('records')
+                if not trades:
+                    continue
+                if columns['note'] in trades[0]:
+                    print(f"⚠️ {path} already has fill model prices, skipped")
+                    continue
+                row = totals.setdefault(book, {'book': book, 'trades': 0, 'gross_pct': 0.0, 'pnl_pct': 0.0, 'stages': np.zeros(len(staged))})
+                row['trades'] += len(trades)
+                stage_pnl = []
+                for stage in staged:
+                    filled = apply_fill_model(trades, bars, stage, columns)
+                    stage_pnl.append(_numbers([t[columns['pnl']] for t in filled]).sum())
+                row['stages'] += stage_pnl
+                row['gross_pct'] += _numbers([t[columns['pnl_pct']] for t in trades]).sum()
+                row['pnl_pct'] += _numbers([t[columns['pnl_pct']] for t in filled]).sum()
+
+    rows = []
+    for row in totals.values():
+        stages = row['stages']
+        rows.append({
+            'book': row['book'], 'trades': row['trades'],
+            'gross_pts': stages[0], 'gross_pct': row['gross_pct'],
+            **{stage: stages[i + 1] - stages[i] for i, stage in enumerate(STAGES)},
+            'net_pts': stages[-1], 'net_pct': row['pnl_pct'],
+            'net_inr': stages[-1] * settings['QUANTITY'],
+        })
+    report = pd.DataFrame(rows)
+    if not report.empty:
+        total = report.drop(columns='book').sum()
+        report = pd.concat([report, pd.DataFrame([{'book': 'TOTAL', **total}])], ignore_index=True)
+        report['trades'] = report['trades'].astype(int)
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quantify the backtest-to-live gap of the option trades with the fill model")
+    parser.add_argument('--data-root', default='data')
+    parser.add_argument('--settings', default=None, help="Path to fill_model.yaml")
+    parser.add_argument('--source', choices=['trades', 'backtest'], default='trades',
+                        help="Executor trade files (step 10) or option backtest files (steps 8/9)")
+    parser.add_argument('--intrabar-path', choices=INTRABAR_PATHS, default=None, help="Override INTRABAR_PATH")
+    parser.add_argument('--dates', nargs='+', default=None, help="DDMM folders (default: all)")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--output', default=None, help="Also write the report to this CSV")
+    args = parser.parse_args()
+
+    settings = load_fill_model_config(args.settings)
+    if args.intrabar_path:
+        settings['INTRABAR_PATH'] = args.intrabar_path
+    report = fill_model_report(args.data_root, settings, args.source, args.dates, args.cache_dir)
+    if report.empty:
+        print(f"ℹ️ No {args.source} files found under {args.data_root}")
+    else:
+        print(f"📊 Fill model gap ({args.source}, path {settings['INTRABAR_PATH']}, {settings['QUANTITY']} units; stage columns are P/L points)")
+        print(report.round(2).to_string(index=False))
+        if args.output:
+            report.to_csv(args.output, index=False)
+            print(f"💾 Report saved to {args.output}")
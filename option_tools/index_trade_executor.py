@@ -3,19 +3,15 @@
 
 import pandas as pd
 import numpy as np
-import os
 from datetime import time
-try:
-    import pandas_ta as ta
-except ImportError:
-    import sys
-    import subprocess
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "pandas_ta"])
-    import pandas_ta as ta
 
+from tools.trade_sink import write_trades
+from tools.lazy_imports import load_pandas_ta
+from tools.profiler import profiled
 from .simple_trade_config import load_simple_trade_config
 
-def execute_index_trades_simple(signals_df, prices_df, signal_col, trade_type, config, output_dir, output_filename):
+@profiled('trade_sim', rows=None)
+def execute_index_trades_simple(signals_df, prices_df, signal_col, trade_type, config, output_dir, output_filename, sink=None):
     """
     Execute index trades using SIMPLE strategy (two-phase stop-loss system).
     """
@@ -32,7 +28,7 @@ def execute_index_trades_simple(signals_df, prices_df, signal_col, trade_type, c
     atr_period = simple_trade_config['INDICATORS']['ATR_PERIOD']
     swing_low_period = simple_trade_config['INDICATORS']['SWING_LOW_PERIOD']
     
-    prices_df[f'ATR_{atr_period}'] = ta.atr(prices_df['high'], prices_df['low'], prices_df['close'], length=atr_period)
+    prices_df[f'ATR_{atr_period}'] = load_pandas_ta().atr(prices_df['high'], prices_df['low'], prices_df['close'], length=atr_period)
     prices_df['low_swing'] = prices_df['low'].rolling(window=swing_low_period).min().shift(1)
 
     valid_signals = signals_df[signals_df[signal_col] == 1].copy()
@@ -81,23 +77,14 @@ def execute_index_trades_simple(signals_df, prices_df, signal_col, trade_type, c
     df_results = pd.DataFrame(trade_results)
     
     if not df_results.empty:
-        os.makedirs(output_dir, exist_ok=True)
-        output_path = os.path.join(output_dir, output_filename)
-        
-        if os.path.exists(output_path):
-            existing_df = pd.read_csv(output_path)
-            combined_df = pd.concat([existing_df, df_results], ignore_index=True)
-            combined_df.to_csv(output_path, index=False)
-            print(f"  ✓ Appended {len(df_results)} index trades to {output_path}")
-        else:
-            df_results.to_csv(output_path, index=False)
-            print(f"  ✓ Saved {len(df_results)} index trades to {output_path}")
+        write_trades(df_results, output_dir, output_filename, sink=sink, label='index')
     else:
         print(f"  ℹ️ No valid index trades found for {trade_type}")
     
     return df_results
 
-def execute_index_trades_complex(signals_df, prices_df, signal_col, trade_type, config, output_dir, output_filename):
+@profiled('trade_sim', rows=None)
+def execute_index_trades_complex(signals_df, prices_df, signal_col, trade_type, config, output_dir, output_filename, sink=None):
     """
     Execute index trades using COMPLEX strategy (original slabbed ATR trailing stop loss).
     This maintains the original logic from tools/trade_executor.py
@@ -115,6 +102,7 @@ def execute_index_trades_complex(signals_df, prices_df, signal_col, trade_type,
     prices_df['datetime'] = pd.to_datetime(prices_df['datetime'])
     prices_df.set_index('datetime', inplace=True)
 
+    load_pandas_ta()  # registers the DataFrame.ta accessor
     prices_df.ta.atr(length=5, append=True, col_names=('ATR_5',))
 
     valid_signals = signals_df[signals_df[signal_col] == 1].copy()
@@ -216,11 +204,9 @@ def execute_index_trades_complex(signals_df, prices_df, signal_col, trade_type,
     df_results = pd.DataFrame(trade_results)
     
     # --- Save results to file ---
+    # Call and Put results share one file per strategy, so append rather than overwrite.
     if not df_results.empty:
-        os.makedirs(output_dir, exist_ok=True)
-        output_path = os.path.join(output_dir, output_filename)
-        df_results.to_csv(output_path, index=False)
-        print(f"  ✓ Saved {len(df_results)} index trades to {output_path}")
+        write_trades(df_results, output_dir, output_filename, sink=sink, label='index')
     
     return df_results
 
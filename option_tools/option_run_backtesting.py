@@ -1,7 +1,132 @@
 # option_tools/option_run_backtesting.py
 
+import numpy as np
 import pandas as pd
-from datetime import time, datetime
+
+from tools.profiler import profiled
+from .fill_model import apply_fill_model, BACKTEST_COLUMNS
+
+# Simplified logic to avoid dependency on old config structure
+OPTION_TP_PERCENT = 15.0  # Generous TP for options
+OPTION_SL_PERCENT = 10.0  # Generous SL for options
+
+def _time_of_day(index):
+    """Nanoseconds since midnight for every timestamp of a DatetimeIndex"""
+    return (index - index.normalize()).as_unit('ns').asi8
+
+def _clock_ns(clock_str):
+    """'HH:MM' config value as nanoseconds since midnight"""
+    hour, minute = map(int, clock_str.split(':'))
+    return pd.Timedelta(hours=hour, minutes=minute).value
+
+def prepare_option_arrays(option_df):
+    """
+    Option bars as NumPy arrays for the backtest, built once per option file.
+
+    Accepts the frame with 'datetime' either as a column or as the index.
+    """
+    index = pd.DatetimeIndex(option_df['datetime'] if 'datetime' in option_df.columns else option_df.index)
+    return {
+        'index': index,
+        'time_of_day': _time_of_day(index),
+        'open': option_df['open'].to_numpy(dtype=float),
+        'high': option_df['high'].to_numpy(dtype=float),
+        'low': option_df['low'].to_numpy(dtype=float),
+        'close': option_df['close'].to_numpy(dtype=float),
+        'sorted': index.is_monotonic_increasing,
+    }
+
+def _entry_positions(bars, signal_times):
+    """Position of the first option bar at or after each signal (len(bars) when there is none)"""
+    index = bars['index']
+    if bars['sorted']:
+        return index.searchsorted(signal_times, side='left')
+    # Unsorted files keep the old "first row in file order" behaviour
+    values = index.as_unit('ns').asi8
+    positions = np.full(len(signal_times), len(index), dtype=np.int64)
+    for i, ts in enumerate(pd.DatetimeIndex(signal_times).as_unit('ns').asi8):
+        hits = values >= ts
+        if hits.any():
+            positions[i] = int(hits.argmax())
+    return positions
+
+@profiled('backtest')
+def _backtest_signals(bars, signals_df, date_str, config, strategy_name, option_type, signal_col):
+    """Trade dicts for one signal column against prepared option bars"""
+    strategy_type = config.get('TRADE_STRATEGY', 'COMPLEX')
+    print(f"  Running option backtest for {date_str} ({option_type} Options - {strategy_name} / Type: {strategy_type})")
+
+    eod_exit_ns = _clock_ns(config['EOD_EXIT_TIME'])
+    last_entry_ns = _clock_ns(config['LAST_ENTRY_TIME'])
+
+    signal_index = pd.DatetimeIndex(signals_df['datetime'] if 'datetime' in signals_df.columns else signals_df.index)
+    if signal_col in signals_df.columns:
+        is_signal = signals_df[signal_col].to_numpy() == 1
+    else:
+        is_signal = np.zeros(len(signals_df), dtype=bool)
+    is_signal &= _time_of_day(signal_index) <= last_entry_ns
+
+    signal_times = signal_index[is_signal]
+    entry_positions = _entry_positions(bars, signal_times)
+
+    index, high, low, close = bars['index'], bars['high'], bars['low'], bars['close']
+    after_eod = bars['time_of_day'] >= eod_exit_ns
+    n_bars = len(index)
+
+    tp_percent, sl_percent = OPTION_TP_PERCENT, OPTION_SL_PERCENT
+    exit_reason_text = {
+        'tp': f"Option Target Profit ({tp_percent}%)",
+        'sl': f"Option Stop Loss ({sl_percent}%)"
+    }
+
+    daily_trades = []
+    for pos in entry_positions:
+        if pos >= n_bars:
+            continue
+
+        entry_price = bars['open'][pos]
+        take_profit_price = entry_price * (1 + tp_percent / 100)
+        stop_loss_price = entry_price * (1 - sl_percent / 100)
+
+        # First bar from entry onwards where TP, SL or EOD triggers
+        tp_hit = high[pos:] >= take_profit_price
+        sl_hit = low[pos:] <= stop_loss_price
+        any_hit = tp_hit | sl_hit | after_eod[pos:]
+
+        if any_hit.any():
+            offset = int(any_hit.argmax())
+            exit_pos = pos + offset
+            exit_time = index[exit_pos]
+            # Same priority as the bar-by-bar check: profit target, stop loss, end of day
+            if tp_hit[offset]:
+                exit_price, exit_reason = take_profit_price, exit_reason_text['tp']
+            elif sl_hit[offset]:
+                exit_price, exit_reason = stop_loss_price, exit_reason_text['sl']
+            else:
+                exit_price, exit_reason = close[exit_pos], "End of Day"
+        else:
+            exit_time, exit_price, exit_reason = index[-1], close[-1], "End of Data"
+
+        pnl = exit_price - entry_price
+        pnl_percent = ((exit_price - entry_price) / entry_price) * 100
+
+        daily_trades.append({
+            'date': date_str,
+            'type': f'{option_type} Option (Long)',
+            'comments': f'{strategy_name} - Option Buying',
+            'entry_time': index[pos],
+            'exit_time': exit_time,
+            'entry_price': entry_price,
+            'exit_price': exit_price,
+            'stop_loss_price': stop_loss_price,
+            'take_profit_price': take_profit_price,
+            'pnl': pnl,
+            'pnl_percent': pnl_percent,
+            'exit_reason': exit_reason
+        })
+
+    print(f"    Generated {len(daily_trades)} {option_type} option trades")
+    return apply_fill_model(daily_trades, bars, columns=BACKTEST_COLUMNS)
 
 def run_option_backtest(signals_df, option_df, date_str, config, strategy_name, option_type, signal_col='Call'):
     """
@@ -17,92 +142,30 @@ def run_option_backtest(signals_df, option_df, date_str, config, strategy_name,
         option_type: 'Call' or 'Put'
         signal_col: Column name to check for signals
     """
-    strategy_type = config.get('TRADE_STRATEGY', 'COMPLEX')
-    print(f"  Running option backtest for {date_str} ({option_type} Options - {strategy_name} / Type: {strategy_type})")
-    
-    eod_hour, eod_minute = map(int, config['EOD_EXIT_TIME'].split(':'))
-    eod_exit_time = time(eod_hour, eod_minute)
-    
-    last_entry_hour, last_entry_minute = map(int, config['LAST_ENTRY_TIME'].split(':'))
-    last_entry_time = time(last_entry_hour, last_entry_minute)
-
-    # Set datetime as index
-    signals_df.set_index('datetime', inplace=True)
-    option_df.set_index('datetime', inplace=True)
+    bars = prepare_option_arrays(option_df)
+    return _backtest_signals(bars, signals_df, date_str, config, strategy_name, option_type, signal_col)
 
-    daily_trades = []
+def run_option_backtests(option_df, date_str, config, option_type, runs):
+    """
+    Backtests several signal sets against the same option file in one call.
 
-    # Process only the signals for the specific option type
-    for timestamp, signal_row in signals_df.iterrows():
-        if timestamp.time() > last_entry_time:
-            continue
+    The option bars are converted to arrays once and shared by every run.
 
-        # Check if there's a signal for this option type
-        if signal_row.get(signal_col, 0) == 1:
-            entry_row_series = option_df[option_df.index >= timestamp]
-            
-            if entry_row_series.empty:
-                continue
-            
-            entry_row = entry_row_series.iloc[0]
-            entry_price = entry_row['open']
-
-            # Simplified logic to avoid dependency on old config structure
-            tp_percent = 15.0  # Generous TP for options
-            sl_percent = 10.0  # Generous SL for options
-            
-            take_profit_price = entry_price * (1 + tp_percent / 100)
-            stop_loss_price = entry_price * (1 - sl_percent / 100)
-            
-            exit_reason_text = {
-                'tp': f"Option Target Profit ({tp_percent}%)",
-                'sl': f"Option Stop Loss ({sl_percent}%)"
-            }
-
-            # Trade exit logic for options
-            exit_time, exit_price, exit_reason = None, None, None
-            for exit_timestamp, option_row in option_df.loc[entry_row.name:].iterrows():
-                current_time = exit_timestamp.time()
-                
-                # Check profit target first (options can move fast)
-                if option_row['high'] >= take_profit_price:
-                    exit_time, exit_price, exit_reason = exit_timestamp, take_profit_price, exit_reason_text['tp']
-                    break
-                # Check stop loss
-                elif option_row['low'] <= stop_loss_price:
-                    exit_time, exit_price, exit_reason = exit_timestamp, stop_loss_price, exit_reason_text['sl']
-                    break
-                # Check end of day
-                elif current_time >= eod_exit_time:
-                    correct_exit_price = option_df.loc[exit_timestamp, 'close']
-                    exit_time, exit_price, exit_reason = exit_timestamp, correct_exit_price, "End of Day"
-                    break
-            
-            # Handle end of data
-            if exit_time is None:
-                last_row = option_df.iloc[-1]
-                exit_time, exit_price, exit_reason = last_row.name, last_row['close'], "End of Data"
-
-            pnl = exit_price - entry_price
-            pnl_percent = ((exit_price - entry_price) / entry_price) * 100
-            
-            daily_trades.append({
-                'date': date_str,
-                'type': f'{option_type} Option (Long)',
-                'comments': f'{strategy_name} - Option Buying',
-                'entry_time': entry_row.name,
-                'exit_time': exit_time,
-                'entry_price': entry_price,
-                'exit_price': exit_price,
-                'stop_loss_price': stop_loss_price,
-                'take_profit_price': take_profit_price,
-                'pnl': pnl,
-                'pnl_percent': pnl_percent,
-                'exit_reason': exit_reason
-            })
+    Args:
+        option_df: DataFrame with option price data (call or put)
+        date_str: Date string for identification
+        config: Configuration dictionary
+        option_type: 'Call' or 'Put'
+        runs: List of (signals_df, strategy_name, signal_col) tuples
 
-    print(f"    Generated {len(daily_trades)} {option_type} option trades")
-    return daily_trades
+    Returns:
+        list: One list of trade dicts per run, in the same order as runs
+    """
+    bars = prepare_option_arrays(option_df)
+    return [
+        _backtest_signals(bars, signals_df, date_str, config, strategy_name, option_type, signal_col)
+        for signals_df, strategy_name, signal_col in runs
+    ]
 
 def run_combined_option_backtest(call_signals_df, put_signals_df, calls_df, puts_df, date_str, config, strategy_name):
     """
@@ -113,7 +176,7 @@ def run_combined_option_backtest(call_signals_df, put_signals_df, calls_df, puts
     # Backtest call options
     if not call_signals_df.empty and not calls_df.empty:
         call_trades = run_option_backtest(
-            call_signals_df.copy(), calls_df.copy(), date_str, config, 
+            call_signals_df, calls_df, date_str, config,
             strategy_name, 'Call', 'Call'
         )
         all_trades.extend(call_trades)
@@ -121,7 +184,7 @@ def run_combined_option_backtest(call_signals_df, put_signals_df, calls_df, puts
     # Backtest put options  
     if not put_signals_df.empty and not puts_df.empty:
         put_trades = run_option_backtest(
-            put_signals_df.copy(), puts_df.copy(), date_str, config,
+            put_signals_df, puts_df, date_str, config,
             strategy_name, 'Put', 'Put'
         )
         all_trades.extend(put_trades)
@@ -4,17 +4,14 @@ import pandas as pd
 import numpy as np
 import yaml
 
-try:
-    import pandas_ta as ta
-except ImportError:
-    import sys
-    import subprocess
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "pandas_ta"])
-    import pandas_ta as ta
-
 from datetime import time
 import os
 
+from tools.trade_sink import write_trades
+from tools.lazy_imports import load_pandas_ta
+from tools.profiler import profiled
+from .fill_model import apply_fill_model
+
 def load_trade_config():
     """Load trade configuration from option_tools/trade_config.yaml"""
     try:
@@ -72,28 +69,33 @@ def load_trade_config():
             }
         }
 
-def execute_option_trades(signals_df, prices_df, signal_col, trade_type, config, output_dir, output_filename):
+@profiled('indicators')
+def prepare_option_prices(prices_df, trade_config):
+    """Index prices by datetime and add the ATR column used by the trade loop (in place)."""
+    prices_df['datetime'] = pd.to_datetime(prices_df['datetime'])
+    prices_df.set_index('datetime', inplace=True)
+
+    # Add ATR calculation
+    atr_period = trade_config.get('ATR_PERIOD', 5)
+    prices_df[f'ATR_{atr_period}'] = load_pandas_ta().atr(prices_df['high'], prices_df['low'], prices_df['close'], length=atr_period)
+    return prices_df
+
+@profiled('trade_sim')
+def simulate_option_trades(signals_df, prices_df, signal_col, trade_type, config, trade_config):
     """
-    Executes option trades based on signals using advanced trade logic with signal differentiation and EMA crossovers.
+    Runs the advanced hybrid premium trade loop over prepared prices and returns the
+    result dicts without writing anything (see prepare_option_prices).
     """
-    # Load trade-specific configuration
-    trade_config = load_trade_config()
-    
     # Get timing from main config (passed from app.py)
     last_entry_hour, last_entry_minute = map(int, config['LAST_ENTRY_TIME'].split(':'))
     last_entry_time = time(last_entry_hour, last_entry_minute)
 
     signals_df['datetime'] = pd.to_datetime(signals_df['datetime'])
-    prices_df['datetime'] = pd.to_datetime(prices_df['datetime'])
-    prices_df.set_index('datetime', inplace=True)
-
-    # Add ATR calculation
-    atr_period = trade_config.get('ATR_PERIOD', 5)
-    prices_df[f'ATR_{atr_period}'] = ta.atr(prices_df['high'], prices_df['low'], prices_df['close'], length=atr_period)
 
     valid_signals = signals_df[signals_df[signal_col] == 1].copy()
     
     trade_results = []
+    exit_bar_stops = []
     current_trade_exit_time = None  # Track when current trade exits
 
     print(f"   Processing {len(valid_signals)} option signals for {trade_type} using advanced strategy with signal differentiation")
@@ -144,6 +146,7 @@ def execute_option_trades(signals_df, prices_df, signal_col, trade_type, config,
         result = execute_advanced_hybrid_premium_trade(trade_data, entry_price, trade_config, entry_time, trade_type, next_bar_index, is_big_move_from_signal=is_big_move_from_signal)
         
         if result:
+            exit_bar_stops.append(result.pop('Exit Bar SL'))
             trade_results.append(result)
             # Update the exit time to prevent overlapping trades
             current_trade_exit_time = pd.to_datetime(result['Exit Time'])
@@ -151,22 +154,23 @@ def execute_option_trades(signals_df, prices_df, signal_col, trade_type, config,
         else:
             print(f"   Trade execution failed for signal at {signal['datetime']}")
 
+    return apply_fill_model(trade_results, prices_df, bar_stops=exit_bar_stops)
+
+def execute_option_trades(signals_df, prices_df, signal_col, trade_type, config, output_dir, output_filename, sink=None):
+    """
+    Executes option trades based on signals using advanced trade logic with signal differentiation and EMA crossovers.
+    """
+    # Load trade-specific configuration
+    trade_config = load_trade_config()
+
+    prepare_option_prices(prices_df, trade_config)
+    trade_results = simulate_option_trades(signals_df, prices_df, signal_col, trade_type, config, trade_config)
+
     df_results = pd.DataFrame(trade_results)
     
-    # --- Save results to file ---
+    # --- Save results to file (true append, no read-back of earlier rows) ---
     if not df_results.empty:
-        os.makedirs(output_dir, exist_ok=True)
-        output_path = os.path.join(output_dir, output_filename)
-        
-        # Append to existing file if it exists, otherwise create new
-        if os.path.exists(output_path):
-            existing_df = pd.read_csv(output_path)
-            combined_df = pd.concat([existing_df, df_results], ignore_index=True)
-            combined_df.to_csv(output_path, index=False)
-            print(f"  ✓ Appended {len(df_results)} option trades to {output_path}")
-        else:
-            df_results.to_csv(output_path, index=False)
-            print(f"  ✓ Saved {len(df_results)} option trades to {output_path}")
+        write_trades(df_results, output_dir, output_filename, sink=sink, label='option')
     else:
         print(f"  ℹ️ No valid option trades found for {trade_type}")
     
@@ -175,267 +179,294 @@ def execute_option_trades(signals_df, prices_df, signal_col, trade_type, config,
 def execute_advanced_hybrid_premium_trade(trade_data, entry_price, trade_config, entry_time, trade_type, entry_idx, is_big_move_from_signal=None):
     """Execute trade with enhanced BigMove detection, multi-stage trailing logic, and INTELLIGENT SL MANAGEMENT"""
     
-    tier = get_premium_tier(entry_price, trade_config['PREMIUM_TIERS'])
-    
-    # PHASE 2: Enhanced SL Management - Dynamic SL based on entry conditions
-    initial_sl_pct = get_dynamic_sl_percent(trade_data, entry_price, trade_config, tier)
-    initial_sl = entry_price * (1 - initial_sl_pct / 100)
-    
     # Enhanced BigMove Detection
     is_big_move = detect_big_move(trade_data, entry_price, trade_config, trade_type, is_big_move_from_signal)
     
-    # Determine if this is an average signal (for fixed TP approach)
-    is_average_signal = not is_big_move and trade_config.get('AVERAGE_SIGNAL_MANAGEMENT', {}).get('ENABLED', False)
+    position = open_position(trade_data.iloc[0], entry_price, trade_config, entry_time, trade_type, is_big_move)
     
-    current_sl = initial_sl
-    highest_high = trade_data.iloc[0]['high']
-    trailed_sl = initial_sl
+    for idx, bar in trade_data.iloc[1:].iterrows():
+        if step_position(position, bar, trade_config):
+            break
     
-    trail_active = False
-    exit_time = None
-    exit_price = None
-    exit_reason = 'In Progress'
+    # End of data exit
+    if position.exit_reason == 'In Progress':
+        close_position(position, trade_data.iloc[-1], 'End of Data')
     
-    candle_count = 0
-    stall_count = 0
-    breakeven_delay_counter = 0
-    entry_timestamp = pd.to_datetime(entry_time)
+    # The stop in force when the exit bar opened, for the fill model's gap check
+    return {**position_result(position), 'Exit Bar SL': position.bar_sl}
+
+class PositionState:
+    """
+    State of one open option trade under the hybrid premium rules.
+
+    The backtest loop and the paper-trading position manager both advance it
+    with step_position, one completed bar at a time.
+    """
+    __slots__ = (
+        'entry_price', 'entry_time', 'entry_timestamp', 'trade_type', 'tier', 'initial_sl_pct', 'initial_sl',
+        'current_sl', 'bar_sl', 'highest_high', 'trailed_sl', 'trail_active', 'candle_count', 'stall_count',
+        'breakeven_delay_counter', 'yellow_flag_triggered', 'yellow_flag_time', 'technical_exit_available',
+        'sl_tightened_by_yellow_flag', 'prev_wr28', 'prev_wr9', 'prev_k', 'prev_d', 'entry_risk_level',
+        'is_big_move', 'is_average_signal', 'closes', 'exit_time', 'exit_price', 'exit_reason',
+    )
+
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+def open_position(entry_bar, entry_price, trade_config, entry_time, trade_type, is_big_move):
+    """
+    Starts the trade state from the entry bar (the bar whose open is the entry price),
+    once that bar is complete.
+    """
+    tier = get_premium_tier(entry_price, trade_config['PREMIUM_TIERS'])
     
-    # PHASE 2: Enhanced SL Management - Yellow Flag and Technical Exit tracking
-    yellow_flag_triggered = False
-    yellow_flag_time = None
-    technical_exit_available = False
-    sl_tightened_by_yellow_flag = False
+    # PHASE 2: Enhanced SL Management - Dynamic SL based on entry conditions
+    initial_sl_pct = get_dynamic_sl_percent(entry_bar, entry_price, trade_config, tier)
+    initial_sl = entry_price * (1 - initial_sl_pct / 100)
     
+    position = PositionState(
+        entry_price=entry_price, entry_time=entry_time, entry_timestamp=pd.to_datetime(entry_time),
+        trade_type=trade_type, tier=tier, initial_sl_pct=initial_sl_pct, initial_sl=initial_sl,
+        current_sl=initial_sl, bar_sl=initial_sl, highest_high=entry_bar['high'], trailed_sl=initial_sl, trail_active=False,
+        candle_count=0, stall_count=0, breakeven_delay_counter=0,
+        # PHASE 2: Enhanced SL Management - Yellow Flag and Technical Exit tracking
+        yellow_flag_triggered=False, yellow_flag_time=None, technical_exit_available=False,
+        sl_tightened_by_yellow_flag=False,
+        prev_wr28=entry_bar.get('%R.1', 0), prev_wr9=entry_bar.get('%R', 0),
+        prev_k=entry_bar.get('K', 50), prev_d=entry_bar.get('D', 50),
+        # Entry risk assessment for enhanced SL management
+        entry_risk_level=assess_entry_risk_level(entry_bar),
+        closes=[entry_bar['close']], exit_time=None, exit_price=None, exit_reason='In Progress',
+    )
+    classify_position(position, is_big_move, trade_config)
+    
+    print(f"Debug {entry_time} ({trade_type}): BigMove={position.is_big_move}, AvgSignal={position.is_average_signal}, EntryRisk={position.entry_risk_level}, InitialSL={initial_sl_pct:.1f}%")
+    return position
+
+def classify_position(position, is_big_move, trade_config):
+    """Sets the BigMove / average-signal management of a position"""
+    position.is_big_move = is_big_move
+    # Determine if this is an average signal (for fixed TP approach)
+    position.is_average_signal = not is_big_move and trade_config.get('AVERAGE_SIGNAL_MANAGEMENT', {}).get('ENABLED', False)
+
+def close_position(position, bar, exit_reason, exit_price=None):
+    """Exits at `exit_price` (default: the bar's close) on `bar`"""
+    position.exit_price = bar['close'] if exit_price is None else exit_price
+    position.exit_time = bar['datetime']
+    position.exit_reason = exit_reason
+    return True
+
+def step_position(position, bar, trade_config):
+    """
+    Applies the exit rules to the next completed bar (a dict or Series with datetime,
+    open, high, low, close, K, D, %R, %R.1 and the ATR column).
+
+    Returns:
+        bool: True when the position exited on this bar (exit_* fields are set)
+    """
+    p = position
+    entry_price, tier = p.entry_price, p.tier
     atr_col = f"ATR_{trade_config.get('ATR_PERIOD', 5)}"
     
-    prev_wr28 = trade_data.iloc[0].get('%R.1', 0)
-    prev_wr9 = trade_data.iloc[0].get('%R', 0)
-    prev_k = trade_data.iloc[0].get('K', 50)
-    prev_d = trade_data.iloc[0].get('D', 50)
-    
-    # Entry risk assessment for enhanced SL management
-    entry_risk_level = assess_entry_risk_level(trade_data.iloc[0])
-    
-    print(f"Debug {entry_time} ({trade_type}): BigMove={is_big_move}, AvgSignal={is_average_signal}, EntryRisk={entry_risk_level}, InitialSL={initial_sl_pct:.1f}%")
-    
-    for idx, bar in trade_data.iloc[1:].iterrows():
-        candle_count += 1
-        current_high = bar['high']
-        current_low = bar['low']
-        current_close = bar['close']
-        current_k = bar.get('K', 50)
-        current_d = bar.get('D', 50)
-        current_r = bar.get('%R', 0)
-        current_r1 = bar.get('%R.1', 0)
-        
-        # Update highest high
-        highest_high = max(highest_high, current_high)
-        
-        # Calculate current profit
-        profit_pct = (highest_high - entry_price) / entry_price * 100
-        current_profit_pct = (current_close - entry_price) / entry_price * 100
-        
-        # PHASE 2: ENHANCED SL MANAGEMENT - Yellow Flag Early Warning System
-        if not yellow_flag_triggered:
-            yellow_flags = detect_yellow_flag_conditions(
-                {'K': current_k, 'D': current_d, 'williams_9': current_r, 'williams_28': current_r1},
-                {'K': prev_k, 'D': prev_d, 'williams_9': prev_wr9, 'williams_28': prev_wr28},
-                trade_config
-            )
+    p.bar_sl = p.current_sl  # Before any of this bar's stop updates
+    p.candle_count += 1
+    current_high = bar['high']
+    current_low = bar['low']
+    current_close = bar['close']
+    current_k = bar.get('K', 50)
+    current_d = bar.get('D', 50)
+    current_r = bar.get('%R', 0)
+    current_r1 = bar.get('%R.1', 0)
+    p.closes.append(current_close)
+    
+    # Update highest high
+    p.highest_high = max(p.highest_high, current_high)
+    
+    # Calculate current profit
+    profit_pct = (p.highest_high - entry_price) / entry_price * 100
+    current_profit_pct = (current_close - entry_price) / entry_price * 100
+    
+    # PHASE 2: ENHANCED SL MANAGEMENT - Yellow Flag Early Warning System
+    if not p.yellow_flag_triggered:
+        yellow_flags = detect_yellow_flag_conditions(
+            {'K': current_k, 'D': current_d, 'williams_9': current_r, 'williams_28': current_r1},
+            {'K': p.prev_k, 'D': p.prev_d, 'williams_9': p.prev_wr9, 'williams_28': p.prev_wr28},
+            trade_config
+        )
+        
+        if yellow_flags:
+            p.yellow_flag_triggered = True
+            p.yellow_flag_time = bar['datetime']
+            print(f"🟡 YELLOW FLAG at {p.yellow_flag_time}: {', '.join(yellow_flags)} (Profit: {current_profit_pct:+.2f}%)")
             
-            if yellow_flags:
-                yellow_flag_triggered = True
-                yellow_flag_time = bar['datetime']
-                print(f"🟡 YELLOW FLAG at {yellow_flag_time}: {', '.join(yellow_flags)} (Profit: {current_profit_pct:+.2f}%)")
-                
-                # Tighten SL based on Yellow Flag
-                if not sl_tightened_by_yellow_flag:
-                    tighten_pct = trade_config.get('ENHANCED_SL_MANAGEMENT', {}).get('YELLOW_FLAG_SYSTEM', {}).get('TIGHTEN_SL_PCT', 1.5)
-                    tightened_sl = entry_price * (1 - (initial_sl_pct - tighten_pct) / 100)
-                    current_sl = max(current_sl, tightened_sl)
-                    sl_tightened_by_yellow_flag = True
-                    print(f"   → SL tightened by {tighten_pct}% to {((entry_price - current_sl) / entry_price * 100):.1f}%")
-        
-        # PHASE 2: ENHANCED SL MANAGEMENT - Technical Exit System
-        # CRITICAL FIX: Only apply technical exits to LOSING trades, NOT profitable BigMove trades
-        if not technical_exit_available:
-            tech_exit_signal, tech_exit_reason = check_technical_exit_conditions(
-                {'K': current_k, 'D': current_d, 'williams_9': current_r, 'williams_28': current_r1},
-                {'K': prev_k, 'D': prev_d, 'williams_9': prev_wr9, 'williams_28': prev_wr28},
-                trade_config
-            )
+            # Tighten SL based on Yellow Flag
+            if not p.sl_tightened_by_yellow_flag:
+                tighten_pct = trade_config.get('ENHANCED_SL_MANAGEMENT', {}).get('YELLOW_FLAG_SYSTEM', {}).get('TIGHTEN_SL_PCT', 1.5)
+                tightened_sl = entry_price * (1 - (p.initial_sl_pct - tighten_pct) / 100)
+                p.current_sl = max(p.current_sl, tightened_sl)
+                p.sl_tightened_by_yellow_flag = True
+                print(f"   → SL tightened by {tighten_pct}% to {((entry_price - p.current_sl) / entry_price * 100):.1f}%")
+    
+    # PHASE 2: ENHANCED SL MANAGEMENT - Technical Exit System
+    # CRITICAL FIX: Only apply technical exits to LOSING trades, NOT profitable BigMove trades
+    if not p.technical_exit_available:
+        tech_exit_signal, tech_exit_reason = check_technical_exit_conditions(
+            {'K': current_k, 'D': current_d, 'williams_9': current_r, 'williams_28': current_r1},
+            {'K': p.prev_k, 'D': p.prev_d, 'williams_9': p.prev_wr9, 'williams_28': p.prev_wr28},
+            trade_config
+        )
+        
+        if tech_exit_signal:
+            p.technical_exit_available = True
+            print(f"🔴 TECHNICAL EXIT SIGNAL at {bar['datetime']}: {tech_exit_reason} (Profit: {current_profit_pct:+.2f}%)")
             
-            if tech_exit_signal:
-                technical_exit_available = True
-                print(f"🔴 TECHNICAL EXIT SIGNAL at {bar['datetime']}: {tech_exit_reason} (Profit: {current_profit_pct:+.2f}%)")
-                
-                # CRITICAL FIX: Only exit on technical signals if trade is LOSING or barely profitable
-                # Do NOT exit profitable BigMove trades early - let them run!
-                should_exit_on_technical = False
-                
-                if current_profit_pct < -2.0:  # Losing trade
-                    should_exit_on_technical = True
-                    print(f"   → TECHNICAL EXIT: Cutting losses on losing trade")
-                elif current_profit_pct < 1.0 and not is_big_move:  # Small profit on non-BigMove
-                    should_exit_on_technical = True
-                    print(f"   → TECHNICAL EXIT: Taking small profit on average trade")
-                elif entry_risk_level == 'HIGH_RISK' and current_profit_pct < 0:  # High-risk losing trade
-                    should_exit_on_technical = True
-                    print(f"   → TECHNICAL EXIT: High-risk losing trade")
-                else:
-                    print(f"   → TECHNICAL EXIT IGNORED: Preserving profitable trade (BigMove={is_big_move}, Profit={current_profit_pct:+.2f}%)")
-                
-                if should_exit_on_technical:
-                    exit_price = current_close
-                    exit_time = bar['datetime']
-                    exit_reason = f'Enhanced Technical Exit: {tech_exit_reason}'
-                    break
-                
-                # For other cases, just tighten SL slightly
-                elif not sl_tightened_by_yellow_flag and current_profit_pct < 0:
-                    emergency_sl = entry_price * (1 - (initial_sl_pct - 1.0) / 100)  # Tighten by 1%
-                    current_sl = max(current_sl, emergency_sl)
-                    print(f"   → SL tightened by 1% due to technical signal")
-        
-        # Average Signal Management - Fixed TP approach
-        if is_average_signal:
-            fixed_tp_points = trade_config['AVERAGE_SIGNAL_MANAGEMENT'].get('FIXED_TP_POINTS', 10)
+            # CRITICAL FIX: Only exit on technical signals if trade is LOSING or barely profitable
+            # Do NOT exit profitable BigMove trades early - let them run!
+            should_exit_on_technical = False
             
-            # Fixed TP exit
-            if current_high >= entry_price + fixed_tp_points:
-                exit_price = entry_price + fixed_tp_points
-                exit_time = bar['datetime']
-                exit_reason = 'Fixed TP (Average Signal)'
-                break
+            if current_profit_pct < -2.0:  # Losing trade
+                should_exit_on_technical = True
+                print(f"   → TECHNICAL EXIT: Cutting losses on losing trade")
+            elif current_profit_pct < 1.0 and not p.is_big_move:  # Small profit on non-BigMove
+                should_exit_on_technical = True
+                print(f"   → TECHNICAL EXIT: Taking small profit on average trade")
+            elif p.entry_risk_level == 'HIGH_RISK' and current_profit_pct < 0:  # High-risk losing trade
+                should_exit_on_technical = True
+                print(f"   → TECHNICAL EXIT: High-risk losing trade")
+            else:
+                print(f"   → TECHNICAL EXIT IGNORED: Preserving profitable trade (BigMove={p.is_big_move}, Profit={current_profit_pct:+.2f}%)")
             
-            # Quick breakeven for average signals
-            breakeven_pct = trade_config['AVERAGE_SIGNAL_MANAGEMENT']['QUICK_EXIT_CONDITIONS'].get('BREAKEVEN_AFTER_PCT', 4.0)
-            if current_profit_pct >= breakeven_pct:
-                current_sl = max(current_sl, entry_price)
+            if should_exit_on_technical:
+                return close_position(p, bar, f'Enhanced Technical Exit: {tech_exit_reason}')
             
-            # Quicker stall detection for average signals
-            avg_stall_candles = trade_config['AVERAGE_SIGNAL_MANAGEMENT']['QUICK_EXIT_CONDITIONS'].get('STALL_CANDLES', 5)
-            candle_range = current_high - current_low
-            if candle_range < entry_price * (trade_config.get('STALL_THRESHOLD_PCT', 1.5) / 100):
-                stall_count += 1
-            else:
-                stall_count = 0
-            if stall_count >= avg_stall_candles:
-                current_sl = max(current_sl, min(current_close, entry_price))
+            # For other cases, just tighten SL slightly
+            elif not p.sl_tightened_by_yellow_flag and current_profit_pct < 0:
+                emergency_sl = entry_price * (1 - (p.initial_sl_pct - 1.0) / 100)  # Tighten by 1%
+                p.current_sl = max(p.current_sl, emergency_sl)
+                print(f"   → SL tightened by 1% due to technical signal")
+    
+    # Average Signal Management - Fixed TP approach
+    if p.is_average_signal:
+        fixed_tp_points = trade_config['AVERAGE_SIGNAL_MANAGEMENT'].get('FIXED_TP_POINTS', 10)
+        
+        # Fixed TP exit
+        if current_high >= entry_price + fixed_tp_points:
+            return close_position(p, bar, 'Fixed TP (Average Signal)', entry_price + fixed_tp_points)
+        
+        # Quick breakeven for average signals
+        breakeven_pct = trade_config['AVERAGE_SIGNAL_MANAGEMENT']['QUICK_EXIT_CONDITIONS'].get('BREAKEVEN_AFTER_PCT', 4.0)
+        if current_profit_pct >= breakeven_pct:
+            p.current_sl = max(p.current_sl, entry_price)
+        
+        # Quicker stall detection for average signals
+        avg_stall_candles = trade_config['AVERAGE_SIGNAL_MANAGEMENT']['QUICK_EXIT_CONDITIONS'].get('STALL_CANDLES', 5)
+        candle_range = current_high - current_low
+        if candle_range < entry_price * (trade_config.get('STALL_THRESHOLD_PCT', 1.5) / 100):
+            p.stall_count += 1
+        else:
+            p.stall_count = 0
+        if p.stall_count >= avg_stall_candles:
+            p.current_sl = max(p.current_sl, min(current_close, entry_price))
+        
+        # Williams exits for average signals
+        if trade_config['AVERAGE_SIGNAL_MANAGEMENT']['QUICK_EXIT_CONDITIONS'].get('WILLIAMS_EXIT_ENABLED', True):
+            williams28_cross = p.prev_wr28 > trade_config.get('WILLIAMS28_CROSS_UNDER', -80) and current_r1 <= trade_config.get('WILLIAMS28_CROSS_UNDER', -80)
+            williams9_cross = current_profit_pct > 3 and p.prev_wr9 > trade_config.get('WILLIAMS9_CROSS_UNDER', -80) and current_r <= trade_config.get('WILLIAMS9_CROSS_UNDER', -80)
             
-            # Williams exits for average signals
-            if trade_config['AVERAGE_SIGNAL_MANAGEMENT']['QUICK_EXIT_CONDITIONS'].get('WILLIAMS_EXIT_ENABLED', True):
-                williams28_cross = prev_wr28 > trade_config.get('WILLIAMS28_CROSS_UNDER', -80) and current_r1 <= trade_config.get('WILLIAMS28_CROSS_UNDER', -80)
-                williams9_cross = current_profit_pct > 3 and prev_wr9 > trade_config.get('WILLIAMS9_CROSS_UNDER', -80) and current_r <= trade_config.get('WILLIAMS9_CROSS_UNDER', -80)
-                
-                if williams28_cross or williams9_cross:
-                    exit_price = current_close
-                    exit_time = bar['datetime']
-                    exit_reason = 'Williams Exit (Average Signal)'
-                    break
-        
-        # BigMove Management - Multi-stage trailing
-        elif is_big_move:
-            # Activate trailing based on tier settings
-            if not trail_active and profit_pct >= tier['trail_start_pct']:
-                trail_active = True
-                print(f"Debug {entry_time}: Trailing activated at {profit_pct:.2f}% profit")
+            if williams28_cross or williams9_cross:
+                return close_position(p, bar, 'Williams Exit (Average Signal)')
+    
+    # BigMove Management - Multi-stage trailing
+    elif p.is_big_move:
+        # Activate trailing based on tier settings
+        if not p.trail_active and profit_pct >= tier['trail_start_pct']:
+            p.trail_active = True
+            print(f"Debug {p.entry_time}: Trailing activated at {profit_pct:.2f}% profit")
+        
+        # Multi-stage trailing logic
+        if p.trail_active:
+            atr_val = bar.get(atr_col, 0)
+            trailing_config = get_trailing_stage_config(profit_pct, trade_config)
             
-            # Multi-stage trailing logic
-            if trail_active:
-                atr_val = bar.get(atr_col, 0)
-                trailing_config = get_trailing_stage_config(profit_pct, trade_config)
-                
-                # Time-based trailing adjustment
-                minutes_elapsed = (pd.to_datetime(bar['datetime']) - entry_timestamp).total_seconds() / 60
-                time_adjustment = get_time_based_adjustment(minutes_elapsed, trade_config)
-                
-                atr_multiplier = trailing_config['ATR_MULTIPLIER'] * time_adjustment
-                min_sl_pct = trailing_config['MIN_SL_PCT']
-                
-                trailed_sl = highest_high - (atr_val * atr_multiplier)
-                min_sl = entry_price * (1 - min_sl_pct / 100)
-                
-                # Profit protection logic
-                protected_sl = get_profit_protection_sl(entry_price, highest_high, trade_config)
-                
-                trailed_sl = max(trailed_sl, min_sl, protected_sl)
-                current_sl = max(current_sl, trailed_sl)
+            # Time-based trailing adjustment
+            minutes_elapsed = (pd.to_datetime(bar['datetime']) - p.entry_timestamp).total_seconds() / 60
+            time_adjustment = get_time_based_adjustment(minutes_elapsed, trade_config)
             
-            # Enhanced EMA crossover exit for BigMoves
-            if should_exit_on_ema_cross(trade_data, candle_count, current_profit_pct, trade_config, current_close, prev_k, prev_d, current_k, current_d):
-                exit_price = current_close
-                exit_time = bar['datetime']
-                exit_reason = 'Enhanced EMA Exit (BigMove)'
-                break
-        
-        # Regular trade management (neither average nor bigmove)
-        else:
-            # Standard trailing logic
-            if not trail_active and profit_pct >= tier['trail_start_pct']:
-                trail_active = True
+            atr_multiplier = trailing_config['ATR_MULTIPLIER'] * time_adjustment
+            min_sl_pct = trailing_config['MIN_SL_PCT']
             
-            if trail_active:
-                atr_val = bar.get(atr_col, 0)
-                atr_multiplier = 1.0  # Standard multiplier for regular trades
-                
-                trailed_sl = highest_high - (atr_val * atr_multiplier)
-                min_sl = entry_price * (1 - 8.0 / 100)  # 8% minimum SL
-                
-                trailed_sl = max(trailed_sl, min_sl)
-                current_sl = max(current_sl, trailed_sl)
+            trailed_sl = p.highest_high - (atr_val * atr_multiplier)
+            min_sl = entry_price * (1 - min_sl_pct / 100)
             
-            # Standard breakeven logic
-            if profit_pct >= trade_config.get('BREAKEVEN_MOVE_PCT', 4.0):
-                breakeven_delay_counter += 1
-                if breakeven_delay_counter >= tier['breakeven_delay']:
-                    current_sl = max(current_sl, entry_price)
+            # Profit protection logic
+            protected_sl = get_profit_protection_sl(entry_price, p.highest_high, trade_config)
             
-            # Standard Quick TP
-            if current_high >= entry_price + trade_config.get('QUICK_TP_POINTS', 10):
-                use_fade = trade_config.get('USE_STOCH_FADE_FOR_TP', False)
-                if not use_fade or (prev_k > prev_d and current_k <= current_d):
-                    exit_price = entry_price + trade_config.get('QUICK_TP_POINTS', 10)
-                    exit_time = bar['datetime']
-                    exit_reason = 'Quick TP'
-                    break
-        
-        # SL Hit Check (common for all trade types)
-        if current_low <= current_sl:
-            exit_price = current_sl
-            exit_time = bar['datetime']
-            exit_reason = 'Trailing SL' if trail_active else 'SL Hit'
-            break
+            p.trailed_sl = max(trailed_sl, min_sl, protected_sl)
+            p.current_sl = max(p.current_sl, p.trailed_sl)
         
-        # Update previous indicators
-        prev_wr28 = current_r1
-        prev_wr9 = current_r
-        prev_k = current_k
-        prev_d = current_d
+        # Enhanced EMA crossover exit for BigMoves
+        if should_exit_on_ema_cross(p.closes, p.candle_count, current_profit_pct, trade_config, current_close, p.prev_k, p.prev_d, current_k, current_d):
+            return close_position(p, bar, 'Enhanced EMA Exit (BigMove)')
     
-    # End of data exit
-    if exit_reason == 'In Progress':
-        exit_price = trade_data.iloc[-1]['close']
-        exit_time = trade_data.iloc[-1]['datetime']
-        exit_reason = 'End of Data'
-    
-    pl = exit_price - entry_price
-    pl_pct = (pl / entry_price) * 100 if entry_price > 0 else 0
+    # Regular trade management (neither average nor bigmove)
+    else:
+        # Standard trailing logic
+        if not p.trail_active and profit_pct >= tier['trail_start_pct']:
+            p.trail_active = True
+        
+        if p.trail_active:
+            atr_val = bar.get(atr_col, 0)
+            atr_multiplier = 1.0  # Standard multiplier for regular trades
+            
+            trailed_sl = p.highest_high - (atr_val * atr_multiplier)
+            min_sl = entry_price * (1 - 8.0 / 100)  # 8% minimum SL
+            
+            p.trailed_sl = max(trailed_sl, min_sl)
+            p.current_sl = max(p.current_sl, p.trailed_sl)
+        
+        # Standard breakeven logic
+        if profit_pct >= trade_config.get('BREAKEVEN_MOVE_PCT', 4.0):
+            p.breakeven_delay_counter += 1
+            if p.breakeven_delay_counter >= tier['breakeven_delay']:
+                p.current_sl = max(p.current_sl, entry_price)
+        
+        # Standard Quick TP
+        if current_high >= entry_price + trade_config.get('QUICK_TP_POINTS', 10):
+            use_fade = trade_config.get('USE_STOCH_FADE_FOR_TP', False)
+            if not use_fade or (p.prev_k > p.prev_d and current_k <= current_d):
+                return close_position(p, bar, 'Quick TP', entry_price + trade_config.get('QUICK_TP_POINTS', 10))
+    
+    # SL Hit Check (common for all trade types)
+    if current_low <= p.current_sl:
+        return close_position(p, bar, 'Trailing SL' if p.trail_active else 'SL Hit', p.current_sl)
+    
+    # Update previous indicators
+    p.prev_wr28 = current_r1
+    p.prev_wr9 = current_r
+    p.prev_k = current_k
+    p.prev_d = current_d
+    return False
+
+def position_result(position):
+    """Trade result dict of a closed position (the trade file row)"""
+    p = position
+    pl = p.exit_price - p.entry_price
+    pl_pct = (pl / p.entry_price) * 100 if p.entry_price > 0 else 0
     
     return {
-        'Entry Time': entry_time,
-        'Entry Price': f"{entry_price:.2f}",
-        'Exit Time': exit_time,
-        'Exit Price': f"{exit_price:.2f}",
+        'Entry Time': p.entry_time,
+        'Entry Price': f"{p.entry_price:.2f}",
+        'Exit Time': p.exit_time,
+        'Exit Price': f"{p.exit_price:.2f}",
         'P/L': f"{pl:.2f}",
         'P/L %': f"{pl_pct:.2f}%",
-        'Exit Reason': exit_reason,
-        'Trade Type': f"{trade_type} Option (Enhanced Hybrid Premium)",
-        'Initial SL': f"{initial_sl:.2f}",
-        'Final SL': f"{current_sl:.2f}",
-        'Highest High': f"{highest_high:.2f}",
-        'Big Move': str(is_big_move)
+        'Exit Reason': p.exit_reason,
+        'Trade Type': f"{p.trade_type} Option (Enhanced Hybrid Premium)",
+        'Initial SL': f"{p.initial_sl:.2f}",
+        'Final SL': f"{p.current_sl:.2f}",
+        'Highest High': f"{p.highest_high:.2f}",
+        'Big Move': str(p.is_big_move)
     }
 
 def detect_big_move(trade_data, entry_price, trade_config, trade_type, is_big_move_from_signal=None):
@@ -554,8 +585,8 @@ def get_profit_protection_sl(entry_price, highest_high, trade_config):
     
     return 0
 
-def should_exit_on_ema_cross(trade_data, candle_count, current_profit_pct, trade_config, current_close, prev_k, prev_d, current_k, current_d):
-    """Enhanced EMA crossover exit logic with additional filters"""
+def should_exit_on_ema_cross(closes, candle_count, current_profit_pct, trade_config, current_close, prev_k, prev_d, current_k, current_d):
+    """Enhanced EMA crossover exit logic with additional filters (closes: entry bar close onwards)"""
     
     ema_config = trade_config['SIGNAL_DIFFERENTIATION'].get('EMA_CROSS_EXIT', {})
     if not ema_config.get('ENABLED', False):
@@ -567,48 +598,47 @@ def should_exit_on_ema_cross(trade_data, candle_count, current_profit_pct, trade
     if current_profit_pct < min_profit or candle_count < min_candles:
         return False
     
-    try:
-        closes_series = trade_data['close'].iloc[:candle_count+1]
-        ema_periods = ema_config.get('EMA_PERIODS', [9, 15])
+    closes_series = pd.Series(closes[:candle_count+1])
+    ema_periods = ema_config.get('EMA_PERIODS', [9, 15])
+    
+    # The previous bar's EMAs need a full period too (pandas_ta returns None for shorter input)
+    if len(closes_series) > max(ema_periods):
+        ta = load_pandas_ta()
+        ema_short = ta.ema(closes_series, length=ema_periods[0]).iloc[-1]
+        ema_long = ta.ema(closes_series, length=ema_periods[1]).iloc[-1]
         
-        if len(closes_series) >= max(ema_periods):
-            ema_short = ta.ema(closes_series, length=ema_periods[0]).iloc[-1]
-            ema_long = ta.ema(closes_series, length=ema_periods[1]).iloc[-1]
-            
-            if len(closes_series) > 1:
-                prev_closes_series = closes_series.iloc[:-1]
-                prev_ema_short = ta.ema(prev_closes_series, length=ema_periods[0]).iloc[-1]
-                prev_ema_long = ta.ema(prev_closes_series, length=ema_periods[1]).iloc[-1]
-                
-                # Basic bearish crossover
-                bearish_cross = (prev_ema_short >= prev_ema_long) and (ema_short < ema_long)
-                
-                if bearish_cross:
-                    # Additional confirmation filters
-                    confirmation_filters = ema_config.get('CONFIRMATION_FILTERS', {})
-                    
-                    # Momentum weakening (Stochastic turning down)
-                    if confirmation_filters.get('MOMENTUM_WEAKENING', False):
-                        momentum_weak = (prev_k > prev_d and current_k <= current_d)
-                        if not momentum_weak:
-                            return False
-                    
-                    return True
+        prev_closes_series = closes_series.iloc[:-1]
+        prev_ema_short = ta.ema(prev_closes_series, length=ema_periods[0]).iloc[-1]
+        prev_ema_long = ta.ema(prev_closes_series, length=ema_periods[1]).iloc[-1]
         
-    except Exception as e:
-        pass
+        # Basic bearish crossover
+        bearish_cross = (prev_ema_short >= prev_ema_long) and (ema_short < ema_long)
+        
+        if bearish_cross:
+            # Additional confirmation filters
+            confirmation_filters = ema_config.get('CONFIRMATION_FILTERS', {})
+            
+            # Momentum weakening (Stochastic turning down)
+            if confirmation_filters.get('MOMENTUM_WEAKENING', False):
+                momentum_weak = (prev_k > prev_d and current_k <= current_d)
+                if not momentum_weak:
+                    return False
+            
+            return True
     
     return False
 
-def get_dynamic_sl_percent(trade_data, entry_price, trade_config, tier):
-    """Calculate dynamic SL percentage based on entry conditions"""
+def get_dynamic_sl_percent(entry_candle, entry_price, trade_config, tier):
+    """Calculate dynamic SL percentage based on entry conditions (entry bar, or trade data starting at it)"""
+    
+    if isinstance(entry_candle, pd.DataFrame):
+        entry_candle = entry_candle.iloc[0]
     
     enhanced_sl_config = trade_config.get('ENHANCED_SL_MANAGEMENT', {})
     if not enhanced_sl_config.get('ENABLED', False):
         return tier.get('sl_percent', trade_config.get('SL_PERCENT', 6.0))
     
     # Get entry candle indicators
-    entry_candle = trade_data.iloc[0]
     stoch_k = entry_candle.get('K', 50)
     williams_r = entry_candle.get('%R', -50)
     
@@ -637,7 +667,7 @@ def get_dynamic_sl_percent(trade_data, entry_price, trade_config, tier):
         print(f"Debug: LOW RISK entry detected (K:{stoch_k:.1f}, %R:{williams_r:.1f}) - SL: {sl_percent}%")
     
     # Time-based adjustments
-    entry_time = pd.to_datetime(trade_data.iloc[0]['datetime'])
+    entry_time = pd.to_datetime(entry_candle['datetime'])
     sl_percent = apply_time_based_sl_adjustment(sl_percent, entry_time, enhanced_sl_config)
     
     return sl_percent
@@ -2,7 +2,7 @@
 
 import pandas as pd
 import os
-from tabulate import tabulate
+from tools.lazy_imports import lazy_import
 
 def get_option_signal_counts(file_path, signal_col):
     """Get signal counts for option files"""
@@ -95,6 +95,7 @@ def run_option_analysis(base_dir_prefix='', cont_signals_filename='call_cont_out
     Run analytics specifically for option trading data.
     Processes call and put option data separately with strategy-specific columns.
     """
+    tabulate = lazy_import('tabulate').tabulate
     data_root = './data'
     dates = sorted([d for d in os.listdir(data_root) if os.path.isdir(os.path.join(data_root, d))])
 
@@ -0,0 +1,307 @@
+# option_tools/paper_trading.py
+# Event-driven paper trading with the backtest exit rules.
+#
+# PositionManager applies option_trade_executor's hybrid premium rules (premium tiers, breakeven,
+# stall, quick TP, EMA cross, yellow flag, technical exits) to each completed bar through the same
+# open_position / step_position functions the backtest loop calls, and appends every fill and exit
+# to a local order log.
+#
+#   python -m option_tools.paper_trading --date 0107                # replay a day bar by bar
+#   python -m option_tools.paper_trading --date 0107 --compare      # ... and diff against the backtest
+
+import os
+import io
+import csv
+import time
+import shutil
+import argparse
+import contextlib
+from datetime import datetime, time as dtime
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from tools.trade_sink import append_trades
+from tools.lazy_imports import load_pandas_ta
+from strategies.signal_engine import OPTION_SIGNAL_FILES
+from .option_trade_executor import (
+    load_trade_config, prepare_option_prices, simulate_option_trades, detect_big_move,
+    open_position, classify_position, close_position, step_position, position_result
+)
+
+PAPER_DIR = 'paper_trades'
+ORDER_LOG_COLUMNS = ['Time', 'Event', 'Position', 'Instrument', 'Book', 'Trade Type', 'Price', 'Reason', 'Decision ms']
+
+# Signal file and column suffix of each strategy (as app.OPTION_BOOKS)
+STRATEGY_SIGNALS = {'cont': ('cont', ''), 'rev_v1': ('rev', ''), 'rev_v2': ('rev', '_v2')}
+SIDES = {'call': 'Call', 'put': 'Put'}
+
+# Bar fields read by detect_big_move
+WINDOW_COLUMNS = ['open', 'high', 'low', 'close', 'K', '%R.1']
+
+class OrderLog:
+    """Append-only CSV of fills and exits, flushed per event so a crash loses nothing"""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._handle = open(path, 'a', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._handle)
+        if new_file:
+            self._writer.writerow(ORDER_LOG_COLUMNS)
+
+    def write(self, row):
+        self._writer.writerow([row.get(column, '') for column in ORDER_LOG_COLUMNS])
+        self._handle.flush()
+
+    def close(self):
+        self._handle.close()
+
+class PositionManager:
+    """
+    Open paper positions of any number of books, advanced on each completed bar.
+
+    A book is one (instrument, signal series) pair and holds at most one
+    position, as in the backtest: a signal is ignored while the book's
+    position is pending or open and when it is not after the last exit.
+    on_signal queues an entry at the next bar's open; on_bar (called at bar
+    close with the complete bar) fills queued entries of that instrument and
+    steps its open positions.
+
+    The backtest classifies BigMove trades from the first AVG_WINDOW_CANDLES
+    bars from entry, known in full only AVG_WINDOW_CANDLES - 1 bars after entry.
+    Until then a position runs unclassified (not BigMove) and is classified
+    as soon as the window is complete.
+    """
+
+    def __init__(self, config, trade_config=None, order_log=None, verbose=False):
+        self.trade_config = trade_config or load_trade_config()
+        hour, minute = map(int, config['LAST_ENTRY_TIME'].split(':'))
+        self.last_entry_time = dtime(hour, minute)
+        self.order_log = order_log
+        self.verbose = verbose
+        self.pending = {}       # book -> (signal time, trade type, Big Move flag of the signal)
+        self.open = {}          # book -> PositionState
+        self.windows = {}       # book -> bars of a position whose BigMove window is not complete yet
+        self.last_exit = {}     # book -> exit time of the book's last position
+        self.closed = []        # (book, PositionState)
+        self.decision_ms = []   # on_bar durations
+        self._next_id = 1
+        self._ids = {}
+
+    def on_signal(self, book, signal_time, trade_type, is_big_move=None):
+        """Queues an entry at the next bar's open; False when the signal is skipped"""
+        signal_time = pd.Timestamp(signal_time)
+        if signal_time.time() > self.last_entry_time or book in self.pending or book in self.open:
+            return False
+        if book in self.last_exit and signal_time <= self.last_exit[book]:
+            return False
+        self.pending[book] = (signal_time, trade_type, is_big_move)
+        return True
+
+    def on_bar(self, instrument, bar):
+        """
+        Processes one completed bar of `instrument` (dict or Series with datetime,
+        open, high, low, close, K, D, %R, %R.1 and the ATR column).
+
+        Returns:
+            list: Order log rows written for this bar
+        """
+        started = time.perf_counter()
+        events = []
+        with contextlib.nullcontext() if self.verbose else contextlib.redirect_stdout(None):
+            for book in [b for b in self.open if b[0] == instrument]:
+                position = self.open[book]
+                window = self.windows.get(book)
+                if window is not None:
+                    window.append(bar)
+                    self._classify(book, position, window)
+                if step_position(position, bar, self.trade_config):
+                    events.append(self._exit(book, position))
+
+            for book in [b for b in self.pending if b[0] == instrument]:
+                signal_time, trade_type, is_big_move = self.pending.pop(book)
+                events.append(self._enter(book, bar, trade_type, is_big_move))
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.decision_ms.append(elapsed_ms)
+        for event in events:
+            event['Decision ms'] = f"{elapsed_ms:.3f}"
+            if self.order_log is not None:
+                self.order_log.write(event)
+        return events
+
+    def close_all(self, last_bars, reason='End of Data'):
+        """Exits every open position at the close of its instrument's last bar ({instrument: bar})"""
+        events = []
+        for book, position in list(self.open.items()):
+            close_position(position, last_bars[book[0]], reason)
+            events.append(self._exit(book, position))
+        for event in events:
+            if self.order_log is not None:
+                self.order_log.write(event)
+        self.pending.clear()
+        return events
+
+    def results(self, book=None):
+        """Trade result dicts of closed positions (same rows as the backtest trade files)"""
+        return [position_result(p) for b, p in self.closed if book is None or b == book]
+
+    def _classify(self, book, position, window):
+        avg_window = self.trade_config['SIGNAL_DIFFERENTIATION']['AVG_WINDOW_CANDLES']
+        if len(window) >= avg_window:
+            frame = pd.DataFrame({column: [bar.get(column, np.nan) for bar in window] for column in WINDOW_COLUMNS})
+            classify_position(position, detect_big_move(frame, position.entry_price, self.trade_config, position.trade_type), self.trade_config)
+            del self.windows[book]
+
+    def _enter(self, book, bar, trade_type, is_big_move):
+        entry_price = float(bar['open'])
+        entry_time = pd.Timestamp(bar['datetime'])
+        resolved = is_big_move is not None or not self.trade_config.get('SIGNAL_DIFFERENTIATION', {}).get('ENABLED', False)
+        flag = detect_big_move(None, entry_price, self.trade_config, trade_type, is_big_move) if resolved else False
+        position = open_position(bar, entry_price, self.trade_config, entry_time, trade_type, flag)
+        self.open[book] = position
+        self._ids[id(position)] = self._next_id
+        self._next_id += 1
+        if not resolved:
+            self.windows[book] = [bar]
+            self._classify(book, position, self.windows[book])
+        return self._event(book, position, entry_time, 'ENTRY', entry_price, '')
+
+    def _exit(self, book, position):
+        del self.open[book]
+        self.windows.pop(book, None)
+        self.last_exit[book] = pd.Timestamp(position.exit_time)
+        self.closed.append((book, position))
+        return self._event(book, position, position.exit_time, 'EXIT', position.exit_price, position.exit_reason)
+
+    def _event(self, book, position, at, event, price, reason):
+        return {'Time': pd.Timestamp(at).isoformat(sep=' '), 'Event': event, 'Position': self._ids[id(position)],
+                'Instrument': book[0], 'Book': book[1], 'Trade Type': position.trade_type,
+                'Price': f"{price:.2f}", 'Reason': reason}
+
+def chain_bar(view, trade_config):
+    """
+    Last completed bar of an option_chain view as a step_position bar, with the
+    ATR column computed over the view's window.
+    """
+    atr_col = f"ATR_{trade_config.get('ATR_PERIOD', 5)}"
+    high, low, close = (pd.Series(np.asarray(view[c])) for c in ('high', 'low', 'close'))
+    bar = {name: float(values[-1]) for name, values in view.items() if name != 'datetime'}
+    bar['datetime'] = pd.Timestamp(view['datetime'][-1])
+    bar[atr_col] = float(load_pandas_ta().atr(high, low, close, length=trade_config.get('ATR_PERIOD', 5)).iloc[-1])
+    return bar
+
+def load_day_books(data_root, date, books, trade_config):
+    """
+    Prepared option prices per side and signal times per book for one date.
+
+    Returns:
+        tuple: ({side: prices_df}, {(side, strategy): signals_df with signal == 1})
+    """
+    prices, signals = {}, {}
+    for side, strategy in books:
+        option_type = SIDES[side]
+        if side not in prices:
+            prices[side] = prepare_option_prices(pd.read_csv(os.path.join(data_root, date, side, f"{side}_out.csv")), trade_config)
+        key, suffix = STRATEGY_SIGNALS[strategy]
+        df = pd.read_csv(os.path.join(data_root, date, OPTION_SIGNAL_FILES[option_type][key]), parse_dates=['datetime'])
+        signals[(side, strategy)] = df[df[option_type + suffix] == 1]
+    return prices, signals
+
+def run_paper_day(data_root, date, config, books=None, trade_config=None, output_dir=PAPER_DIR, verbose=False):
+    """
+    Replays one date bar by bar through a PositionManager, as the live loop would:
+    at each bar close the manager steps open positions, then takes that bar's signals.
+
+    Writes {output_dir}/{date}/orders.csv and one trade file per book, replacing
+    the output of an earlier replay of the same date.
+
+    Returns:
+        PositionManager: The manager after the session (results, decision_ms)
+    """
+    trade_config = trade_config or load_trade_config()
+    books = [tuple(book) for book in (books or [(side, strategy) for side in SIDES for strategy in STRATEGY_SIGNALS])]
+    with contextlib.redirect_stdout(io.StringIO()):
+        prices, signals = load_day_books(data_root, date, books, trade_config)
+
+    day_dir = os.path.join(output_dir, date)
+    # The order log and trade files append; a replay starts from an empty day folder
+    shutil.rmtree(day_dir, ignore_errors=True)
+    order_log = OrderLog(os.path.join(day_dir, 'orders.csv'))
+    manager = PositionManager(config, trade_config, order_log, verbose=verbose)
+
+    bars = {side: df.reset_index().to_dict('records') for side, df in prices.items()}
+    signal_times = {book: set(df['datetime']) for book, df in signals.items()}
+    big_move = {book: dict(zip(df['datetime'], df['Big Move'])) if 'Big Move' in df.columns else {} for book, df in signals.items()}
+    times = sorted(set().union(*(df.index for df in prices.values())))
+    positions = {side: 0 for side in bars}
+
+    for at in times:
+        stepped = set()
+        for side, side_bars in bars.items():
+            if positions[side] < len(side_bars) and side_bars[positions[side]]['datetime'] == at:
+                manager.on_bar(side, side_bars[positions[side]])
+                positions[side] += 1
+                stepped.add(side)
+        # Signals of this bar enter at the next bar's open (none after the side's last bar)
+        for (side, strategy), times_of_book in signal_times.items():
+            if at in times_of_book and side in stepped and positions[side] < len(bars[side]):
+                manager.on_signal((side, strategy), at, SIDES[side], big_move[(side, strategy)].get(at))
+
+    manager.close_all({side: side_bars[-1] for side, side_bars in bars.items()})
+    order_log.close()
+
+    for side, strategy in books:
+        trades = pd.DataFrame(manager.results((side, strategy)))
+        append_trades(os.path.join(day_dir, f"{side}_{strategy}_trades.csv"), trades)
+    return manager
+
+def compare_with_backtest(manager, data_root, date, config, books, trade_config):
+    """
+    Per book: trades of the backtest executor vs the paper replay and how many agree
+    on entry, exit time, exit price and reason.
+    """
+    rows = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for side, strategy in books:
+            option_type = SIDES[side]
+            key, suffix = STRATEGY_SIGNALS[strategy]
+            prices = prepare_option_prices(pd.read_csv(os.path.join(data_root, date, side, f"{side}_out.csv")), trade_config)
+            signals_df = pd.read_csv(os.path.join(data_root, date, OPTION_SIGNAL_FILES[option_type][key]))
+            backtest = simulate_option_trades(signals_df, prices, option_type + suffix, option_type, config, trade_config)
+            paper = manager.results((side, strategy))
+            fields = ('Entry Time', 'Exit Time', 'Exit Price', 'Exit Reason')
+            as_key = lambda t: tuple(str(pd.Timestamp(t[f])) if 'Time' in f else t[f] for f in fields)
+            matched = len({as_key(t) for t in backtest} & {as_key(t) for t in paper})
+            rows.append({'book': f"{side}_{strategy}", 'backtest': len(backtest), 'paper': len(paper), 'matching': matched})
+    return pd.DataFrame(rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Paper-trade one date bar by bar with the backtest exit rules")
+    parser.add_argument('--date', required=True, help="DDMM folder under the data root")
+    parser.add_argument('--data-root', default='data')
+    parser.add_argument('--output-dir', default=PAPER_DIR)
+    parser.add_argument('--books', nargs='+', default=None, help="side:strategy, e.g. call:rev_v1 put:cont")
+    parser.add_argument('--compare', action='store_true', help="Diff the paper trades against the backtest executor")
+    parser.add_argument('--verbose', action='store_true', help="Print the executor's per-trade debug output")
+    args = parser.parse_args()
+
+    with open('config.yaml', 'r') as file:
+        main_config = yaml.safe_load(file)
+    trade_config = load_trade_config()
+    books = [tuple(book.split(':')) for book in args.books] if args.books else None
+
+    started = datetime.now()
+    manager = run_paper_day(args.data_root, args.date, main_config, books, trade_config, args.output_dir, args.verbose)
+    decisions = np.array(manager.decision_ms)
+    print(f"✓ Paper session {args.date}: {len(manager.closed)} trades, {len(decisions)} bar events in {(datetime.now() - started).total_seconds():.2f}s")
+    print(f"📊 Decision time per bar: median {np.median(decisions):.3f} ms, p99 {np.percentile(decisions, 99):.3f} ms, max {decisions.max():.3f} ms")
+    print(f"💾 Order log: {os.path.join(args.output_dir, args.date, 'orders.csv')}")
+    if args.compare:
+        books = books or [(side, strategy) for side in SIDES for strategy in STRATEGY_SIGNALS]
+        print(compare_with_backtest(manager, args.data_root, args.date, main_config, books, trade_config).to_string(index=False))
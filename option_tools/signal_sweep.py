@@ -0,0 +1,218 @@
+# option_tools/signal_sweep.py
+# Sweep of the signal rule parameters (wait bars / thresholds), scored by executor P/L.
+
+import os
+import io
+import copy
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from strategies.signal_engine import SIGNAL_PARAMS, COLUMN_RENAMES, build_rule_context, option_signals, option_direction
+from tools.analytics_engine import normalize_ledger
+from tools.day_cache import DEFAULT_CACHE_DIR, build_day_cache, attach_day
+from .walk_forward import (
+    BOOK_SOURCES, load_main_config, resolve_executor, get_executor_module, indicator_key,
+    expand_grid, list_trade_dates, score_trades
+)
+
+DEFAULT_SETTINGS = {
+    'EXECUTOR': 'CONFIG',
+    'OBJECTIVE': 'total_pnl_pct',
+    'MIN_TRADES': 10,
+    'BOOKS': [['call', 'rev_v1'], ['put', 'rev_v1']],
+    'PARAM_GRID': {},
+    'OUTPUT_DIR': 'signal_sweep',
+    'CACHE_DIR': DEFAULT_CACHE_DIR,
+    'TOP_N': 10,
+}
+
+def load_sweep_config(path=None):
+    """Load sweep settings from option_tools/signal_sweep.yaml"""
+    path = path or os.path.join(os.path.dirname(__file__), 'signal_sweep.yaml')
+    try:
+        with open(path, 'r') as file:
+            settings = yaml.safe_load(file) or {}
+    except Exception as e:
+        print(f"Warning: Could not load {path}: {e}")
+        settings = {}
+    merged = copy.deepcopy(DEFAULT_SETTINGS)
+    merged.update(settings)
+    return merged
+
+def load_big_move(data_root, date, side, strategy, index):
+    """
+    'Big Move' flags of a book's signal file aligned to the day's bars, or None
+    when the file has no such column (the executor then classifies the trade itself).
+    """
+    path = os.path.join(data_root, date, side, BOOK_SOURCES[strategy][0].format(side=side))
+    try:
+        if 'Big Move' not in pd.read_csv(path, nrows=0, encoding='utf-8-sig').columns:
+            return None
+        flags = pd.read_csv(path, usecols=['datetime', 'Big Move'], encoding='utf-8-sig')
+    except (OSError, ValueError):
+        return None
+    flags.index = pd.to_datetime(flags['datetime'])
+    return flags['Big Move'][~flags.index.duplicated()].reindex(index).to_numpy()
+
+# Per-process state, set up once by _init_worker
+_WORKER = {}
+
+def _init_worker(data_root, cache_dir, days, books, executor, main_config):
+    module, base_config = get_executor_module(executor)
+    arrays = {(date, side): attach_day(date, side, cache_dir) for date, side in days}
+    books = [tuple(book) for book in books]
+    _WORKER.clear()
+    _WORKER.update({
+        'days': arrays,
+        'big_move': {
+            (date, side, strategy): load_big_move(data_root, date, side, strategy, day.index)
+            for (date, side), day in arrays.items() for book_side, strategy in books if book_side == side
+        },
+        'books': books,
+        'executor': executor,
+        'module': module,
+        'trade_config': base_config,
+        'main_config': main_config,
+        'prepared': {},
+        'results': {},
+    })
+
+def _prepared_prices(date, side):
+    """Executor-prepared price frame for one date/side, built once per worker"""
+    key = (date, side, indicator_key(_WORKER['executor'], _WORKER['trade_config']))
+    if key not in _WORKER['prepared']:
+        # Every cached column: the COMPLEX executor reads K, D, %R and %R.1 as well as OHLC
+        prices_df = _WORKER['days'][(date, side)].to_frame()
+        _WORKER['prepared'][key] = _WORKER['module'].prepare_option_prices(prices_df, _WORKER['trade_config'])
+    return _WORKER['prepared'][key]
+
+def _simulate(date, side, strategy, arrays, entries):
+    """
+    Executor trades for one set of entry bars.
+
+    Results are cached by the entry bars, so parameter sets that leave a
+    book's signals unchanged reuse its trades instead of re-running the executor.
+    The signal file's 'Big Move' flags go along with the entries, as in step 10.
+    """
+    positions = np.flatnonzero(entries)
+    big_move = _WORKER['big_move'].get((date, side, strategy))
+    source = BOOK_SOURCES[strategy][0] if big_move is not None else None
+    key = (date, side, source, positions.tobytes())
+    if key not in _WORKER['results']:
+        option_type = side.capitalize()
+        signals_df = pd.DataFrame({
+            'datetime': arrays.index,
+            option_type: entries.astype(int),
+        })
+        if big_move is not None:
+            signals_df['Big Move'] = big_move
+        with contextlib.redirect_stdout(io.StringIO()):
+            _WORKER['results'][key] = _WORKER['module'].simulate_option_trades(
+                signals_df, _prepared_prices(date, side), option_type, option_type,
+                _WORKER['main_config'], _WORKER['trade_config']
+            )
+    return [{'Date': date, 'Book': side, 'Strategy': strategy, **result} for result in _WORKER['results'][key]]
+
+def evaluate_params(params):
+    """Ledger-shaped trades of every configured book over all cached days for one parameter set"""
+    rows = []
+    strategies_by_side = {}
+    for side, strategy in _WORKER['books']:
+        strategies_by_side.setdefault(side, []).append(strategy)
+
+    for (date, side), arrays in _WORKER['days'].items():
+        strategies = strategies_by_side.get(side)
+        if not strategies:
+            continue
+        # Rules read the memory-mapped indicator columns directly (renamed views, no copies)
+        columns = {COLUMN_RENAMES.get(column, column): arrays[column] for column in arrays}
+        ctx = build_rule_context(columns, option_direction(arrays))
+        entries = option_signals(ctx, side.capitalize(), strategies, params)
+        for strategy in strategies:
+            rows.extend(_simulate(date, side, strategy, arrays, entries[strategy]))
+
+    if not rows:
+        return normalize_ledger(pd.DataFrame(columns=['Date', 'Book', 'Strategy', 'Entry Time', 'Exit Time', 'P/L', 'P/L %']))
+    return normalize_ledger(pd.DataFrame(rows))
+
+def run_param_set(task):
+    """Scores one parameter set in a worker process"""
+    index, overrides, objective, min_trades = task
+    params = dict(SIGNAL_PARAMS)
+    params.update(overrides)
+    trades = evaluate_params(params)
+    score, stats = score_trades(trades, objective, min_trades)
+    by_book = trades.groupby(['Book', 'Strategy'])['pnl_pct'].sum() if not trades.empty else {}
+    return {
+        'set': index,
+        **overrides,
+        'score': score,
+        'trades': stats['count'],
+        'win_rate': stats['win_rate'],
+        'total_pnl': stats['total_pnl'],
+        'total_pnl_pct': stats['avg_pnl_pct'],
+        'expectancy_pct': stats['expectancy_pct'],
+        **{f"{book}/{strategy} %": value for (book, strategy), value in dict(by_book).items()},
+    }
+
+def run_signal_sweep(data_root='data', settings_path=None, workers=None, config_path='config.yaml'):
+    """
+    Evaluates every PARAM_GRID combination over all dates and ranks them by trade P/L.
+
+    Day arrays come from the shared day cache (tools.day_cache) and are
+    memory-mapped by every worker, so the CSVs are parsed once across runs.
+
+    Returns:
+        pd.DataFrame: One row per parameter set, best first
+    """
+    settings = load_sweep_config(settings_path)
+    main_config = load_main_config(config_path)
+    executor = resolve_executor(settings, main_config)
+    books = settings['BOOKS']
+
+    dates = list_trade_dates(data_root)
+    days = build_day_cache(data_root, dates, sorted({side for side, _ in books}), settings['CACHE_DIR'])
+    if not days:
+        print(f"⚠️ No processed option files found under {data_root}.")
+        return None
+
+    grid = expand_grid(settings.get('PARAM_GRID', {}))
+    unknown = sorted({key for overrides in grid for key in overrides} - set(SIGNAL_PARAMS))
+    if unknown:
+        print(f"❌ Unknown signal parameters in PARAM_GRID: {unknown}")
+        return None
+    print(f"--- Signal sweep: {executor} executor, {len(dates)} dates, {len(grid)} parameter sets ---")
+
+    objective = settings.get('OBJECTIVE', 'total_pnl_pct')
+    tasks = [(i, overrides, objective, settings.get('MIN_TRADES', 0)) for i, overrides in enumerate(grid, 1)]
+    init_args = (data_root, settings['CACHE_DIR'], days, books, executor, main_config)
+    if workers == 1:
+        _init_worker(*init_args)
+        results = [run_param_set(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+            # Neighbouring grid points share most book signals; chunking keeps them in one worker's cache
+            results = list(pool.map(run_param_set, tasks, chunksize=max(1, len(tasks) // (4 * (workers or os.cpu_count() or 1)))))
+
+    ranked = pd.DataFrame(results).sort_values(['score', 'trades'], ascending=[False, False], kind='mergesort')
+    output_dir = settings.get('OUTPUT_DIR', 'signal_sweep')
+    os.makedirs(output_dir, exist_ok=True)
+    ranked.to_csv(os.path.join(output_dir, 'signal_sweep_results.csv'), index=False)
+
+    top_n = settings.get('TOP_N', 10)
+    print(ranked.head(top_n).to_string(index=False))
+    print(f"✓ Signal sweep results saved to {output_dir}/signal_sweep_results.csv")
+    return ranked
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep signal rule parameters scored by executor P/L")
+    parser.add_argument('--data-root', default='data')
+    parser.add_argument('--settings', default=None, help="Path to signal_sweep.yaml")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (1 = run inline)")
+    args = parser.parse_args()
+    run_signal_sweep(args.data_root, args.settings, args.workers)
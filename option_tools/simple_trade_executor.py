@@ -2,17 +2,13 @@
 
 import pandas as pd
 import numpy as np
-import os
 from datetime import time
-try:
-    import pandas_ta as ta
-except ImportError:
-    import sys
-    import subprocess
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "pandas_ta"])
-    import pandas_ta as ta
 
+from tools.trade_sink import write_trades
+from tools.lazy_imports import load_pandas_ta
+from tools.profiler import profiled
 from .simple_trade_config import load_simple_trade_config
+from .fill_model import apply_fill_model
 
 def get_atr_multiplier(profit_pct, multipliers_config):
     """Get the correct ATR multiplier based on the current profit."""
@@ -44,8 +40,10 @@ def execute_trade(trade_data, entry_price, config):
     exit_time = None
     exit_price = None
     exit_reason = 'In Progress'
+    bar_start_stop = stop_level
 
     for idx, bar in trade_data.iloc[1:].iterrows():
+        bar_start_stop = stop_level  # Stop in force when this bar opened (fill model gap check)
         current_price = bar['close']
         current_profit_pct = ((current_price - entry_price) / entry_price) * 100
 
@@ -93,30 +91,38 @@ def execute_trade(trade_data, entry_price, config):
         'P/L': f"{pl:.2f}",
         'P/L %': f"{pl_pct:.2f}%",
         'Exit Reason': exit_reason,
+        'Exit Bar SL': bar_start_stop,
     }
 
-def execute_option_trades(signals_df, prices_df, signal_col, trade_type, config, output_dir, output_filename):
-    """
-    Executes option trades based on signals using the two-phase stop-loss strategy.
-    """
-    simple_trade_config = load_simple_trade_config()
+@profiled('indicators')
+def prepare_option_prices(prices_df, simple_trade_config):
+    """Add the ATR and prior swing-low columns and index prices by datetime (in place)."""
     atr_period = simple_trade_config['INDICATORS']['ATR_PERIOD']
     swing_low_period = simple_trade_config['INDICATORS']['SWING_LOW_PERIOD']
 
-    last_entry_hour, last_entry_minute = map(int, config['LAST_ENTRY_TIME'].split(':'))
-    last_entry_time = time(last_entry_hour, last_entry_minute)
-
-    signals_df['datetime'] = pd.to_datetime(signals_df['datetime'])
     prices_df['datetime'] = pd.to_datetime(prices_df['datetime'])
     
     # Pre-calculate indicators
-    prices_df['atr'] = ta.atr(prices_df['high'], prices_df['low'], prices_df['close'], length=atr_period)
+    prices_df['atr'] = load_pandas_ta().atr(prices_df['high'], prices_df['low'], prices_df['close'], length=atr_period)
     prices_df['low_swing'] = prices_df['low'].rolling(window=swing_low_period).min().shift(1) # Shift to get prior swing low
     prices_df.set_index('datetime', inplace=True)
+    return prices_df
+
+@profiled('trade_sim')
+def simulate_option_trades(signals_df, prices_df, signal_col, trade_type, config, simple_trade_config):
+    """
+    Runs the two-phase stop-loss trade loop over prepared prices and returns the
+    result dicts without writing anything (see prepare_option_prices).
+    """
+    last_entry_hour, last_entry_minute = map(int, config['LAST_ENTRY_TIME'].split(':'))
+    last_entry_time = time(last_entry_hour, last_entry_minute)
+
+    signals_df['datetime'] = pd.to_datetime(signals_df['datetime'])
 
     valid_signals = signals_df[signals_df[signal_col] == 1].copy()
     
     trade_results = []
+    exit_bar_stops = []
     current_trade_exit_time = None
 
     print(f"   Processing {len(valid_signals)} option signals for {trade_type} using Two-Phase SL strategy")
@@ -152,6 +158,7 @@ def execute_option_trades(signals_df, prices_df, signal_col, trade_type, config,
         print(f"   Executing trade: Entry at {entry_time}, Price: {entry_price}")
 
         result = execute_trade(trade_data, entry_price, simple_trade_config)
+        exit_bar_stops.append(result.pop('Exit Bar SL'))
         
         final_result = {
             'Entry Time': entry_time,
@@ -164,20 +171,21 @@ def execute_option_trades(signals_df, prices_df, signal_col, trade_type, config,
         current_trade_exit_time = pd.to_datetime(final_result['Exit Time'])
         print(f"   Trade completed: Exit at {current_trade_exit_time}, P/L: {final_result['P/L %']}")
 
+    return apply_fill_model(trade_results, prices_df, bar_stops=exit_bar_stops)
+
+def execute_option_trades(signals_df, prices_df, signal_col, trade_type, config, output_dir, output_filename, sink=None):
+    """
+    Executes option trades based on signals using the two-phase stop-loss strategy.
+    """
+    simple_trade_config = load_simple_trade_config()
+
+    prepare_option_prices(prices_df, simple_trade_config)
+    trade_results = simulate_option_trades(signals_df, prices_df, signal_col, trade_type, config, simple_trade_config)
+
     df_results = pd.DataFrame(trade_results)
     
     if not df_results.empty:
-        os.makedirs(output_dir, exist_ok=True)
-        output_path = os.path.join(output_dir, output_filename)
-        
-        if os.path.exists(output_path):
-            existing_df = pd.read_csv(output_path)
-            combined_df = pd.concat([existing_df, df_results], ignore_index=True)
-            combined_df.to_csv(output_path, index=False)
-            print(f"  ✓ Appended {len(df_results)} option trades to {output_path}")
-        else:
-            df_results.to_csv(output_path, index=False)
-            print(f"  ✓ Saved {len(df_results)} option trades to {output_path}")
+        write_trades(df_results, output_dir, output_filename, sink=sink, label='option')
     else:
         print(f"  ℹ️ No valid option trades found for {trade_type}")
     
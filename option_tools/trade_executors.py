@@ -0,0 +1,31 @@
+# option_tools/trade_executors.py
+# SIMPLE / COMPLEX executor selection from config.yaml TRADE_STRATEGY.
+# The executor modules (and pandas_ta) are only imported when trades are executed.
+
+from functools import lru_cache
+
+def get_strategy_type(config):
+    """'SIMPLE' or 'COMPLEX' from the main config (COMPLEX when unset)"""
+    return 'SIMPLE' if (config or {}).get('TRADE_STRATEGY', 'COMPLEX') == 'SIMPLE' else 'COMPLEX'
+
+@lru_cache(maxsize=None)
+def get_trade_executors(strategy_type):
+    """(execute_option_trades, execute_index_trades) for a strategy type, imported once"""
+    if strategy_type == 'SIMPLE':
+        from .simple_trade_executor import execute_option_trades
+        from .index_trade_executor import execute_index_trades_simple as execute_index_trades
+    else:
+        from .option_trade_executor import execute_option_trades
+        from .index_trade_executor import execute_index_trades_complex as execute_index_trades
+    print(f"--- Using {strategy_type} trading strategy for both options and index trades ---")
+    return execute_option_trades, execute_index_trades
+
+def execute_option_trades(signals_df, prices_df, signal_col, trade_type, config, output_dir, output_filename, sink=None):
+    """Option trades with the executor selected by config['TRADE_STRATEGY']"""
+    execute, _ = get_trade_executors(get_strategy_type(config))
+    return execute(signals_df, prices_df, signal_col, trade_type, config, output_dir, output_filename, sink=sink)
+
+def execute_index_trades(signals_df, prices_df, signal_col, trade_type, config, output_dir, output_filename, sink=None):
+    """Index trades with the executor selected by config['TRADE_STRATEGY']"""
+    _, execute = get_trade_executors(get_strategy_type(config))
+    return execute(signals_df, prices_df, signal_col, trade_type, config, output_dir, output_filename, sink=sink)
@@ -0,0 +1,311 @@
+# option_tools/walk_forward.py
+# Walk-forward optimisation of the option trade executors over the data/DDMM folders.
+
+import os
+import io
+import copy
+import argparse
+import itertools
+import contextlib
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import yaml
+
+from tools.analytics_engine import normalize_ledger, summarize, equity_curve
+from tools.day_cache import DEFAULT_CACHE_DIR, build_day_cache, load_day
+
+# Signal file and signal column for each option strategy ({side} is 'call' or 'put')
+BOOK_SOURCES = {
+    'cont': ('{side}_cont_out.csv', '{Side}'),
+    'rev_v1': ('{side}_rev_out.csv', '{Side}'),
+    'rev_v2': ('{side}_rev_out.csv', '{Side}_v2'),
+}
+
+OBJECTIVE_KEYS = {
+    'total_pnl_pct': 'avg_pnl_pct',  # analytics_engine sums P/L % under this key
+    'total_pnl': 'total_pnl',
+    'expectancy_pct': 'expectancy_pct',
+}
+
+DEFAULT_SETTINGS = {
+    'EXECUTOR': 'CONFIG',
+    'WINDOWS': {'TRAIN_DATES': 5, 'TEST_DATES': 2, 'STEP_DATES': 2},
+    'OBJECTIVE': 'total_pnl_pct',
+    'MIN_TRAIN_TRADES': 5,
+    'BOOKS': [['call', 'rev_v1'], ['put', 'rev_v1']],
+    'PARAM_GRID': {'SIMPLE': {}, 'COMPLEX': {}},
+    'OUTPUT_DIR': 'walk_forward',
+    'CACHE_DIR': DEFAULT_CACHE_DIR,
+}
+
+def load_walk_forward_config(path=None):
+    """Load walk-forward settings from option_tools/walk_forward.yaml"""
+    path = path or os.path.join(os.path.dirname(__file__), 'walk_forward.yaml')
+    try:
+        with open(path, 'r') as file:
+            settings = yaml.safe_load(file) or {}
+    except Exception as e:
+        print(f"Warning: Could not load {path}: {e}")
+        settings = {}
+    merged = copy.deepcopy(DEFAULT_SETTINGS)
+    merged.update(settings)
+    return merged
+
+def load_main_config(path='config.yaml'):
+    """Load config.yaml (timing and TRADE_STRATEGY)"""
+    with open(path, 'r') as file:
+        return yaml.safe_load(file)
+
+def resolve_executor(settings, main_config):
+    """'SIMPLE' or 'COMPLEX' for this run"""
+    executor = str(settings.get('EXECUTOR', 'CONFIG')).upper()
+    if executor == 'CONFIG':
+        executor = str(main_config.get('TRADE_STRATEGY', 'COMPLEX')).upper()
+    return 'SIMPLE' if executor == 'SIMPLE' else 'COMPLEX'
+
+def get_executor_module(executor):
+    """Executor module and its base trade config (the code paths app.py uses)"""
+    if executor == 'SIMPLE':
+        from . import simple_trade_executor as module
+        from .simple_trade_config import load_simple_trade_config
+        return module, load_simple_trade_config()
+    from . import option_trade_executor as module
+    return module, module.load_trade_config()
+
+def indicator_key(executor, trade_config):
+    """Config values that change the prepared price columns (ATR / swing low)"""
+    if executor == 'SIMPLE':
+        return (trade_config['INDICATORS']['ATR_PERIOD'], trade_config['INDICATORS']['SWING_LOW_PERIOD'])
+    return (trade_config.get('ATR_PERIOD', 5),)
+
+def apply_overrides(base_config, overrides):
+    """Deep copy of base_config with dotted-path overrides applied"""
+    config = copy.deepcopy(base_config)
+    for dotted_key, value in overrides.items():
+        target = config
+        parts = dotted_key.split('.')
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = value
+    return config
+
+def expand_grid(grid):
+    """All parameter combinations as a list of {dotted_key: value} dicts"""
+    if not grid:
+        return [{}]
+    keys = list(grid.keys())
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+def date_sort_key(date_str):
+    """Chronological sort key for ddmm folder names"""
+    try:
+        return datetime(2025, int(date_str[2:]), int(date_str[:2]))
+    except (ValueError, TypeError):
+        return datetime.max
+
+def list_trade_dates(data_root='data'):
+    """Date folders with processed option data, in chronological order"""
+    dates = [
+        d for d in os.listdir(data_root)
+        if len(d) == 4 and os.path.exists(os.path.join(data_root, d, 'call', 'call_out.csv'))
+    ]
+    return sorted(dates, key=date_sort_key)
+
+def build_windows(dates, train_size, test_size, step=None):
+    """Rolling (train_dates, test_dates) windows over an ordered date list"""
+    step = step or test_size
+    windows = []
+    start = 0
+    while start + train_size + test_size <= len(dates):
+        train = dates[start:start + train_size]
+        test = dates[start + train_size:start + train_size + test_size]
+        windows.append((train, test))
+        start += step
+    return windows
+
+def load_day_inputs(data_root, date, books, cache_dir=DEFAULT_CACHE_DIR):
+    """Option prices (from the day cache) and raw signal frames for one date, keyed by side"""
+    day = {}
+    for side in sorted({side for side, _ in books}):
+        prices = load_day(data_root, date, side, cache_dir)
+        if prices is None:
+            continue
+        side_dir = os.path.join(data_root, date, side)
+        signals = {}
+        for filename in {BOOK_SOURCES[strategy][0].format(side=side) for s, strategy in books if s == side}:
+            path = os.path.join(side_dir, filename)
+            if os.path.exists(path):
+                signals[filename] = pd.read_csv(path, encoding='utf-8-sig')
+        day[side] = {'prices': prices, 'signals': signals}
+    return day
+
+class DaySimulator:
+    """
+    Runs an executor's trade loop over cached day inputs for many parameter sets.
+
+    Prices come from the shared day cache; prepared prices (datetime index plus ATR /
+    swing-low columns) are cached per indicator setting, so a grid that only
+    touches stop-loss parameters prepares each day exactly once.
+    """
+
+    def __init__(self, data_root, dates, books, executor, main_config, cache_dir=DEFAULT_CACHE_DIR):
+        self.books = [tuple(book) for book in books]
+        self.executor = executor
+        self.main_config = main_config
+        self.module, self.base_config = get_executor_module(executor)
+        self.days = {date: load_day_inputs(data_root, date, self.books, cache_dir) for date in dates}
+        self._prepared = {}
+
+    def prepared_prices(self, date, side, trade_config):
+        key = (date, side, indicator_key(self.executor, trade_config))
+        if key not in self._prepared:
+            # Every cached column: the COMPLEX executor reads K, D, %R and %R.1 as well as OHLC
+            prices_df = self.days[date][side]['prices'].to_frame()
+            self._prepared[key] = self.module.prepare_option_prices(prices_df, trade_config)
+        return self._prepared[key]
+
+    def run(self, dates, trade_config):
+        """Ledger-shaped DataFrame of all trades for the given dates and config"""
+        rows = []
+        for date in dates:
+            day = self.days.get(date, {})
+            for side, strategy in self.books:
+                if side not in day:
+                    continue
+                filename, column = BOOK_SOURCES[strategy]
+                signals_df = day[side]['signals'].get(filename.format(side=side))
+                signal_col = column.format(Side=side.capitalize())
+                if signals_df is None or signal_col not in signals_df.columns:
+                    continue
+                prices_df = self.prepared_prices(date, side, trade_config)
+                # Executors print per-trade debug lines; keep worker output readable
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results = self.module.simulate_option_trades(
+                        signals_df.copy(), prices_df, signal_col, side.capitalize(), self.main_config, trade_config
+                    )
+                for result in results:
+                    rows.append({'Date': date, 'Book': side, 'Strategy': strategy, **result})
+
+        if not rows:
+            return normalize_ledger(pd.DataFrame(columns=['Date', 'Book', 'Strategy', 'Entry Time', 'Exit Time', 'P/L', 'P/L %']))
+        return normalize_ledger(pd.DataFrame(rows))
+
+def score_trades(trades_df, objective, min_trades=0):
+    """Objective value for a trade set (-inf when it has too few trades)"""
+    stats = summarize(trades_df)
+    if stats['count'] < min_trades:
+        return float('-inf'), stats
+    return stats[OBJECTIVE_KEYS.get(objective, 'avg_pnl_pct')], stats
+
+def run_window(task):
+    """
+    Optimise on one train window and evaluate the winner out of sample.
+
+    Module-level so it can be shipped to worker processes.
+    """
+    window_index, train_dates, test_dates, data_root, settings, main_config = task
+    executor = resolve_executor(settings, main_config)
+    simulator = DaySimulator(data_root, train_dates + test_dates, settings['BOOKS'], executor, main_config,
+                             settings.get('CACHE_DIR', DEFAULT_CACHE_DIR))
+    objective = settings.get('OBJECTIVE', 'total_pnl_pct')
+    min_trades = settings.get('MIN_TRAIN_TRADES', 0)
+
+    best = None
+    for overrides in expand_grid(settings.get('PARAM_GRID', {}).get(executor, {})):
+        trade_config = apply_overrides(simulator.base_config, overrides)
+        score, stats = score_trades(simulator.run(train_dates, trade_config), objective, min_trades)
+        if best is None or score > best[0]:
+            best = (score, stats, overrides, trade_config)
+
+    train_score, train_stats, best_overrides, best_config = best
+    oos_trades = simulator.run(test_dates, best_config).assign(Window=window_index)
+    test_score, test_stats = score_trades(oos_trades, objective)
+    baseline_score, _ = score_trades(simulator.run(test_dates, simulator.base_config), objective)
+
+    return {
+        'window': window_index,
+        'train_start': train_dates[0],
+        'train_end': train_dates[-1],
+        'test_start': test_dates[0],
+        'test_end': test_dates[-1],
+        'best_params': best_overrides,
+        'train_score': train_score,
+        'train_trades': train_stats['count'],
+        'test_score': test_score,
+        'test_trades': test_stats['count'],
+        'test_win_rate': test_stats['win_rate'],
+        'baseline_test_score': baseline_score,
+        'oos_trades': oos_trades,
+    }
+
+def run_walk_forward(data_root='data', settings_path=None, workers=None, config_path='config.yaml'):
+    """
+    Rolling train/test walk-forward over the date folders.
+
+    Windows are optimised in parallel processes. Writes the per-window summary,
+    the out-of-sample trades and the combined OOS equity curve to OUTPUT_DIR.
+
+    Returns:
+        dict: {'windows': DataFrame, 'oos_trades': DataFrame, 'equity_curve': dict}
+    """
+    settings = load_walk_forward_config(settings_path)
+    main_config = load_main_config(config_path)
+    executor = resolve_executor(settings, main_config)
+
+    windows_cfg = settings.get('WINDOWS', {})
+    dates = list_trade_dates(data_root)
+    windows = build_windows(dates, windows_cfg.get('TRAIN_DATES', 5), windows_cfg.get('TEST_DATES', 2),
+                            windows_cfg.get('STEP_DATES'))
+    if not windows:
+        print(f"⚠️ Not enough dates ({len(dates)}) for one train/test window.")
+        return None
+
+    # Parse each option file once here; window workers only attach to the cached arrays
+    build_day_cache(data_root, dates, sorted({side for side, _ in settings['BOOKS']}), settings.get('CACHE_DIR', DEFAULT_CACHE_DIR))
+
+    grid_size = len(expand_grid(settings.get('PARAM_GRID', {}).get(executor, {})))
+    print(f"--- Walk-forward: {executor} executor, {len(windows)} windows, {grid_size} parameter sets per window ---")
+
+    tasks = [(i, train, test, data_root, settings, main_config) for i, (train, test) in enumerate(windows, 1)]
+    if workers == 1:
+        results = [run_window(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run_window, tasks))
+
+    for result in results:
+        print(f"  Window {result['window']}: train {result['train_start']}-{result['train_end']} "
+              f"({result['train_trades']} trades, score {result['train_score']:.2f}) → "
+              f"test {result['test_start']}-{result['test_end']} "
+              f"({result['test_trades']} trades, OOS {result['test_score']:.2f} vs baseline {result['baseline_test_score']:.2f}) "
+              f"params {result['best_params']}")
+
+    windows_df = pd.DataFrame([{k: v for k, v in r.items() if k != 'oos_trades'} for r in results])
+    oos_trades = pd.concat([r['oos_trades'] for r in results], ignore_index=True)
+    curve = equity_curve(oos_trades)
+
+    output_dir = settings.get('OUTPUT_DIR', 'walk_forward')
+    os.makedirs(output_dir, exist_ok=True)
+    windows_df.to_csv(os.path.join(output_dir, 'walk_forward_windows.csv'), index=False)
+    oos_trades.drop(columns=['pnl', 'pnl_pct', 'entry_time', 'exit_time', 'Week'], errors='ignore') \
+        .to_csv(os.path.join(output_dir, 'walk_forward_oos_trades.csv'), index=False)
+    pd.DataFrame({k: curve[k] for k in ('time', 'equity', 'equity_pct', 'drawdown', 'drawdown_pct')}) \
+        .to_csv(os.path.join(output_dir, 'walk_forward_equity.csv'), index=False)
+
+    oos_stats = summarize(oos_trades)
+    print(f"✓ OOS: {oos_stats['count']} trades, win {oos_stats['win_rate']:.1f}%, "
+          f"P/L {oos_stats['total_pnl']:.2f} ({oos_stats['avg_pnl_pct']:.2f}%), "
+          f"max drawdown {curve['max_drawdown']:.2f}")
+    print(f"✓ Walk-forward results saved to {output_dir}/")
+
+    return {'windows': windows_df, 'oos_trades': oos_trades, 'equity_curve': curve}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward optimisation of the option trade executors")
+    parser.add_argument('--data-root', default='data')
+    parser.add_argument('--settings', default=None, help="Path to walk_forward.yaml")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (1 = run inline)")
+    args = parser.parse_args()
+    run_walk_forward(args.data_root, args.settings, args.workers)
@@ -4,6 +4,9 @@ import pandas as pd
 import os
 from datetime import datetime
 
+from tools.profiler import profiled
+
+@profiled('process_data', rows=None)
 def process_nifty_file(date_dir_path, expected_date):
     """
     Reads NSE_NIFTY.csv from a specific date directory, validates the data against
@@ -79,6 +82,7 @@ def process_nifty_file(date_dir_path, expected_date):
         print(f"❌ Error saving file: {e}")
 
 
+@profiled('process_data', rows=None)
 def process_option_file(option_dir_path, expected_date, option_type):
     """
     Processes the first raw CSV file found in a 'call' or 'put' directory,
@@ -162,17 +166,20 @@ def process_option_file(option_dir_path, expected_date, option_type):
         print(f"❌ Error saving file '{output_file}': {e}")
 
 
-def run_process_data():
+def run_process_data(dates=None, base_data_dir='data'):
     """
     Main function to find and process all DDMM subdirectories, including call/put options.
+
+    Args:
+        dates (list): Only process these DDMM folders (default: all).
     """
-    base_data_dir = 'data'
-    
     if not os.path.isdir(base_data_dir):
         print(f"❌ Error: Base directory '{base_data_dir}' not found.")
         return
 
     subdirectories = [d for d in os.listdir(base_data_dir) if os.path.isdir(os.path.join(base_data_dir, d))]
+    if dates is not None:
+        subdirectories = [d for d in subdirectories if d in dates]
 
     if not subdirectories:
         print(f"ℹ️ No subdirectories found in '{base_data_dir}'.")
@@ -1,7 +1,24 @@
 # strategies/__init__.py
+# Public names are imported on first use (see option_tools/__init__.py).
 
-from .run_cont_strategy import generate_continuation_strategies
-from .run_rev_strategy import generate_reversal_strategies
-from .run_rev2_strategy import generate_reversal_strategies_v2
+import importlib
 
-print("--- Strategies Package Initialized ---")
+_EXPORTS = {
+    'generate_continuation_strategies': '.run_cont_strategy',
+    'generate_reversal_strategies': '.run_rev_strategy',
+    'generate_reversal_strategies_v2': '.run_rev2_strategy',
+    'generate_index_signals': '.signal_engine',
+    'generate_option_signals': '.signal_engine',
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
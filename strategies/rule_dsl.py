@@ -0,0 +1,286 @@
+# strategies/rule_dsl.py
+# Small declarative rule format for entry signals, compiled to NumPy kernels
+# (the stateful sequence kernel is JIT-compiled with Numba when it is installed).
+#
+# A rule is a nested dict; every node evaluates to one bool per bar:
+#
+#   {'cross_above': [a, b]}   a crosses above b this bar
+#   {'cross_below': [a, b]}   a crosses below b this bar
+#   {'above': [a, b]}         a > b  (also 'below', 'equals')
+#   {'all': [...]}, {'any': [...]}, {'not': node}
+#   {'first': node}           first bar of each run where node is true
+#   {'since': {'event': node, 'bars': N, 'reset': node}}
+#                             event happened within the last N bars (0 = this bar)
+#                             and no reset bar came after it
+#   {'sequence': {'arm': node, 'fire': node, 'cancel': node, 'timeout': N, 'fire_on_arm': bool}}
+#                             arm, then fire once; cancel or N bars after arming disarm
+#
+# Operands are series names (resolved through the context), numbers, or
+# '$NAME' parameter references filled in at compile time.
+
+import json
+
+import numpy as np
+import yaml
+
+try:
+    from numba import njit
+except ImportError:  # Optional: pure Python loop over lists
+    njit = None
+
+
+def _sequence_loop(arm, fire, cancel, timeout, fire_on_arm, signals):
+    """Arm/fire/cancel state machine (timeout < 0 means no timeout)"""
+    armed = False
+    arm_bar = -1
+    for i in range(len(signals)):
+        if not armed:
+            if arm[i]:
+                armed = True
+                arm_bar = i
+                if fire_on_arm and fire[i]:
+                    signals[i] = True
+                    armed = False
+        elif (timeout >= 0 and i > arm_bar + timeout) or cancel[i]:
+            armed = False
+        elif fire[i]:
+            signals[i] = True
+            armed = False
+    return signals
+
+
+_sequence_kernel = njit(cache=True)(_sequence_loop) if njit is not None else None
+
+
+def run_sequence(arm, fire, cancel, timeout=None, fire_on_arm=False):
+    """Runs the sequence state machine over bool arrays"""
+    signals = np.zeros(len(arm), dtype=bool)
+    timeout = -1 if timeout is None else int(timeout)
+    if _sequence_kernel is not None:
+        return _sequence_kernel(arm, fire, cancel, timeout, bool(fire_on_arm), signals)
+    # Plain lists are much faster than NumPy scalars in an interpreted loop
+    return _sequence_loop(arm.tolist(), fire.tolist(), cancel.tolist(), timeout, bool(fire_on_arm), signals)
+
+
+def _previous(values):
+    """values shifted one bar forward (NaN on the first bar)"""
+    prev = np.empty_like(values)
+    prev[0:1] = np.nan
+    prev[1:] = values[:-1]
+    return prev
+
+
+def _last_true_index(condition):
+    """Index of the most recent True bar at or before each bar (-1 if none yet)"""
+    return np.maximum.accumulate(np.where(condition, np.arange(len(condition)), -1))
+
+
+class RuleContext:
+    """
+    Series for one frame plus a cache of evaluated nodes.
+
+    Nodes are cached by their resolved definition, so a primitive such as
+    {'cross_above': ['fast', -80]} is computed once however many rules use it.
+    """
+
+    def __init__(self, series, n_bars):
+        self._series = series
+        self.n_bars = n_bars
+        self.cache = {}
+
+    def has_series(self, name):
+        return name in self._series
+
+    def series(self, name):
+        if name not in self._series:
+            raise KeyError(f"Series '{name}' is not available")
+        return self._series[name]
+
+
+class CompiledRule:
+    """A rule compiled to a function of a RuleContext"""
+
+    def __init__(self, fn, key, series):
+        self._fn = fn
+        self.key = key
+        self.series = series
+
+    def __call__(self, ctx):
+        if self.key not in ctx.cache:
+            ctx.cache[self.key] = self._fn(ctx)
+        return ctx.cache[self.key]
+
+
+def _resolve(value, params):
+    """Substitutes '$NAME' parameters"""
+    if isinstance(value, str) and value.startswith('$'):
+        name = value[1:]
+        if name not in params:
+            raise KeyError(f"Rule parameter '{name}' is not defined")
+        return params[name]
+    return value
+
+
+def _operand(value, params):
+    """Compiles a comparison operand (series name or number) to (fn, series names)"""
+    value = _resolve(value, params)
+    if isinstance(value, str):
+        return (lambda ctx: ctx.series(value)), {value}
+    constant = float(value)
+    return (lambda ctx: constant), set()
+
+
+def _compare(op):
+    def build(args, params):
+        (a, a_series), (b, b_series) = (_operand(arg, params) for arg in args)
+        return (lambda ctx: op(a(ctx), b(ctx))), a_series | b_series
+    return build
+
+
+def _cross(above):
+    def build(args, params):
+        (a, a_series), (b, b_series) = (_operand(arg, params) for arg in args)
+
+        def fn(ctx):
+            a_now, b_now = a(ctx), b(ctx)
+            a_prev = _previous(a_now)
+            b_prev = _previous(b_now) if isinstance(b_now, np.ndarray) else b_now
+            if above:
+                return (a_now > b_now) & (a_prev <= b_prev)
+            return (a_now < b_now) & (a_prev >= b_prev)
+        return fn, a_series | b_series
+    return build
+
+
+def _build_all(args, params):
+    children = [compile_rule(child, params) for child in args]
+
+    def fn(ctx):
+        result = children[0](ctx)
+        for child in children[1:]:
+            result = result & child(ctx)
+        return result
+    return fn, set().union(*(c.series for c in children))
+
+
+def _build_any(args, params):
+    children = [compile_rule(child, params) for child in args]
+
+    def fn(ctx):
+        result = children[0](ctx)
+        for child in children[1:]:
+            result = result | child(ctx)
+        return result
+    return fn, set().union(*(c.series for c in children))
+
+
+def _build_not(args, params):
+    child = compile_rule(args, params)
+    return (lambda ctx: ~child(ctx)), child.series
+
+
+def _build_first(args, params):
+    child = compile_rule(args, params)
+
+    def fn(ctx):
+        condition = child(ctx)
+        return condition & ~np.concatenate(([False], condition[:-1]))
+    return fn, child.series
+
+
+def _build_since(args, params):
+    event = compile_rule(args['event'], params)
+    reset = compile_rule(args['reset'], params) if args.get('reset') is not None else None
+    bars = _resolve(args.get('bars'), params)
+    bars = None if bars is None else int(bars)
+
+    def fn(ctx):
+        last_event = _last_true_index(event(ctx))
+        result = last_event >= 0
+        if bars is not None:
+            result &= np.arange(ctx.n_bars) - last_event <= bars
+        if reset is not None:
+            result &= _last_true_index(reset(ctx)) <= last_event
+        return result
+    series = event.series | (reset.series if reset is not None else set())
+    return fn, series
+
+
+def _build_sequence(args, params):
+    arm = compile_rule(args['arm'], params)
+    fire = compile_rule(args['fire'], params)
+    cancel = compile_rule(args['cancel'], params) if args.get('cancel') is not None else None
+    timeout = _resolve(args.get('timeout'), params)
+    fire_on_arm = bool(_resolve(args.get('fire_on_arm', False), params))
+
+    def fn(ctx):
+        cancel_values = cancel(ctx) if cancel is not None else np.zeros(ctx.n_bars, dtype=bool)
+        return run_sequence(arm(ctx), fire(ctx), cancel_values, timeout, fire_on_arm)
+    series = arm.series | fire.series | (cancel.series if cancel is not None else set())
+    return fn, series
+
+
+NODE_BUILDERS = {
+    'cross_above': _cross(above=True),
+    'cross_below': _cross(above=False),
+    'above': _compare(np.greater),
+    'below': _compare(np.less),
+    'equals': _compare(np.equal),
+    'all': _build_all,
+    'any': _build_any,
+    'not': _build_not,
+    'first': _build_first,
+    'since': _build_since,
+    'sequence': _build_sequence,
+}
+
+
+def _substitute(node, params):
+    """The node with every '$NAME' replaced (used as the cache key)"""
+    if isinstance(node, dict):
+        return {k: _substitute(v, params) for k, v in node.items()}
+    if isinstance(node, list):
+        return [_substitute(v, params) for v in node]
+    return _resolve(node, params)
+
+
+def compile_rule(node, params=None):
+    """
+    Compiles one rule node.
+
+    Args:
+        node (dict): Rule definition (see the module header).
+        params (dict): Values for '$NAME' references.
+
+    Returns:
+        CompiledRule: Call it with a RuleContext to get one bool per bar.
+    """
+    params = params or {}
+    if not isinstance(node, dict) or len(node) != 1:
+        raise ValueError(f"A rule node needs exactly one operator, got: {node!r}")
+    (op, args), = node.items()
+    if op not in NODE_BUILDERS:
+        raise ValueError(f"Unknown rule operator '{op}'")
+    fn, series = NODE_BUILDERS[op](args, params)
+    key = json.dumps(_substitute(node, params), sort_keys=True)
+    return CompiledRule(fn, key, frozenset(series))
+
+
+def compile_strategies(rules, params=None):
+    """
+    Compiles a {strategy: {output: rule}} mapping.
+
+    Returns:
+        dict: strategy -> output -> CompiledRule
+    """
+    return {
+        strategy: {output: compile_rule(rule, params) for output, rule in outputs.items()}
+        for strategy, outputs in rules.items()
+    }
+
+
+def load_rules(path):
+    """Reads a YAML rule file with STRATEGIES (and optional PARAMS) sections"""
+    with open(path, 'r') as file:
+        data = yaml.safe_load(file) or {}
+    return data.get('STRATEGIES', {}), data.get('PARAMS', {})
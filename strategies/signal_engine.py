@@ -0,0 +1,359 @@
+# strategies/signal_engine.py
+# One pass signal generation: each day's frame is read once and every strategy variant,
+# defined as rules (strategies/rule_dsl.py), is evaluated over shared cached primitives.
+
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from tools.profiler import profiled
+
+from .rule_dsl import RuleContext, compile_strategies
+
+STRATEGIES = ('cont', 'rev_v1', 'rev_v2')
+
+COLUMN_RENAMES = {'%R': 'williamsRFast', '%R.1': 'williamsRSlow', 'K': 'stochRSIK', 'D': 'stochRSID'}
+
+OUTPUT_BASE_COLUMNS = ['datetime', 'open', 'high', 'low', 'close']
+CPR_COLUMNS = [
+    'Daily Pivot', 'Daily BC', 'Daily TC', 'Daily R1', 'Daily R2',
+    'Daily R3', 'Daily R4', 'Daily S1', 'Daily S2', 'Daily S3',
+    'Daily S4', 'Prev Day High', 'Prev Day Low'
+]
+
+INDEX_SIGNAL_FILES = {
+    'input': 'tradeview_utc.csv',
+    'rev': 'tradeview_rev_output.csv',
+    'cont': 'tradeview_cont_output.csv',
+}
+
+OPTION_SIGNAL_FILES = {
+    'Call': {'input': 'call/call_out.csv', 'rev': 'call/call_rev_out.csv', 'cont': 'call/call_cont_out.csv'},
+    'Put': {'input': 'put/put_out.csv', 'rev': 'put/put_rev_out.csv', 'cont': 'put/put_cont_out.csv'},
+}
+
+
+# Tunable values referenced by STRATEGY_RULES as '$NAME'
+SIGNAL_PARAMS = {
+    # Reversal v1: bars allowed between fast and slow Williams crossovers, then for the Stoch entry
+    'WAIT_BULL_BARS_WILLIAMS': 4,
+    'WAIT_BEAR_BARS_WILLIAMS': 5,
+    'WAIT_BULL_BARS_STOCH': 2,
+    'WAIT_BEAR_BARS_STOCH': 2,
+    # Continuation: bars allowed between the Williams trigger and the Stoch confirmation
+    'CONT_WAIT_BARS': 4,
+    # Williams %R levels
+    'WILLIAMS_OVERSOLD': -80,
+    'WILLIAMS_OVERBOUGHT': -20,
+    'WILLIAMS_MID': -50,
+    # Stoch RSI levels
+    'STOCH_OVERSOLD': 20,
+    'STOCH_OVERBOUGHT': 80,
+    # Continuation: Williams %R (slow) filter on the confirmation bar
+    'CONT_CALL_SLOW_MIN': -40,
+    'CONT_PUT_SLOW_MAX': -60,
+}
+
+# Series names used by the rules -> frame columns (after COLUMN_RENAMES)
+RULE_SERIES = {
+    'fast': 'williamsRFast',
+    'slow': 'williamsRSlow',
+    'k': 'stochRSIK',
+    'd': 'stochRSID',
+}
+
+# Strategy definitions in the rule format of strategies.rule_dsl.
+# Every strategy has a 'call' (bullish) and 'put' (bearish) output.
+STRATEGY_RULES = {
+    'rev_v1': {
+        # Fast %R leaves oversold, slow %R follows within N bars, Stoch confirms within M bars
+        'call': {'first': {'all': [
+            {'since': {
+                'event': {'all': [
+                    {'cross_above': ['slow', '$WILLIAMS_OVERSOLD']},
+                    {'since': {'event': {'cross_above': ['fast', '$WILLIAMS_OVERSOLD']},
+                               'bars': '$WAIT_BULL_BARS_WILLIAMS'}},
+                ]},
+                'bars': '$WAIT_BULL_BARS_STOCH',
+                'reset': {'cross_above': ['fast', '$WILLIAMS_OVERSOLD']},
+            }},
+            {'above': ['k', 'd']},
+            {'above': ['k', '$STOCH_OVERSOLD']},
+            {'above': ['fast', '$WILLIAMS_OVERSOLD']},
+            {'above': ['slow', '$WILLIAMS_OVERSOLD']},
+        ]}},
+        'put': {'first': {'all': [
+            {'since': {
+                'event': {'all': [
+                    {'cross_below': ['slow', '$WILLIAMS_OVERBOUGHT']},
+                    {'since': {'event': {'cross_below': ['fast', '$WILLIAMS_OVERBOUGHT']},
+                               'bars': '$WAIT_BEAR_BARS_WILLIAMS'}},
+                ]},
+                'bars': '$WAIT_BEAR_BARS_STOCH',
+                'reset': {'cross_below': ['fast', '$WILLIAMS_OVERBOUGHT']},
+            }},
+            {'above': ['d', 'k']},
+            {'below': ['k', '$STOCH_OVERBOUGHT']},
+            {'below': ['fast', '$WILLIAMS_OVERBOUGHT']},
+            {'below': ['slow', '$WILLIAMS_OVERBOUGHT']},
+        ]}},
+    },
+    'rev_v2': {
+        # Slow %R armed by leaving oversold/overbought, fired by crossing the midline
+        'call': {'sequence': {
+            'arm': {'cross_above': ['slow', '$WILLIAMS_OVERSOLD']},
+            'cancel': {'cross_below': ['slow', '$WILLIAMS_OVERSOLD']},
+            'fire': {'cross_above': ['slow', '$WILLIAMS_MID']},
+        }},
+        'put': {'sequence': {
+            'arm': {'cross_below': ['slow', '$WILLIAMS_OVERBOUGHT']},
+            'cancel': {'cross_above': ['slow', '$WILLIAMS_OVERBOUGHT']},
+            'fire': {'cross_below': ['slow', '$WILLIAMS_MID']},
+            'fire_on_arm': True,
+        }},
+    },
+    'cont': {
+        # Fast %R trigger in the trend direction, Stoch confirmation within N bars
+        'call': {'sequence': {
+            'arm': {'all': [{'cross_above': ['fast', '$WILLIAMS_OVERSOLD']}, {'equals': ['direction', -1]}]},
+            'cancel': {'cross_below': ['fast', '$WILLIAMS_OVERSOLD']},
+            'fire': {'all': [{'cross_above': ['k', '$STOCH_OVERSOLD']}, {'above': ['slow', '$CONT_CALL_SLOW_MIN']}]},
+            'timeout': '$CONT_WAIT_BARS',
+        }},
+        'put': {'sequence': {
+            'arm': {'all': [{'cross_below': ['fast', '$WILLIAMS_OVERBOUGHT']}, {'equals': ['direction', 1]}]},
+            'cancel': {'cross_above': ['fast', '$WILLIAMS_OVERBOUGHT']},
+            'fire': {'all': [{'cross_below': ['k', '$STOCH_OVERBOUGHT']}, {'below': ['slow', '$CONT_PUT_SLOW_MAX']}]},
+            'timeout': '$CONT_WAIT_BARS',
+        }},
+    },
+}
+
+
+@lru_cache(maxsize=64)
+def _compiled_rules(params_key):
+    return compile_strategies(STRATEGY_RULES, dict(params_key))
+
+
+def compile_signal_rules(params=None):
+    """STRATEGY_RULES compiled with SIGNAL_PARAMS overridden by params (cached per parameter set)"""
+    merged = dict(SIGNAL_PARAMS)
+    merged.update(params or {})
+    return _compiled_rules(tuple(sorted(merged.items())))
+
+
+def build_rule_context(frame, direction=None):
+    """
+    RuleContext over the indicator columns of a frame (plus the trend direction if given).
+
+    frame can also be a dict of arrays keyed by column name, e.g. memory-mapped day arrays.
+    """
+    series = {alias: np.asarray(frame[column], dtype=float) for alias, column in RULE_SERIES.items() if column in frame}
+    if isinstance(frame, pd.DataFrame):
+        n_bars = len(frame)
+    else:
+        n_bars = len(next(iter(frame.values()))) if len(frame) else 0
+    if direction is not None:
+        series['direction'] = np.asarray(direction, dtype=float)
+    return RuleContext(series, n_bars)
+
+
+@profiled('state_machine', rows=lambda result, args, kwargs: args[0].n_bars)
+def evaluate_strategies(ctx, strategies, params=None):
+    """
+    Evaluates strategies on one frame; shared sub-rules are computed once.
+
+    Returns:
+        dict: strategy -> {'call': bool array, 'put': bool array}
+    """
+    compiled = compile_signal_rules(params)
+    return {strategy: {output: rule(ctx) for output, rule in compiled[strategy].items()} for strategy in strategies}
+
+
+def index_direction(df):
+    """Supertrend direction for the index (-1 up, 1 down), None without supertrend columns"""
+    if 'Up Trend' not in df.columns or 'Down Trend' not in df.columns:
+        return None
+    return np.where(df['Up Trend'].notna(), -1, 1)
+
+
+def option_direction(df):
+    """Direction from the option's own candle (-1 when close > open, else 1)"""
+    return np.where(df['close'] > df['open'], -1, 1)
+
+
+def option_type_from_filename(input_filename):
+    """'Call' / 'Put' from an option file name (None for other files)"""
+    if 'call_out.csv' in input_filename:
+        return 'Call'
+    if 'put_out.csv' in input_filename:
+        return 'Put'
+    return None
+
+
+@profiled('read_csv')
+def load_signal_frame(input_file):
+    """Reads an indicator file once and renames the indicator columns"""
+    df = pd.read_csv(input_file, parse_dates=['datetime'])
+    return df.rename(columns=COLUMN_RENAMES)
+
+
+def _runnable(strategies, ctx, label, outputs=('call', 'put')):
+    """Strategies whose rules only use series present in ctx (warns about the rest)"""
+    compiled = compile_signal_rules()
+    runnable = []
+    for strategy in strategies:
+        needed = set().union(*(compiled[strategy][output].series for output in outputs))
+        missing = sorted(name for name in needed if not ctx.has_series(name))
+        if missing:
+            print(f"⚠️  Warning: {label}: {strategy} needs series {missing}. Skipping.")
+        else:
+            runnable.append(strategy)
+    return runnable
+
+
+def write_signal_file(df, output_file, base_signal_columns, signals):
+    """
+    Writes signal columns into an output file in one pass.
+
+    An existing output file is updated in place (other columns are kept and
+    existing 1s are not cleared); otherwise it is created from the price and
+    CPR columns of df with base_signal_columns initialised to 0.
+
+    Args:
+        signals (dict): output column -> bool array aligned with df
+    """
+    if os.path.exists(output_file):
+        output_df = pd.read_csv(output_file, parse_dates=['datetime'], index_col='datetime')
+    else:
+        existing_cols = OUTPUT_BASE_COLUMNS + [col for col in CPR_COLUMNS if col in df.columns]
+        output_df = df[existing_cols].copy()
+        output_df.set_index('datetime', inplace=True)
+        for column in base_signal_columns:
+            output_df[column] = 0
+
+    for column, mask in signals.items():
+        if column not in output_df.columns:
+            output_df[column] = 0
+        output_df.loc[output_df.index.isin(df['datetime'][mask]), column] = 1
+
+    output_df.to_csv(output_file, index=True)
+    counts = ", ".join(f"{column} {int(mask.sum())}" for column, mask in signals.items())
+    print(f"✅ Signals written to {output_file} ({counts})")
+
+
+def process_index_day(date_dir_path, strategies=STRATEGIES, files=INDEX_SIGNAL_FILES, params=None):
+    """
+    Generates the selected index strategies for one date folder.
+
+    Reversal v1/v2 share the reversal output file (Call/Put and Call_v2/Put_v2),
+    continuation writes its own file (Call/Put).
+    """
+    input_file = os.path.join(date_dir_path, files['input'])
+    print(f"\n--- Generating index signals ({', '.join(strategies)}) in: {date_dir_path} ---")
+    if not os.path.exists(input_file):
+        print(f"⚠️  Warning: Missing input file in {date_dir_path}. Skipping.")
+        return
+
+    df = load_signal_frame(input_file)
+    ctx = build_rule_context(df, index_direction(df))
+    strategies = _runnable(strategies, ctx, input_file)
+    signals = evaluate_strategies(ctx, strategies, params)
+
+    rev_signals = {}
+    if 'rev_v1' in signals:
+        rev_signals.update({'Call': signals['rev_v1']['call'], 'Put': signals['rev_v1']['put']})
+    if 'rev_v2' in signals:
+        rev_signals.update({'Call_v2': signals['rev_v2']['call'], 'Put_v2': signals['rev_v2']['put']})
+    if rev_signals:
+        write_signal_file(df, os.path.join(date_dir_path, files['rev']), ['Call', 'Put'], rev_signals)
+
+    if 'cont' in signals:
+        write_signal_file(df, os.path.join(date_dir_path, files['cont']), ['Call', 'Put'],
+                          {'Call': signals['cont']['call'], 'Put': signals['cont']['put']})
+
+
+def option_signals(ctx, option_type, strategies=STRATEGIES, params=None):
+    """
+    Long-only entries for one option file.
+
+    Both option types use the bullish reversal rules on their own premium
+    (a put is bought when the put premium reverses up); continuation uses the
+    call or put rules with the option candle as the trend.
+
+    Returns:
+        dict: strategy -> bool array
+    """
+    signals = evaluate_strategies(ctx, strategies, params)
+    cont_output = 'call' if option_type == 'Call' else 'put'
+    return {
+        strategy: outputs[cont_output if strategy == 'cont' else 'call']
+        for strategy, outputs in signals.items()
+    }
+
+
+def process_option_day(date_dir_path, option_type, strategies=STRATEGIES, files=None, params=None):
+    """
+    Generates the selected option strategies for one option file.
+
+    Args:
+        option_type (str): 'Call' or 'Put'
+        files (dict): 'input', 'rev' and 'cont' paths relative to date_dir_path
+    """
+    files = files or OPTION_SIGNAL_FILES[option_type]
+    input_file = os.path.join(date_dir_path, files['input'])
+    print(f"\n--- Generating {option_type} option signals ({', '.join(strategies)}) in: {date_dir_path} ---")
+    if not os.path.exists(input_file):
+        print(f"⚠️  {option_type} option file not found: {input_file}")
+        return
+
+    df = load_signal_frame(input_file)
+    ctx = build_rule_context(df, option_direction(df))
+    signals = option_signals(ctx, option_type, _runnable(strategies, ctx, input_file), params)
+
+    rev_signals = {}
+    if 'rev_v1' in signals:
+        rev_signals[option_type] = signals['rev_v1']
+    if 'rev_v2' in signals:
+        rev_signals[f'{option_type}_v2'] = signals['rev_v2']
+    if rev_signals and files.get('rev'):
+        write_signal_file(df, os.path.join(date_dir_path, files['rev']), [option_type], rev_signals)
+
+    if 'cont' in signals and files.get('cont'):
+        write_signal_file(df, os.path.join(date_dir_path, files['cont']), [option_type], {option_type: signals['cont']})
+
+
+def _date_directories(base_data_dir):
+    """Sorted date folders under base_data_dir (None when the base folder is missing)"""
+    if not os.path.isdir(base_data_dir):
+        print(f"❌ Error: Base directory '{base_data_dir}' not found.")
+        return None
+    subdirectories = sorted(d for d in os.listdir(base_data_dir) if os.path.isdir(os.path.join(base_data_dir, d)))
+    if not subdirectories:
+        print(f"ℹ️ No subdirectories found in '{base_data_dir}'.")
+    return subdirectories
+
+
+def generate_index_signals(strategies=STRATEGIES, base_data_dir='data', params=None):
+    """Runs the selected index strategies over every date folder"""
+    subdirectories = _date_directories(base_data_dir)
+    if not subdirectories:
+        return
+    print(f"Found {len(subdirectories)} directories to process for index signals: {subdirectories}")
+    for dir_name in subdirectories:
+        process_index_day(os.path.join(base_data_dir, dir_name), strategies, params=params)
+    print(f"\n🎉 Index signals generated ({', '.join(strategies)}).")
+
+
+def generate_option_signals(strategies=STRATEGIES, base_data_dir='data', files=OPTION_SIGNAL_FILES, params=None):
+    """Runs the selected option strategies over the call and put files of every date folder"""
+    subdirectories = _date_directories(base_data_dir)
+    if not subdirectories:
+        return
+    print(f"Found {len(subdirectories)} directories to process for option signals: {subdirectories}")
+    for dir_name in subdirectories:
+        for option_type, option_files in files.items():
+            process_option_day(os.path.join(base_data_dir, dir_name), option_type, strategies, option_files, params)
+    print(f"\n🎉 Option signals generated ({', '.join(strategies)}).")
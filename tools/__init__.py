@@ -3,9 +3,21 @@
 from .run_cpr_filter import run_cpr_filter
 from .run_cpr_filter_wide_band import run_cpr_filter_wide_band
 from .clean_data_dir import clean_generated_files
+from .trade_sink import TradeSink, append_trades
+from .analytics_engine import load_trade_ledger, build_aggregates
+from .monte_carlo import run_monte_carlo
+from .day_cache import build_day_cache, attach_day, load_day
 
 __all__ = [
     'run_cpr_filter',
     'run_cpr_filter_wide_band',
-    'clean_generated_files'
+    'clean_generated_files',
+    'TradeSink',
+    'append_trades',
+    'load_trade_ledger',
+    'build_aggregates',
+    'run_monte_carlo',
+    'build_day_cache',
+    'attach_day',
+    'load_day'
 ]
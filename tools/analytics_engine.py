@@ -0,0 +1,243 @@
+# tools/analytics_engine.py
+# Numeric aggregation over the unified trade ledger. Renderers (text/PDF) only format what this returns.
+
+import os
+import glob
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .trade_sink import LEDGER_FILENAME, LEDGER_COLUMNS, describe_trade_file
+
+EMPTY_STATS = {
+    'count': 0, 'profitable': 0, 'total_pnl': 0.0, 'win_rate': 0.0, 'avg_pnl_pct': 0.0,
+    'gross_win': 0.0, 'gross_loss': 0.0, 'expectancy': 0.0, 'expectancy_pct': 0.0
+}
+
+# Books whose trades repeat another book's (index_crp is the CPR-filtered subset of index);
+# they get their own strategy rows but stay out of the combined figures
+OVERLAPPING_BOOKS = ('index_crp',)
+
+
+def get_weekly_groups(date_folders):
+    """Group dates into weekly cycles (Friday to Thursday)"""
+    dates_with_obj = []
+    for date_str in date_folders:
+        try:
+            # Parse ddmm format (assuming 2025)
+            date_obj = datetime(2025, int(date_str[2:]), int(date_str[:2]))
+            dates_with_obj.append((date_str, date_obj))
+        except (ValueError, TypeError):
+            continue
+
+    dates_with_obj.sort(key=lambda x: x[1])
+
+    weekly_groups = []
+    current_week = []
+    for date_str, date_obj in dates_with_obj:
+        # A Friday starts a new week
+        if date_obj.weekday() == 4 and current_week:
+            weekly_groups.append(current_week)
+            current_week = [date_str]
+        else:
+            current_week.append(date_str)
+
+    if current_week:
+        weekly_groups.append(current_week)
+
+    return weekly_groups
+
+
+def get_week_numbers(date_folders):
+    """Map each ddmm folder to its 1-based week number (see get_weekly_groups)."""
+    return {
+        date_str: week_num
+        for week_num, week_dates in enumerate(get_weekly_groups(date_folders), 1)
+        for date_str in week_dates
+    }
+
+
+def parse_pnl_pct(series):
+    """Convert 'x.xx%' strings to floats (NaN when unparseable)."""
+    return pd.to_numeric(series.astype(str).str.replace('%', '', regex=False), errors='coerce')
+
+
+def _collect_trade_files(data_root):
+    """Per-date trade files written by the executors (used when no ledger exists)."""
+    patterns = [
+        os.path.join(data_root, '*', 'trades', '*.csv'),
+        os.path.join(data_root, '*', 'trades_crp', '*.csv'),
+        os.path.join(data_root, '*', 'call', 'trades', '*.csv'),
+        os.path.join(data_root, '*', 'put', 'trades', '*.csv'),
+    ]
+    return sorted(path for pattern in patterns for path in glob.glob(pattern))
+
+
+def build_ledger_from_trade_files(data_root='data'):
+    """Rebuild the unified ledger from per-date trade files."""
+    frames = []
+    for path in _collect_trade_files(data_root):
+        try:
+            df = pd.read_csv(path, dtype=str, keep_default_na=False)
+        except Exception as e:
+            print(f"⚠️ Could not read {path}: {e}")
+            continue
+        if df.empty:
+            continue
+        date, book, strategy = describe_trade_file(path)
+        df['Date'] = date
+        df['Book'] = book
+        df['Strategy'] = strategy
+        df['Source'] = path.replace('\\', '/')
+        frames.append(df.reindex(columns=LEDGER_COLUMNS))
+
+    if not frames:
+        return pd.DataFrame(columns=LEDGER_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def normalize_ledger(ledger_df):
+    """Adds numeric pnl/pnl_pct, parsed times and week numbers to a raw ledger frame."""
+    df = ledger_df.copy()
+    df['Date'] = df['Date'].astype(str).str.zfill(4)
+    df['pnl'] = pd.to_numeric(df['P/L'], errors='coerce').fillna(0.0)
+    df['pnl_pct'] = parse_pnl_pct(df['P/L %']).fillna(0.0)
+    df['entry_time'] = pd.to_datetime(df['Entry Time'], errors='coerce')
+    df['exit_time'] = pd.to_datetime(df['Exit Time'], errors='coerce')
+    week_numbers = get_week_numbers(df['Date'].unique().tolist())
+    df['Week'] = df['Date'].map(week_numbers).fillna(0).astype(int)
+    return df
+
+
+def load_trade_ledger(data_root='data', ledger_path=None):
+    """
+    Loads the unified trade ledger once.
+
+    Falls back to scanning the per-date trade files when the ledger written by
+    the trade sink is not present (e.g. output from an older run).
+    """
+    ledger_path = ledger_path or os.path.join(data_root, LEDGER_FILENAME)
+    if os.path.exists(ledger_path):
+        ledger_df = pd.read_csv(ledger_path, dtype=str, keep_default_na=False)
+    else:
+        ledger_df = build_ledger_from_trade_files(data_root)
+    return normalize_ledger(ledger_df)
+
+
+def group_stats(df, keys):
+    """
+    Per-group trade statistics in one groupby pass.
+
+    Returns a dict keyed by group value (tuple for several keys) whose values
+    have the EMPTY_STATS fields. 'avg_pnl_pct' keeps the report's convention of
+    summing per-trade P/L % values.
+    """
+    if df.empty:
+        return {}
+
+    pnl = df['pnl']
+    work = pd.DataFrame({
+        'pnl': pnl,
+        'pnl_pct': df['pnl_pct'],
+        'win': (pnl > 0).astype(int),
+        'win_pnl': pnl.where(pnl > 0, 0.0),
+        'loss_pnl': pnl.where(pnl <= 0, 0.0),
+    })
+    key_values = [df[k] for k in keys] if isinstance(keys, (list, tuple)) else df[keys]
+    agg = work.groupby(key_values, sort=True).agg(
+        count=('pnl', 'size'),
+        profitable=('win', 'sum'),
+        total_pnl=('pnl', 'sum'),
+        avg_pnl_pct=('pnl_pct', 'sum'),
+        gross_win=('win_pnl', 'sum'),
+        gross_loss=('loss_pnl', 'sum'),
+    )
+    agg['win_rate'] = agg['profitable'] / agg['count'] * 100
+    agg['expectancy'] = agg['total_pnl'] / agg['count']
+    agg['expectancy_pct'] = agg['avg_pnl_pct'] / agg['count']
+
+    result = {}
+    for key, row in agg.iterrows():
+        stats = {name: float(row[name]) for name in EMPTY_STATS}
+        stats['count'] = int(row['count'])
+        stats['profitable'] = int(row['profitable'])
+        result[key] = stats
+    return result
+
+
+def summarize(df):
+    """Statistics for a whole frame (EMPTY_STATS when empty)."""
+    if df.empty:
+        return dict(EMPTY_STATS)
+    return next(iter(group_stats(df.assign(_all=0), '_all').values()))
+
+
+def combine_stats(stats_list):
+    """Adds up already-computed stats dicts without re-reading any trades."""
+    total = dict(EMPTY_STATS)
+    for stats in stats_list:
+        if not stats:
+            continue
+        for name in ('count', 'profitable', 'total_pnl', 'avg_pnl_pct', 'gross_win', 'gross_loss'):
+            total[name] += stats[name]
+    if total['count']:
+        total['win_rate'] = total['profitable'] / total['count'] * 100
+        total['expectancy'] = total['total_pnl'] / total['count']
+        total['expectancy_pct'] = total['avg_pnl_pct'] / total['count']
+    return total
+
+
+def equity_curve(df):
+    """
+    Cumulative P/L ordered by exit time, with running drawdown.
+
+    Returns:
+        dict: lists 'time', 'equity', 'equity_pct', 'drawdown', 'drawdown_pct'
+              plus scalars 'max_drawdown' and 'max_drawdown_pct'.
+    """
+    if df.empty:
+        return {'time': [], 'equity': [], 'equity_pct': [], 'drawdown': [], 'drawdown_pct': [],
+                'max_drawdown': 0.0, 'max_drawdown_pct': 0.0}
+
+    ordered = df.sort_values(['exit_time', 'entry_time'], kind='mergesort')
+    equity = ordered['pnl'].to_numpy(dtype=float).cumsum()
+    equity_pct = ordered['pnl_pct'].to_numpy(dtype=float).cumsum()
+    # Peak includes the flat starting point so an opening loss counts as drawdown
+    drawdown = np.maximum.accumulate(np.maximum(equity, 0.0)) - equity
+    drawdown_pct = np.maximum.accumulate(np.maximum(equity_pct, 0.0)) - equity_pct
+
+    return {
+        'time': ordered['exit_time'].dt.strftime('%Y-%m-%d %H:%M:%S').tolist(),
+        'equity': equity.tolist(),
+        'equity_pct': equity_pct.tolist(),
+        'drawdown': drawdown.tolist(),
+        'drawdown_pct': drawdown_pct.tolist(),
+        'max_drawdown': float(drawdown.max()),
+        'max_drawdown_pct': float(drawdown_pct.max()),
+    }
+
+
+def build_aggregates(ledger_df):
+    """
+    All analytics for a normalized ledger as plain dicts/lists.
+
+    Keys: 'summary', 'by_date', 'by_week', 'by_strategy' (keyed 'book/strategy'),
+    'by_exit_reason', 'equity_curve'. Every book has its strategy rows; the
+    combined figures leave out OVERLAPPING_BOOKS so no trade is counted twice.
+    """
+    by_strategy = {}
+    combined_df = ledger_df
+    if not ledger_df.empty:
+        labels = ledger_df['Book'].astype(str) + '/' + ledger_df['Strategy'].astype(str)
+        by_strategy = group_stats(ledger_df.assign(_label=labels), '_label')
+        combined_df = ledger_df[~ledger_df['Book'].isin(OVERLAPPING_BOOKS)]
+
+    return {
+        'summary': summarize(combined_df),
+        'by_date': group_stats(combined_df, 'Date'),
+        'by_week': group_stats(combined_df, 'Week'),
+        'by_strategy': by_strategy,
+        'by_exit_reason': group_stats(combined_df, 'Exit Reason'),
+        'equity_curve': equity_curve(combined_df),
+    }
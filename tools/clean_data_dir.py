@@ -3,13 +3,16 @@ import sys
 import shutil
 import glob
 
-def clean_generated_files():
+def clean_generated_files(dates=None, base_data_dir=None):
     """
     Scans all subdirectories within the 'data' folder and deletes
     a specific list of generated files and folders.
+
+    With dates, only those DDMM folders are cleaned and only their rows are
+    removed from the trade ledger (the rest of the ledger is kept).
     """
     project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    base_data_dir = os.path.join(project_root, 'data')
+    base_data_dir = base_data_dir or os.path.join(project_root, 'data')
 
     files_to_delete = [
         'tradeview_rev_output.csv',
@@ -43,6 +46,9 @@ def clean_generated_files():
         print(f"Error: Cannot access '{base_data_dir}'.")
         return
 
+    if dates is not None:
+        subdirectories = [d for d in subdirectories if d in dates]
+
     if not subdirectories:
         print("No date directories found to clean.")
         return
@@ -112,6 +118,22 @@ def clean_generated_files():
         except Exception as e:
             print(f"  ❌ Error deleting final_analytics_report.txt: {e}")
 
+    # Delete the unified trade ledger written by the trade sink
+    ledger_path = os.path.join(base_data_dir, 'trade_ledger.csv')
+    if dates is not None:
+        from .trade_sink import remove_ledger_rows
+        removed = remove_ledger_rows(ledger_path, subdirectories)
+        if removed:
+            print(f"  ✅ Removed {removed} rows for {len(subdirectories)} dates from data/trade_ledger.csv")
+            deleted_count += 1
+    elif os.path.exists(ledger_path):
+        try:
+            os.remove(ledger_path)
+            print("  ✅ Deleted: data/trade_ledger.csv")
+            deleted_count += 1
+        except Exception as e:
+            print(f"  ❌ Error deleting data/trade_ledger.csv: {e}")
+
     print(f"\n--- Cleanup complete. Total files/folders deleted: {deleted_count} ---")
 
 if __name__ == "__main__":
@@ -0,0 +1,203 @@
+# tools/day_cache.py
+# Memory-mapped per-day arrays shared by parallel workers (sweeps, walk-forward, per-date runs).
+#
+# Layout under the cache directory:
+#   DDMM/<instrument>.values.npy    float64 matrix (bars x columns), column-major
+#   DDMM/<instrument>.datetime.npy  int64 nanoseconds per bar
+#   DDMM/<instrument>.json          header: columns, rows and the source file it was built from
+
+import os
+import json
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CACHE_DIR = 'day_cache'
+
+# Source CSV of each instrument, relative to data/DDMM
+INSTRUMENT_SOURCES = {
+    'index': 'tradeview_utc.csv',
+    'call': os.path.join('call', 'call_out.csv'),
+    'put': os.path.join('put', 'put_out.csv'),
+}
+
+HEADER_VERSION = 1
+
+
+class DayArrays(Mapping):
+    """
+    Read-only view of one cached day/instrument.
+
+    Behaves like a dict of column -> 1-D array. The arrays are memory-mapped
+    views into the cache files, so attaching costs no parsing and no copy and
+    every process shares the same pages. 'datetime' holds int64 nanoseconds.
+    """
+
+    def __init__(self, header, values, datetime_ns):
+        self.header = header
+        self.columns = list(header['columns'])
+        self._positions = {name: i for i, name in enumerate(self.columns)}
+        self._values = values
+        self._datetime = datetime_ns
+
+    def __getitem__(self, column):
+        if column == 'datetime':
+            return self._datetime
+        return self._values[:, self._positions[column]]
+
+    def __iter__(self):
+        return iter(['datetime'] + self.columns)
+
+    def __len__(self):
+        return len(self.columns) + 1
+
+    @property
+    def n_bars(self):
+        return int(self.header['rows'])
+
+    @property
+    def index(self):
+        """Bar timestamps as a DatetimeIndex"""
+        return pd.DatetimeIndex(np.asarray(self._datetime).view('datetime64[ns]'))
+
+    def to_frame(self, columns=None):
+        """DataFrame copy with a 'datetime' column (for code that needs pandas)"""
+        df = pd.DataFrame({'datetime': self.index})
+        for column in columns or self.columns:
+            df[column] = np.asarray(self[column])
+        return df
+
+
+def _paths(cache_dir, date, instrument):
+    base = os.path.join(cache_dir, date, instrument)
+    return f"{base}.json", f"{base}.values.npy", f"{base}.datetime.npy"
+
+
+def _source_stamp(source):
+    stat = os.stat(source)
+    return {'source': os.path.abspath(source), 'source_mtime_ns': stat.st_mtime_ns, 'source_size': stat.st_size}
+
+
+def _read_header(header_path):
+    try:
+        with open(header_path, 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def is_fresh(data_root, date, instrument, cache_dir=DEFAULT_CACHE_DIR):
+    """True when the cached arrays were built from the current source file"""
+    source = os.path.join(data_root, date, INSTRUMENT_SOURCES[instrument])
+    header = _read_header(_paths(cache_dir, date, instrument)[0])
+    if header is None or header.get('version') != HEADER_VERSION or not os.path.exists(source):
+        return False
+    stamp = _source_stamp(source)
+    return all(header.get(key) == value for key, value in stamp.items())
+
+
+def materialize_day(data_root, date, instrument, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Parses one source CSV and writes its numeric columns to the cache.
+
+    Files are written under temporary names and moved into place, header last,
+    so a reader never attaches to a half-written day.
+
+    Returns:
+        dict: The header, or None when the source file does not exist.
+    """
+    source = os.path.join(data_root, date, INSTRUMENT_SOURCES[instrument])
+    if not os.path.exists(source):
+        return None
+
+    df = pd.read_csv(source, parse_dates=['datetime'])
+    numeric = df.drop(columns=['datetime']).select_dtypes(include='number')
+    datetime_ns = pd.DatetimeIndex(df['datetime']).as_unit('ns').asi8
+    return write_day(cache_dir, date, instrument, numeric, datetime_ns, _source_stamp(source))
+
+
+def write_day(cache_dir, date, instrument, columns, datetime_ns, extra_header=None):
+    """
+    Writes one day/instrument to the cache from in-memory columns.
+
+    Args:
+        columns: DataFrame or dict of column -> 1-D numeric array (bars long)
+        datetime_ns: int64 bar timestamps in nanoseconds
+        extra_header (dict): Merged into the header (e.g. the source stamp)
+
+    Returns:
+        dict: The header
+    """
+    names = [str(c) for c in columns.keys()]
+    values = np.asfortranarray(np.column_stack([np.asarray(columns[c], dtype=float) for c in columns.keys()])
+                               if names else np.empty((len(datetime_ns), 0)))
+    datetime_ns = np.asarray(datetime_ns, dtype=np.int64)
+
+    header_path, values_path, datetime_path = _paths(cache_dir, date, instrument)
+    os.makedirs(os.path.dirname(header_path), exist_ok=True)
+    for path, array in ((values_path, values), (datetime_path, datetime_ns)):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as file:
+            np.save(file, array)
+        os.replace(tmp_path, path)
+
+    header = {
+        'version': HEADER_VERSION,
+        'date': date,
+        'instrument': instrument,
+        'rows': int(len(datetime_ns)),
+        'columns': names,
+        'dtype': 'float64',
+        **(extra_header or {}),
+    }
+    tmp_path = f"{header_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as file:
+        json.dump(header, file, indent=2)
+    os.replace(tmp_path, header_path)
+    return header
+
+
+def attach_day(date, instrument, cache_dir=DEFAULT_CACHE_DIR):
+    """Memory-maps a cached day (read-only); None when it is not in the cache"""
+    header_path, values_path, datetime_path = _paths(cache_dir, date, instrument)
+    header = _read_header(header_path)
+    if header is None:
+        return None
+    values = np.load(values_path, mmap_mode='r')
+    datetime_ns = np.load(datetime_path, mmap_mode='r')
+    return DayArrays(header, values, datetime_ns)
+
+
+def load_day(data_root, date, instrument, cache_dir=DEFAULT_CACHE_DIR):
+    """Attaches a cached day, rebuilding it first if the source changed"""
+    if not is_fresh(data_root, date, instrument, cache_dir):
+        if materialize_day(data_root, date, instrument, cache_dir) is None:
+            return None
+    return attach_day(date, instrument, cache_dir)
+
+
+def build_day_cache(data_root='data', dates=None, instruments=tuple(INSTRUMENT_SOURCES), cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Materialises every date/instrument that is missing or stale.
+
+    Run this once in the parent process before starting workers; the workers
+    then only call attach_day.
+
+    Returns:
+        list: (date, instrument) pairs available in the cache
+    """
+    if dates is None:
+        dates = sorted(d for d in os.listdir(data_root) if os.path.isdir(os.path.join(data_root, d)))
+
+    available, built = [], 0
+    for date in dates:
+        for instrument in instruments:
+            if not is_fresh(data_root, date, instrument, cache_dir):
+                if materialize_day(data_root, date, instrument, cache_dir) is None:
+                    continue
+                built += 1
+            available.append((date, instrument))
+
+    print(f"✓ Day cache: {len(available)} day arrays in {cache_dir} ({built} rebuilt)")
+    return available
@@ -0,0 +1,442 @@
+# tools/golden_outputs.py
+# Golden-output regression harness: snapshots the signals, trades and analytics of every
+# data/DDMM folder and compares a new run against them field by field.
+#
+#   python -m tools.golden_outputs snapshot --run     # rerun the pipeline and store golden/
+#   python -m tools.golden_outputs check --run        # rerun and compare with golden/ (exit 1 on divergence)
+#   python -m tools.golden_outputs check              # compare the outputs already in data/
+#
+# --run executes steps 1-10 on a scratch copy of the raw inputs, so data/ is never modified.
+
+import os
+import io
+import copy
+import glob
+import fnmatch
+import json
+import shutil
+import argparse
+import tempfile
+import contextlib
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from .trade_sink import LEDGER_FILENAME
+
+# Artifacts per date folder: (kind, relative path or glob, key columns)
+# Keys align rows between runs; the first key is the bar time used to report divergences.
+ARTIFACTS = [
+    ('processed', 'tradeview_utc.csv', ['datetime']),
+    ('processed', os.path.join('call', 'call_out.csv'), ['datetime']),
+    ('processed', os.path.join('put', 'put_out.csv'), ['datetime']),
+    ('signals', 'tradeview_rev_output.csv', ['datetime']),
+    ('signals', 'tradeview_cont_output.csv', ['datetime']),
+    ('signals', os.path.join('call', 'call_rev_out.csv'), ['datetime']),
+    ('signals', os.path.join('call', 'call_cont_out.csv'), ['datetime']),
+    ('signals', os.path.join('put', 'put_rev_out.csv'), ['datetime']),
+    ('signals', os.path.join('put', 'put_cont_out.csv'), ['datetime']),
+    ('trades', os.path.join('trades', '*.csv'), ['Entry Time', 'Trade Type']),
+    ('trades', os.path.join('trades_crp', '*.csv'), ['Entry Time', 'Trade Type']),
+    ('trades', os.path.join('call', 'trades', '*.csv'), ['Entry Time', 'Trade Type']),
+    ('trades', os.path.join('put', 'trades', '*.csv'), ['Entry Time', 'Trade Type']),
+    ('trades', os.path.join('call', 'backtest', '*.csv'), ['entry_time', 'type']),
+    ('trades', os.path.join('put', 'backtest', '*.csv'), ['entry_time', 'type']),
+]
+# Exit column of each trade layout: when it differs, the earlier exit is the first divergent bar
+EXIT_COLUMNS = {'Entry Time': 'Exit Time', 'entry_time': 'exit_time'}
+
+ANALYTICS_FILE = 'analytics.csv'
+OVERALL_DIR = '_overall'
+MANIFEST_FILE = 'manifest.json'
+
+DEFAULT_SETTINGS = {
+    'GOLDEN_DIR': 'golden',
+    'ABS_TOL': 1e-6,
+    'REL_TOL': 1e-9,
+    'COLUMN_TOLERANCES': {},
+    'IGNORE_COLUMNS': ['Source'],
+    'MAX_DIFFS_PER_FILE': 20,
+    'WORKERS': None,
+    'RUN_STEPS': '1-10',
+}
+
+def load_golden_config(path=None):
+    """Load harness settings from tools/golden_outputs.yaml"""
+    path = path or os.path.join(os.path.dirname(__file__), 'golden_outputs.yaml')
+    try:
+        with open(path, 'r') as file:
+            settings = yaml.safe_load(file) or {}
+    except Exception as e:
+        print(f"Warning: Could not load {path}: {e}")
+        settings = {}
+    merged = copy.deepcopy(DEFAULT_SETTINGS)
+    merged.update(settings)
+    return merged
+
+# --- Running the pipeline on a scratch copy ---
+
+def _is_generated(date_relpath):
+    """True for files and folders the pipeline writes (they are not copied as inputs)"""
+    for _, pattern, _ in ARTIFACTS:
+        if date_relpath == pattern or ('*' in pattern and date_relpath == os.path.dirname(pattern)):
+            return True
+    return date_relpath.startswith('analytics_')
+
+def copy_raw_inputs(data_root, scratch_root, dates=None):
+    """Copies the raw input files of each date folder (no generated outputs) to scratch_root"""
+    dates = dates or list_dates(data_root)
+    for date in dates:
+        source = os.path.join(data_root, date)
+
+        def ignore(directory, names):
+            relative = os.path.relpath(directory, source)
+            return [name for name in names
+                    if _is_generated(os.path.normpath(os.path.join(relative, name)))]
+
+        shutil.copytree(source, os.path.join(scratch_root, date), ignore=ignore)
+    return dates
+
+def run_pipeline(data_root, steps='1-10', workers=None):
+    """Runs the selected app.py steps on data_root (console output suppressed)"""
+    import app
+    argv = ['--steps', steps, '--data-root', data_root]
+    if workers is not None:
+        argv += ['--workers', str(workers)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        app.main(argv)
+
+# --- Snapshots ---
+
+def list_dates(data_root):
+    return sorted(d for d in os.listdir(data_root) if len(d) == 4 and os.path.isdir(os.path.join(data_root, d)))
+
+def artifact_files(date_dir):
+    """(kind, relative path, keys) for every artifact present in one date folder"""
+    found = []
+    for kind, pattern, keys in ARTIFACTS:
+        for path in sorted(glob.glob(os.path.join(date_dir, pattern))):
+            found.append((kind, os.path.relpath(path, date_dir), keys))
+    return found
+
+def analytics_frames(data_root):
+    """
+    Report figures as flat tables: one row per date, and the overall totals per report column.
+
+    Returns:
+        tuple: ({date: one-row DataFrame}, overall DataFrame keyed by 'Column')
+    """
+    from run_analytics import build_report
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = build_report(data_root)
+    per_date = {}
+    for row in report['rows']:
+        flat = {'Date': row['Date'], 'CPR_Width': row['CPR_Width']}
+        for column, stats in {**row['cells'], 'Total': row['Total']}.items():
+            flat.update({f"{column}.{stat}": value for stat, value in stats.items()})
+        flat.update({f"signal.{name}": bool(value) for name, value in row['signals'].items()})
+        per_date[row['Date']] = pd.DataFrame([flat])
+    overall = pd.DataFrame([{'Column': column, **stats} for column, stats in report['totals'].items()])
+    return per_date, overall
+
+def snapshot_outputs(data_root, snapshot_dir, dates=None):
+    """
+    Copies every artifact of the selected dates plus the report figures into snapshot_dir.
+
+    Layout: DDMM/<artifact path>, DDMM/analytics.csv, _overall/analytics.csv,
+    _overall/trade_ledger.csv and manifest.json.
+
+    Returns:
+        dict: The manifest
+    """
+    dates = dates or list_dates(data_root)
+    if os.path.exists(snapshot_dir):
+        shutil.rmtree(snapshot_dir)
+    per_date_analytics, overall = analytics_frames(data_root)
+
+    files = {}
+    for date in dates:
+        date_dir = os.path.join(data_root, date)
+        files[date] = []
+        for kind, relative, _ in artifact_files(date_dir):
+            target = os.path.join(snapshot_dir, date, relative)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy2(os.path.join(date_dir, relative), target)
+            files[date].append(relative)
+        if date in per_date_analytics:
+            os.makedirs(os.path.join(snapshot_dir, date), exist_ok=True)
+            per_date_analytics[date].to_csv(os.path.join(snapshot_dir, date, ANALYTICS_FILE), index=False)
+            files[date].append(ANALYTICS_FILE)
+
+    overall_dir = os.path.join(snapshot_dir, OVERALL_DIR)
+    os.makedirs(overall_dir, exist_ok=True)
+    overall.to_csv(os.path.join(overall_dir, ANALYTICS_FILE), index=False)
+    ledger_path = os.path.join(data_root, LEDGER_FILENAME)
+    if os.path.exists(ledger_path):
+        ledger = pd.read_csv(ledger_path, dtype=str, keep_default_na=False)
+        ledger[ledger['Date'].isin(dates)].to_csv(os.path.join(overall_dir, LEDGER_FILENAME), index=False)
+
+    manifest = {'created': datetime.now().strftime('%Y-%m-%dT%H:%M:%S'), 'data_root': data_root, 'dates': dates, 'files': files}
+    with open(os.path.join(snapshot_dir, MANIFEST_FILE), 'w') as file:
+        json.dump(manifest, file, indent=2)
+    return manifest
+
+# --- Field-by-field comparison ---
+
+def _keys_for(relative):
+    """Row keys of a snapshot file (analytics and ledger files included)"""
+    if os.path.basename(relative) == ANALYTICS_FILE:
+        return ['Column'] if relative.startswith(OVERALL_DIR) else ['Date']
+    if os.path.basename(relative) == LEDGER_FILENAME:
+        return ['Date', 'Book', 'Strategy', 'Entry Time', 'Trade Type']
+    for _, pattern, keys in ARTIFACTS:
+        if fnmatch.fnmatch(relative.split(os.sep, 1)[-1], pattern):
+            return keys
+    return []
+
+def _numeric(series):
+    """Floats for numeric / 'x.xx%' / boolean text, NaN where the text is not a number"""
+    text = series.astype(str).str.strip()
+    text = text.replace({'True': '1', 'False': '0'}).str.replace('%', '', regex=False)
+    return pd.to_numeric(text, errors='coerce')
+
+def _with_occurrence(df, keys):
+    """Adds a counter so rows with identical keys still pair up in order"""
+    df = df.copy()
+    df['_occurrence'] = df.groupby(keys, sort=False).cumcount() if keys else np.arange(len(df))
+    return df
+
+def _bar(value):
+    """Bar time as text (None when the key is not a timestamp)"""
+    parsed = pd.to_datetime(pd.Series([value]), errors='coerce').iloc[0]
+    return None if pd.isna(parsed) else parsed.strftime('%Y-%m-%d %H:%M:%S')
+
+def compare_frames(golden, new, keys, settings):
+    """
+    Compares two versions of one artifact.
+
+    Rows are paired by the key columns; numeric fields match within
+    abs_tol + rel_tol * |golden| (per-column overrides in COLUMN_TOLERANCES),
+    other fields must be equal as text.
+
+    Returns:
+        list: Divergence dicts (bar, key, column, golden, new), earliest bar first
+    """
+    ignore = set(settings.get('IGNORE_COLUMNS') or [])
+    diffs = []
+    missing = [c for c in golden.columns if c not in new.columns and c not in ignore]
+    extra = [c for c in new.columns if c not in golden.columns and c not in ignore]
+    for column in missing:
+        diffs.append({'bar': None, 'key': None, 'column': column, 'golden': 'present', 'new': 'missing'})
+    for column in extra:
+        diffs.append({'bar': None, 'key': None, 'column': column, 'golden': 'missing', 'new': 'present'})
+
+    keys = [k for k in keys if k in golden.columns and k in new.columns]
+    join = keys + ['_occurrence']
+    merged = _with_occurrence(golden, keys).merge(
+        _with_occurrence(new, keys), on=join, how='outer', suffixes=('__golden', '__new'), indicator=True
+    )
+
+    bar_key = keys[0] if keys else None
+    exit_column = EXIT_COLUMNS.get(bar_key)
+    for _, row in merged[merged['_merge'] != 'both'].iterrows():
+        side = 'golden' if row['_merge'] == 'left_only' else 'new'
+        diffs.append({
+            'bar': _bar(row[bar_key]) if bar_key else None,
+            'key': {k: row[k] for k in keys},
+            'column': '(row)',
+            'golden': 'present' if side == 'golden' else 'missing',
+            'new': 'present' if side == 'new' else 'missing',
+        })
+
+    both = merged[merged['_merge'] == 'both']
+    compared = [c for c in golden.columns if c in new.columns and c not in ignore and c not in join]
+    tolerances = settings.get('COLUMN_TOLERANCES') or {}
+    mismatched = pd.Series(False, index=both.index)
+    column_masks = {}
+    for column in compared:
+        g_text, n_text = both[f'{column}__golden'].astype(str), both[f'{column}__new'].astype(str)
+        g_num, n_num = _numeric(both[f'{column}__golden']), _numeric(both[f'{column}__new'])
+        numeric = g_num.notna() & n_num.notna()
+        tolerance = settings['ABS_TOL'] + settings['REL_TOL'] * g_num.abs()
+        if column in tolerances:
+            tolerance = np.maximum(tolerance, tolerances[column])
+        differs = np.where(numeric, (g_num - n_num).abs() > tolerance, g_text != n_text)
+        column_masks[column] = pd.Series(differs, index=both.index)
+        mismatched |= column_masks[column]
+
+    for index in both.index[mismatched.to_numpy()]:
+        row = both.loc[index]
+        bar = _bar(row[bar_key]) if bar_key else None
+        # A trade that exits on a different bar diverged at the earlier of the two exits
+        if exit_column and exit_column in compared and column_masks[exit_column].loc[index]:
+            exits = [_bar(row[f'{exit_column}__golden']), _bar(row[f'{exit_column}__new'])]
+            exits = [e for e in exits if e]
+            bar = min(exits) if exits else bar
+        for column in compared:
+            if column_masks[column].loc[index]:
+                diffs.append({
+                    'bar': bar,
+                    'key': {k: row[k] for k in keys},
+                    'column': column,
+                    'golden': row[f'{column}__golden'],
+                    'new': row[f'{column}__new'],
+                })
+
+    return sorted(diffs, key=lambda d: (d['bar'] is not None, d['bar'] or ''))
+
+def _read(path):
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+def compare_date(task):
+    """
+    Compares every snapshot file of one date folder (runs in a worker process).
+
+    Returns:
+        dict: {'date', 'files': {relative: diffs}, 'missing', 'extra'}
+    """
+    golden_dir, new_dir, date, settings = task
+    golden_files = _snapshot_files(os.path.join(golden_dir, date))
+    new_files = _snapshot_files(os.path.join(new_dir, date))
+    result = {
+        'date': date,
+        'files': {},
+        'missing': sorted(set(golden_files) - set(new_files)),
+        'extra': sorted(set(new_files) - set(golden_files)),
+    }
+    for relative in sorted(set(golden_files) & set(new_files)):
+        keys = _keys_for(os.path.join(date, relative))
+        diffs = compare_frames(_read(os.path.join(golden_dir, date, relative)),
+                               _read(os.path.join(new_dir, date, relative)), keys, settings)
+        if diffs:
+            result['files'][relative] = diffs
+    return result
+
+def _snapshot_files(directory):
+    if not os.path.isdir(directory):
+        return []
+    return sorted(os.path.relpath(os.path.join(root, name), directory)
+                  for root, _, names in os.walk(directory) for name in names if name.endswith('.csv'))
+
+def compare_snapshots(golden_dir, new_dir, settings, workers=None, folders=None):
+    """
+    Compares two snapshot trees, one worker task per date folder.
+
+    Args:
+        folders: Snapshot folders to compare (default: every folder in either tree)
+
+    Returns:
+        list: compare_date results for dates (and _overall) with any divergence
+    """
+    if folders is None:
+        folders = sorted(
+            set(d for d in os.listdir(golden_dir) if os.path.isdir(os.path.join(golden_dir, d))) |
+            set(d for d in os.listdir(new_dir) if os.path.isdir(os.path.join(new_dir, d)))
+        )
+    tasks = [(golden_dir, new_dir, folder, settings) for folder in folders]
+    if workers == 1 or len(tasks) < 2:
+        results = [compare_date(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(compare_date, tasks))
+    return [r for r in results if r['files'] or r['missing'] or r['extra']]
+
+def format_divergences(results, max_diffs):
+    """Console lines per date and file, first divergent bar first"""
+    lines = []
+    for result in results:
+        lines.append(f"❌ {result['date']}")
+        for relative in result['missing']:
+            lines.append(f"   {relative}: missing in new run")
+        for relative in result['extra']:
+            lines.append(f"   {relative}: not in golden snapshot")
+        for relative, diffs in result['files'].items():
+            first_bar = next((d['bar'] for d in diffs if d['bar']), None)
+            header = f"   {relative}: {len(diffs)} differing fields"
+            lines.append(header + (f", first divergent bar {first_bar}" if first_bar else ''))
+            for diff in diffs[:max_diffs]:
+                key = ', '.join(f"{k}={v}" for k, v in (diff['key'] or {}).items())
+                lines.append(f"      [{diff['bar'] or '-'}] {key} {diff['column']}: golden {diff['golden']!r} vs new {diff['new']!r}")
+            if len(diffs) > max_diffs:
+                lines.append(f"      ... {len(diffs) - max_diffs} more")
+    return lines
+
+# --- Entry points ---
+
+@contextlib.contextmanager
+def _run_outputs(data_root, run, dates, settings, workers):
+    """Yields the data root to snapshot: a fresh pipeline run on a scratch copy, or data_root itself"""
+    if not run:
+        yield data_root
+        return
+    with tempfile.TemporaryDirectory(prefix='golden_run_') as scratch:
+        scratch_root = os.path.join(scratch, 'data')
+        copy_raw_inputs(data_root, scratch_root, dates)
+        print(f"--- Running steps {settings['RUN_STEPS']} on a scratch copy of {data_root} ---")
+        run_pipeline(scratch_root, settings['RUN_STEPS'], workers)
+        yield scratch_root
+
+def take_golden_snapshot(data_root='data', golden_dir=None, run=False, dates=None, settings=None, workers=None):
+    """Stores the current (or a freshly run) set of outputs as the golden snapshot"""
+    settings = settings or load_golden_config()
+    golden_dir = golden_dir or settings['GOLDEN_DIR']
+    with _run_outputs(data_root, run, dates, settings, workers) as outputs_root:
+        manifest = snapshot_outputs(outputs_root, golden_dir, dates or list_dates(outputs_root))
+    count = sum(len(files) for files in manifest['files'].values())
+    print(f"💾 Golden snapshot: {count} files for {len(manifest['dates'])} dates saved to {golden_dir}")
+    return manifest
+
+def check_against_golden(data_root='data', golden_dir=None, run=False, dates=None, settings=None, workers=None):
+    """
+    Compares the current (or a freshly run) outputs with the golden snapshot.
+
+    Returns:
+        bool: True when every field matches within tolerance
+    """
+    settings = settings or load_golden_config()
+    golden_dir = golden_dir or settings['GOLDEN_DIR']
+    if not os.path.exists(os.path.join(golden_dir, MANIFEST_FILE)):
+        print(f"❌ No golden snapshot in {golden_dir}; create one with: python -m tools.golden_outputs snapshot --run")
+        return False
+    with open(os.path.join(golden_dir, MANIFEST_FILE), 'r') as file:
+        golden_dates = json.load(file)['dates']
+    dates = dates or golden_dates
+    # Overall figures (report totals, ledger) are only comparable for the full date set
+    folders = sorted(dates) + ([OVERALL_DIR] if set(dates) == set(golden_dates) else [])
+
+    with _run_outputs(data_root, run, dates, settings, workers) as outputs_root, \
+            tempfile.TemporaryDirectory(prefix='golden_new_') as new_dir:
+        snapshot_outputs(outputs_root, new_dir, dates)
+        results = compare_snapshots(golden_dir, new_dir, settings, workers, folders)
+
+    if not results:
+        print(f"✅ All outputs match the golden snapshot ({len(dates)} dates)")
+        return True
+    print("\n".join(format_divergences(results, settings['MAX_DIFFS_PER_FILE'])))
+    print(f"❌ {len(results)} of {len(folders)} snapshot folders diverge from {golden_dir}")
+    return False
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Golden-output regression harness for signals, trades and analytics")
+    parser.add_argument('command', choices=['snapshot', 'check'])
+    parser.add_argument('--data-root', default='data')
+    parser.add_argument('--golden-dir', default=None, help="Snapshot directory (default from golden_outputs.yaml)")
+    parser.add_argument('--run', action='store_true', help="Rerun the pipeline on a scratch copy of the raw inputs first")
+    parser.add_argument('--dates', nargs='*', help="DDMM folders (default: all, or the snapshot's dates for check)")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (1 = run inline)")
+    parser.add_argument('--settings', default=None, help="Path to golden_outputs.yaml")
+    args = parser.parse_args(argv)
+
+    settings = load_golden_config(args.settings)
+    workers = args.workers if args.workers is not None else settings.get('WORKERS')
+    if args.command == 'snapshot':
+        take_golden_snapshot(args.data_root, args.golden_dir, args.run, args.dates, settings, workers)
+        return 0
+    return 0 if check_against_golden(args.data_root, args.golden_dir, args.run, args.dates, settings, workers) else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
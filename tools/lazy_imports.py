@@ -0,0 +1,32 @@
+# tools/lazy_imports.py
+# Heavy optional packages, imported the first time a step actually needs them.
+
+import importlib
+
+_INSTALL_HINTS = {
+    'pandas_ta': 'pip install pandas_ta',
+    'tabulate': 'pip install tabulate',
+    'reportlab': 'pip install reportlab',
+}
+
+_MODULES = {}
+
+def lazy_import(name):
+    """
+    Imports a module once per process.
+
+    Nothing is installed at import time any more: a missing package raises an
+    ImportError with the install command instead.
+    """
+    if name not in _MODULES:
+        try:
+            _MODULES[name] = importlib.import_module(name)
+        except ImportError as e:
+            package = name.split('.')[0]
+            hint = _INSTALL_HINTS.get(package, f"pip install {package}")
+            raise ImportError(f"❌ '{package}' is required for this step but is not installed ({hint})") from e
+    return _MODULES[name]
+
+def load_pandas_ta():
+    """pandas_ta (also registers the DataFrame.ta accessor)"""
+    return lazy_import('pandas_ta')
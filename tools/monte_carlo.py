@@ -0,0 +1,145 @@
+# tools/monte_carlo.py
+# Day-block bootstrap of per-trade P/L for drawdown, ruin and terminal P/L distributions.
+
+import numpy as np
+import yaml
+
+from .profiler import profiled
+
+DEFAULT_MONTE_CARLO_CONFIG = {
+    'PATHS': 20000,
+    'BLOCK_DAYS': 1,       # Consecutive trading days drawn together (keeps intraday clustering)
+    'HORIZON_DAYS': None,  # Days per path; None = same number of days as the history
+    'RUIN_LOSS': {'pnl': 200.0, 'pnl_pct': 200.0},  # Path is ruined once equity falls to -RUIN_LOSS
+    'SEED': 42,
+    'CHUNK_PATHS': 5000,   # Paths simulated per vectorised batch (bounds memory)
+}
+
+PERCENTILES = [1, 5, 25, 50, 75, 95, 99]
+
+def load_monte_carlo_config(config_path='config.yaml'):
+    """MONTE_CARLO section of config.yaml merged over the defaults"""
+    settings = dict(DEFAULT_MONTE_CARLO_CONFIG)
+    try:
+        with open(config_path, 'r') as file:
+            settings.update((yaml.safe_load(file) or {}).get('MONTE_CARLO', {}) or {})
+    except Exception as e:
+        print(f"Warning: Could not load MONTE_CARLO settings from {config_path}: {e}")
+    return settings
+
+def build_day_blocks(trades_df, value_cols=('pnl', 'pnl_pct')):
+    """
+    Per-day trade P/L as zero-padded matrices.
+
+    Days are in chronological order (by first entry) and trades inside a day keep
+    their exit order, so a sampled day replays its real intraday sequence.
+
+    Returns:
+        dict: value column -> float array of shape (n_days, max_trades_per_day)
+    """
+    day_order = trades_df.groupby('Date', sort=False)['entry_time'].min().sort_values(kind='mergesort').index
+    day_codes = {date: i for i, date in enumerate(day_order)}
+
+    ordered = trades_df.assign(_day=trades_df['Date'].map(day_codes).to_numpy())
+    ordered = ordered.sort_values(['_day', 'exit_time', 'entry_time'], kind='mergesort')
+    codes = ordered['_day'].to_numpy()
+    n_days = len(day_order)
+    counts = np.bincount(codes, minlength=n_days)
+    # Position of each trade within its day
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    slots = np.arange(len(codes)) - np.repeat(starts, counts)
+
+    blocks = {}
+    for col in value_cols:
+        matrix = np.zeros((n_days, max(int(counts.max()) if n_days else 0, 1)))
+        matrix[codes, slots] = ordered[col].to_numpy(dtype=float)
+        blocks[col] = matrix
+    return blocks
+
+def _summarize_distribution(values):
+    """Mean/std and fixed percentiles of a 1-D sample"""
+    pct_values = np.percentile(values, PERCENTILES)
+    return {
+        'mean': float(values.mean()),
+        'std': float(values.std()),
+        'percentiles': {p: float(v) for p, v in zip(PERCENTILES, pct_values)},
+    }
+
+def simulate_paths(trades_df, n_paths=20000, block_days=1, horizon_days=None, ruin_loss=None,
+                   seed=42, chunk_paths=5000, value_cols=('pnl', 'pnl_pct')):
+    """
+    Day-block bootstrap of the trade ledger.
+
+    Each path draws trading days (in blocks of block_days consecutive days, with
+    wrap-around) with replacement and replays their trades in order. Equity,
+    drawdown and ruin are computed for all paths of a chunk at once with NumPy.
+
+    Args:
+        trades_df (pd.DataFrame): Normalized ledger rows (Date, entry/exit times, pnl columns).
+        ruin_loss (dict): Loss level per value column that counts as ruin.
+
+    Returns:
+        dict: value column -> {'terminal', 'max_drawdown' (distribution summaries),
+              'prob_loss', 'ruin_probability', 'ruin_loss'} plus run metadata.
+    """
+    if trades_df is None or trades_df.empty:
+        return None
+
+    blocks = build_day_blocks(trades_df, value_cols)
+    n_hist_days = next(iter(blocks.values())).shape[0]
+    horizon_days = horizon_days or n_hist_days
+    block_days = max(1, min(int(block_days), n_hist_days))
+    n_blocks = -(-horizon_days // block_days)
+    ruin_loss = ruin_loss or {}
+    rng = np.random.default_rng(seed)
+
+    terminal = {col: np.empty(n_paths) for col in value_cols}
+    max_dd = {col: np.empty(n_paths) for col in value_cols}
+    ruined = {col: np.zeros(n_paths, dtype=bool) for col in value_cols}
+
+    offsets = np.arange(block_days)
+    for start in range(0, n_paths, chunk_paths):
+        size = min(chunk_paths, n_paths - start)
+        block_starts = rng.integers(0, n_hist_days, size=(size, n_blocks))
+        day_idx = ((block_starts[:, :, None] + offsets) % n_hist_days).reshape(size, -1)[:, :horizon_days]
+
+        for col in value_cols:
+            # (paths, days, trades_per_day) -> one trade sequence per path
+            trade_pnl = blocks[col][day_idx].reshape(size, -1)
+            equity = np.cumsum(trade_pnl, axis=1)
+            peak = np.maximum.accumulate(np.maximum(equity, 0.0), axis=1)
+            terminal[col][start:start + size] = equity[:, -1]
+            max_dd[col][start:start + size] = (peak - equity).max(axis=1)
+            if col in ruin_loss and ruin_loss[col] is not None:
+                ruined[col][start:start + size] = equity.min(axis=1) <= -float(ruin_loss[col])
+
+    results = {
+        'n_paths': n_paths,
+        'horizon_days': horizon_days,
+        'block_days': block_days,
+        'history_days': n_hist_days,
+        'history_trades': int(len(trades_df)),
+    }
+    for col in value_cols:
+        results[col] = {
+            'terminal': _summarize_distribution(terminal[col]),
+            'max_drawdown': _summarize_distribution(max_dd[col]),
+            'prob_loss': float((terminal[col] < 0).mean()),
+            'ruin_probability': float(ruined[col].mean()) if col in ruin_loss else None,
+            'ruin_loss': ruin_loss.get(col),
+        }
+    return results
+
+@profiled('report', rows=None)
+def run_monte_carlo(trades_df, config_path='config.yaml'):
+    """simulate_paths with the MONTE_CARLO settings from config.yaml"""
+    settings = load_monte_carlo_config(config_path)
+    return simulate_paths(
+        trades_df,
+        n_paths=int(settings['PATHS']),
+        block_days=int(settings['BLOCK_DAYS']),
+        horizon_days=settings.get('HORIZON_DAYS'),
+        ruin_loss=settings.get('RUIN_LOSS'),
+        seed=settings.get('SEED'),
+        chunk_paths=int(settings.get('CHUNK_PATHS', 5000)),
+    )
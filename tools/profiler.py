@@ -0,0 +1,301 @@
+# tools/profiler.py
+# Opt-in instrumentation: wall/CPU time, rows processed and peak memory per step,
+# per date and per function, written as JSON/CSV. Disabled unless a run enables it
+# (app.py --profile DIR), in which case profiled functions cost one extra call each.
+
+import os
+import sys
+import csv
+import json
+import time
+import signal
+import pstats
+import cProfile
+import functools
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows: no peak RSS
+    resource = None
+
+SPAN_FIELDS = ['name', 'function', 'step', 'date', 'depth', 'wall_s', 'cpu_s', 'rows', 'peak_rss_mb', 'pid']
+
+PROFILE_HOOKS = ('cprofile', 'sample')
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far (MB), None where unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+class Profiler:
+    """
+    Collects timing spans for one process.
+
+    tags (step/date) are attached to every span recorded while they are set,
+    so per-function spans inside a date task know which step and date they
+    belong to.
+    """
+
+    def __init__(self, **tags):
+        self.tags = tags
+        self.spans = []
+        self.pid = os.getpid()
+        self._depth = 0
+
+    @contextmanager
+    def span(self, name, function=None, rows=None, **tags):
+        """Times a block; set record['rows'] inside the block to report rows processed"""
+        record = {'name': name, 'function': function or name, 'rows': rows, **self.tags, **tags}
+        record['depth'] = self._depth
+        self._depth += 1
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            self._depth -= 1
+            record['wall_s'] = round(time.perf_counter() - wall_start, 6)
+            record['cpu_s'] = round(time.process_time() - cpu_start, 6)
+            record['peak_rss_mb'] = peak_rss_mb()
+            record['pid'] = os.getpid()
+            self.spans.append(record)
+
+# Profiler of the current process (None = instrumentation off)
+_ACTIVE = None
+
+def enable_profiling(**tags):
+    """Starts collecting spans in this process and returns the profiler"""
+    global _ACTIVE
+    _ACTIVE = Profiler(**tags)
+    return _ACTIVE
+
+def disable_profiling():
+    """Stops collecting spans; returns the profiler that was active (or None)"""
+    global _ACTIVE
+    profiler, _ACTIVE = _ACTIVE, None
+    return profiler
+
+def active_profiler():
+    return _ACTIVE
+
+@contextmanager
+def profile_span(name, function=None, rows=None, **tags):
+    """Span on the active profiler; yields None (and records nothing) when profiling is off"""
+    if _ACTIVE is None:
+        yield None
+        return
+    with _ACTIVE.span(name, function, rows, **tags) as record:
+        yield record
+
+@contextmanager
+def profile_task(enabled, **tags):
+    """
+    Tags the spans recorded in the block (e.g. step and date of a pipeline task).
+
+    Inline, spans go to the already active profiler. In a worker process a
+    fresh profiler collects them and the yielded list is filled on exit, so
+    the task can send its spans back to the main process.
+    """
+    global _ACTIVE
+    collected = []
+    if not enabled:
+        yield collected
+        return
+    if _ACTIVE is not None and _ACTIVE.pid == os.getpid():
+        saved_tags = _ACTIVE.tags
+        _ACTIVE.tags = {**saved_tags, **tags}
+        try:
+            yield collected
+        finally:
+            _ACTIVE.tags = saved_tags
+        return
+    # Worker process (a profiler inherited through fork belongs to the parent)
+    inherited, _ACTIVE = _ACTIVE, Profiler(**tags)
+    try:
+        yield collected
+    finally:
+        collected.extend(_ACTIVE.spans)
+        _ACTIVE = inherited
+
+def worker_cpu_s(spans, step, parent_pid=None):
+    """
+    CPU seconds of a step's date tasks that ran in worker processes.
+
+    A step span's own cpu_s only covers the process that recorded it, which
+    is close to zero when the dates run on a process pool.
+    """
+    parent_pid = parent_pid or os.getpid()
+    return sum(span['cpu_s'] for span in spans
+               if span['name'] == 'date_task' and span.get('step') == step and span.get('pid') != parent_pid)
+
+def _row_count(result, args, kwargs):
+    """Rows in a DataFrame / list result (None for anything else)"""
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+def profiled(name, rows=_row_count):
+    """
+    Decorator recording a span named `name` for every call.
+
+    Args:
+        rows: rows(result, args, kwargs) -> rows processed (default: len() of
+              the result); None to record no row count.
+    """
+    def decorate(fn):
+        function = f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _ACTIVE is None:
+                return fn(*args, **kwargs)
+            with _ACTIVE.span(name, function) as record:
+                result = fn(*args, **kwargs)
+                if rows is not None:
+                    record['rows'] = rows(result, args, kwargs)
+                return result
+        return wrapper
+    return decorate
+
+# --- Optional profiler hooks ---
+
+class SamplingProfiler:
+    """
+    Statistical profiler: samples the main thread's stack on a CPU-time timer
+    and counts collapsed stacks (flamegraph.pl / speedscope 'folded' format).
+    Unix only.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self._previous_handler = None
+
+    def _sample(self, signum, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+
+    def write(self, path):
+        with open(path, 'w') as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+@contextmanager
+def profile_hook(kind, output_base):
+    """
+    Runs the block under cProfile ('cprofile' -> output_base.prof) or the
+    sampling profiler ('sample' -> output_base.folded); no-op when kind is None.
+    """
+    if kind is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(output_base) or '.', exist_ok=True)
+    if kind == 'cprofile':
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            profile.dump_stats(f"{output_base}.prof")
+    elif kind == 'sample':
+        if not hasattr(signal, 'setitimer'):
+            print("⚠️ Sampling profiler needs signal.setitimer (not available on this platform)")
+            yield
+            return
+        sampler = SamplingProfiler()
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            sampler.write(f"{output_base}.folded")
+    else:
+        raise ValueError(f"Unknown profile hook '{kind}' (use one of {PROFILE_HOOKS})")
+
+def merge_cprofile_stats(paths, output_path):
+    """Combines per-task .prof files into one (e.g. for snakeviz)"""
+    paths = [p for p in paths if os.path.exists(p)]
+    if not paths:
+        return None
+    stats = pstats.Stats(paths[0])
+    for path in paths[1:]:
+        stats.add(path)
+    stats.dump_stats(output_path)
+    return output_path
+
+# --- Reporting ---
+
+def summarize_spans(spans, key='name'):
+    """
+    Totals per span key ('name', 'function', 'step' or 'date').
+
+    Returns:
+        list: dicts with calls, wall_s, cpu_s, rows and peak_rss_mb, slowest first
+    """
+    totals = {}
+    for span in spans:
+        group = totals.setdefault(span.get(key), {key: span.get(key), 'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'rows': 0, 'peak_rss_mb': 0.0})
+        group['calls'] += 1
+        group['wall_s'] += span['wall_s']
+        group['cpu_s'] += span['cpu_s']
+        group['rows'] += span.get('rows') or 0
+        group['peak_rss_mb'] = max(group['peak_rss_mb'], span.get('peak_rss_mb') or 0.0)
+    for group in totals.values():
+        group['wall_s'] = round(group['wall_s'], 6)
+        group['cpu_s'] = round(group['cpu_s'], 6)
+    return sorted(totals.values(), key=lambda g: g['wall_s'], reverse=True)
+
+def write_profile(spans, output_dir, meta=None):
+    """
+    Writes profile.json (spans, summaries, run metadata) and profile_spans.csv.
+
+    Returns:
+        str: Path of profile.json
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    profile = {
+        'meta': {'python': sys.version.split()[0], 'created': time.strftime('%Y-%m-%dT%H:%M:%S'), **(meta or {})},
+        'summary': {
+            'by_name': summarize_spans(spans, 'name'),
+            'by_function': summarize_spans(spans, 'function'),
+            'by_step': summarize_spans([s for s in spans if s['name'] == 'step'], 'step'),
+            'by_date': summarize_spans([s for s in spans if s['name'] == 'date_task'], 'date'),
+        },
+        'spans': spans,
+    }
+    json_path = os.path.join(output_dir, 'profile.json')
+    with open(json_path, 'w') as file:
+        json.dump(profile, file, indent=2, default=str)
+    with open(os.path.join(output_dir, 'profile_spans.csv'), 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=SPAN_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(spans)
+    return json_path
+
+def format_profile_summary(spans, top=12):
+    """Console lines: per-step and per-function time"""
+    lines = ["⏱️ Profile by step:"]
+    for group in sorted(summarize_spans([s for s in spans if s['name'] == 'step'], 'step'), key=lambda g: g['step']):
+        lines.append(f"   Step {group['step']:>2}: wall {group['wall_s']:8.2f}s  cpu {group['cpu_s']:8.2f}s")
+    lines.append("⏱️ Profile by function (inclusive):")
+    for group in summarize_spans([s for s in spans if s['name'] not in ('step', 'date_task')], 'function')[:top]:
+        lines.append(f"   {group['function']:<60} {group['calls']:>5} calls  wall {group['wall_s']:8.2f}s  rows {group['rows']:>9}")
+    return lines
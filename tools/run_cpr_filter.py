@@ -2,6 +2,9 @@
 import pandas as pd
 from datetime import timedelta
 
+from .profiler import profiled
+
+@profiled('cpr_filter')
 def run_cpr_filter(price_df, signals_df, trade_type_map):
     """
     Analyzes trades against price action near CPR levels to filter for high-probability reversals.
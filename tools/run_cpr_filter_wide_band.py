@@ -1,6 +1,9 @@
 import pandas as pd
 import numpy as np
 
+from .profiler import profiled
+
+@profiled('cpr_filter')
 def run_cpr_filter_wide_band(price_df, signals_df, trade_type_map, primary_proximity_pct=0.03, extended_proximity_pct=0.06):
     """
     Applies CPR filtering for wide CPR bands (>50) with separate S1/PDL and R1/PDH zones.
@@ -0,0 +1,79 @@
+# tools/startup_budget.py
+# Measures the import cost of the entry modules in fresh interpreters and checks it
+# against STARTUP_BUDGET in config.yaml.
+
+import os
+import sys
+import subprocess
+import yaml
+
+DEFAULT_STARTUP_BUDGET = {
+    'RUNS': 5,
+    'MODULES': {'app': 100, 'option_tools': 30, 'strategies': 30},
+}
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_startup_budget(config_path='config.yaml'):
+    """STARTUP_BUDGET section of config.yaml merged over the defaults"""
+    settings = dict(DEFAULT_STARTUP_BUDGET)
+    try:
+        with open(config_path, 'r') as file:
+            settings.update((yaml.safe_load(file) or {}).get('STARTUP_BUDGET', {}) or {})
+    except Exception as e:
+        print(f"Warning: Could not load STARTUP_BUDGET settings from {config_path}: {e}")
+    return settings
+
+def measure_import_ms(module, runs=5):
+    """Fastest wall time (ms) of `import module` over several fresh interpreters"""
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"import {module}; print((time.perf_counter() - start) * 1000)"
+    )
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', code], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True, check=True)
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return min(timings)
+
+def slowest_imports(module, top=5):
+    """(cumulative ms, module) of the costliest imports under `module` (python -X importtime)"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        rows.append((int(parts[1]) / 1000, parts[2].strip()))
+    return sorted(rows, reverse=True)[1:top + 1]
+
+def check_startup_budget(config_path='config.yaml'):
+    """
+    Prints each module's import time against its budget.
+
+    Returns:
+        bool: True when every module is within budget
+    """
+    settings = load_startup_budget(config_path)
+    within_budget = True
+    for module, budget_ms in settings['MODULES'].items():
+        try:
+            elapsed_ms = measure_import_ms(module, settings['RUNS'])
+        except subprocess.CalledProcessError as e:
+            within_budget = False
+            error = (e.stderr or '').strip().splitlines()
+            print(f"❌ import {module} failed: {error[-1] if error else e}")
+            continue
+        if elapsed_ms <= budget_ms:
+            print(f"✅ import {module}: {elapsed_ms:.1f} ms (budget {budget_ms} ms)")
+            continue
+        within_budget = False
+        print(f"❌ import {module}: {elapsed_ms:.1f} ms (budget {budget_ms} ms)")
+        for cumulative_ms, name in slowest_imports(module):
+            print(f"     {cumulative_ms:8.1f} ms  {name}")
+    return within_budget
+
+if __name__ == "__main__":
+    sys.exit(0 if check_startup_budget() else 1)
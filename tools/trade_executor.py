@@ -1,16 +1,11 @@
 import pandas as pd
-try:
-    import pandas_ta as ta
-except ImportError:
-    import sys
-    import subprocess
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "pandas_ta"])
-    import pandas_ta as ta
 
 from datetime import time
 
 import os
 
+from .lazy_imports import load_pandas_ta
+
 def execute_trades(signals_df, prices_df, signal_col, trade_type, config, output_dir, output_filename):
     """
     Executes trades based on signals and a slabbed ATR trailing stop loss strategy.
@@ -28,6 +23,7 @@ def execute_trades(signals_df, prices_df, signal_col, trade_type, config, output
     prices_df['datetime'] = pd.to_datetime(prices_df['datetime'])
     prices_df.set_index('datetime', inplace=True)
 
+    load_pandas_ta()  # registers the DataFrame.ta accessor
     prices_df.ta.atr(length=5, append=True, col_names=('ATR_5',))
 
     valid_signals = signals_df[signals_df[signal_col] == 1].copy()
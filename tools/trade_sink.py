@@ -0,0 +1,258 @@
+# tools/trade_sink.py
+# Append-only trade output shared by the index and option executors.
+
+import os
+import io
+
+import pandas as pd
+
+from .profiler import profiled
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LEDGER_FILENAME = 'trade_ledger.csv'
+
+# Columns kept in the unified ledger; executor-specific extras stay in the per-date files.
+LEDGER_COLUMNS = [
+    'Date', 'Book', 'Strategy', 'Source',
+    'Entry Time', 'Entry Price', 'Exit Time', 'Exit Price',
+    'P/L', 'P/L %', 'Exit Reason', 'Trade Type'
+]
+
+
+def _lock(handle):
+    """Take an exclusive lock on an open file (blocks until available)."""
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+    else:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def _unlock(handle):
+    """Release a lock taken with _lock."""
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+    else:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _read_header(handle):
+    """Return the column names from the first line of an open CSV file."""
+    handle.seek(0)
+    first_line = handle.readline()
+    if not first_line:
+        return []
+    return list(pd.read_csv(io.StringIO(first_line), nrows=0).columns)
+
+
+def append_trades(output_path, df):
+    """
+    Appends trade rows to a CSV file without reading its body back.
+
+    The header is written only when the file is new or empty. The file is
+    locked for the duration of the write so that several worker processes can
+    append to the same file safely. If the incoming frame carries columns the
+    existing file does not have, the file is rewritten once (under the same
+    lock) with the widened header.
+
+    Returns:
+        int: Number of rows written.
+    """
+    if df is None or df.empty:
+        return 0
+
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(output_path, 'a+', newline='', encoding='utf-8') as handle:
+        _lock(handle)
+        try:
+            handle.seek(0, os.SEEK_END)
+            if handle.tell() == 0:
+                df.to_csv(handle, index=False)
+                return len(df)
+
+            header = _read_header(handle)
+            new_columns = [c for c in df.columns if c not in header]
+            if not new_columns:
+                handle.seek(0, os.SEEK_END)
+                df.reindex(columns=header).to_csv(handle, index=False, header=False)
+                return len(df)
+
+            # Rare path: schema widened, rewrite once with the union of columns.
+            handle.seek(0)
+            existing_df = pd.read_csv(handle, dtype=str, keep_default_na=False)
+            combined_df = pd.concat([existing_df, df], ignore_index=True)
+            handle.seek(0)
+            handle.truncate()
+            combined_df.to_csv(handle, index=False)
+            return len(df)
+        finally:
+            handle.flush()
+            _unlock(handle)
+
+
+def describe_trade_file(output_path):
+    """
+    Derives ledger tags (date, book, strategy) from a trade file path.
+
+    './data/1107/call/trades/call_rev_v1_trades.csv' -> ('1107', 'call', 'rev_v1')
+    './data/1107/trades_crp/cont_trades.csv'         -> ('1107', 'index_crp', 'cont')
+    """
+    parts = os.path.normpath(output_path).replace('\\', '/').split('/')
+    filename = parts[-1]
+    parent = parts[-2] if len(parts) > 1 else ''
+    grandparent = parts[-3] if len(parts) > 2 else ''
+
+    if parent == 'trades' and grandparent in ('call', 'put'):
+        book = grandparent
+        date = parts[-4] if len(parts) > 3 else ''
+    elif parent == 'trades_crp':
+        book = 'index_crp'
+        date = grandparent
+    else:
+        book = 'index'
+        date = grandparent
+
+    strategy = os.path.splitext(filename)[0]
+    if strategy.endswith('_trades'):
+        strategy = strategy[:-len('_trades')]
+    for prefix in ('call_', 'put_'):
+        if strategy.startswith(prefix):
+            strategy = strategy[len(prefix):]
+            break
+
+    return date, book, strategy
+
+
+def to_ledger_rows(df, output_path):
+    """Tags executor output with its date/book/strategy and aligns it to LEDGER_COLUMNS."""
+    date, book, strategy = describe_trade_file(output_path)
+    tagged = df.copy()
+    tagged['Date'] = date
+    tagged['Book'] = book
+    tagged['Strategy'] = strategy
+    tagged['Source'] = os.path.relpath(output_path).replace('\\', '/')
+    return tagged.reindex(columns=LEDGER_COLUMNS)
+
+
+class TradeSink:
+    """
+    Collects executor output for one run and appends it in batches.
+
+    Open it once per run (or once per worker process), pass it to the
+    executors, and call flush()/close() when a date or the run is done.
+    When ledger_path is set, every flushed row is also appended to the
+    unified trade ledger used by the analytics step. With collect_ledger
+    the ledger rows are kept in ledger_rows instead, so a parent process
+    can append the results of parallel tasks in a fixed order.
+    """
+
+    def __init__(self, ledger_path=None, max_buffered_rows=5000, collect_ledger=False):
+        self.ledger_path = ledger_path
+        self.max_buffered_rows = max_buffered_rows
+        self.collect_ledger = collect_ledger
+        self.ledger_rows = []
+        self._pending = {}
+        self._buffered_rows = 0
+        self.rows_written = 0
+
+    def add(self, output_path, df):
+        """Buffers trade rows destined for output_path."""
+        if df is None or df.empty:
+            return
+        self._pending.setdefault(output_path, []).append(df)
+        self._buffered_rows += len(df)
+        if self._buffered_rows >= self.max_buffered_rows:
+            self.flush()
+
+    @profiled('write_trades', rows=lambda result, args, kwargs: result)
+    def flush(self):
+        """Appends all buffered rows to their files (and the ledger)."""
+        if not self._pending:
+            return 0
+
+        written = 0
+        ledger_frames = []
+        for output_path, frames in self._pending.items():
+            batch = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+            written += append_trades(output_path, batch)
+            if self.ledger_path or self.collect_ledger:
+                ledger_frames.append(to_ledger_rows(batch, output_path))
+
+        if ledger_frames:
+            ledger_df = pd.concat(ledger_frames, ignore_index=True)
+            if self.ledger_path:
+                append_trades(self.ledger_path, ledger_df)
+            if self.collect_ledger:
+                self.ledger_rows.append(ledger_df)
+
+        self._pending = {}
+        self._buffered_rows = 0
+        self.rows_written += written
+        return written
+
+    def close(self):
+        """Flushes any remaining rows."""
+        return self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def remove_ledger_rows(ledger_path, dates, books=None, strategies=None):
+    """
+    Drops ledger rows for the given dates (optionally only some books/strategies).
+
+    Used before re-running part of the pipeline so the re-run trades replace
+    the old ones instead of being appended next to them.
+
+    Returns:
+        int: Number of rows removed.
+    """
+    if not os.path.exists(ledger_path):
+        return 0
+
+    with open(ledger_path, 'r+', newline='', encoding='utf-8') as handle:
+        _lock(handle)
+        try:
+            ledger_df = pd.read_csv(handle, dtype=str, keep_default_na=False)
+            stale = ledger_df['Date'].str.zfill(4).isin([str(d) for d in dates])
+            if books is not None:
+                stale &= ledger_df['Book'].isin(list(books))
+            if strategies is not None:
+                stale &= ledger_df['Strategy'].isin(list(strategies))
+            removed = int(stale.sum())
+            if removed:
+                handle.seek(0)
+                handle.truncate()
+                ledger_df[~stale].to_csv(handle, index=False)
+            return removed
+        finally:
+            handle.flush()
+            _unlock(handle)
+
+
+def write_trades(df_results, output_dir, output_filename, sink=None, label='option'):
+    """
+    Hands executor results to the sink, or appends them directly when no sink is open.
+    """
+    output_path = os.path.join(output_dir, output_filename)
+    if sink is not None:
+        sink.add(output_path, df_results)
+        print(f"  ✓ Queued {len(df_results)} {label} trades for {output_path}")
+    else:
+        append_trades(output_path, df_results)
+        print(f"  ✓ Saved {len(df_results)} {label} trades to {output_path}")
+    return output_path
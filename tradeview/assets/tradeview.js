@@ -0,0 +1,282 @@
+// tradeview/assets/tradeview.js
+// Draws a tradeview page from window.TRADEVIEW_DATA (written by tradeview/run_tradeview.py).
+// Series arrive as base64 typed arrays: 'time' is Uint32 (Unix seconds), every other series Float32 (NaN = no value).
+
+(function () {
+    function decode(b64, Type) {
+        const binary = atob(b64);
+        const bytes = new Uint8Array(binary.length);
+        for (let i = 0; i < binary.length; i++) {
+            bytes[i] = binary.charCodeAt(i);
+        }
+        return new Type(bytes.buffer);
+    }
+
+    function candleData(times, open, high, low, close) {
+        const out = new Array(times.length);
+        for (let i = 0; i < times.length; i++) {
+            out[i] = { time: times[i], open: open[i], high: high[i], low: low[i], close: close[i] };
+        }
+        return out;
+    }
+
+    function lineData(times, values) {
+        // Bars without a value become whitespace points so the panes stay aligned
+        const out = new Array(times.length);
+        for (let i = 0; i < times.length; i++) {
+            out[i] = Number.isNaN(values[i]) ? { time: times[i] } : { time: times[i], value: values[i] };
+        }
+        return out;
+    }
+
+    function formatValue(value) {
+        return value === undefined || Number.isNaN(value) ? 'N/A' : value.toFixed(2);
+    }
+
+    function formatTime(timestamp) {
+        return new Date(timestamp * 1000).toLocaleString('en-IN', { timeZone: 'Asia/Kolkata' });
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        const payload = window.TRADEVIEW_DATA;
+
+        const chartOptions = {
+            layout: {
+                background: { type: 'solid', color: '#131722' },
+                textColor: '#D9D9D9',
+            },
+            grid: {
+                vertLines: { color: '#2A2E39' },
+                horzLines: { color: '#2A2E39' },
+            },
+            crosshair: {
+                mode: LightweightCharts.CrosshairMode.Normal,
+            },
+            rightPriceScale: {
+                borderColor: '#485158',
+            },
+            timeScale: {
+                borderColor: '#485158',
+                timeVisible: true,
+                secondsVisible: false,
+                tickMarkFormatter: (time, tickMarkType, locale) => {
+                    const date = new Date(time * 1000);
+                    if (tickMarkType <= LightweightCharts.TickMarkType.DayOfMonth) {
+                        return date.toLocaleDateString('en-IN', { day: '2-digit', month: 'short', timeZone: 'Asia/Kolkata' });
+                    }
+                    return date.toLocaleTimeString('en-IN', { hour: '2-digit', minute: '2-digit', timeZone: 'Asia/Kolkata' });
+                },
+            },
+        };
+
+        const mainChartContainer = document.getElementById('main-chart-container');
+        const stochChartContainer = document.getElementById('stoch-chart-container');
+        const williams9ChartContainer = document.getElementById('williams9-chart-container');
+        const williams28ChartContainer = document.getElementById('williams28-chart-container');
+        const legend = document.getElementById('legend');
+        const errorContainer = document.getElementById('error-container');
+        const tradesContent = document.getElementById('trades-content');
+        const toggleTradesButton = document.getElementById('toggle-trades');
+        const tradesPanel = document.getElementById('trades-panel');
+        const markerTooltip = document.getElementById('marker-tooltip');
+
+        function displayError(message) {
+            errorContainer.textContent = `Error: ${message}`;
+            errorContainer.style.display = 'block';
+        }
+
+        function indicatorChart(container, title) {
+            return LightweightCharts.createChart(container, {
+                ...chartOptions,
+                height: Math.floor(document.getElementById('chart-container').clientHeight * 0.15),
+                width: container.clientWidth,
+                watermark: { color: 'rgba(255, 255, 255, 0.4)', visible: true, text: title, fontSize: 16, horzAlign: 'left', vertAlign: 'top' },
+                timeScale: {
+                    ...chartOptions.timeScale,
+                    visible: false,
+                },
+            });
+        }
+
+        function addBands(series, bands) {
+            Object.values(bands || {}).forEach(band => series.createPriceLine(band));
+        }
+
+        try {
+            const series = payload.series;
+            const times = decode(series.time, Uint32Array);
+            const values = {};
+            Object.keys(series).forEach(name => {
+                if (name !== 'time') {
+                    values[name] = decode(series[name], Float32Array);
+                }
+            });
+
+            const totalHeight = document.getElementById('chart-container').clientHeight;
+            const mainChart = LightweightCharts.createChart(mainChartContainer, { ...chartOptions, height: Math.floor(totalHeight * 0.55), width: mainChartContainer.clientWidth });
+            const candleSeries = mainChart.addCandlestickSeries({
+                upColor: '#26A69A', downColor: '#EF5350',
+                borderDownColor: '#EF5350', borderUpColor: '#26A69A',
+                wickDownColor: '#EF5350', wickUpColor: '#26A69A',
+            });
+            candleSeries.setData(candleData(times, values.open, values.high, values.low, values.close));
+
+            const stochChart = indicatorChart(stochChartContainer, 'StochRSI (K,D)');
+            const stochSeriesD = stochChart.addLineSeries({ color: '#26A69A', lineWidth: 2, title: 'D' });
+            const stochSeriesK = stochChart.addLineSeries({ color: '#EF5350', lineWidth: 2, title: 'K' });
+            stochSeriesD.setData(lineData(times, values.stoch_d));
+            stochSeriesK.setData(lineData(times, values.stoch_k));
+            addBands(stochSeriesK, payload.bands.stoch_rsi);
+
+            const williams9Chart = indicatorChart(williams9ChartContainer, 'Williams %R (9)');
+            const williams9Series = williams9Chart.addLineSeries({ color: '#2196F3', lineWidth: 2 });
+            williams9Series.setData(lineData(times, values.williams_r9));
+            addBands(williams9Series, payload.bands.williams_r9);
+
+            const williams28Chart = indicatorChart(williams28ChartContainer, 'Williams %R (28)');
+            const williams28Series = williams28Chart.addLineSeries({ color: '#FF9800', lineWidth: 2 });
+            williams28Series.setData(lineData(times, values.williams_r28));
+            addBands(williams28Series, payload.bands.williams_r28);
+
+            // Bar position by time for the legend (times are sorted)
+            const barIndex = new Map();
+            for (let i = 0; i < times.length; i++) {
+                barIndex.set(times[i], i);
+            }
+
+            function updateLegend(param) {
+                if (!param.time || !param.point || !barIndex.has(param.time)) {
+                    legend.style.display = 'none';
+                    return;
+                }
+                const i = barIndex.get(param.time);
+                const bucket = payload.bar_minutes > 1 ? ` <span style="color: #B2B5BE;">(${payload.bar_minutes}m bars)</span>` : '';
+                legend.style.display = 'block';
+                legend.innerHTML = `
+                    <div><strong>O:</strong> ${formatValue(values.open[i])} <strong>H:</strong> ${formatValue(values.high[i])} <strong>L:</strong> ${formatValue(values.low[i])} <strong>C:</strong> ${formatValue(values.close[i])}${bucket}</div>
+                    <div style="color: #EF5350;"><strong>Stoch K:</strong> ${formatValue(values.stoch_k[i])}</div>
+                    <div style="color: #26A69A;"><strong>Stoch D:</strong> ${formatValue(values.stoch_d[i])}</div>
+                    <div style="color: #2196F3;"><strong>Will %R(9):</strong> ${formatValue(values.williams_r9[i])}</div>
+                    <div style="color: #FF9800;"><strong>Will %R(28):</strong> ${formatValue(values.williams_r28[i])}</div>
+                `;
+            }
+
+            const charts = [mainChart, stochChart, williams9Chart, williams28Chart];
+            charts.forEach(chart => {
+                chart.timeScale().subscribeVisibleLogicalRangeChange(range => {
+                    charts.forEach(otherChart => {
+                        if (chart !== otherChart) {
+                            otherChart.timeScale().setVisibleLogicalRange(range);
+                        }
+                    });
+                });
+                chart.subscribeCrosshairMove(updateLegend);
+            });
+
+            new ResizeObserver(() => {
+                const totalHeight = document.getElementById('chart-container').clientHeight;
+                const mainChartHeight = Math.floor(totalHeight * 0.55);
+                const indicatorHeight = Math.floor(totalHeight * 0.15);
+                const width = mainChartContainer.clientWidth;
+
+                mainChart.applyOptions({ height: mainChartHeight, width });
+                stochChart.applyOptions({ height: indicatorHeight, width });
+                williams9Chart.applyOptions({ height: indicatorHeight, width });
+                williams28Chart.applyOptions({ height: indicatorHeight, width });
+            }).observe(document.getElementById('chart-container'));
+
+            // Trades panel and markers (trades are sorted by time; 'time' is snapped to the bar they fall in)
+            const markers = [];
+            payload.trades.forEach(trade => {
+                const isEntry = trade.type.toLowerCase().includes('entry');
+                const pnlClass = trade.pnl_pct >= 0 ? 'positive' : 'negative';
+
+                const tradeItem = document.createElement('div');
+                tradeItem.classList.add('trade-item', isEntry ? 'trade-entry' : 'trade-exit');
+                tradeItem.innerHTML = `
+                    <div class="trade-header">
+                        <span class="trade-type">Trade #${trade.trade} - ${trade.type}</span>
+                        <span class="trade-signal">${trade.signal}</span>
+                    </div>
+                    <div class="trade-details">
+                        <div><strong>Time:</strong> ${formatTime(trade.timestamp)}</div>
+                        <div><strong>Price:</strong> <span class="trade-price">₹${trade.price}</span></div>
+                        <div><strong>P&L:</strong> <span class="trade-pnl ${pnlClass}">₹${trade.pnl} (${trade.pnl_pct}%)</span></div>
+                    </div>
+                `;
+                tradesContent.appendChild(tradeItem);
+
+                let markerColor = '#26A69A'; // Green for entry / profit
+                if (!isEntry) {
+                    const signal = trade.signal.toLowerCase();
+                    if (signal.includes('stop') || signal.includes('loss')) {
+                        markerColor = '#EF5350'; // Red for stop loss
+                    } else if (!signal.includes('profit')) {
+                        markerColor = '#FF9800'; // Orange for other exits
+                    }
+                }
+                markers.push({
+                    time: trade.time,
+                    position: isEntry ? 'belowBar' : 'aboveBar',
+                    color: markerColor,
+                    shape: isEntry ? 'arrowUp' : 'arrowDown',
+                    text: isEntry ? 'Entry long' : trade.signal,
+                    size: 1,
+                    tradeInfo: trade,
+                });
+            });
+
+            candleSeries.setMarkers(markers);
+
+            function updateMarkerTooltip(param) {
+                const marker = param.point && param.time ? markers.find(m => m.time === param.time) : null;
+                if (!marker) {
+                    markerTooltip.style.display = 'none';
+                    return;
+                }
+                const trade = marker.tradeInfo;
+                const pnlClass = trade.pnl_pct >= 0 ? 'positive' : 'negative';
+                const tradeTypeColor = trade.type.toLowerCase().includes('entry') ? '#26A69A' :
+                                       (trade.signal.toLowerCase().includes('profit') ? '#26A69A' : '#EF5350');
+                markerTooltip.innerHTML = `
+                    <div style="color: ${tradeTypeColor}; font-weight: bold; margin-bottom: 4px;">
+                        ${trade.type.toUpperCase()} - ${trade.signal}
+                    </div>
+                    <div><strong>Trade #:</strong> ${trade.trade}</div>
+                    <div><strong>Time:</strong> ${formatTime(trade.timestamp)}</div>
+                    <div><strong>Price:</strong> ₹${trade.price}</div>
+                    <div><strong>P&L:</strong> <span class="${pnlClass}">₹${trade.pnl} (${trade.pnl_pct}%)</span></div>
+                `;
+                markerTooltip.style.display = 'block';
+                markerTooltip.style.left = `${param.point.x + 15}px`;
+                markerTooltip.style.top = `${param.point.y + 15}px`;
+            }
+
+            charts.forEach(chart => {
+                chart.subscribeCrosshairMove(updateMarkerTooltip);
+            });
+
+            // Toggle trades panel
+            let tradesPanelVisible = true;
+            toggleTradesButton.addEventListener('click', () => {
+                if (tradesPanelVisible) {
+                    tradesPanel.style.width = '0';
+                    tradesPanel.style.borderLeft = 'none';
+                    toggleTradesButton.textContent = '+';
+                    toggleTradesButton.title = 'Show trades panel';
+                } else {
+                    tradesPanel.style.width = '350px';
+                    tradesPanel.style.borderLeft = '1px solid #2A2E39';
+                    toggleTradesButton.textContent = '−';
+                    toggleTradesButton.title = 'Hide trades panel';
+                }
+                tradesPanelVisible = !tradesPanelVisible;
+                // Trigger chart resize after panel toggle
+                window.dispatchEvent(new Event('resize'));
+            });
+        } catch (e) {
+            displayError(e.message);
+            console.error(e);
+        }
+    });
+})();
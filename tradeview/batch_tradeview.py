@@ -0,0 +1,163 @@
+# tradeview/batch_tradeview.py
+# Renders a tradeview page for every date x instrument x strategy trade file and an index page linking them.
+#
+#   python -m tradeview.batch_tradeview                          # every date under data/
+#   python -m tradeview.batch_tradeview --dates '*07' --workers 4
+#   python -m tradeview.batch_tradeview --instruments put --strategies rev_v1 rev_v2
+#
+# Layout: BATCH_OUTPUT_DIR/index.html, BATCH_OUTPUT_DIR/assets/tradeview.{css,js} (shared)
+# and BATCH_OUTPUT_DIR/DDMM/{instrument}_{strategy}.html.
+
+import os
+import html
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from tradeview.run_tradeview import (
+    INSTRUMENT_FILES, TRADE_FILES, load_tradeview_config, load_trades, generate_chart, write_assets, read_asset,
+)
+
+ASSET_FOLDER = 'assets'
+
+def plan_pages(data_root, dates, instruments, strategies, output_dir):
+    """One task per date x instrument x strategy whose processed price file exists"""
+    tasks = []
+    for date in dates:
+        for instrument in instruments:
+            ohlc_path = os.path.join(data_root, date, INSTRUMENT_FILES[instrument])
+            if not os.path.exists(ohlc_path):
+                continue
+            for strategy in strategies:
+                tasks.append({
+                    'date': date, 'instrument': instrument, 'strategy': strategy, 'ohlc_path': ohlc_path,
+                    'trade_path': os.path.join(data_root, date, TRADE_FILES[instrument].format(strategy=strategy)),
+                    'output_path': os.path.join(output_dir, date, f"{instrument}_{strategy}.html"),
+                })
+    return tasks
+
+def render_page(task, settings):
+    """Worker: writes one page and returns its index entry (trade count and P/L)"""
+    entry = {key: task[key] for key in ('date', 'instrument', 'strategy', 'output_path')}
+    try:
+        title = f"{task['instrument'].upper()} {task['strategy']} {task['date']}"
+        generate_chart([task['ohlc_path']], [task['trade_path']], task['output_path'], 'auto', settings,
+                       title=title, asset_prefix=f"../{ASSET_FOLDER}/", verbose=False)
+        trades = load_trades([task['trade_path']])
+        entry['trades'] = len(trades)
+        entry['pnl'] = float(pd.to_numeric(trades['P/L'], errors='coerce').sum()) if len(trades) else 0.0
+        entry['has_trades'] = os.path.exists(task['trade_path'])
+    except Exception as e:
+        entry['error'] = str(e)
+    return entry
+
+def _render_page_args(args):
+    return render_page(*args)
+
+def _format_cell(entry, output_dir):
+    if entry is None:
+        return '<td class="missing">–</td>'
+    if 'error' in entry:
+        return f'<td class="negative" title="{html.escape(entry["error"])}">error</td>'
+    href = os.path.relpath(entry['output_path'], output_dir).replace(os.sep, '/')
+    if not entry['has_trades']:
+        return f'<td><a href="{href}"><span class="trades">no trades</span></a></td>'
+    pnl_class = 'positive' if entry['pnl'] >= 0 else 'negative'
+    return (f'<td><a href="{href}"><span class="trades">{entry["trades"]}</span>'
+            f'<span class="{pnl_class}">₹{entry["pnl"]:.2f}</span></a></td>')
+
+def write_index(entries, output_dir, instruments, strategies, title="Tradeview charts"):
+    """Index page: one row per date, one column per instrument/strategy, with totals"""
+    columns = [(instrument, strategy) for instrument in instruments for strategy in strategies]
+    by_key = {(e['date'], e['instrument'], e['strategy']): e for e in entries}
+    dates = list(dict.fromkeys(e['date'] for e in entries))
+
+    header = ['            <tr><th rowspan="2">Date</th>' +
+              ''.join(f'<th colspan="{len(strategies)}">{instrument.upper()}</th>' for instrument in instruments) + '</tr>',
+              '            <tr>' + ''.join(f'<th>{strategy}</th>' for _, strategy in columns) + '</tr>']
+    rows = []
+    for date in dates:
+        cells = ''.join(_format_cell(by_key.get((date, instrument, strategy)), output_dir) for instrument, strategy in columns)
+        rows.append(f'            <tr><td class="date">{date}</td>{cells}</tr>')
+
+    totals = []
+    for instrument, strategy in columns:
+        column_entries = [e for e in entries if e['instrument'] == instrument and e['strategy'] == strategy and 'error' not in e]
+        pnl = sum(e['pnl'] for e in column_entries)
+        pnl_class = 'positive' if pnl >= 0 else 'negative'
+        totals.append(f'<td><span class="trades">{sum(e["trades"] for e in column_entries)}</span>'
+                      f'<span class="{pnl_class}">₹{pnl:.2f}</span></td>')
+    rows.append(f'            <tr class="total"><td class="date">Total</td>{"".join(totals)}</tr>')
+
+    errors = sum('error' in e for e in entries)
+    summary = f"{len(entries)} charts over {len(dates)} dates · cells show trade count and total P/L (per unit)"
+    if errors:
+        summary += f" · {errors} failed"
+    page = read_asset('index.html')
+    for placeholder, value in {'__TITLE__': title, '__SUMMARY__': summary,
+                               '__HEADER__': '\n'.join(header), '__ROWS__': '\n'.join(rows)}.items():
+        page = page.replace(placeholder, value)
+
+    index_path = os.path.join(output_dir, 'index.html')
+    with open(index_path, 'w', encoding='utf-8') as file:
+        file.write(page)
+    return index_path
+
+def run_batch(data_root='data', dates=None, instruments=None, strategies=None, output_dir=None, workers=None, settings=None):
+    """
+    Renders every chart page and the index.
+
+    Args:
+        dates (str): DDMM selection as accepted by app.select_dates (None = every date)
+        workers (int): Worker processes; 1 renders inline, 0/None uses every CPU
+
+    Returns:
+        str: Path of the index page, or None when there is nothing to render
+    """
+    from app import select_dates
+
+    settings = settings or load_tradeview_config()
+    instruments = instruments or settings['BATCH_INSTRUMENTS']
+    strategies = strategies or settings['BATCH_STRATEGIES']
+    output_dir = output_dir or settings['BATCH_OUTPUT_DIR']
+
+    all_dates = sorted((d for d in os.listdir(data_root) if os.path.isdir(os.path.join(data_root, d))),
+                       key=lambda d: (d[2:4], d[0:2]))
+    tasks = plan_pages(data_root, select_dates(all_dates, dates), instruments, strategies, output_dir)
+    if not tasks:
+        print(f"⚠️ No processed {'/'.join(instruments)} files found under {data_root}.")
+        return None
+
+    workers = workers or os.cpu_count() or 1
+    print(f"--- Rendering {len(tasks)} tradeview charts with {workers} worker(s) ---")
+    write_assets(os.path.join(output_dir, ASSET_FOLDER))
+    if workers == 1:
+        entries = [render_page(task, settings) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            entries = list(pool.map(_render_page_args, [(task, settings) for task in tasks],
+                                    chunksize=max(1, len(tasks) // (4 * workers))))
+
+    for entry in entries:
+        if 'error' in entry:
+            print(f"❌ {entry['date']} {entry['instrument']} {entry['strategy']}: {entry['error']}")
+    index_path = write_index(entries, output_dir, instruments, strategies)
+    print(f"✓ {sum('error' not in e for e in entries)}/{len(entries)} charts saved under {output_dir}")
+    print(f"✓ Index saved to {index_path}")
+    return index_path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render tradeview pages for every date, instrument and strategy")
+    parser.add_argument('--data-root', default='data')
+    parser.add_argument('--dates', help="DDMM selection: 1107 | 0107-1807 | 0107,1407 | *07 (all of July)")
+    parser.add_argument('--instruments', nargs='+', choices=sorted(INSTRUMENT_FILES))
+    parser.add_argument('--strategies', nargs='+', choices=['cont', 'rev_v1', 'rev_v2'])
+    parser.add_argument('--output', help="Output directory (default: BATCH_OUTPUT_DIR)")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (1 = run inline, default: all CPUs)")
+    args = parser.parse_args(argv)
+    index_path = run_batch(args.data_root, args.dates, args.instruments, args.strategies, args.output, args.workers)
+    return 0 if index_path else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,755 +1,290 @@
-import pandas as pd
+# tradeview/run_tradeview.py
+# Builds a lightweight-charts page (candles, StochRSI, Williams %R and trade markers) for any
+# processed index/option file and trade file.
+#
+#   python -m tradeview.run_tradeview                                    # tradeview/put_out.csv example
+#   python -m tradeview.run_tradeview --dates 1107 --instrument put --strategy rev_v1
+#   python -m tradeview.run_tradeview --dates 0107-1807 --instrument index --strategy cont --lod 5
+#   python -m tradeview.run_tradeview --ohlc data/1107/put/put_out.csv --trades my_trades.csv --output chart.html
+#
+# Series are embedded as base64 typed arrays (Uint32 times, Float32 values) and multi-day
+# ranges are downsampled to coarser bars (level of detail) so pages stay small.
+
+import os
 import json
+import base64
+import argparse
+import copy
+import shutil
+
+import numpy as np
+import pandas as pd
 import yaml
-from datetime import datetime
-from zoneinfo import ZoneInfo
-
-def convert_datetime_to_unix(date_str):
-    """Convert various date formats to a Unix timestamp."""
-    # Ensure date_str is a string
-    date_str = str(date_str).strip()
-    
-    formats_to_try = [
-        '%Y-%m-%d %H:%M:%S',        # Format in put_out.csv
-        '%d/%m/%Y %I:%M:%S %p'     # Possible format in trades csv
-    ]
-    
-    dt_naive = None
-    for fmt in formats_to_try:
-        try:
-            dt_naive = datetime.strptime(date_str, fmt)
-            break  # If parsing is successful, exit the loop
-        except ValueError:
-            continue # If parsing fails, try the next format
-
-    if dt_naive is None:
-        print(f"Error: Could not parse date '{{date_str}}' with any known format.")
-        return None
 
+TRADEVIEW_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSETS_DIR = os.path.join(TRADEVIEW_DIR, 'assets')
+IST = 'Asia/Kolkata'
+IST_OFFSET_S = 5 * 3600 + 30 * 60
+
+# Chart series -> column in the processed files
+SERIES_COLUMNS = {
+    'open': 'open', 'high': 'high', 'low': 'low', 'close': 'close',
+    'stoch_k': 'K', 'stoch_d': 'D', 'williams_r9': '%R', 'williams_r28': '%R.1',
+}
+
+# Processed price file and trade file of each instrument, relative to data/DDMM
+INSTRUMENT_FILES = {
+    'index': 'tradeview_utc.csv',
+    'call': os.path.join('call', 'call_out.csv'),
+    'put': os.path.join('put', 'put_out.csv'),
+}
+TRADE_FILES = {
+    'index': os.path.join('trades', '{strategy}_trades.csv'),
+    'call': os.path.join('call', 'trades', 'call_{strategy}_trades.csv'),
+    'put': os.path.join('put', 'trades', 'put_{strategy}_trades.csv'),
+}
+
+# Timestamp layouts found in processed files and trade files
+DATETIME_FORMATS = ['%Y-%m-%d %H:%M:%S', '%d/%m/%Y %I:%M:%S %p']
+
+DEFAULT_SETTINGS = {
+    'MAX_POINTS': 3000,
+    'LOD_MINUTES': [1, 2, 3, 5, 10, 15, 30, 60],
+    'OUTPUT_DIR': 'tradeview',
+    'BATCH_OUTPUT_DIR': os.path.join('tradeview', 'charts'),
+    'BATCH_INSTRUMENTS': ['call', 'put'],
+    'BATCH_STRATEGIES': ['cont', 'rev_v1', 'rev_v2'],
+}
+
+def load_tradeview_config(path=None):
+    """Load chart settings and indicator bands from tradeview/tradeview.yaml"""
+    path = path or os.path.join(TRADEVIEW_DIR, 'tradeview.yaml')
     try:
-        # Make the datetime aware of the IST timezone
-        ist = ZoneInfo("Asia/Kolkata")
-        dt_aware = dt_naive.replace(tzinfo=ist)
-        # Convert to Unix timestamp (which is in UTC)
-        return int(dt_aware.timestamp())
+        with open(path, 'r') as file:
+            settings = yaml.safe_load(file) or {}
     except Exception as e:
-        print(f"Error setting timezone or converting to timestamp for '{{date_str}}': {{e}}")
-        return None
-
-def process_csv_data():
-    """Process the CSV files and prepare data for JavaScript"""
-    
-    # Read the OHLC data
-    ohlc_df = pd.read_csv('tradeview/put_out.csv', header=0)
-    ohlc_df['time'] = ohlc_df['datetime'].apply(convert_datetime_to_unix)
-    
-    # Read the trades data
-    trades_df = pd.read_csv('tradeview/put_rev_v1_trades.csv')
-    
-    # Process OHLC data
-    ohlc_data = []
-    stoch_k_data = []
-    stoch_d_data = []
-    williams_r9_data = []
-    williams_r28_data = []
-    
-    for _, row in ohlc_df.iterrows():
-        time_val = int(row['time'])
-        
-        # OHLC data
-        ohlc_data.append({
-            'time': time_val,
-            'open': float(row['open']),
-            'high': float(row['high']),
-            'low': float(row['low']),
-            'close': float(row['close'])
-        })
-        
-        # Technical indicators
-        stoch_k_data.append({
-            'time': time_val,
-            'value': float(row['K'])
-        })
-        
-        stoch_d_data.append({
-            'time': time_val,
-            'value': float(row['D'])
-        })
-        
-        # Williams %R data
-        williams_r9_data.append({
-            'time': time_val,
-            'value': float(row['%R'])
-        })
-        
-        williams_r28_data.append({
-            'time': time_val,
-            'value': float(row['%R.1'])
-        })
-        
-    # Process trades data
-    processed_trades = []
-    for index, row in trades_df.iterrows():
-        # Entry trade
-        processed_trades.append({
-            'Trade #': index + 1,
-            'Type': 'Entry long',
-            'Signal': row['Trade Type'],
-            'Date/Time': convert_datetime_to_unix(row['Entry Time']),
-            'Price INR': row['Entry Price'],
-            'Quantity': 37,  # Assuming a fixed quantity
-            'P&L INR': row['P/L'],
-            'P&L %': row['P/L %'].replace('%', ''),
-            'Run-up INR': 0,
-            'Run-up %': 0,
-            'Drawdown INR': 0,
-            'Drawdown %': 0,
-            'Cumulative P&L INR': 0,
-            'Cumulative P&L %': 0
-        })
-        # Exit trade
-        processed_trades.append({
-            'Trade #': index + 1,
-            'Type': 'Exit long',
-            'Signal': row['Exit Reason'],
-            'Date/Time': convert_datetime_to_unix(row['Exit Time']),
-            'Price INR': row['Exit Price'],
-            'Quantity': 37, # Assuming a fixed quantity
-            'P&L INR': row['P/L'],
-            'P&L %': row['P/L %'].replace('%', ''),
-            'Run-up INR': 0,
-            'Run-up %': 0,
-            'Drawdown INR': 0,
-            'Drawdown %': 0,
-            'Cumulative P&L INR': 0,
-            'Cumulative P&L %': 0
-        })
-
-    # Convert processed trades to CSV format
-    trades_csv_df = pd.DataFrame(processed_trades)
-    trades_csv_content = trades_csv_df.to_csv(index=False)
-    
+        print(f"Warning: Could not load {path}: {e}")
+        settings = {}
+    merged = copy.deepcopy(DEFAULT_SETTINGS)
+    merged.update(settings)
+    return merged
+
+def to_unix_seconds(values):
+    """IST wall-clock timestamps (any DATETIME_FORMATS layout) as Unix seconds; -1 where unparseable"""
+    text = pd.Series(values).astype(str).str.strip()
+    parsed = pd.to_datetime(text, format=DATETIME_FORMATS[0], errors='coerce')
+    for fmt in DATETIME_FORMATS[1:]:
+        missing = parsed.isna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(text[missing], format=fmt, errors='coerce')
+    unparsed = parsed.isna()
+    if unparsed.any():
+        print(f"⚠️ Could not parse {int(unparsed.sum())} timestamps (e.g. '{text[unparsed].iloc[0]}')")
+    seconds = pd.DatetimeIndex(parsed.dt.tz_localize(IST)).as_unit('ns').asi8 // 10**9
+    return np.where(unparsed, -1, seconds)
+
+def load_bars(paths):
+    """Processed price files as one frame sorted by time, with a Unix 'time' column"""
+    frames = [pd.read_csv(path) for path in paths]
+    bars = pd.concat(frames, ignore_index=True)
+    bars['time'] = to_unix_seconds(bars['datetime'])
+    bars = bars[bars['time'] >= 0].sort_values('time', kind='mergesort').drop_duplicates('time', keep='last')
+    missing = [column for column in SERIES_COLUMNS.values() if column not in bars.columns]
+    if missing:
+        raise ValueError(f"Price file is missing columns {missing}: {paths}")
+    return bars.reset_index(drop=True)
+
+def bar_buckets(times, minutes):
+    """IST wall-clock bucket of each Unix time for `minutes` bars (aligned like 09:15, 09:30, 10:00 ...)"""
+    return (np.asarray(times, dtype=np.int64) + IST_OFFSET_S) // (minutes * 60)
+
+def choose_bar_minutes(times, max_points, levels):
+    """Smallest level (minutes per bar) that keeps `times` (Unix seconds) under max_points bars"""
+    for minutes in sorted(levels):
+        if len(np.unique(bar_buckets(times, minutes))) <= max_points:
+            return minutes
+    return max(levels)
+
+def downsample_bars(bars, minutes):
+    """
+    Aggregates 1-minute bars into `minutes` bars (OHLC first/max/min/last, indicators last).
+
+    Buckets follow the clock and never span two sessions; each bucket is
+    stamped with the time of its first bar.
+    """
+    if minutes <= 1:
+        return bars
+    bucket = bar_buckets(bars['time'], minutes)
+    aggregations = {'time': 'first', 'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last'}
+    aggregations.update({column: 'last' for column in ('K', 'D', '%R', '%R.1')})
+    return bars.groupby(bucket, sort=True).agg(aggregations).reset_index(drop=True)
+
+def encode_array(values, dtype):
+    """Base64 of a little-endian typed array (decoded in the page with Float32Array/Uint32Array)"""
+    return base64.b64encode(np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder('<')).tobytes()).decode('ascii')
+
+def load_trades(paths):
+    """Trade files (Entry Time, Entry Price, Exit Time, Exit Price, P/L, P/L %, Exit Reason, Trade Type)"""
+    frames = [pd.read_csv(path, dtype=str, keep_default_na=False) for path in paths if os.path.exists(path)]
+    if not frames:
+        return pd.DataFrame(columns=['Entry Time', 'Entry Price', 'Exit Time', 'Exit Price', 'P/L', 'P/L %', 'Exit Reason', 'Trade Type'])
+    return pd.concat(frames, ignore_index=True)
+
+def build_trade_events(trades_df, bar_times):
+    """
+    Entry and exit events for the trades panel and chart markers, sorted by time.
+
+    Marker times are snapped to the (possibly downsampled) bar the event falls in,
+    since the chart can only place markers on existing bars.
+    """
+    if trades_df.empty:
+        return []
+    trades_df = trades_df.sort_values('Entry Time', kind='mergesort').reset_index(drop=True)
+    pnl_pct = pd.to_numeric(trades_df['P/L %'].str.replace('%', '', regex=False), errors='coerce').round(2)
+    common = {'trade': np.arange(1, len(trades_df) + 1), 'pnl': trades_df['P/L'], 'pnl_pct': pnl_pct}
+    entries = pd.DataFrame({**common, 'type': 'Entry long', 'signal': trades_df['Trade Type'],
+                            'timestamp': to_unix_seconds(trades_df['Entry Time']), 'price': trades_df['Entry Price']})
+    exits = pd.DataFrame({**common, 'type': 'Exit long', 'signal': trades_df['Exit Reason'],
+                          'timestamp': to_unix_seconds(trades_df['Exit Time']), 'price': trades_df['Exit Price']})
+    events = pd.concat([entries, exits], ignore_index=True)
+    events = events[events['timestamp'] >= 0].sort_values(['timestamp', 'trade'], kind='mergesort')
+
+    positions = np.searchsorted(bar_times, events['timestamp'].to_numpy(), side='right') - 1
+    events['time'] = np.asarray(bar_times)[np.clip(positions, 0, len(bar_times) - 1)]
+    events = events[positions >= 0]
+    events['pnl_pct'] = events['pnl_pct'].fillna(0.0)
+    return json.loads(events.to_json(orient='records'))
+
+def build_payload(bars, trades_df, bar_minutes, bands=None, title=''):
+    """Page data: base64 series, trade events, indicator bands and the bar size"""
+    bars = downsample_bars(bars, bar_minutes)
+    bar_times = bars['time'].to_numpy(dtype=np.int64)
+    series = {'time': encode_array(bar_times, 'u4')}
+    series.update({name: encode_array(bars[column].to_numpy(dtype=float), 'f4') for name, column in SERIES_COLUMNS.items()})
     return {
-        'ohlc': ohlc_data,
-        'stochRSI_K': stoch_k_data,
-        'stochRSI': stoch_d_data,
-        'williamsR9': williams_r9_data,
-        'williamsR28': williams_r28_data,
-        'trades_csv': trades_csv_content
+        'title': title,
+        'bar_minutes': bar_minutes,
+        'bars': int(len(bars)),
+        'series': series,
+        'trades': build_trade_events(trades_df, bar_times),
+        'bands': bands or {},
+    }
+
+def read_asset(name):
+    with open(os.path.join(ASSETS_DIR, name), 'r', encoding='utf-8') as file:
+        return file.read()
+
+def render_html(payload, title, asset_prefix=None):
+    """
+    Page HTML with the payload embedded.
+
+    Without asset_prefix the CSS/JS assets are inlined (self-contained page);
+    with it the page links `{asset_prefix}tradeview.css` and `tradeview.js`
+    so a batch of pages shares one copy (see write_assets).
+    """
+    html = read_asset('tradeview.html')
+    if asset_prefix is None:
+        style = f"<style>\n{read_asset('tradeview.css')}</style>"
+        script = f"<script>\n{read_asset('tradeview.js')}</script>"
+    else:
+        style = f'<link rel="stylesheet" href="{asset_prefix}tradeview.css">'
+        script = f'<script src="{asset_prefix}tradeview.js"></script>'
+    replacements = {
+        '__TITLE__': title,
+        '__STYLE__': style,
+        '__SCRIPT__': script,
+        # '</' would end the inline <script> early if a trade label contained it
+        '__PAYLOAD__': json.dumps(payload, separators=(',', ':')).replace('</', '<\\/'),
     }
+    for placeholder, value in replacements.items():
+        html = html.replace(placeholder, value)
+    return html
+
+def write_assets(output_dir):
+    """Copies the shared CSS/JS into output_dir (for pages rendered with an asset_prefix)"""
+    os.makedirs(output_dir, exist_ok=True)
+    for name in ('tradeview.css', 'tradeview.js'):
+        shutil.copyfile(os.path.join(ASSETS_DIR, name), os.path.join(output_dir, name))
+    return output_dir
+
+def generate_chart(ohlc_paths, trade_paths, output_path, lod='auto', settings=None, title=None, asset_prefix=None, verbose=True):
+    """
+    Writes one chart page.
+
+    Args:
+        ohlc_paths (list): Processed price files (one per session; concatenated in time order)
+        trade_paths (list): Trade files whose entries/exits are marked on the chart
+        lod: 'auto' (coarsest bars needed to stay under MAX_POINTS) or minutes per bar
+        asset_prefix (str): Link shared CSS/JS at this relative path instead of inlining them
+
+    Returns:
+        str: output_path
+    """
+    settings = settings or load_tradeview_config()
+    bars = load_bars(ohlc_paths)
+    bar_minutes = choose_bar_minutes(bars['time'], settings['MAX_POINTS'], settings['LOD_MINUTES']) if lod == 'auto' else int(lod)
+    title = title or os.path.splitext(os.path.basename(output_path))[0]
+    bands = {pane: settings[pane] for pane in ('stoch_rsi', 'williams_r9', 'williams_r28') if pane in settings}
+    payload = build_payload(bars, load_trades(trade_paths), bar_minutes, bands, title)
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as file:
+        file.write(render_html(payload, title, asset_prefix))
+    if verbose:
+        print(f"✓ Chart saved to {output_path} ({payload['bars']} bars of {bar_minutes}m, {len(payload['trades'])} trade events)")
+    return output_path
+
+def resolve_inputs(data_root, dates, instrument, strategy):
+    """Price and trade files of an instrument/strategy for the selected DDMM folders"""
+    from app import select_dates
+
+    all_dates = sorted(d for d in os.listdir(data_root) if os.path.isdir(os.path.join(data_root, d)))
+    selected = select_dates(all_dates, dates)
+    ohlc_paths = [os.path.join(data_root, d, INSTRUMENT_FILES[instrument]) for d in selected]
+    ohlc_paths = [path for path in ohlc_paths if os.path.exists(path)]
+    trade_paths = [os.path.join(data_root, d, TRADE_FILES[instrument].format(strategy=strategy)) for d in selected] if strategy else []
+    return selected, ohlc_paths, trade_paths
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a tradeview chart page for a price file and its trades")
+    parser.add_argument('--ohlc', nargs='+', help="Processed price file(s) (default: tradeview/put_out.csv)")
+    parser.add_argument('--trades', nargs='*', help="Trade file(s) to mark on the chart")
+    parser.add_argument('--data-root', default='data')
+    parser.add_argument('--dates', help="DDMM folders instead of --ohlc: 1107 | 0107-1807 | 0107,1407 | *07 (all of July)")
+    parser.add_argument('--instrument', choices=sorted(INSTRUMENT_FILES), default='put')
+    parser.add_argument('--strategy', help="Trade file of this strategy (cont, rev_v1, rev_v2) with --dates")
+    parser.add_argument('--output', help="Output HTML path")
+    parser.add_argument('--lod', default='auto', help="Minutes per bar, or 'auto' to downsample long ranges to MAX_POINTS bars")
+    parser.add_argument('--max-points', type=int, help="Bar budget for --lod auto")
+    args = parser.parse_args(argv)
+
+    settings = load_tradeview_config()
+    if args.max_points:
+        settings['MAX_POINTS'] = args.max_points
+
+    if args.dates:
+        selected, ohlc_paths, trade_paths = resolve_inputs(args.data_root, args.dates, args.instrument, args.strategy)
+        if not ohlc_paths:
+            print(f"❌ No {args.instrument} price files for dates '{args.dates}' under {args.data_root}")
+            return 1
+        span = selected[0] if len(selected) == 1 else f"{selected[0]}-{selected[-1]}"
+        name = f"{args.instrument}_{args.strategy or 'bars'}_{span}.html"
+        output = args.output or os.path.join(settings['OUTPUT_DIR'], name)
+        trade_paths += args.trades or []
+    else:
+        ohlc_paths = args.ohlc or [os.path.join('tradeview', 'put_out.csv')]
+        trade_paths = args.trades if args.trades is not None else (
+            [] if args.ohlc else [os.path.join('tradeview', 'put_rev_v1_trades.csv')])
+        output = args.output or (os.path.join('tradeview', 'NSE_NIFTY250717P25200.html') if not args.ohlc else
+                                 os.path.splitext(ohlc_paths[0])[0] + '.html')
 
-def generate_html():
-    """Generate the complete HTML file"""
-    
-    # Process the data
-    data = process_csv_data()
-    
-    html_content = f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>TradingView Chart - Enhanced with Trades</title>
-    <script src="https://unpkg.com/lightweight-charts@4.0.1/dist/lightweight-charts.standalone.production.js"></script>
-    <style>
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, Cantarell, 'Open Sans', 'Helvetica Neue', sans-serif;
-            background-color: #131722;
-            color: #D9D9D9;
-            margin: 0;
-            padding: 0;
-            display: flex;
-            height: 100vh;
-        }}
-        
-        #main-container {{
-            display: flex;
-            width: 100%;
-            height: 100%;
-        }}
-        
-        #chart-section {{
-            flex: 1;
-            display: flex;
-            flex-direction: column;
-            min-width: 0;
-        }}
-        
-        #chart-container {{
-            flex-grow: 1;
-            display: flex;
-            flex-direction: column;
-        }}
-        
-        .chart-pane {{
-            position: relative;
-        }}
-        
-        #trades-panel {{
-            width: 350px;
-            background-color: #1E222D;
-            border-left: 1px solid #2A2E39;
-            display: flex;
-            flex-direction: column;
-            overflow: hidden;
-        }}
-        
-        #trades-header {{
-            padding: 12px 16px;
-            background-color: #2A2E39;
-            border-bottom: 1px solid #363A45;
-            font-weight: 600;
-            font-size: 14px;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-        }}
-        
-        #toggle-trades {{
-            background: none;
-            border: none;
-            color: #D9D9D9;
-            cursor: pointer;
-            font-size: 16px;
-            padding: 4px;
-            border-radius: 4px;
-        }}
-        
-        #toggle-trades:hover {{
-            background-color: #363A45;
-        }}
-        
-        #trades-content {{
-            flex: 1;
-            overflow-y: auto;
-            padding: 8px;
-        }}
-        
-        .trade-item {{
-            background-color: #2A2E39;
-            border-radius: 6px;
-            padding: 12px;
-            margin-bottom: 8px;
-            border-left: 4px solid;
-        }}
-        
-        .trade-entry {{
-            border-left-color: #26A69A;
-        }}
-        
-        .trade-exit {{
-            border-left-color: #EF5350;
-        }}
-        
-        .trade-header {{
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 8px;
-        }}
-        
-        .trade-type {{
-            font-weight: 600;
-            font-size: 12px;
-            text-transform: uppercase;
-        }}
-        
-        .trade-entry .trade-type {{
-            color: #26A69A;
-        }}
-        
-        .trade-exit .trade-type {{
-            color: #EF5350;
-        }}
-        
-        .trade-signal {{
-            font-size: 11px;
-            color: #B2B5BE;
-            background-color: #363A45;
-            padding: 2px 6px;
-            border-radius: 3px;
-        }}
-        
-        .trade-details {{
-            font-size: 11px;
-            color: #B2B5BE;
-            line-height: 1.4;
-        }}
-        
-        .trade-price {{
-            color: #D9D9D9;
-            font-weight: 600;
-        }}
-        
-        .trade-pnl {{
-            font-weight: 600;
-        }}
-        
-        .trade-pnl.positive {{
-            color: #26A69A;
-        }}
-        
-        .trade-pnl.negative {{
-            color: #EF5350;
-        }}
-        
-        #legend {{
-            position: absolute;
-            top: 12px;
-            left: 12px;
-            z-index: 1000;
-            background-color: rgba(255, 255, 255, 0.2);
-            padding: 8px;
-            border-radius: 4px;
-            font-size: 14px;
-            pointer-events: none;
-            display: none;
-        }}
-        
-        #error-container {{
-            color: orange;
-            font-size: 16px;
-            margin: 12px;
-            min-height: 120px;
-            overflow-y: auto;
-            border: 1px solid orange;
-            padding: 10px;
-            border-radius: 8px;
-            background-color: #ff96000d;
-            display: none;
-        }}
-        
-        .marker-tooltip {{
-            position: absolute;
-            background-color: #2A2E39;
-            border: 1px solid #363A45;
-            border-radius: 6px;
-            padding: 10px;
-            font-size: 11px;
-            z-index: 1001;
-            pointer-events: none;
-            display: none;
-            max-width: 250px;
-            box-shadow: 0 4px 12px rgba(0, 0, 0, 0.3);
-            line-height: 1.4;
-        }}
-        
-        .marker-tooltip div {{
-            margin-bottom: 2px;
-        }}
-        
-        .marker-tooltip div:last-child {{
-            margin-bottom: 0;
-        }}
-        
-        @media (max-width: 768px) {{
-            #main-container {{
-                flex-direction: column;
-            }}
-            
-            #trades-panel {{
-                width: 100%;
-                height: 200px;
-                border-left: none;
-                border-top: 1px solid #2A2E39;
-            }}
-        }}
-    </style>
-</head>
-<body>
-    <div id="main-container">
-        <div id="chart-section">
-            <div id="chart-container">
-                <div id="main-chart-container" class="chart-pane"></div>
-                <div id="stoch-chart-container" class="chart-pane"></div>
-                <div id="williams9-chart-container" class="chart-pane"></div>
-                <div id="williams28-chart-container" class="chart-pane"></div>
-            </div>
-            <div id="legend"></div>
-            <div id="error-container"></div>
-        </div>
-        
-        <div id="trades-panel">
-            <div id="trades-header">
-                <span>List of Trades</span>
-                <button id="toggle-trades" title="Toggle trades panel">−</button>
-            </div>
-            <div id="trades-content">
-                <!-- Trades will be populated here -->
-            </div>
-        </div>
-    </div>
-    
-    <div class="marker-tooltip" id="marker-tooltip"></div>
-
-    <script>
-    document.addEventListener('DOMContentLoaded', function() {{
-        const data = {json.dumps(data, indent=8).replace('    ', '        ')};
-
-        // Raw CSV data for trades
-        const tradesCsvData = `{data['trades_csv']}`;
-
-
-        const chartOptions = {{
-            layout: {{
-                background: {{ type: 'solid', color: '#131722' }},
-                textColor: '#D9D9D9',
-            }},
-            grid: {{
-                vertLines: {{ color: '#2A2E39' }},
-                horzLines: {{ color: '#2A2E39' }},
-            }},
-            crosshair: {{
-                mode: LightweightCharts.CrosshairMode.Normal,
-            }},
-            rightPriceScale: {{
-                borderColor: '#485158',
-            }},
-            timeScale: {{
-                borderColor: '#485158',
-                timeVisible: true,
-                secondsVisible: false,
-                tickMarkFormatter: (time, tickMarkType, locale) => {{
-                    const date = new Date(time * 1000);
-                    return date.toLocaleTimeString('en-IN', {{ hour: '2-digit', minute: '2-digit', timeZone: 'Asia/Kolkata' }});
-                }},
-            }},
-        }};
-
-        const mainChartContainer = document.getElementById('main-chart-container');
-        const stochChartContainer = document.getElementById('stoch-chart-container');
-        const williams9ChartContainer = document.getElementById('williams9-chart-container');
-        const williams28ChartContainer = document.getElementById('williams28-chart-container');
-        const legend = document.getElementById('legend');
-        const errorContainer = document.getElementById('error-container');
-        const tradesContent = document.getElementById('trades-content');
-        const toggleTradesButton = document.getElementById('toggle-trades');
-        const tradesPanel = document.getElementById('trades-panel');
-        const markerTooltip = document.getElementById('marker-tooltip');
-
-        function displayError(message) {{
-            errorContainer.textContent = `Error: ${{message}}`;
-            errorContainer.style.display = 'block';
-        }}
-
-        // Function to parse CSV data
-        function parseCsv(csv) {{
-            const lines = csv.trim().split('\\n');
-            const headers = lines[0].split(',').map(header => header.trim());
-            const result = [];
-
-            for (let i = 1; i < lines.length; i++) {{
-                const values = lines[i].split(',').map(value => value.trim());
-                if (values.length === headers.length) {{
-                    const obj = {{}};
-                    headers.forEach((header, index) => {{
-                        obj[header] = values[index];
-                    }});
-                    result.push(obj);
-                }}
-            }}
-            return result;
-        }}
-
-        // Function to convert timestamp to Unix timestamp
-        function convertDateTimeToUnix(dateTimeStr) {{
-            // If it's already a number (synthetic timestamp), return as is
-            if (typeof dateTimeStr === 'number') {{
-                return dateTimeStr;
-            }}
-            // If it's a string, try to parse it
-            if (typeof dateTimeStr === 'string') {{
-                // Check if it's a pure number string
-                const numValue = parseFloat(dateTimeStr);
-                if (!isNaN(numValue)) {{
-                    return numValue;
-                }}
-                // Otherwise try to parse as date
-                const date = new Date(dateTimeStr);
-                return date.getTime() / 1000;
-            }}
-            return dateTimeStr;
-        }}
-
-        try {{
-            const totalHeight = document.getElementById('chart-container').clientHeight;
-            const mainChartHeight = Math.floor(totalHeight * 0.55);
-            const indicatorHeight = Math.floor(totalHeight * 0.15);
-
-            const mainChart = LightweightCharts.createChart(mainChartContainer, {{ ...chartOptions, height: mainChartHeight, width: mainChartContainer.clientWidth }});
-            const candleSeries = mainChart.addCandlestickSeries({{
-                upColor: '#26A69A', downColor: '#EF5350',
-                borderDownColor: '#EF5350', borderUpColor: '#26A69A',
-                wickDownColor: '#EF5350', wickUpColor: '#26A69A',
-            }});
-            candleSeries.setData(data.ohlc);
-
-            const stochChart = LightweightCharts.createChart(stochChartContainer, {{
-                ...chartOptions,
-                height: indicatorHeight,
-                width: stochChartContainer.clientWidth,
-                watermark: {{ color: 'rgba(255, 255, 255, 0.4)', visible: true, text: 'StochRSI (K,D)', fontSize: 16, horzAlign: 'left', vertAlign: 'top' }},
-                timeScale: {{
-                    ...chartOptions.timeScale,
-                    visible: false,
-                }},
-            }});
-            const stochSeriesD = stochChart.addLineSeries({{ color: '#26A69A', lineWidth: 2, title: 'D' }});
-            const stochSeriesK = stochChart.addLineSeries({{ color: '#EF5350', lineWidth: 2, title: 'K' }});
-            stochSeriesD.setData(data.stochRSI);
-            stochSeriesK.setData(data.stochRSI_K);
-
-            const williams9Chart = LightweightCharts.createChart(williams9ChartContainer, {{
-                ...chartOptions,
-                height: indicatorHeight,
-                width: williams9ChartContainer.clientWidth,
-                watermark: {{ color: 'rgba(255, 255, 255, 0.4)', visible: true, text: 'Williams %R (9)', fontSize: 16, horzAlign: 'left', vertAlign: 'top' }},
-                timeScale: {{
-                    ...chartOptions.timeScale,
-                    visible: false,
-                }},
-            }});
-            const williams9Series = williams9Chart.addLineSeries({{ color: '#2196F3', lineWidth: 2 }});
-            williams9Series.setData(data.williamsR9);
-
-            const williams28Chart = LightweightCharts.createChart(williams28ChartContainer, {{
-                ...chartOptions,
-                height: indicatorHeight,
-                width: williams28ChartContainer.clientWidth,
-                watermark: {{ color: 'rgba(255, 255, 255, 0.4)', visible: true, text: 'Williams %R (28)', fontSize: 16, horzAlign: 'left', vertAlign: 'top' }},
-                timeScale: {{
-                    ...chartOptions.timeScale,
-                    visible: false,
-                }},
-            }});
-            const williams28Series = williams28Chart.addLineSeries({{ color: '#FF9800', lineWidth: 2 }});
-            williams28Series.setData(data.williamsR28);
-
-            const ohlcMap = new Map(data.ohlc.map(d => [d.time, d]));
-            const stochMapD = new Map(data.stochRSI.map(d => [d.time, d.value]));
-            const stochMapK = new Map(data.stochRSI_K.map(d => [d.time, d.value]));
-            const williams9Map = new Map(data.williamsR9.map(d => [d.time, d.value]));
-            const williams28Map = new Map(data.williamsR28.map(d => [d.time, d.value]));
-
-            function updateLegend(param) {{
-                if (!param.time || !param.point) {{
-                    legend.style.display = 'none';
-                    return;
-                }}
-                const ohlcData = ohlcMap.get(param.time);
-                const stochD = stochMapD.get(param.time);
-                const stochK = stochMapK.get(param.time);
-                const will9 = williams9Map.get(param.time);
-                const will28 = williams28Map.get(param.time);
-                if (!ohlcData) {{
-                    legend.style.display = 'none';
-                    return;
-                }}
-                legend.style.display = 'block';
-                legend.innerHTML = `
-                    <div><strong>O:</strong> ${{ohlcData.open.toFixed(2)}} <strong>H:</strong> ${{ohlcData.high.toFixed(2)}} <strong>L:</strong> ${{ohlcData.low.toFixed(2)}} <strong>C:</strong> ${{ohlcData.close.toFixed(2)}}</div>
-                    <div style="color: #EF5350;"><strong>Stoch K:</strong> ${{stochK !== undefined ? stochK.toFixed(2) : 'N/A'}}</div>
-                    <div style="color: #26A69A;"><strong>Stoch D:</strong> ${{stochD !== undefined ? stochD.toFixed(2) : 'N/A'}}</div>
-                    <div style="color: #2196F3;"><strong>Will %R(9):</strong> ${{will9 !== undefined ? will9.toFixed(2) : 'N/A'}}</div>
-                    <div style="color: #FF9800;"><strong>Will %R(28):</strong> ${{will28 !== undefined ? will28.toFixed(2) : 'N/A'}}</div>
-                `;
-            }}
-
-            const charts = [mainChart, stochChart, williams9Chart, williams28Chart];
-            charts.forEach(chart => {{
-                chart.timeScale().subscribeVisibleLogicalRangeChange(range => {{
-                    charts.forEach(otherChart => {{
-                        if (chart !== otherChart) {{
-                            otherChart.timeScale().setVisibleLogicalRange(range);
-                        }}
-                    }});
-                }});
-                chart.subscribeCrosshairMove(updateLegend);
-            }});
-
-            new ResizeObserver(() => {{
-                const totalHeight = document.getElementById('chart-container').clientHeight;
-                const mainChartHeight = Math.floor(totalHeight * 0.55);
-                const indicatorHeight = Math.floor(totalHeight * 0.15);
-                const width = mainChartContainer.clientWidth;
-
-                mainChart.applyOptions({{ height: mainChartHeight, width }});
-                stochChart.applyOptions({{ height: indicatorHeight, width }});
-                williams9Chart.applyOptions({{ height: indicatorHeight, width }});
-                williams28Chart.applyOptions({{ height: indicatorHeight, width }});
-            }}).observe(document.getElementById('chart-container'));
-
-            // Populate trades panel and add markers
-            const trades = parseCsv(tradesCsvData);
-            const markers = [];
-
-            trades.forEach(trade => {{
-                const tradeItem = document.createElement('div');
-                tradeItem.classList.add('trade-item');
-                
-                const tradeTypeClass = trade.Type.toLowerCase().includes('entry') ? 'trade-entry' : 'trade-exit';
-                tradeItem.classList.add(tradeTypeClass);
-
-                const pnlValue = parseFloat(trade['P&L %']);
-                const pnlClass = pnlValue >= 0 ? 'positive' : 'negative';
-
-                const timestamp = parseFloat(trade['Date/Time']);
-                const tradeDateTime = !isNaN(timestamp) ?
-                                    new Date(timestamp * 1000).toLocaleString('en-IN', {{ timeZone: 'Asia/Kolkata' }}) :
-                                    'Synthetic Trade Time';
-                
-                tradeItem.innerHTML = `
-                    <div class="trade-header">
-                        <span class="trade-type">Trade #${{trade['Trade #']}} - ${{trade.Type}}</span>
-                        <span class="trade-signal">${{trade.Signal}}</span>
-                    </div>
-                    <div class="trade-details">
-                        <div><strong>Time:</strong> ${{tradeDateTime}}</div>
-                        <div><strong>Price:</strong> <span class="trade-price">₹${{trade['Price INR']}}</span></div>
-                        <div><strong>P&L:</strong> <span class="trade-pnl ${{pnlClass}}">₹${{trade['P&L INR']}} (${{trade['P&L %']}}%)</span></div>
-                    </div>
-                `;
-                tradesContent.appendChild(tradeItem);
-
-                // Add markers to the chart
-                const tradeTime = convertDateTimeToUnix(trade['Date/Time']);
-                const tradePrice = parseFloat(trade['Price INR']);
-
-                if (!isNaN(tradeTime) && !isNaN(tradePrice)) {{
-                    let markerShape;
-                    let markerColor;
-                    let markerPosition;
-                    let markerText;
-
-                    if (trade.Type.toLowerCase().includes('entry')) {{
-                        markerShape = 'arrowUp';
-                        markerColor = '#26A69A'; // Green for entry
-                        markerPosition = 'belowBar';
-                        markerText = 'Entry long';
-                    }} else if (trade.Type.toLowerCase().includes('exit')) {{
-                        markerShape = 'arrowDown';
-                        markerPosition = 'aboveBar';
-                        markerText = trade.Signal; // Use the exit reason as text
-                        
-                        // Different colors based on exit signal
-                        if (trade.Signal.toLowerCase().includes('profit')) {{
-                            markerColor = '#26A69A'; // Green for profit
-                        }} else if (trade.Signal.toLowerCase().includes('stop') || trade.Signal.toLowerCase().includes('loss')) {{
-                            markerColor = '#EF5350'; // Red for stop loss
-                        }} else {{
-                            markerColor = '#FF9800'; // Orange for other exits
-                        }}
-                    }}
-
-                    if (markerShape) {{
-                        markers.push({{
-                            time: tradeTime,
-                            position: markerPosition,
-                            color: markerColor,
-                            shape: markerShape,
-                            text: markerText,
-                            size: 1, // Use size 1 for line-style arrows
-                            tradeInfo: trade // Store full trade info for tooltip
-                        }});
-                    }}
-                }}
-            }});
-
-            candleSeries.setMarkers(markers);
-
-            // Marker tooltip functionality
-            function updateMarkerTooltip(param) {{
-                if (param.point) {{
-                    // Find the corresponding time for the crosshair position
-                    const time = param.time;
-                    if (!time) {{
-                        markerTooltip.style.display = 'none';
-                        return;
-                    }}
-
-                    const marker = markers.find(m => m.time === time);
-                    if (marker && marker.tradeInfo) {{
-                        const trade = marker.tradeInfo;
-                        const pnlValue = parseFloat(trade['P&L %']);
-                        const pnlClass = pnlValue >= 0 ? 'positive' : 'negative';
-                        const tradeTypeColor = trade.Type.toLowerCase().includes('entry') ? '#26A69A' :
-                                             (trade.Signal.toLowerCase().includes('profit') ? '#26A69A' : '#EF5350');
-                        
-                        const timestamp = parseFloat(trade['Date/Time']);
-                        const tradeDateTime = !isNaN(timestamp) ?
-                                            new Date(timestamp * 1000).toLocaleString('en-IN', {{ timeZone: 'Asia/Kolkata' }}) :
-                                            'Synthetic Trade Time';
-
-                        markerTooltip.innerHTML = `
-                            <div style="color: ${{tradeTypeColor}}; font-weight: bold; margin-bottom: 4px;">
-                                ${{trade.Type.toUpperCase()}} - ${{trade.Signal}}
-                            </div>
-                            <div><strong>Trade #:</strong> ${{trade['Trade #']}}</div>
-                            <div><strong>Time:</strong> ${{tradeDateTime}}</div>
-                            <div><strong>Price:</strong> ₹${{trade['Price INR']}}</div>
-                            <div><strong>P&L:</strong> <span class="${{pnlClass}}">₹${{trade['P&L INR']}} (${{trade['P&L %']}}%)</span></div>
-                        `;
-                        markerTooltip.style.display = 'block';
-                        markerTooltip.style.left = `${{param.point.x + 15}}px`;
-                        markerTooltip.style.top = `${{param.point.y + 15}}px`;
-                    }} else {{
-                        markerTooltip.style.display = 'none';
-                    }}
-                }} else {{
-                    markerTooltip.style.display = 'none';
-                }}
-            }}
-
-            // Subscribe the tooltip function to all charts
-            charts.forEach(chart => {{
-                chart.subscribeCrosshairMove(updateMarkerTooltip);
-            }});
-
-            // Toggle trades panel
-            let tradesPanelVisible = true;
-            toggleTradesButton.addEventListener('click', () => {{
-                if (tradesPanelVisible) {{
-                    tradesPanel.style.width = '0';
-                    tradesPanel.style.borderLeft = 'none';
-                    toggleTradesButton.textContent = '+';
-                    toggleTradesButton.title = 'Show trades panel';
-                }} else {{
-                    tradesPanel.style.width = '350px';
-                    tradesPanel.style.borderLeft = '1px solid #2A2E39';
-                    toggleTradesButton.textContent = '−';
-                    toggleTradesButton.title = 'Hide trades panel';
-                }}
-                tradesPanelVisible = !tradesPanelVisible;
-                // Trigger chart resize after panel toggle
-                window.dispatchEvent(new Event('resize'));
-            }});
-
-
-        }} catch (e) {{
-            displayError(e.message);
-            console.error(e);
-        }}
-    }});
-    </script>
-</body>
-</html>'''
-    
-    return html_content
-
-def main():
-    """Main function to generate the HTML file"""
     try:
-        print("Processing CSV files...")
-        html_content = generate_html()
-        
-        print("Writing HTML file...")
-        with open('tradeview/NSE_NIFTY250717P25200.html', 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        
-        print("HTML file 'tradeview/NSE_NIFTY250717P25200.html' has been created successfully!")
-        
+        generate_chart(ohlc_paths, trade_paths, output, args.lod, settings)
     except Exception as e:
-        print(f"Error: {e}")
+        print(f"❌ Error: {e}")
+        return 1
+    return 0
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())